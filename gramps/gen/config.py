@@ -159,6 +159,7 @@ register("behavior.do-not-show-previously-seen-addon-updates", True)
 register("behavior.date-about-range", 50)
 register("behavior.date-after-range", 50)
 register("behavior.date-before-range", 50)
+register("behavior.generate-thumbnails", True)
 register("behavior.generation-depth", 15)
 register("behavior.max-age-prob-alive", 110)
 register("behavior.max-sib-age-diff", 20)
@@ -171,6 +172,7 @@ register("behavior.runcheck", False)
 register("behavior.spellcheck", False)
 register("behavior.startup", 0)
 register("behavior.surname-guessing", 0)
+register("behavior.thumbnail-workers", 0)
 register("behavior.translator-needed", True)
 register("behavior.use-tips", False)
 register("behavior.welcome", 100)
@@ -202,6 +204,12 @@ register("database.autobackup", 0)
 register("database.path", os.path.join(USER_DATA, "grampsdb"))
 register("database.host", "")
 register("database.port", "")
+register("database.cache-size", 10000)
+register("database.blob-codec", "pickle")
+register("database.sqlite-wal", False)
+register("database.workers", 0)
+register("database.undo-memory", 10000)
+register("database.undo-size", 1000000)
 
 register(
     "export.proxy-order",
@@ -48,6 +48,7 @@ from ..lib.childreftype import ChildRefType
 from ..lib.childref import ChildRef
 from .txn import DbTxn
 from .exceptions import DbTransactionCancel, DbException
+from .kinship import KinshipGraph
 
 _LOG = logging.getLogger(DBLOGNAME)
 
@@ -606,6 +607,343 @@ class DbReadBase:
         """
         raise NotImplementedError
 
+    def prefetch_handles(self, class_name, handles):
+        """
+        Hint that the objects with the passed handles will be requested soon.
+
+        Backends that support batched reads load the objects in a single pass
+        so that the following get_*_from_handle calls are served from memory.
+        The default implementation does nothing.
+
+        :param class_name: name of the object class, for example "Person".
+        :type class_name: str
+        :param handles: handles of the objects to load.
+        :type handles: list
+        """
+        pass
+
+    def imap_over_objects(self, class_name, func, chunk_size=1000):
+        """
+        Call func(db, handles) for each chunk of the handles of the objects
+        of the class, taken in ascending order, and return an iterator over
+        the results in chunk order.
+
+        Backends may call func in worker processes, a few chunks ahead of
+        the iteration, so func must only read the database and its results
+        must be picklable.  This implementation calls it in this process,
+        as the iteration goes.
+
+        :param class_name: name of the object class, for example "Person".
+        :type class_name: str
+        :param func: function called with the database and a list of
+            handles.
+        :type func: function
+        :param chunk_size: number of handles passed to each call.
+        :type chunk_size: int
+        """
+        for chunk in self._iter_sorted_handle_chunks(class_name, chunk_size):
+            yield func(self, chunk)
+
+    def _iter_sorted_handle_chunks(self, class_name, chunk_size):
+        """
+        Return an iterator over the handles of the objects of the class,
+        in ascending order, split in lists of at most chunk_size handles.
+        """
+        handles = sorted(self.method("get_%s_handles", class_name)())
+        for start in range(0, len(handles), chunk_size):
+            yield handles[start : start + chunk_size]
+
+    def get_kinship_graph(self):
+        """
+        Return a :class:`.KinshipGraph` of the people of the database.
+
+        The default implementation builds a new graph each time.  Backends
+        may keep the graph and update it when people and families are
+        committed, so callers must not modify it.
+        """
+        return KinshipGraph(self)
+
+    def get_ancestor_handles(self, handle, min_generations=1, max_generations=None):
+        """
+        Return the set of handles of the ancestors of a person, through all
+        their parent families, at least min_generations and at most
+        max_generations generations away.  The parents are one generation
+        away, and the person is included if min_generations is 0.
+
+        :param handle: handle of the person.
+        :type handle: str
+        :param min_generations: minimum number of generations.
+        :type min_generations: int
+        :param max_generations: maximum number of generations, or None for
+            all.
+        :type max_generations: int or None
+        """
+        return self.get_kinship_graph().get_generations(
+            handle, True, min_generations, max_generations
+        )
+
+    def get_descendant_handles(self, handle, min_generations=1, max_generations=None):
+        """
+        Return the set of handles of the descendants of a person, at least
+        min_generations and at most max_generations generations away.  The
+        children are one generation away, and the person is included if
+        min_generations is 0.
+
+        :param handle: handle of the person.
+        :type handle: str
+        :param min_generations: minimum number of generations.
+        :type min_generations: int
+        :param max_generations: maximum number of generations, or None for
+            all.
+        :type max_generations: int or None
+        """
+        return self.get_kinship_graph().get_generations(
+            handle, False, min_generations, max_generations
+        )
+
+    def get_lifespan(self, handle, settings):
+        """
+        Return the estimated lifespan data of a person stored by
+        :meth:`set_lifespans` with the same settings, or None if there is
+        none.
+
+        The default implementation stores nothing.
+        """
+        return None
+
+    def get_lifespan_count(self, settings):
+        """
+        Return the number of people with a lifespan stored with the given
+        settings, or None if the database does not store lifespans.
+        """
+        return None
+
+    def set_lifespans(self, settings, lifespans):
+        """
+        Store the estimated lifespans of people, as computed by
+        :mod:`gramps.gen.utils.alive`.
+
+        The lifespan of a person is dropped when one of the people, families
+        or events it depends on is committed or removed.  All lifespans are
+        dropped when the settings change.
+
+        :param settings: picklable value the lifespans were computed with.
+        :param lifespans: list of (handle, data, dependencies) tuples, where
+            data is a picklable value and dependencies a list of handles.
+        :type lifespans: list
+        """
+        pass
+
+    def get_raw_data_from_handles(self, class_name, handles):
+        """
+        Return a dictionary of the raw data of the objects with the passed
+        handles, keyed by handle.  Handles that are not found are omitted.
+
+        :param class_name: name of the object class, for example "Person".
+        :type class_name: str
+        :param handles: handles of the objects to return.
+        :type handles: list
+        """
+        get_raw_data = self.method("get_raw_%s_data", class_name)
+        result = {}
+        for handle in handles:
+            data = get_raw_data(handle)
+            if data:
+                result[handle] = data
+        return result
+
+    def select_handles(self, class_name, predicates):
+        """
+        Return the handles of the objects that satisfy all the predicates,
+        or None if the backend cannot evaluate them.
+
+        Each predicate is a boolean SQL expression over the columns of the
+        object's table, using "?" placeholders for its arguments.  The
+        default implementation returns None, so callers must then test
+        every object themselves.
+
+        :param class_name: name of the object class, for example "Person".
+        :type class_name: str
+        :param predicates: list of (sql, args) tuples.
+        :type predicates: list
+        :returns: list of handles, or None.
+        """
+        return None
+
+    def get_sort_keys(self, class_name, sort_name, sort_func):
+        """
+        Return a list of (sort_key, handle) tuples for all objects of the
+        class, sorted ascending.
+
+        The sort function must only depend on the raw data of the object.
+        Backends may store the keys under the given name and keep them up
+        to date when objects are committed, so that they do not have to be
+        computed again.  The default implementation computes them each
+        time.
+
+        :param class_name: name of the object class, for example "Person".
+        :type class_name: str
+        :param sort_name: name identifying the sort function.
+        :type sort_name: str
+        :param sort_func: function mapping the raw data to the sort key.
+        :type sort_func: function
+        :returns: list of (sort_key, handle) tuples.
+        """
+        with self.method("get_%s_cursor", class_name)() as cursor:
+            srt_keys = [(sort_func(data), handle) for handle, data in cursor]
+        srt_keys.sort()
+        return srt_keys
+
+    def get_people_from_handles(self, handles):
+        """
+        Return a list of Person objects in the database from the passed handles,
+        in the same order as the handles.
+
+        :param handles: handles of the objects to search for.
+        :type handles: list
+
+        Raises a HandleError if a handle does not exist, unless used through a
+        proxy, in which case None is returned for each filtered out Person.
+        """
+        handles = list(handles)
+        self.prefetch_handles("Person", handles)
+        return [self.get_person_from_handle(handle) for handle in handles]
+
+    def get_families_from_handles(self, handles):
+        """
+        Return a list of Family objects in the database from the passed handles,
+        in the same order as the handles.
+
+        :param handles: handles of the objects to search for.
+        :type handles: list
+
+        Raises a HandleError if a handle does not exist, unless used through a
+        proxy, in which case None is returned for each filtered out Family.
+        """
+        handles = list(handles)
+        self.prefetch_handles("Family", handles)
+        return [self.get_family_from_handle(handle) for handle in handles]
+
+    def get_events_from_handles(self, handles):
+        """
+        Return a list of Event objects in the database from the passed handles,
+        in the same order as the handles.
+
+        :param handles: handles of the objects to search for.
+        :type handles: list
+
+        Raises a HandleError if a handle does not exist, unless used through a
+        proxy, in which case None is returned for each filtered out Event.
+        """
+        handles = list(handles)
+        self.prefetch_handles("Event", handles)
+        return [self.get_event_from_handle(handle) for handle in handles]
+
+    def get_places_from_handles(self, handles):
+        """
+        Return a list of Place objects in the database from the passed handles,
+        in the same order as the handles.
+
+        :param handles: handles of the objects to search for.
+        :type handles: list
+
+        Raises a HandleError if a handle does not exist, unless used through a
+        proxy, in which case None is returned for each filtered out Place.
+        """
+        handles = list(handles)
+        self.prefetch_handles("Place", handles)
+        return [self.get_place_from_handle(handle) for handle in handles]
+
+    def get_sources_from_handles(self, handles):
+        """
+        Return a list of Source objects in the database from the passed handles,
+        in the same order as the handles.
+
+        :param handles: handles of the objects to search for.
+        :type handles: list
+
+        Raises a HandleError if a handle does not exist, unless used through a
+        proxy, in which case None is returned for each filtered out Source.
+        """
+        handles = list(handles)
+        self.prefetch_handles("Source", handles)
+        return [self.get_source_from_handle(handle) for handle in handles]
+
+    def get_citations_from_handles(self, handles):
+        """
+        Return a list of Citation objects in the database from the passed handles,
+        in the same order as the handles.
+
+        :param handles: handles of the objects to search for.
+        :type handles: list
+
+        Raises a HandleError if a handle does not exist, unless used through a
+        proxy, in which case None is returned for each filtered out Citation.
+        """
+        handles = list(handles)
+        self.prefetch_handles("Citation", handles)
+        return [self.get_citation_from_handle(handle) for handle in handles]
+
+    def get_media_from_handles(self, handles):
+        """
+        Return a list of Media objects in the database from the passed handles,
+        in the same order as the handles.
+
+        :param handles: handles of the objects to search for.
+        :type handles: list
+
+        Raises a HandleError if a handle does not exist, unless used through a
+        proxy, in which case None is returned for each filtered out Media.
+        """
+        handles = list(handles)
+        self.prefetch_handles("Media", handles)
+        return [self.get_media_from_handle(handle) for handle in handles]
+
+    def get_repositories_from_handles(self, handles):
+        """
+        Return a list of Repository objects in the database from the passed handles,
+        in the same order as the handles.
+
+        :param handles: handles of the objects to search for.
+        :type handles: list
+
+        Raises a HandleError if a handle does not exist, unless used through a
+        proxy, in which case None is returned for each filtered out Repository.
+        """
+        handles = list(handles)
+        self.prefetch_handles("Repository", handles)
+        return [self.get_repository_from_handle(handle) for handle in handles]
+
+    def get_notes_from_handles(self, handles):
+        """
+        Return a list of Note objects in the database from the passed handles,
+        in the same order as the handles.
+
+        :param handles: handles of the objects to search for.
+        :type handles: list
+
+        Raises a HandleError if a handle does not exist, unless used through a
+        proxy, in which case None is returned for each filtered out Note.
+        """
+        handles = list(handles)
+        self.prefetch_handles("Note", handles)
+        return [self.get_note_from_handle(handle) for handle in handles]
+
+    def get_tags_from_handles(self, handles):
+        """
+        Return a list of Tag objects in the database from the passed handles,
+        in the same order as the handles.
+
+        :param handles: handles of the objects to search for.
+        :type handles: list
+
+        Raises a HandleError if a handle does not exist, unless used through a
+        proxy, in which case None is returned for each filtered out Tag.
+        """
+        handles = list(handles)
+        self.prefetch_handles("Tag", handles)
+        return [self.get_tag_from_handle(handle) for handle in handles]
+
     def get_citation_handles(self, sort_handles=False, locale=glocale):
         """
         Return a list of database handles, one handle for each Citation in
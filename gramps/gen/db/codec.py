@@ -0,0 +1,131 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Codecs used to store serialized objects in the database.
+
+The name of the codec used by a database is stored in its metadata under
+the ``blob-codec`` key.  Databases without this key use pickle.
+"""
+
+# ------------------------------------------------------------------------
+#
+# Python modules
+#
+# ------------------------------------------------------------------------
+import pickle
+
+try:
+    import msgpack
+
+    _HAS_MSGPACK = True
+except ImportError:
+    _HAS_MSGPACK = False
+
+# ------------------------------------------------------------------------
+#
+# Gramps modules
+#
+# ------------------------------------------------------------------------
+from .exceptions import DbException
+from ..const import GRAMPS_LOCALE as glocale
+
+_ = glocale.translation.gettext
+
+DEFAULT_CODEC = "pickle"
+
+
+# ------------------------------------------------------------------------
+#
+# BlobCodec
+#
+# ------------------------------------------------------------------------
+class BlobCodec:
+    """
+    Convert the data returned by serialize() to bytes and back.
+    """
+
+    name = None
+
+    def encode(self, data):
+        """
+        Return the bytes representing the serialized object data.
+        """
+        raise NotImplementedError
+
+    def decode(self, blob):
+        """
+        Return the serialized object data stored in blob.
+        """
+        raise NotImplementedError
+
+
+class PickleCodec(BlobCodec):
+    """
+    Store the serialized data as a pickle.
+    """
+
+    name = "pickle"
+
+    def encode(self, data):
+        return pickle.dumps(data)
+
+    def decode(self, blob):
+        return pickle.loads(blob)
+
+
+class MsgpackCodec(BlobCodec):
+    """
+    Store the serialized data in the MessagePack format.
+
+    MessagePack does not distinguish lists from tuples, so all sequences
+    are decoded as tuples.
+    """
+
+    name = "msgpack"
+
+    def encode(self, data):
+        return msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, blob):
+        return msgpack.unpackb(blob, use_list=False, raw=False)
+
+
+_CODECS = {PickleCodec.name: PickleCodec}
+if _HAS_MSGPACK:
+    _CODECS[MsgpackCodec.name] = MsgpackCodec
+
+
+def get_available_codecs():
+    """
+    Return the names of the codecs that can be used.
+    """
+    return sorted(_CODECS)
+
+
+def get_codec(name):
+    """
+    Return the codec with the given name.
+
+    :param name: name of the codec, as stored in the database metadata.
+    :type name: str
+    :raises DbException: if the codec is unknown or its module is missing.
+    """
+    if name not in _CODECS:
+        raise DbException(_("The database blob codec '%s' is not available.") % name)
+    return _CODECS[name]()
@@ -35,6 +35,8 @@ import ast
 import sys
 import datetime
 import glob
+import sqlite3
+from itertools import chain
 from pathlib import Path
 
 # ------------------------------------------------------------------------
@@ -63,17 +65,21 @@ from . import (
     TXNUPD,
     TXNDEL,
     KEY_TO_NAME_MAP,
+    CLASS_TO_KEY_MAP,
     DBMODE_R,
     DBMODE_W,
 )
 from .utils import write_lock_file, clear_lock_file
-from .exceptions import DbVersionError, DbUpgradeRequiredError
+from .exceptions import DbException, DbVersionError, DbUpgradeRequiredError
+from .codec import DEFAULT_CODEC, get_codec, get_available_codecs
+from .kinship import KinshipGraph
 from ..errors import HandleError
 from ..utils.callback import Callback
 from ..updatecallback import UpdateCallback
 from .bookmarks import DbBookmarks
 
 from ..utils.id import create_id
+from ..utils.lru import LRU
 from ..lib.researcher import Researcher
 from ..lib import (
     Tag,
@@ -112,50 +118,154 @@ SIGBASE = (
 
 
 class DbGenericUndo(DbUndo):
+    """
+    Undo manager keeping the last records in memory and the older ones in
+    an append-only log, stored in an SQLite file at the path, or in a
+    temporary file if the path is None.
+
+    The "database.undo-memory" option sets the number of records kept in
+    memory.  The "database.undo-size" option sets the number of records
+    kept in all, with 0 meaning no limit; when it is reached, the oldest
+    transactions are dropped from the undo list, but the last one is
+    always kept.
+    """
+
     def __init__(self, grampsdb, path):
         super(DbGenericUndo, self).__init__(grampsdb)
-        self.undodb = []
+        self.path = path
+        self.undodb = {}
+        self.log = None
+        self.count = 0
+        self.first = 0
+        self.memory_size = max(config.get("database.undo-memory"), 1)
+        self.max_size = config.get("database.undo-size")
 
     def open(self, value=None):
         """
-        Open the backing storage.  Needs to be overridden in the derived
-        class.
+        Open the backing storage.  The log is only created when records
+        are first written to it.
         """
-        pass
+        self.undodb = {}
+        self.count = 0
+        self.first = 0
 
     def close(self):
         """
-        Close the backing storage.  Needs to be overridden in the derived
-        class.
+        Close and remove the backing storage.
         """
-        pass
+        self.undodb = {}
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+            if self.path and os.path.isfile(self.path):
+                os.remove(self.path)
+
+    def _get_log(self):
+        """
+        Return the connection to the log, creating the log if needed.
+        """
+        if self.log is None:
+            # an empty name gives a temporary file, removed when closed
+            self.log = sqlite3.connect(self.path or "")
+            self.log.execute("PRAGMA journal_mode = OFF")
+            self.log.execute("PRAGMA synchronous = OFF")
+            self.log.execute("DROP TABLE IF EXISTS undo")
+            self.log.execute("CREATE TABLE undo (recno INTEGER PRIMARY KEY, data BLOB)")
+        return self.log
+
+    def _spill(self):
+        """
+        Move the records kept in memory to the log.
+        """
+        log = self._get_log()
+        log.executemany("INSERT INTO undo VALUES (?, ?)", self.undodb.items())
+        log.commit()
+        self.undodb = {}
 
     def append(self, value):
         """
-        Add a new entry on the end.  Needs to be overridden in the derived
-        class.
+        Add a new entry on the end, and return its record number.
         """
-        self.undodb.append(value)
+        recno = self.count
+        self.count += 1
+        self.undodb[recno] = value
+        if len(self.undodb) > self.memory_size:
+            self._spill()
+        return recno
 
     def __getitem__(self, index):
         """
-        Returns an entry by index number.  Needs to be overridden in the
-        derived class.
+        Returns an entry by index number.
         """
-        return self.undodb[index]
+        if index in self.undodb:
+            return self.undodb[index]
+        row = None
+        if self.first <= index < self.count and self.log is not None:
+            row = self.log.execute(
+                "SELECT data FROM undo WHERE recno = ?", [index]
+            ).fetchone()
+        if row is None:
+            raise IndexError("undo record %d is not available" % index)
+        return row[0]
 
     def __setitem__(self, index, value):
         """
-        Set an entry to a value.  Needs to be overridden in the derived class.
+        Set an entry to a value.
         """
-        self.undodb[index] = value
+        if index in self.undodb:
+            self.undodb[index] = value
+        else:
+            self[index]
+            self.log.execute("UPDATE undo SET data = ? WHERE recno = ?", [value, index])
+            self.log.commit()
 
     def __len__(self):
         """
-        Returns the number of entries.  Needs to be overridden in the derived
-        class.
+        Returns the number of entries appended since the storage was opened,
+        including the dropped ones.
+        """
+        return self.count
+
+    def clear(self):
+        """
+        Clear the undo/redo list, and drop their records.
         """
-        return len(self.undodb)
+        super().clear()
+        transaction = self.db.transaction
+        if transaction is not None and transaction.first is not None:
+            self._drop_records(transaction.first)
+        else:
+            self._drop_records(self.count)
+
+    def _after_commit(self, transaction):
+        """
+        Drop the oldest transactions once the number of records is above
+        the limit.
+        """
+        if not self.max_size or self.count - self.first <= self.max_size:
+            return
+        while len(self.undoq) > 1 and self.count - self.first > self.max_size:
+            self.undoq.popleft()
+            self.first = min(
+                (
+                    txn.first
+                    for txn in chain(self.undoq, self.redoq)
+                    if txn.first is not None
+                ),
+                default=self.count,
+            )
+        self._drop_records(self.first)
+
+    def _drop_records(self, first):
+        """
+        Remove the records before the record number first.
+        """
+        self.first = first
+        for recno in [recno for recno in self.undodb if recno < first]:
+            del self.undodb[recno]
+        if self.log is not None:
+            self.log.execute("DELETE FROM undo WHERE recno < ?", [first])
+            self.log.commit()
 
     def _redo(self, update_history):
         """
@@ -175,7 +285,7 @@ class DbGenericUndo(DbUndo):
             self.db._txn_begin()
             for record_id in subitems:
                 (key, trans_type, handle, old_data, new_data) = pickle.loads(
-                    self.undodb[record_id]
+                    self[record_id]
                 )
 
                 if key == REFERENCE_KEY:
@@ -224,7 +334,7 @@ class DbGenericUndo(DbUndo):
             self.db._txn_begin()
             for record_id in subitems:
                 (key, trans_type, handle, old_data, new_data) = pickle.loads(
-                    self.undodb[record_id]
+                    self[record_id]
                 )
 
                 if key == REFERENCE_KEY:
@@ -589,6 +699,14 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         self.surname_list = []
         self.genderStats = GenderStats()  # can pass in loaded stats as dict
         self.owner = Researcher()
+        # Raw data read by the get_*_from_handle methods
+        self._cache = LRU(config.get("database.cache-size"))
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # Kinship graph, built when first requested
+        self._kinship_graph = None
+        # Codec used for the serialized data stored in the database
+        self.blob_codec = get_codec(DEFAULT_CODEC)
         if directory:
             self.load(directory)
 
@@ -645,10 +763,20 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
 
         # run backend-specific code:
         self._initialize(directory, username, password)
+        self.clear_cache()
 
         if not self._schema_exists():
             self._create_schema()
             self._set_metadata("version", str(self.VERSION[0]))
+            codec_name = config.get("database.blob-codec")
+            if codec_name not in get_available_codecs():
+                LOG.warning(
+                    "Blob codec '%s' is not available, using '%s'",
+                    codec_name,
+                    DEFAULT_CODEC,
+                )
+                codec_name = DEFAULT_CODEC
+            self._set_metadata("blob-codec", codec_name)
 
         # Load metadata
         self.name_formats = self._get_metadata("name_formats")
@@ -719,6 +847,12 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
             self.close()
             raise DbVersionError(dbversion, 18, self.VERSION[0])
 
+        try:
+            self.blob_codec = get_codec(self._get_metadata("blob-codec", DEFAULT_CODEC))
+        except DbException:
+            self.close()
+            raise
+
         if not self.readonly and dbversion < self.VERSION[0]:
             LOG.debug(
                 "Schema upgrade required from %s to %s", dbversion, self.VERSION[0]
@@ -809,6 +943,9 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
             except IOError:
                 pass
 
+        if self.undodb is not None:
+            self.undodb.close()
+        self.clear_cache()
         self.db_is_open = False
         self._directory = None
 
@@ -1334,12 +1471,30 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
             raise HandleError("Handle is None")
         if not handle:
             raise HandleError("Handle is empty")
-        data = self._get_raw_data(obj_key, handle)
+        data = self._get_cached_raw_data(obj_key, handle)
         if data:
             return obj_class.create(data)
         else:
             raise HandleError("Handle %s not found" % handle)
 
+    def _get_cached_raw_data(self, obj_key, handle):
+        """
+        Return raw data from the object cache, reading it from the backend
+        if it is not present.
+
+        The cached data is only used to create new objects, so objects
+        returned to callers are never shared.
+        """
+        key = (obj_key, handle)
+        if key in self._cache:
+            self._cache_hits += 1
+            return self._cache[key]
+        self._cache_misses += 1
+        data = self._get_raw_data(obj_key, handle)
+        if data:
+            self._cache[key] = data
+        return data
+
     def get_event_from_handle(self, handle):
         return self._get_from_handle(EVENT_KEY, Event, handle)
 
@@ -1370,6 +1525,199 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
     def get_tag_from_handle(self, handle):
         return self._get_from_handle(TAG_KEY, Tag, handle)
 
+    ################################################################
+    #
+    # get_*_from_handles methods
+    #
+    ################################################################
+
+    def _get_raw_data_many(self, obj_key, handles):
+        """
+        Return a dictionary of raw data, keyed by handle, for the passed
+        handles.  Handles that are not found are omitted.
+
+        Backends should override this to read the objects in bulk.
+        """
+        result = {}
+        for handle in handles:
+            data = self._get_raw_data(obj_key, handle)
+            if data:
+                result[handle] = data
+        return result
+
+    def _get_cached_raw_data_many(self, obj_key, handles):
+        """
+        Return a dictionary of raw data, keyed by handle, for the passed
+        handles, reading the objects that are not cached in one pass.
+        """
+        result = {}
+        missing = []
+        for handle in handles:
+            key = (obj_key, handle)
+            if key in self._cache:
+                self._cache_hits += 1
+                result[handle] = self._cache[key]
+            else:
+                missing.append(handle)
+        if missing:
+            self._cache_misses += len(missing)
+            data = self._get_raw_data_many(obj_key, set(missing))
+            for handle, raw in data.items():
+                self._cache[(obj_key, handle)] = raw
+            result.update(data)
+        return result
+
+    def _get_from_handles(self, obj_key, obj_class, handles):
+        handles = list(handles)
+        data = self._get_cached_raw_data_many(obj_key, handles)
+        objects = []
+        for handle in handles:
+            if handle not in data:
+                raise HandleError("Handle %s not found" % handle)
+            objects.append(obj_class.create(data[handle]))
+        return objects
+
+    def prefetch_handles(self, class_name, handles):
+        """
+        Load the objects with the passed handles into the object cache.
+        """
+        self._get_cached_raw_data_many(CLASS_TO_KEY_MAP[class_name], handles)
+
+    def get_raw_data_from_handles(self, class_name, handles):
+        return self._get_raw_data_many(CLASS_TO_KEY_MAP[class_name], handles)
+
+    def map_over_objects(self, class_name, func, chunk_size=1000):
+        """
+        Call func(db, handles) for each chunk of the handles of the objects
+        of the class, and return the list of the results in chunk order.
+
+        Backends may call func in worker processes, each with its own
+        read-only connection to the database.  func must therefore be a
+        module level function that only reads the database, and its
+        results must be picklable.  This implementation calls it in this
+        process.
+
+        :param class_name: name of the object class, for example "Person".
+        :type class_name: str
+        :param func: function called with the database and a list of
+            handles.
+        :type func: function
+        :param chunk_size: number of handles passed to each call.
+        :type chunk_size: int
+        """
+        return [
+            func(self, chunk)
+            for chunk in self._get_handle_chunks(class_name, chunk_size)
+        ]
+
+    def _get_handle_chunks(self, class_name, chunk_size):
+        """
+        Return the handles of the objects of the class split in lists of
+        at most chunk_size handles.
+        """
+        handles = self.method("get_%s_handles", class_name)()
+        return [
+            handles[start : start + chunk_size]
+            for start in range(0, len(handles), chunk_size)
+        ]
+
+    def map_over_people(self, func, chunk_size=1000):
+        """
+        Call func(db, handles) for each chunk of the person handles, and
+        return the list of the results in chunk order.
+
+        See :meth:`map_over_objects`.
+        """
+        return self.map_over_objects("Person", func, chunk_size)
+
+    def get_people_from_handles(self, handles):
+        return self._get_from_handles(PERSON_KEY, Person, handles)
+
+    def get_families_from_handles(self, handles):
+        return self._get_from_handles(FAMILY_KEY, Family, handles)
+
+    def get_events_from_handles(self, handles):
+        return self._get_from_handles(EVENT_KEY, Event, handles)
+
+    def get_places_from_handles(self, handles):
+        return self._get_from_handles(PLACE_KEY, Place, handles)
+
+    def get_sources_from_handles(self, handles):
+        return self._get_from_handles(SOURCE_KEY, Source, handles)
+
+    def get_citations_from_handles(self, handles):
+        return self._get_from_handles(CITATION_KEY, Citation, handles)
+
+    def get_media_from_handles(self, handles):
+        return self._get_from_handles(MEDIA_KEY, Media, handles)
+
+    def get_repositories_from_handles(self, handles):
+        return self._get_from_handles(REPOSITORY_KEY, Repository, handles)
+
+    def get_notes_from_handles(self, handles):
+        return self._get_from_handles(NOTE_KEY, Note, handles)
+
+    def get_tags_from_handles(self, handles):
+        return self._get_from_handles(TAG_KEY, Tag, handles)
+
+    ################################################################
+    #
+    # Object cache methods
+    #
+    ################################################################
+
+    def _invalidate_cache(self, obj_key, handle):
+        """
+        Remove an object from the cache.  Must be called by the backend
+        whenever the stored data for a handle changes.
+        """
+        key = (obj_key, handle)
+        if key in self._cache:
+            del self._cache[key]
+
+    def clear_cache(self):
+        """
+        Remove all objects from the cache, and the kinship graph.
+        """
+        self._cache.clear()
+        self._kinship_graph = None
+
+    def get_kinship_graph(self):
+        """
+        Return the :class:`.KinshipGraph` of the people of the database,
+        building it the first time.  It is updated when people and families
+        are committed.
+        """
+        if self._kinship_graph is None:
+            self._kinship_graph = KinshipGraph(self)
+        return self._kinship_graph
+
+    def _update_kinship_graph(self, obj_key, handle, data):
+        """
+        Update the kinship graph, if it was built, after a person or a
+        family was committed or removed.
+
+        :param data: raw data of the object, or None if it was removed.
+        """
+        if self._kinship_graph is None:
+            return
+        if obj_key == PERSON_KEY:
+            self._kinship_graph.update_person(handle, data)
+        elif obj_key == FAMILY_KEY:
+            self._kinship_graph.update_family(handle, data)
+
+    def get_cache_stats(self):
+        """
+        Return a dictionary of object cache statistics with the keys
+        "hits", "misses", "size" and "capacity".
+        """
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "size": len(self._cache.data),
+            "capacity": self._cache.count,
+        }
+
     ################################################################
     #
     # get_*_from_gramps_id methods
@@ -2653,3 +3001,27 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
     def set_schema_version(self, value):
         """set the current schema version"""
         self._set_metadata("version", str(value))
+
+    def get_blob_codec(self):
+        """
+        Return the name of the codec used to store serialized objects.
+        """
+        return self.blob_codec.name
+
+    def set_blob_codec(self, name, callback=None):
+        """
+        Rewrite all serialized objects in the database using the named
+        codec.
+
+        :param name: name of the codec, see :func:`.get_available_codecs`.
+        :type name: str
+        :raises DbException: if the codec is not available.
+        """
+        codec = get_codec(name)
+        if codec.name == self.blob_codec.name:
+            return
+        UpdateCallback.__init__(self, callback)
+
+        from gramps.gen.db.upgrade import convert_blob_codec
+
+        convert_blob_codec(self, codec)
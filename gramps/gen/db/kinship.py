@@ -0,0 +1,508 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+In-memory graph of the family relationships between people.
+
+People and families are numbered, and their links are stored in arrays in
+compressed sparse row form: the links of the object with number i are
+``links[start[i]:start[i + 1]]``.  Objects changed after the graph was
+built are kept in dictionaries, until there are enough of them to build
+the arrays again.
+"""
+
+# ------------------------------------------------------------------------
+#
+# Python modules
+#
+# ------------------------------------------------------------------------
+from array import array
+from collections import deque
+from itertools import chain
+
+# Positions in the raw data of people, families and child references
+PERSON_FAMILY_LIST = 8
+PERSON_PARENT_FAMILY_LIST = 9
+FAMILY_FATHER_HANDLE = 2
+FAMILY_MOTHER_HANDLE = 3
+FAMILY_CHILD_REF_LIST = 4
+CHILD_REF_HANDLE = 3
+
+# Minimum number of changed objects before the arrays are built again
+COMPACT_SIZE = 1000
+
+NONE = -1
+
+
+def _build_csr(lists):
+    """
+    Return the (start, links) arrays of a list of lists of numbers.
+    """
+    start = array("i", [0])
+    links = array("i")
+    for items in lists:
+        links.extend(items)
+        start.append(len(links))
+    return start, links
+
+
+def _get_links(start, links, index):
+    """
+    Return the links of an object from the (start, links) arrays.
+    """
+    if index + 1 < len(start):
+        return links[start[index] : start[index + 1]]
+    return ()
+
+
+# ------------------------------------------------------------------------
+#
+# KinshipGraph
+#
+# ------------------------------------------------------------------------
+class KinshipGraph:
+    """
+    The parents, children and spouses of all people of a database.
+
+    Each person has the ordered list of families in which they are a
+    child, the first one being their main family, and the list of families
+    in which they are a parent.  Each family has a father, a mother and an
+    ordered list of children, as stored in the family.
+    """
+
+    def __init__(self, db):
+        """
+        Build the graph from the raw data of the database.
+        """
+        self._person_index = {}
+        self._person_handles = []
+        self._family_index = {}
+        self._family_handles = []
+        self._changed_people = {}
+        self._changed_families = {}
+
+        parent_families = []
+        families = []
+        with db.get_person_cursor() as cursor:
+            for handle, data in cursor:
+                index = self._get_person_index(handle)
+                while len(parent_families) <= index:
+                    parent_families.append(())
+                    families.append(())
+                parent_families[index] = self._get_family_indexes(
+                    data[PERSON_PARENT_FAMILY_LIST]
+                )
+                families[index] = self._get_family_indexes(data[PERSON_FAMILY_LIST])
+
+        fathers = {}
+        mothers = {}
+        children = {}
+        with db.get_family_cursor() as cursor:
+            for handle, data in cursor:
+                index = self._get_family_index(handle)
+                fathers[index], mothers[index], children[index] = self._get_members(
+                    data
+                )
+        self._build(parent_families, families, fathers, mothers, children)
+
+    def _build(self, parent_families, families, fathers, mothers, children):
+        """
+        Build the arrays from the links of all objects.
+        """
+        count = len(self._person_handles)
+        parent_families = list(parent_families) + [()] * (count - len(parent_families))
+        families = list(families) + [()] * (count - len(families))
+        self._pfam_start, self._pfam = _build_csr(parent_families)
+        self._fam_start, self._fam = _build_csr(families)
+
+        count = len(self._family_handles)
+        self._father = array("i", [fathers.get(index, NONE) for index in range(count)])
+        self._mother = array("i", [mothers.get(index, NONE) for index in range(count)])
+        self._child_start, self._child = _build_csr(
+            [children.get(index, ()) for index in range(count)]
+        )
+        self._changed_people = {}
+        self._changed_families = {}
+
+    def _compact(self):
+        """
+        Build the arrays again, including the changed objects.
+        """
+        people = range(len(self._person_handles))
+        families = range(len(self._family_handles))
+        self._build(
+            [self.get_parent_families(index) for index in people],
+            [self.get_families(index) for index in people],
+            {index: self.get_father(index) for index in families},
+            {index: self.get_mother(index) for index in families},
+            {index: self.get_children(index) for index in families},
+        )
+
+    def _get_person_index(self, handle):
+        index = self._person_index.get(handle)
+        if index is None:
+            index = len(self._person_handles)
+            self._person_index[handle] = index
+            self._person_handles.append(handle)
+        return index
+
+    def _get_family_index(self, handle):
+        index = self._family_index.get(handle)
+        if index is None:
+            index = len(self._family_handles)
+            self._family_index[handle] = index
+            self._family_handles.append(handle)
+        return index
+
+    def _get_family_indexes(self, handles):
+        return tuple(self._get_family_index(handle) for handle in handles)
+
+    def _get_members(self, data):
+        """
+        Return the father, mother and children numbers of raw family data.
+        """
+        father = data[FAMILY_FATHER_HANDLE]
+        mother = data[FAMILY_MOTHER_HANDLE]
+        return (
+            self._get_person_index(father) if father else NONE,
+            self._get_person_index(mother) if mother else NONE,
+            tuple(
+                self._get_person_index(child_ref[CHILD_REF_HANDLE])
+                for child_ref in data[FAMILY_CHILD_REF_LIST]
+            ),
+        )
+
+    # ------------------------------------------------------------------
+    #
+    # Updates
+    #
+    # ------------------------------------------------------------------
+    def update_person(self, handle, data):
+        """
+        Update the links of a person.
+
+        :param data: raw data of the person, or None if it was removed.
+        """
+        index = self._get_person_index(handle)
+        if data is None:
+            self._changed_people[index] = ((), ())
+        else:
+            self._changed_people[index] = (
+                self._get_family_indexes(data[PERSON_PARENT_FAMILY_LIST]),
+                self._get_family_indexes(data[PERSON_FAMILY_LIST]),
+            )
+        self._check_compact()
+
+    def update_family(self, handle, data):
+        """
+        Update the links of a family.
+
+        :param data: raw data of the family, or None if it was removed.
+        """
+        index = self._get_family_index(handle)
+        if data is None:
+            self._changed_families[index] = (NONE, NONE, ())
+        else:
+            self._changed_families[index] = self._get_members(data)
+        self._check_compact()
+
+    def _check_compact(self):
+        changed = len(self._changed_people) + len(self._changed_families)
+        total = len(self._person_handles) + len(self._family_handles)
+        if changed > max(COMPACT_SIZE, total // 8):
+            self._compact()
+
+    # ------------------------------------------------------------------
+    #
+    # Links
+    #
+    # ------------------------------------------------------------------
+    def get_person_index(self, handle):
+        """
+        Return the number of a person, or None if the person is unknown.
+        """
+        return self._person_index.get(handle)
+
+    def get_person_handle(self, index):
+        """
+        Return the handle of a person from their number.
+        """
+        return self._person_handles[index]
+
+    def get_family_handle(self, index):
+        """
+        Return the handle of a family from its number.
+        """
+        return self._family_handles[index]
+
+    def get_parent_families(self, index):
+        """
+        Return the numbers of the families in which a person is a child.
+        """
+        if index in self._changed_people:
+            return self._changed_people[index][0]
+        return _get_links(self._pfam_start, self._pfam, index)
+
+    def get_families(self, index):
+        """
+        Return the numbers of the families in which a person is a parent.
+        """
+        if index in self._changed_people:
+            return self._changed_people[index][1]
+        return _get_links(self._fam_start, self._fam, index)
+
+    def get_father(self, index):
+        """
+        Return the number of the father of a family, or -1.
+        """
+        if index in self._changed_families:
+            return self._changed_families[index][0]
+        if index < len(self._father):
+            return self._father[index]
+        return NONE
+
+    def get_mother(self, index):
+        """
+        Return the number of the mother of a family, or -1.
+        """
+        if index in self._changed_families:
+            return self._changed_families[index][1]
+        if index < len(self._mother):
+            return self._mother[index]
+        return NONE
+
+    def get_children(self, index):
+        """
+        Return the numbers of the children of a family.
+        """
+        if index in self._changed_families:
+            return self._changed_families[index][2]
+        return _get_links(self._child_start, self._child, index)
+
+    def get_parents(self, index, main_only=False):
+        """
+        Return the numbers of the parents of a person, in their main family
+        only if main_only is True.
+        """
+        parents = []
+        families = self.get_parent_families(index)
+        if main_only:
+            families = families[:1]
+        for family in families:
+            for parent in (self.get_father(family), self.get_mother(family)):
+                if parent != NONE:
+                    parents.append(parent)
+        return parents
+
+    # ------------------------------------------------------------------
+    #
+    # Traversals
+    #
+    # ------------------------------------------------------------------
+    def _to_handles(self, indexes):
+        return {self._person_handles[index] for index in indexes}
+
+    def get_ancestors(self, handle, inclusive=True, generations=None):
+        """
+        Return the handles of the ancestors of a person, following the main
+        family of each person.
+
+        :param inclusive: include the person.
+        :param generations: maximum number of generations, the person being
+            the first, or None for all.
+        """
+        root = self.get_person_index(handle)
+        if root is None:
+            return set()
+        found = set()
+        if inclusive:
+            found.add(root)
+        queue = deque((parent, 2) for parent in self.get_parents(root, True))
+        if generations is not None and generations < 2:
+            queue.clear()
+        while queue:
+            index, generation = queue.popleft()
+            if index in found:
+                continue
+            found.add(index)
+            if generations is None or generation < generations:
+                for parent in self.get_parents(index, True):
+                    queue.append((parent, generation + 1))
+        return self._to_handles(found)
+
+    def get_descendants(self, handle, inclusive=True):
+        """
+        Return the handles of the descendants of a person.
+
+        :param inclusive: include the person.
+        """
+        root = self.get_person_index(handle)
+        if root is None:
+            return set()
+        found = set()
+        if inclusive:
+            found.add(root)
+        stack = [root]
+        while stack:
+            for family in self.get_families(stack.pop()):
+                for child in self.get_children(family):
+                    if child not in found:
+                        found.add(child)
+                        stack.append(child)
+        return self._to_handles(found)
+
+    def get_children_of(self, index):
+        """
+        Return the numbers of the children of a person in all their families.
+        """
+        children = []
+        for family in self.get_families(index):
+            children.extend(self.get_children(family))
+        return children
+
+    def get_generations(
+        self, handle, ancestors=True, min_generations=1, max_generations=None
+    ):
+        """
+        Return the handles of the ancestors, through all their families, or
+        of the descendants of a person, at least min_generations and at most
+        max_generations generations away.  The parents and the children of
+        the person are one generation away.
+
+        :param ancestors: return the ancestors if True, else the descendants.
+        :param max_generations: maximum number of generations, or None for
+            all.
+        """
+        root = self.get_person_index(handle)
+        if root is None:
+            return set()
+        if ancestors:
+            get_next = self.get_parents
+        else:
+            get_next = self.get_children_of
+        found = set()
+        if min_generations <= 0:
+            found.add(root)
+        # a path without loops is not longer than the number of people
+        limit = len(self._person_handles)
+        if max_generations is not None:
+            limit = min(limit, max_generations)
+        level = {root}
+        generation = 0
+        while level and generation < limit:
+            generation += 1
+            level = {index for current in level for index in get_next(current)}
+            if generation < min_generations:
+                continue
+            found |= level
+            if max_generations is None:
+                # the people reached from these are further away
+                stack = list(level)
+                while stack:
+                    for index in get_next(stack.pop()):
+                        if index not in found:
+                            found.add(index)
+                            stack.append(index)
+                break
+        return self._to_handles(found)
+
+    def get_relatives(self, handle):
+        """
+        Return the handles of the people connected to a person by any
+        chain of parent, child, sibling or spouse links, including the
+        person.
+        """
+        root = self.get_person_index(handle)
+        if root is None:
+            return set()
+        found = {root}
+        stack = [root]
+        while stack:
+            index = stack.pop()
+            for family in chain(
+                self.get_parent_families(index), self.get_families(index)
+            ):
+                members = [self.get_father(family), self.get_mother(family)]
+                members.extend(self.get_children(family))
+                for member in members:
+                    if member != NONE and member not in found:
+                        found.add(member)
+                        stack.append(member)
+        return self._to_handles(found)
+
+    def _get_ancestor_keys(self, root):
+        """
+        Return the numbers of the ancestors of a person through all their
+        families, including the person, and the numbers of the families
+        without parents among their families, as -number - 1.
+        """
+        found = set()
+        stack = [root]
+        while stack:
+            index = stack.pop()
+            if index in found:
+                continue
+            found.add(index)
+            for family in self.get_parent_families(index):
+                father = self.get_father(family)
+                mother = self.get_mother(family)
+                if father == NONE and mother == NONE:
+                    found.add(-family - 1)
+                for parent in (father, mother):
+                    if parent != NONE:
+                        stack.append(parent)
+        return found
+
+    def get_common_ancestor_people(self, handles):
+        """
+        Return the handles of the people having a common ancestor with any
+        of the given people, through all their families, including these
+        people and their ancestors.  A family without parents counts as a
+        common ancestor of its children.
+        """
+        keys = set()
+        for handle in handles:
+            root = self.get_person_index(handle)
+            if root is not None:
+                keys |= self._get_ancestor_keys(root)
+        if not keys:
+            return set()
+        # families of each parent, and children of each family, as listed
+        # in the families of the children
+        parent_of = {}
+        child_of = {}
+        for index in range(len(self._person_handles)):
+            for family in self.get_parent_families(index):
+                child_of.setdefault(family, []).append(index)
+        for family in range(len(self._family_handles)):
+            for parent in (self.get_father(family), self.get_mother(family)):
+                if parent != NONE:
+                    parent_of.setdefault(parent, []).append(family)
+
+        found = {key for key in keys if key >= 0}
+        for key in keys:
+            if key < 0:
+                found.update(child_of.get(-key - 1, ()))
+        stack = list(found)
+        while stack:
+            for family in parent_of.get(stack.pop(), ()):
+                for child in child_of.get(family, ()):
+                    if child not in found:
+                        found.add(child)
+                        stack.append(child)
+        return self._to_handles(found)
@@ -128,10 +128,9 @@ class DbTxn(defaultdict):
             transaction type = a numeric representation of the type of
                           transaction: TXNADD = 0, TXNUPD = 1, TXNDEL = 2
 
-        data = Python list where:
-            list element = (handle, data) where:
-                handle = handle (database key) of the object in the transaction
-                data = pickled representation of the object
+        data = Python list of the handles (database keys) of the objects
+            in the transaction.  The data of the objects is only kept in
+            the undo database, see :meth:`get_record`.
         """
 
         # Conditional on __debug__ because all that frame stuff may be slow
@@ -200,7 +199,7 @@ class DbTxn(defaultdict):
         if self.first is None:
             self.first = self.last
         _LOG.debug("added to trans: %d %d %s" % (obj_type, trans_type, handle))
-        self[(obj_type, trans_type)] += [(handle, new_data)]
+        self[(obj_type, trans_type)].append(handle)
         return
 
     def get_recnos(self, reverse=False):
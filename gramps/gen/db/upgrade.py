@@ -50,6 +50,7 @@ from .dbconst import (
     SOURCE_KEY,
     NOTE_KEY,
     TAG_KEY,
+    KEY_TO_NAME_MAP,
 )
 from ..const import GRAMPS_LOCALE as glocale
 
@@ -57,6 +58,57 @@ _ = glocale.translation.gettext
 
 LOG = logging.getLogger(".upgrade")
 
+# The number of objects re-encoded at a time by convert_blob_codec.
+CONVERT_CHUNK_SIZE = 1000
+
+
+def convert_blob_codec(self, codec):
+    """
+    Rewrite the serialized data of all objects using a new blob codec.
+
+    The data is re-encoded in place, a batch of rows at a time, so the
+    secondary tables like the sort keys and the lifespans are kept.
+    """
+    length = 0
+    for obj_key in KEY_TO_NAME_MAP:
+        length += self._get_number_of(obj_key)
+    self.set_total(length)
+    old_codec = self.blob_codec
+    count = 0
+    self._flush_objects()
+    self._txn_begin()
+    try:
+        for table in KEY_TO_NAME_MAP.values():
+            select = (
+                "SELECT handle, blob_data FROM %s WHERE handle > ? "
+                "ORDER BY handle LIMIT ?" % table
+            )
+            update = "UPDATE %s SET blob_data = ? WHERE handle = ?" % table
+            last_handle = ""
+            while True:
+                self.dbapi.execute(select, [last_handle, CONVERT_CHUNK_SIZE])
+                rows = self.dbapi.fetchall()
+                if not rows:
+                    break
+                self.dbapi.executemany(
+                    update,
+                    [
+                        (codec.encode(old_codec.decode(blob)), handle)
+                        for handle, blob in rows
+                    ],
+                )
+                last_handle = rows[-1][0]
+                count += len(rows)
+                self.update(count)
+    except:
+        self._txn_abort()
+        raise
+    self.blob_codec = codec
+    self._txn_commit()
+    self.clear_cache()
+    # Separate transaction to save metadata.
+    self._set_metadata("blob-codec", codec.name)
+
 
 def gramps_upgrade_20(self):
     """
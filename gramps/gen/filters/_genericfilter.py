@@ -167,6 +167,10 @@ class GenericFilter:
         return final_list
 
     def check_and(self, db, id_list, user=None, tupleind=None, tree=False):
+        if id_list is not None or not tree:
+            final_list = self.check_and_sql(db, id_list, user, tupleind)
+            if final_list is not None:
+                return final_list
         final_list = []
         flist = self.flist
         if user:
@@ -197,6 +201,80 @@ class GenericFilter:
             user.end_progress()
         return final_list
 
+    def check_and_sql(self, db, id_list=None, user=None, tupleind=None):
+        """
+        Apply the "and" filter by letting the database select the objects
+        that match the rules with a SQL predicate.  The remaining rules are
+        applied to the selected objects only.
+
+        Return None if the database cannot evaluate the predicates, or no
+        rule provides one.
+        """
+        selection = self.select_sql(db)
+        if selection is None:
+            return None
+        if user:
+            user.begin_progress(_("Filter"), _("Applying ..."), self.get_number(db))
+        final_list = list(self.iter_sql(db, selection, id_list, user, tupleind))
+        if user:
+            user.end_progress()
+        return final_list
+
+    def select_sql(self, db):
+        """
+        Return the handles the database selects for the rules of an "and"
+        filter with a SQL predicate, and the list of the other rules.
+
+        Return None if the filter is not an "and" filter, the database
+        cannot evaluate the predicates, or no rule provides one.
+        """
+        if self.get_test_func() != self.and_test:
+            return None
+        predicates = []
+        other_rules = []
+        for rule in self.flist:
+            predicate = rule.get_sql_predicate()
+            if predicate is None:
+                other_rules.append(rule)
+            else:
+                predicates.append(predicate)
+        if not predicates:
+            return None
+        handles = db.select_handles(self.make_obj().__class__.__name__, predicates)
+        if handles is None:
+            return None
+        return handles, other_rules
+
+    def iter_sql(self, db, selection, id_list=None, user=None, tupleind=None):
+        """
+        Yield the matches of the "and" filter, from the selection returned
+        by :meth:`select_sql`.
+
+        The arguments and the matches are the same as for :meth:`apply`.
+        """
+        handles, other_rules = selection
+        if id_list is None:
+            tupleind = None
+            if self.invert:
+                class_name = self.make_obj().__class__.__name__
+                id_list = db.select_handles(class_name, [])
+            else:
+                id_list = handles
+        selected = set(handles)
+        for data in id_list:
+            if tupleind is None:
+                handle = data
+            else:
+                handle = data[tupleind]
+            if user:
+                user.step_progress()
+            val = handle in selected
+            if val and other_rules:
+                obj = self.find_from_handle(db, handle)
+                val = all(rule.apply(db, obj) for rule in other_rules)
+            if val != self.invert:
+                yield data
+
     def check_or(self, db, id_list, user=None, tupleind=None, tree=False):
         return self.check_func(db, id_list, self.or_test, user, tupleind, tree=False)
 
@@ -224,6 +302,9 @@ class GenericFilter:
     def or_test(self, db, person):
         return any(rule.apply(db, person) for rule in self.flist)
 
+    def and_test(self, db, person):
+        return all(rule.apply(db, person) for rule in self.flist)
+
     def get_check_func(self):
         try:
             m = getattr(self, "check_" + self.logical_op)
@@ -231,6 +312,13 @@ class GenericFilter:
             m = self.check_and
         return m
 
+    def get_test_func(self):
+        try:
+            m = getattr(self, self.logical_op + "_test")
+        except AttributeError:
+            m = self.and_test
+        return m
+
     def check(self, db, handle):
         return self.get_check_func()(db, [handle])
 
@@ -259,6 +347,53 @@ class GenericFilter:
             rule.requestreset()
         return res
 
+    def iter_apply(self, db, id_list=None, tupleind=None, user=None, tree=False):
+        """
+        Apply the filter using db, yielding the matches one at a time.
+
+        The arguments and the matches are the same as for :meth:`apply`.
+        Closing the generator before it is exhausted stops the filter, so
+        callers can show the first matches while the filter still runs.
+        """
+        test = self.get_test_func()
+        for rule in self.flist:
+            rule.requestprepare(db, user)
+        if user:
+            user.begin_progress(_("Filter"), _("Applying ..."), self.get_number(db))
+        try:
+            selection = None
+            if id_list is not None or not tree:
+                selection = self.select_sql(db)
+            if selection is not None:
+                yield from self.iter_sql(db, selection, id_list, user, tupleind)
+            elif id_list is None:
+                with (
+                    self.get_tree_cursor(db) if tree else self.get_cursor(db)
+                ) as cursor:
+                    for handle, data in cursor:
+                        obj = self.make_obj()
+                        obj.unserialize(data)
+                        if user:
+                            user.step_progress()
+                        if test(db, obj) != self.invert:
+                            yield handle
+            else:
+                for data in id_list:
+                    if tupleind is None:
+                        handle = data
+                    else:
+                        handle = data[tupleind]
+                    obj = self.find_from_handle(db, handle)
+                    if user:
+                        user.step_progress()
+                    if test(db, obj) != self.invert:
+                        yield data
+        finally:
+            if user:
+                user.end_progress()
+            for rule in self.flist:
+                rule.requestreset()
+
 
 class GenericFamilyFilter(GenericFilter):
     def __init__(self, source=None):
@@ -55,3 +55,9 @@ class HasGrampsId(Rule):
         return true if the rule passes, false otherwise.
         """
         return obj.gramps_id == self.list[0]
+
+    def get_sql_predicate(self):
+        if type(self).apply is not HasGrampsId.apply:
+            # subclasses that match the ID of another object
+            return None
+        return ("gramps_id = ?", [self.list[0]])
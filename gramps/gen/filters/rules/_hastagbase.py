@@ -69,3 +69,12 @@ class HasTagBase(Rule):
         if self.tag_handle is None:
             return False
         return self.tag_handle in obj.get_tag_list()
+
+    def get_sql_predicate(self):
+        if self.tag_handle is None:
+            return ("0", [])
+        return (
+            "handle IN (SELECT obj_handle FROM reference "
+            "WHERE ref_class = 'Tag' AND ref_handle = ?)",
+            [self.tag_handle],
+        )
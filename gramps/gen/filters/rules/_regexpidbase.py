@@ -58,3 +58,24 @@ class RegExpIdBase(Rule):
 
     def apply(self, db, obj):
         return self.match_substring(0, obj.gramps_id)
+
+    def get_sql_predicate(self):
+        if type(self).apply is not RegExpIdBase.apply:
+            # subclasses that match the ID of another object
+            return None
+        return self.get_id_predicate()
+
+    def get_id_predicate(self):
+        """
+        Return a (sql, args) tuple matching the gramps_id column, or None if
+        every ID matches.
+        """
+        if not self.list[0]:
+            return None
+        if self.use_regex:
+            pattern = self.regex[0].pattern
+            if not self.use_case:
+                pattern = "(?i)" + pattern
+        else:
+            pattern = "(?i)" + re.escape(self.list[0])
+        return ("gramps_id REGEXP ?", [pattern])
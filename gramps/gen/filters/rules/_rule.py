@@ -154,6 +154,17 @@ class Rule:
         """Apply the rule to some database entry; must be overwritten."""
         return True
 
+    def get_sql_predicate(self):
+        """
+        Return a (sql, args) tuple with a SQL expression, over the columns of
+        the object table, that is equivalent to :meth:`apply`, or None if the
+        rule can only be applied to the objects themselves.
+
+        Called after :meth:`prepare`.  Backends that support it use the
+        expression to select candidate objects without unserializing them.
+        """
+        return None
+
     def display_values(self):
         """Return the labels and values of this rule."""
         l_v = (
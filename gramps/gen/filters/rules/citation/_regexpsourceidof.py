@@ -59,3 +59,10 @@ class RegExpSourceIdOf(RegExpIdBase):
         if RegExpIdBase.apply(self, dbase, source):
             return True
         return False
+
+    def get_sql_predicate(self):
+        predicate = self.get_id_predicate()
+        if predicate is None:
+            return None
+        sql, args = predicate
+        return ("source_handle IN (SELECT handle FROM source WHERE %s)" % sql, args)
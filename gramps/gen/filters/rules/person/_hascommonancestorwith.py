@@ -32,7 +32,6 @@ _ = glocale.translation.gettext
 # Gramps modules
 #
 # -------------------------------------------------------------------------
-from ....utils.db import for_each_ancestor
 from .. import Rule
 
 
@@ -53,61 +52,25 @@ class HasCommonAncestorWith(Rule):
 
     def prepare(self, db, user):
         self.db = db
-        # For each(!) person we keep track of who their ancestors
-        # are, in a set(). So we only have to compute a person's
-        # ancestor list once.
-        # Start with filling the cache for root person (gramps_id in self.list[0])
-        self.ancestor_cache = {}
         root_person = db.get_person_from_gramps_id(self.list[0])
         if root_person:
-            self.add_ancs(db, root_person)
             self.with_people = [root_person.handle]
         else:
             self.with_people = []
+        self.init_matches(db)
 
-    def add_ancs(self, db, person):
-        if person and person.handle not in self.ancestor_cache:
-            self.ancestor_cache[person.handle] = set()
-            # We are going to compare ancestors of one person with that of
-            # another person; if that other person is an ancestor and itself
-            # has no ancestors is must be included, this is achieved by the
-            # little trick of making a person his own ancestor.
-            self.ancestor_cache[person.handle].add(person.handle)
-        else:
-            return
+    def init_matches(self, db):
+        """
+        Find all people sharing an ancestor with one of self.with_people.
 
-        for fam_handle in person.get_parent_family_handle_list():
-            parentless_fam = True
-            fam = db.get_family_from_handle(fam_handle)
-            if fam:
-                for par_handle in (fam.get_father_handle(), fam.get_mother_handle()):
-                    if par_handle:
-                        parentless_fam = False
-                        par = db.get_person_from_handle(par_handle)
-                        if par and par.handle not in self.ancestor_cache:
-                            self.add_ancs(db, par)
-                        if par:
-                            self.ancestor_cache[person.handle] |= self.ancestor_cache[
-                                par.handle
-                            ]
-                if parentless_fam:
-                    self.ancestor_cache[person.handle].add(fam_handle)
+        A person counts as their own ancestor, and a family without parents
+        counts as an ancestor of its descendants.
+        """
+        graph = db.get_kinship_graph()
+        self.matches = graph.get_common_ancestor_people(self.with_people)
 
     def reset(self):
-        self.ancestor_cache = {}
-
-    def has_common_ancestor(self, other):
-        for handle in self.with_people:
-            if (handle in self.ancestor_cache and self.ancestor_cache[handle]) & (
-                other
-                and other.handle in self.ancestor_cache
-                and self.ancestor_cache[other.handle]
-            ):
-                return True
-        return False
+        self.matches = set()
 
     def apply(self, db, person):
-        if person and person.handle not in self.ancestor_cache:
-            self.add_ancs(db, person)
-
-        return self.has_common_ancestor(person)
+        return person.handle in self.matches
@@ -50,3 +50,6 @@ class HasUnknownGender(Rule):
 
     def apply(self, db, person):
         return person.gender == Person.UNKNOWN
+
+    def get_sql_predicate(self):
+        return ("gender = ?", [Person.UNKNOWN])
@@ -52,6 +52,7 @@ class IsAncestorOf(Rule):
         """Assume that if 'Inclusive' not defined, assume inclusive"""
         self.db = db
         self.map = set()
+        self.graph = db.get_kinship_graph()
         try:
             first = 0 if int(self.list[1]) else 1
         except IndexError:
@@ -64,6 +65,7 @@ class IsAncestorOf(Rule):
 
     def reset(self):
         self.map.clear()
+        self.graph = None
 
     def apply(self, db, person):
         return person.handle in self.map
@@ -73,16 +75,4 @@ class IsAncestorOf(Rule):
             return
         if person.handle in self.map:
             return
-        if not first:
-            self.map.add(person.handle)
-        fam_id = person.get_main_parents_family_handle()
-        if fam_id:
-            fam = db.get_family_from_handle(fam_id)
-            if fam:
-                f_id = fam.get_father_handle()
-                m_id = fam.get_mother_handle()
-
-                if f_id:
-                    self.init_ancestor_list(db, db.get_person_from_handle(f_id), 0)
-                if m_id:
-                    self.init_ancestor_list(db, db.get_person_from_handle(m_id), 0)
+        self.map |= self.graph.get_ancestors(person.handle, inclusive=not first)
@@ -55,6 +55,7 @@ class IsAncestorOfFilterMatch(IsAncestorOf):
     def prepare(self, db, user):
         self.db = db
         self.map = set()
+        self.graph = db.get_kinship_graph()
         try:
             if int(self.list[1]):
                 first = 0
@@ -82,6 +83,7 @@ class IsAncestorOfFilterMatch(IsAncestorOf):
     def reset(self):
         self.filt.requestreset()
         self.map.clear()
+        self.graph = None
 
     def apply(self, db, person):
         return person.handle in self.map
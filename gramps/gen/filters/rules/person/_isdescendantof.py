@@ -52,6 +52,7 @@ class IsDescendantOf(Rule):
     def prepare(self, db, user):
         self.db = db
         self.map = set()
+        self.graph = db.get_kinship_graph()
         try:
             first = False if int(self.list[1]) else True
         except IndexError:
@@ -64,6 +65,7 @@ class IsDescendantOf(Rule):
 
     def reset(self):
         self.map.clear()
+        self.graph = None
 
     def apply(self, db, person):
         return person.handle in self.map
@@ -72,11 +74,4 @@ class IsDescendantOf(Rule):
         if not person or person.handle in self.map:
             # if we have been here before, skip
             return
-        if not first:
-            self.map.add(person.handle)
-
-        for fam_id in person.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_id)
-            if fam:
-                for child_ref in fam.get_child_ref_list():
-                    self.init_list(self.db.get_person_from_handle(child_ref.ref), 0)
+        self.map |= self.graph.get_descendants(person.handle, inclusive=not first)
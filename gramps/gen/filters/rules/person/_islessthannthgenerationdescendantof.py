@@ -57,7 +57,7 @@ class IsLessThanNthGenerationDescendantOf(Rule):
         self.map = set()
         try:
             root_person = db.get_person_from_gramps_id(self.list[0])
-            self.init_list(root_person, 0)
+            self.init_list(root_person)
         except:
             pass
 
@@ -67,19 +67,9 @@ class IsLessThanNthGenerationDescendantOf(Rule):
     def apply(self, db, person):
         return person.handle in self.map
 
-    def init_list(self, person, gen):
-        if not person or person.handle in self.map:
-            # if we have been here before, skip
+    def init_list(self, person):
+        if not person:
             return
-        if gen:
-            self.map.add(person.handle)
-            if gen >= int(self.list[1]):
-                return
-
-        for fam_id in person.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_id)
-            if fam:
-                for child_ref in fam.get_child_ref_list():
-                    self.init_list(
-                        self.db.get_person_from_handle(child_ref.ref), gen + 1
-                    )
+        self.map = self.db.get_descendant_handles(
+            person.handle, max_generations=int(self.list[1])
+        )
@@ -50,3 +50,6 @@ class IsMale(Rule):
 
     def apply(self, db, person):
         return person.gender == Person.MALE
+
+    def get_sql_predicate(self):
+        return ("gender = ?", [Person.MALE])
@@ -55,57 +55,18 @@ class IsRelatedWith(Rule):
         """
         self.db = db
 
-        self.relatives = []
+        self.relatives = set()
         self.add_relative(db.get_person_from_gramps_id(self.list[0]))
 
     def reset(self):
-        self.relatives = []
+        self.relatives = set()
 
     def apply(self, db, person):
         return person.handle in self.relatives
 
     def add_relative(self, start):
-        """Non-recursive function that scans relatives and add them to self.relatives"""
+        """Scan the parents, siblings, spouses and children of start, and
+        theirs, and add them to self.relatives"""
         if not (start):
             return
-
-        expand = [start]
-        relatives = {}
-
-        while expand:
-            person = expand.pop()
-            # Add the relative to the list
-            if person is None or (person.handle in relatives):
-                continue
-            relatives[person.handle] = True
-
-            for family_handle in person.get_parent_family_handle_list():
-                family = self.db.get_family_from_handle(family_handle)
-                if family:
-                    # Check Parents
-                    for parent_handle in (
-                        family.get_father_handle(),
-                        family.get_mother_handle(),
-                    ):
-                        if parent_handle:
-                            expand.append(self.db.get_person_from_handle(parent_handle))
-                    # Check Sibilings
-                    for child_ref in family.get_child_ref_list():
-                        expand.append(self.db.get_person_from_handle(child_ref.ref))
-
-            for family_handle in person.get_family_handle_list():
-                family = self.db.get_family_from_handle(family_handle)
-                if family:
-                    # Check Spouse
-                    for parent_handle in (
-                        family.get_father_handle(),
-                        family.get_mother_handle(),
-                    ):
-                        if parent_handle:
-                            expand.append(self.db.get_person_from_handle(parent_handle))
-                    # Check Children
-                    for child_ref in family.get_child_ref_list():
-                        expand.append(self.db.get_person_from_handle(child_ref.ref))
-
-        self.relatives = list(relatives.keys())
-        return
+        self.relatives = self.db.get_kinship_graph().get_relatives(start.handle)
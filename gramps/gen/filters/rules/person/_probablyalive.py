@@ -32,7 +32,7 @@ _ = glocale.translation.gettext
 # Gramps modules
 #
 # -------------------------------------------------------------------------
-from ....utils.alive import probably_alive
+from ....utils.alive import probably_alive, update_lifespans
 from .. import Rule
 from ....datehandler import parser
 
@@ -53,6 +53,7 @@ class ProbablyAlive(Rule):
             self.current_date = parser.parse(str(self.list[0]))
         except:
             self.current_date = None
+        update_lifespans(db)
 
     def apply(self, db, person):
         return probably_alive(person, db, self.current_date)
@@ -22,6 +22,7 @@
 Unittest that tests person-specific filter rules
 """
 import unittest
+from unittest.mock import patch
 import os
 from time import perf_counter
 import inspect
@@ -29,13 +30,16 @@ import inspect
 from ....filters import reload_custom_filters
 
 reload_custom_filters()
+from ....db import base as db_base
 from ....db.utils import import_as_dict
 from ....filters import GenericFilter, CustomFilters
 from ....const import DATA_DIR
+from ....proxy import LivingProxyDb
 from ....user import User
 from ....utils.unittest import localize_date
 
 from ..person import (
+    ChangedSince,
     Disconnected,
     Everyone,
     FamilyWithIncompleteEvent,
@@ -55,15 +59,18 @@ from ..person import (
     HasNameOriginType,
     HasNameType,
     HasNickname,
+    HasOtherGender,
     HasRelationship,
     HasSoundexName,
     HasSourceOf,
+    HasTag,
     HasTextMatchingRegexpOf,
     HasUnknownGender,
     HaveAltFamilies,
     HaveChildren,
     HavePhotos,
     IncompleteNames,
+    IsAncestorOf,
     IsAncestorOfFilterMatch,
     IsBookmarked,
     IsChildOfFilterMatch,
@@ -94,6 +101,7 @@ from ..person import (
     PeoplePublic,
     PersonWithIncompleteEvent,
     ProbablyAlive,
+    RegExpIdOf,
     RegExpName,
     RelationshipPathBetweenBookmarks,
 )
@@ -245,6 +253,37 @@ class BaseTest(unittest.TestCase):
         res = self.filter_with_rule(rule, baserule=[rule1, rule2], base_l_op="or")
         self.assertEqual(len(res), 431)
 
+    def test_filtermatch_kinship_graph(self):
+        """
+        Test that the kinship graph of a proxy is built once for all the
+        rules that use it.
+        """
+        proxy = LivingProxyDb(self.db, LivingProxyDb.MODE_INCLUDE_ALL)
+        base = GenericFilter()
+        base.set_rules([HasIdOf(["I0006"]), HasIdOf(["I0005"])])
+        base.set_logical_op("or")
+        base.set_name("Base")
+        CustomFilters.get_filters_dict("Person")["Base"] = base
+        filters = []
+        for rule in (
+            IsAncestorOfFilterMatch(["Base"]),
+            IsDescendantOfFilterMatch(["Base"]),
+            IsAncestorOf(["I0006", 0]),
+            IsDescendantOf(["I0005", 0]),
+            IsRelatedWith(["I0006"]),
+            HasCommonAncestorWith(["I0006"]),
+        ):
+            filter_ = GenericFilter()
+            filter_.add_rule(rule)
+            expected = filter_.apply(self.db)
+            self.assertTrue(len(expected) > 2)
+            filters.append((filter_, set(expected)))
+        with patch.object(db_base, "KinshipGraph", wraps=db_base.KinshipGraph) as graph:
+            for dummy in range(2):
+                for filter_, expected in filters:
+                    self.assertEqual(set(filter_.apply(proxy)), expected)
+        self.assertEqual(graph.call_count, 1)
+
     def test_HasCommonAncestorWithFilterMatch(self):
         """Test the rule with two persons in base filter"""
         rule1 = HasIdOf(["I0006"])
@@ -1270,6 +1309,83 @@ class BaseTest(unittest.TestCase):
         )
         self.assertEqual(self.filter_with_rule(rule), set(["GNUJQCL9MD64AM56OH"]))
 
+    def test_sql_predicates(self):
+        """
+        Test that rules selected by the database match the same people as
+        rules applied to each person.
+        """
+        rules = [IsMale([]), RegExpIdOf(["i00"]), HaveChildren([])]
+        filter_ = GenericFilter()
+        filter_.set_rules(rules)
+        with patch.object(self.db, "select_handles", return_value=None):
+            expected = set(filter_.apply(self.db))
+        self.assertTrue(expected)
+        self.assertEqual(self.filter_with_rule(rules), expected)
+
+    def test_sql_predicate_rules(self):
+        """
+        Test each rule with a SQL predicate against the same rule applied to
+        each person, with and without invert and a list of handles.
+        """
+        handles = list(self.db.iter_person_handles())[::3]
+        id_list = [(str(index), handle) for index, handle in enumerate(handles)]
+        for rule in [
+            IsMale([]),
+            IsFemale([]),
+            HasUnknownGender([]),
+            HasOtherGender([]),
+            HasIdOf(["I0044"]),
+            HasIdOf(["I9999"]),
+            RegExpIdOf(["i00"]),
+            RegExpIdOf(["^I00.*4$"], use_regex=True),
+            HasTag(["ToDo"]),
+            HasTag(["NoSuchTag"]),
+            ChangedSince(["2008-01-01", ""]),
+            ChangedSince(["", "2008-01-01"]),
+            PeoplePrivate([]),
+            PeoplePublic([]),
+        ]:
+            for invert in (False, True):
+                filter_ = GenericFilter()
+                filter_.set_rules([rule, HaveChildren([])])
+                filter_.set_invert(invert)
+                with self.subTest(rule=rule.__class__.__name__, invert=invert):
+                    for args in ([], [handles], [id_list, 1]):
+                        with patch.object(self.db, "select_handles", return_value=None):
+                            expected = filter_.apply(self.db, *args)
+                        with patch.object(
+                            self.db, "select_handles", wraps=self.db.select_handles
+                        ) as select_handles:
+                            result = filter_.apply(self.db, *args)
+                        select_handles.assert_called()
+                        self.assertEqual(sorted(result), sorted(expected))
+                        if args:
+                            self.assertEqual(result, expected)
+                        self.assertEqual(
+                            list(filter_.iter_apply(self.db, *args)),
+                            filter_.apply(self.db, *args),
+                        )
+
+    def test_iter_apply(self):
+        """
+        Test that iter_apply yields the same people as apply, and that the
+        rules are reset when it is stopped early.
+        """
+        rule = RegExpIdOf(["i00"])
+        filter_ = GenericFilter()
+        filter_.set_rules([IsMale([]), rule])
+        filter_.set_logical_op("or")
+        handles = list(self.db.iter_person_handles())
+        self.assertEqual(
+            list(filter_.iter_apply(self.db, handles)),
+            filter_.apply(self.db, handles),
+        )
+        matches = filter_.iter_apply(self.db, handles)
+        next(matches)
+        self.assertEqual(rule.nrprepare, 1)
+        matches.close()
+        self.assertEqual(rule.nrprepare, 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -290,8 +290,8 @@ class Person(
             self.death_ref_index,  #  5
             self.birth_ref_index,  #  6
             event_ref_list,  #  7
-            self.family_list,  #  8
-            self.parent_family_list,  #  9
+            family_list,  #  8
+            parent_family_list,  #  9
             media_list,  # 10
             address_list,  # 11
             attribute_list,  # 12
@@ -310,6 +310,8 @@ class Person(
         self.alternate_names = [Name().unserialize(name) for name in alternate_names]
         self.event_ref_list = [EventRef().unserialize(er) for er in event_ref_list]
         self.person_ref_list = [PersonRef().unserialize(pr) for pr in person_ref_list]
+        self.family_list = list(family_list)
+        self.parent_family_list = list(parent_family_list)
         MediaBase.unserialize(self, media_list)
         LdsOrdBase.unserialize(self, lds_ord_list)
         AddressBase.unserialize(self, address_list)
@@ -85,8 +85,9 @@ class StyledTextTag:
         :type data: tuple
 
         """
-        (the_name, self.value, self.ranges) = data
+        the_name, self.value, the_ranges = data
 
+        self.ranges = list(the_ranges)
         self.name = StyledTextTagType()
         self.name.unserialize(the_name)
         return self
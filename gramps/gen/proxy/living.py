@@ -45,7 +45,7 @@ from ..lib import (
     Note,
     Tag,
 )
-from ..utils.alive import probably_alive
+from ..utils.alive import probably_alive, update_lifespans
 from ..config import config
 from ..const import GRAMPS_LOCALE as glocale
 
@@ -111,6 +111,8 @@ class LivingProxyDb(ProxyDbBase):
         self._ = llocale.translation.gettext
         self._p_f_n = self._(config.get("preferences.private-given-text"))
         self._p_s_n = self._(config.get("preferences.private-surname-text"))
+        if mode != self.MODE_INCLUDE_ALL:
+            update_lifespans(dbase)
 
     def get_person_from_handle(self, handle):
         """
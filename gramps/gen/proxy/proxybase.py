@@ -138,6 +138,7 @@ class ProxyDbBase(DbReadBase):
         )
         self.media_map = ProxyMap(self, self.get_raw_media_data, self.get_media_handles)
         self.note_map = ProxyMap(self, self.get_raw_note_data, self.get_note_handles)
+        self._kinship_graph = None
 
     def is_open(self):
         """
@@ -150,6 +151,18 @@ class ProxyDbBase(DbReadBase):
         the owner of the database"""
         return self.db.get_researcher()
 
+    def get_kinship_graph(self):
+        """
+        Return the :class:`.KinshipGraph` of the people of the proxy,
+        building it the first time.
+
+        A proxy is a read-only view of the database, so the graph is not
+        updated when the database changes.
+        """
+        if self._kinship_graph is None:
+            self._kinship_graph = super().get_kinship_graph()
+        return self._kinship_graph
+
     def include_something(self, handle, obj=None):
         """
         Model predicate. Returns True if object referred to by handle is to be
@@ -561,6 +574,13 @@ class ProxyDbBase(DbReadBase):
         """
         return self.gfilter(self.include_tag, self.db.get_tag_from_handle(handle))
 
+    def prefetch_handles(self, class_name, handles):
+        """
+        Pass the hint on to the proxied database so that the following
+        get_*_from_handle calls are served from its cache.
+        """
+        self.db.prefetch_handles(class_name, handles)
+
     def get_person_from_gramps_id(self, val):
         """
         Finds a Person in the database from the passed Gramps ID.
@@ -26,6 +26,7 @@ Classes for relationships.
 # Python modules
 #
 # -------------------------------------------------------------------------
+import copy
 import logging
 
 # -------------------------------------------------------------------------
@@ -36,6 +37,8 @@ import logging
 from .lib import Person, ChildRefType, EventType, FamilyRelType
 from .plug import PluginRegister, BasePluginManager
 from .const import GRAMPS_LOCALE as glocale
+from .errors import HandleError
+from .utils.lru import LRU
 
 _ = glocale.translation.sgettext
 
@@ -46,6 +49,12 @@ UNKNOWN = Person.UNKNOWN
 LOG = logging.getLogger("gen.relationship")
 LOG.addHandler(logging.StreamHandler())
 
+# Number of ancestor maps and of relationship results kept
+ANCESTOR_MAP_CACHE_SIZE = 16
+RELATIONSHIP_CACHE_SIZE = 256
+# Number of people whose parent families are kept
+PARENT_CACHE_SIZE = 100000
+
 # -------------------------------------------------------------------------
 #
 #
@@ -945,9 +954,10 @@ class RelationshipCalculator:
         self.state_signal_key = None
         self.storemap = False
         self.dirtymap = True
-        self.stored_map = None
-        self.map_handle = None
-        self.map_meta = None
+        self.__cache_db = None
+        self.__parent_cache = {}
+        self.__map_cache = LRU(ANCESTOR_MAP_CACHE_SIZE)
+        self.__result_cache = LRU(RELATIONSHIP_CACHE_SIZE)
         self.__db_connected = False
         self.depth = 15
         try:
@@ -1361,6 +1371,50 @@ class RelationshipCalculator:
                            considered
         :type only_birth:  bool
         """
+        self.__check_cache(db)
+        key = (
+            orig_person.handle,
+            other_person.handle,
+            self.get_depth(),
+            all_families,
+            all_dist,
+            only_birth,
+        )
+        if key in self.__result_cache:
+            result, msg = self.__result_cache[key]
+        else:
+            result, msg = self.__get_relationship_distance(
+                db, orig_person, other_person, all_families, all_dist, only_birth
+            )
+            if self.storemap:
+                self.__result_cache[key] = (result, msg)
+        # callers may change the result, keep the cached one intact
+        return copy.deepcopy(result), list(msg)
+
+    def __check_cache(self, db):
+        """
+        Clear the cached parents, ancestor maps and relationships if the
+        database changed since they were computed. Without the database
+        signals there is no way to know, and they are only kept for one
+        relationship search.
+        """
+        if self.dirtymap or not self.storemap or db is not self.__cache_db:
+            self.__cache_db = db
+            self.__parent_cache = {}
+            self.__map_cache.clear()
+            self.__result_cache.clear()
+            self.dirtymap = False
+
+    def __get_relationship_distance(
+        self, db, orig_person, other_person, all_families, all_dist, only_birth
+    ):
+        """
+        Search the relationships between two people, see
+        :meth:`get_relationship_distance_new`.
+
+        The ancestor map of orig_person is kept, and the ancestors of
+        other_person are only followed up to the ancestors found in it.
+        """
         # data storage to communicate with recursive functions
         self.__max_depth_reached = False
         self.__loop_detected = False
@@ -1379,37 +1433,27 @@ class RelationshipCalculator:
         second_map = {}
         rank = 9999999
 
+        map_key = (orig_person.handle, self.__max_depth, all_families, only_birth)
         try:
-            if (
-                self.storemap
-                and self.stored_map is not None
-                and self.map_handle == orig_person.handle
-                and not self.dirtymap
-            ):
-                first_map = self.stored_map
+            if map_key in self.__map_cache:
+                first_map, map_meta = self.__map_cache[map_key]
                 (
                     self.__max_depth_reached,
                     self.__loop_detected,
-                    self.__all_families,
-                    self.__all_dist,
-                    self.__only_birth,
                     self.__crosslinks,
                     self.__msg,
-                ) = self.map_meta
+                ) = map_meta
                 self.__msg = list(self.__msg)
             else:
-                self.__apply_filter(db, orig_person, "", [], first_map)
-                self.map_meta = (
+                self.__apply_filter(db, orig_person.handle, "", [], first_map)
+                map_meta = (
                     self.__max_depth_reached,
                     self.__loop_detected,
-                    self.__all_families,
-                    self.__all_dist,
-                    self.__only_birth,
                     self.__crosslinks,
                     list(self.__msg),
                 )
             self.__apply_filter(
-                db, other_person, "", [], second_map, stoprecursemap=first_map
+                db, other_person.handle, "", [], second_map, stoprecursemap=first_map
             )
         except RuntimeError:
             return (-1, None, -1, [], -1, []), [
@@ -1417,9 +1461,7 @@ class RelationshipCalculator:
             ] + self.__msg
 
         if self.storemap:
-            self.stored_map = first_map
-            self.dirtymap = False
-            self.map_handle = orig_person.handle
+            self.__map_cache[map_key] = (first_map, map_meta)
 
         for person_handle in second_map:
             if person_handle in first_map:
@@ -1519,8 +1561,55 @@ class RelationshipCalculator:
         else:
             return [(-1, None, "", [], "", [])], self.__msg
 
+    def __get_parent_families(self, db, handle):
+        """
+        Return the parent families of a person as a list of
+        (family_handle, father_handle, mother_handle, childrel, children)
+        tuples, or None for the families not in the database. childrel is
+        the (mother relation, father relation) of the person, or None if
+        the family does not list the person as a child.
+
+        Return None if the person is not in the database.
+        """
+        if handle in self.__parent_cache:
+            return self.__parent_cache[handle]
+        if len(self.__parent_cache) >= PARENT_CACHE_SIZE:
+            self.__parent_cache = {}
+        try:
+            person = db.get_person_from_handle(handle)
+        except HandleError:
+            person = None
+        families = None
+        if person is not None:
+            families = []
+            for family_handle in person.get_parent_family_handle_list():
+                try:
+                    family = db.get_family_from_handle(family_handle)
+                except HandleError:
+                    family = None
+                if not family:
+                    families.append(None)
+                    continue
+                children = family.get_child_ref_list()
+                childrel = [
+                    (ref.get_mother_relation(), ref.get_father_relation())
+                    for ref in children
+                    if ref.ref == handle
+                ]
+                families.append(
+                    (
+                        family_handle,
+                        family.father_handle,
+                        family.mother_handle,
+                        childrel[0] if childrel else None,
+                        [ref.ref for ref in children],
+                    )
+                )
+        self.__parent_cache[handle] = families
+        return families
+
     def __apply_filter(
-        self, db, person, rel_str, rel_fam, pmap, depth=1, stoprecursemap=None
+        self, db, handle, rel_str, rel_fam, pmap, depth=1, stoprecursemap=None
     ):
         """
         Typically this method is called recursively in two ways:
@@ -1535,40 +1624,45 @@ class RelationshipCalculator:
         will be looked up anyway an stored if common. At end the doubles
         are filtered out
         """
-        if person is None or not person.handle:
+        if not handle:
             return
 
         if depth > self.__max_depth:
-            self.__max_depth_reached = True
+            if db.has_person_handle(handle):
+                self.__max_depth_reached = True
             # print('Maximum ancestor generations ('+str(depth)+') reached', \
             #            '(' + rel_str + ').',\
             #            'Stopping relation algorithm.')
             return
         depth += 1
+        parent_families = self.__get_parent_families(db, handle)
+        if parent_families is None:
+            return
 
         commonancestor = False
         store = True  # normally we store all parents
         if stoprecursemap:
             store = False  # but not if a stop map given
-            if person.handle in stoprecursemap:
+            if handle in stoprecursemap:
                 commonancestor = True
                 store = True
 
         # add person to the map, take into account that person can be obtained
         # from different sides
-        if person.handle in pmap:
+        if handle in pmap:
             # person is already a grandparent in another branch, we already have
             # had lookup of all parents, we call that a crosslink
             if not stoprecursemap:
                 self.__crosslinks = True
-            pmap[person.handle][0] += [rel_str]
-            pmap[person.handle][1] += [rel_fam]
+            pmap[handle][0] += [rel_str]
+            pmap[handle][1] += [rel_fam]
             # check if there is no loop father son of his son, ...
             # loop means person is twice reached, same rel_str in begin
-            for rel1 in pmap[person.handle][0]:
-                for rel2 in pmap[person.handle][0]:
+            for rel1 in pmap[handle][0]:
+                for rel2 in pmap[handle][0]:
                     if len(rel1) < len(rel2) and rel1 == rel2[: len(rel1)]:
                         # loop, keep one message in storage!
+                        person = db.get_person_from_handle(handle)
                         self.__loop_detected = True
                         self.__msg += [
                             _("Relationship loop detected:")
@@ -1583,7 +1677,7 @@ class RelationshipCalculator:
                         ]
                         return
         elif store:
-            pmap[person.handle] = [[rel_str], [rel_fam]]
+            pmap[handle] = [[rel_str], [rel_fam]]
 
         # having added person to the pmap, we only look up recursively to
         # parents if this person is not common relative
@@ -1592,98 +1686,73 @@ class RelationshipCalculator:
             # don't continue search, great speedup!
             return
 
-        family_handles = []
-        main = person.get_main_parents_family_handle()
-        if main:
-            family_handles = [main]
-        if self.__all_families:
-            family_handles = person.get_parent_family_handle_list()
-
-        try:
-            parentstodo = {}
-            fam = 0
-            for family_handle in family_handles:
-                rel_fam_new = rel_fam + [fam]
-                family = db.get_family_from_handle(family_handle)
-                if not family:
-                    continue
-                # obtain childref for this person
-                childrel = [
-                    (ref.get_mother_relation(), ref.get_father_relation())
-                    for ref in family.get_child_ref_list()
-                    if ref.ref == person.handle
-                ]
-                fhandle = family.father_handle
-                mhandle = family.mother_handle
-                for data in [
-                    (
-                        fhandle,
-                        self.REL_FATHER,
-                        self.REL_FATHER_NOTBIRTH,
-                        childrel[0][1],
-                    ),
-                    (
-                        mhandle,
-                        self.REL_MOTHER,
-                        self.REL_MOTHER_NOTBIRTH,
-                        childrel[0][0],
-                    ),
-                ]:
-                    if data[0] and data[0] not in parentstodo:
-                        persontodo = db.get_person_from_handle(data[0])
-                        if data[3] == ChildRefType.BIRTH:
-                            addstr = data[1]
-                        elif not self.__only_birth:
-                            addstr = data[2]
-                        else:
-                            addstr = ""
-                        if addstr:
-                            parentstodo[data[0]] = (
-                                persontodo,
-                                rel_str + addstr,
-                                rel_fam_new,
-                            )
-                    elif data[0] and data[0] in parentstodo:
-                        # this person is already scheduled to research
-                        # update family list
-                        famlist = parentstodo[data[0]][2]
-                        if not isinstance(famlist[-1], list) and fam != famlist[-1]:
-                            famlist = famlist[:-1] + [[famlist[-1]]]
-                        if isinstance(famlist[-1], list) and fam not in famlist[-1]:
-                            famlist = famlist[:-1] + [famlist[-1] + [fam]]
-                            parentstodo[data[0]] = (
-                                parentstodo[data[0]][0],
-                                parentstodo[data[0]][1],
-                                famlist,
-                            )
-                if not fhandle and not mhandle and stoprecursemap is None:
-                    # family without parents, add brothers for orig person
-                    # other person has recusemap, and will stop when seeing
-                    # the brother.
-                    child_list = [
-                        ref.ref
-                        for ref in family.get_child_ref_list()
-                        if ref.ref != person.handle
-                    ]
-                    addstr = self.REL_SIBLING
-                    for chandle in child_list:
-                        if chandle in pmap:
-                            pmap[chandle][0] += [rel_str + addstr]
-                            pmap[chandle][1] += [rel_fam_new]
-                            # person is already a grandparent in another branch
-                        else:
-                            pmap[chandle] = [[rel_str + addstr], [rel_fam_new]]
-                fam += 1
+        if not self.__all_families:
+            # only the main family
+            parent_families = parent_families[:1]
 
-            for handle, data in parentstodo.items():
-                self.__apply_filter(
-                    db, data[0], data[1], data[2], pmap, depth, stoprecursemap
+        parentstodo = {}
+        fam = 0
+        for family in parent_families:
+            rel_fam_new = rel_fam + [fam]
+            if not family:
+                continue
+            family_handle, fhandle, mhandle, childrel, children = family
+            if childrel is None:
+                LOG.warning(
+                    "Family %s does not list its child %s", family_handle, handle
                 )
-        except:
-            import traceback
+                return
+            for data in [
+                (
+                    fhandle,
+                    self.REL_FATHER,
+                    self.REL_FATHER_NOTBIRTH,
+                    childrel[1],
+                ),
+                (
+                    mhandle,
+                    self.REL_MOTHER,
+                    self.REL_MOTHER_NOTBIRTH,
+                    childrel[0],
+                ),
+            ]:
+                if data[0] and data[0] not in parentstodo:
+                    if data[3] == ChildRefType.BIRTH:
+                        addstr = data[1]
+                    elif not self.__only_birth:
+                        addstr = data[2]
+                    else:
+                        addstr = ""
+                    if addstr:
+                        parentstodo[data[0]] = (rel_str + addstr, rel_fam_new)
+                elif data[0] and data[0] in parentstodo:
+                    # this person is already scheduled to research
+                    # update family list
+                    famlist = parentstodo[data[0]][1]
+                    if not isinstance(famlist[-1], list) and fam != famlist[-1]:
+                        famlist = famlist[:-1] + [[famlist[-1]]]
+                    if isinstance(famlist[-1], list) and fam not in famlist[-1]:
+                        famlist = famlist[:-1] + [famlist[-1] + [fam]]
+                        parentstodo[data[0]] = (parentstodo[data[0]][0], famlist)
+            if not fhandle and not mhandle and stoprecursemap is None:
+                # family without parents, add brothers for orig person
+                # other person has recusemap, and will stop when seeing
+                # the brother.
+                child_list = [chandle for chandle in children if chandle != handle]
+                addstr = self.REL_SIBLING
+                for chandle in child_list:
+                    if chandle in pmap:
+                        pmap[chandle][0] += [rel_str + addstr]
+                        pmap[chandle][1] += [rel_fam_new]
+                        # person is already a grandparent in another branch
+                    else:
+                        pmap[chandle] = [[rel_str + addstr], [rel_fam_new]]
+            fam += 1
 
-            traceback.print_exc()
-            return
+        for parent_handle, data in parentstodo.items():
+            self.__apply_filter(
+                db, parent_handle, data[0], data[1], pmap, depth, stoprecursemap
+            )
 
     def collapse_relations(self, relations):
         """
@@ -2554,7 +2623,7 @@ class RelationshipCalculator:
         dbstate.disconnect(self.state_signal_key)
         list(map(dbstate.db.disconnect, self.signal_keys))
         self.storemap = False
-        self.stored_map = None
+        self.dirtymap = True
 
     def _dbchange_callback(self, db):
         """
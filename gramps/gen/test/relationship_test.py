@@ -0,0 +1,196 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Tests of the caches of the relationship calculator.
+"""
+
+# -------------------------------------------------------------------------
+#
+# Standard python modules
+#
+# -------------------------------------------------------------------------
+import os
+import unittest
+from unittest.mock import patch
+
+# -------------------------------------------------------------------------
+#
+# Gramps modules
+#
+# -------------------------------------------------------------------------
+from ..const import DATA_DIR
+from ..db import DbTxn
+from ..db.utils import import_as_dict, make_database
+from ..dbstate import DbState
+from ..lib import ChildRef, Family, Person
+from ..relationship import RelationshipCalculator
+from ..user import User
+
+TEST_DIR = os.path.abspath(os.path.join(DATA_DIR, "tests"))
+EXAMPLE = os.path.join(TEST_DIR, "example.gramps")
+
+# The method searching for a relationship, which the cache saves calling.
+SEARCH = "_RelationshipCalculator__get_relationship_distance"
+
+
+class RelationshipCacheTest(unittest.TestCase):
+    """
+    Compare the relationships found with and without the caches.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = import_as_dict(EXAMPLE, User())
+        people = sorted(cls.db.iter_people(), key=lambda person: person.gramps_id)
+        # few enough pairs for all their results to stay in the cache
+        cls.people = people[:10]
+
+    def setUp(self):
+        self.dbstate = DbState()
+        self.dbstate.change_database_noclose(self.db)
+        self.calc = RelationshipCalculator()
+        self.calc.connect_db_signals(self.dbstate)
+        self.addCleanup(self.calc.disconnect_db_signals, self.dbstate)
+
+    def get_relationships(self, calc):
+        """
+        Return the relationship strings between each pair of people.
+        """
+        return [
+            calc.get_one_relationship(self.db, person, other)
+            for person in self.people
+            for other in self.people
+        ]
+
+    def test_same_relationships(self):
+        expected = self.get_relationships(RelationshipCalculator())
+        self.assertTrue(any(expected))
+        self.assertEqual(self.get_relationships(self.calc), expected)
+        # the second time, every relationship comes from the cache
+        with patch.object(self.calc, SEARCH, side_effect=AssertionError):
+            self.assertEqual(self.get_relationships(self.calc), expected)
+
+    def test_all_relationships(self):
+        person, other = self.people[0], self.people[1]
+        expected = RelationshipCalculator().get_all_relationships(
+            self.db, person, other
+        )
+        self.assertEqual(
+            self.calc.get_all_relationships(self.db, person, other), expected
+        )
+        # the cached result is not changed by the callers
+        self.assertEqual(
+            self.calc.get_all_relationships(self.db, person, other), expected
+        )
+
+    def test_no_signals(self):
+        calc = RelationshipCalculator()
+        calc.get_one_relationship(self.db, self.people[0], self.people[1])
+        # without the database signals, nothing is kept between searches
+        with patch.object(calc, SEARCH, wraps=getattr(calc, SEARCH)) as search:
+            calc.get_one_relationship(self.db, self.people[0], self.people[1])
+        self.assertEqual(search.call_count, 1)
+
+
+class RelationshipInvalidationTest(unittest.TestCase):
+    """
+    Check that the caches are cleared when the database changes.
+    """
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        self.addCleanup(self.db.close)
+        self.dbstate = DbState()
+        self.dbstate.change_database_noclose(self.db)
+        self.calc = RelationshipCalculator()
+        self.calc.connect_db_signals(self.dbstate)
+        self.addCleanup(self.calc.disconnect_db_signals, self.dbstate)
+        with DbTxn("Add people", self.db) as trans:
+            self.father = self.add_person(Person.MALE, trans)
+            self.son = self.add_person(Person.MALE, trans)
+
+    def add_person(self, gender, trans):
+        person = Person()
+        person.set_gender(gender)
+        self.db.add_person(person, trans)
+        return person
+
+    def relationship(self):
+        """
+        Return the relationship of the father to the son, read again from
+        the database.
+        """
+        return self.calc.get_one_relationship(
+            self.db,
+            self.db.get_person_from_handle(self.son.handle),
+            self.db.get_person_from_handle(self.father.handle),
+        )
+
+    def add_family(self):
+        with DbTxn("Add family", self.db) as trans:
+            family = Family()
+            family.set_father_handle(self.father.handle)
+            child_ref = ChildRef()
+            child_ref.set_reference_handle(self.son.handle)
+            family.add_child_ref(child_ref)
+            self.db.add_family(family, trans)
+            for person, add_family in (
+                (self.father, Person.add_family_handle),
+                (self.son, Person.add_parent_family_handle),
+            ):
+                person = self.db.get_person_from_handle(person.handle)
+                add_family(person, family.handle)
+                self.db.commit_person(person, trans)
+        return family
+
+    def test_family_added(self):
+        self.assertEqual(self.relationship(), "")
+        self.add_family()
+        self.assertEqual(self.relationship(), "father")
+
+    def test_family_removed(self):
+        family = self.add_family()
+        self.assertEqual(self.relationship(), "father")
+        with DbTxn("Remove family", self.db) as trans:
+            self.db.remove_family_relationships(family.handle, trans)
+        self.assertEqual(self.relationship(), "")
+
+    def test_database_changed(self):
+        self.assertEqual(self.relationship(), "")
+        other_db = make_database("sqlite")
+        other_db.load(":memory:")
+        self.addCleanup(other_db.close)
+        with DbTxn("Add people", other_db) as trans:
+            other_db.add_person(self.db.get_person_from_handle(self.son.handle), trans)
+        self.dbstate.change_database_noclose(other_db)
+        # the cache of the first database is not used for the second one
+        with patch.object(
+            self.calc, SEARCH, wraps=getattr(self.calc, SEARCH)
+        ) as search:
+            self.calc.get_one_relationship(
+                other_db,
+                other_db.get_person_from_handle(self.son.handle),
+                self.db.get_person_from_handle(self.father.handle),
+            )
+        self.assertEqual(search.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
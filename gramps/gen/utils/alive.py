@@ -702,14 +702,163 @@ def probably_alive_range(
     """
     # First, find the real database to use all people
     # for determining alive status:
+    basedb = _get_base_db(db)
+    if (
+        max_sib_age_diff is None
+        and max_age_prob_alive is None
+        and avg_generation_gap is None
+        and _is_stored_person(basedb, person)
+    ):
+        return _get_lifespan(basedb, person)
+    # Now, we create a wrapper for doing work:
+    pb = ProbablyAlive(basedb, max_sib_age_diff, max_age_prob_alive, avg_generation_gap)
+    return pb.probably_alive_range(person)
+
+
+def _get_base_db(db):
+    """
+    Return the database under the proxies.
+    """
     from ..proxy.proxybase import ProxyDbBase
 
     basedb = db
     while isinstance(basedb, ProxyDbBase):
         basedb = basedb.db
-    # Now, we create a wrapper for doing work:
-    pb = ProbablyAlive(basedb, max_sib_age_diff, max_age_prob_alive, avg_generation_gap)
-    return pb.probably_alive_range(person)
+    return basedb
+
+
+# -------------------------------------------------------------------------
+#
+# Stored lifespans
+#
+# -------------------------------------------------------------------------
+class _RecordingDb:
+    """
+    Wrapper of a database recording the handles of the people, families and
+    events read through it.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.handles = set()
+
+    def get_person_from_handle(self, handle):
+        self.handles.add(handle)
+        return self.db.get_person_from_handle(handle)
+
+    def get_family_from_handle(self, handle):
+        self.handles.add(handle)
+        return self.db.get_family_from_handle(handle)
+
+    def get_event_from_handle(self, handle):
+        self.handles.add(handle)
+        return self.db.get_event_from_handle(handle)
+
+
+def _get_lifespan_settings():
+    """
+    Return the settings the stored lifespans depend on.
+    """
+    return (_MAX_SIB_AGE_DIFF, _MAX_AGE_PROB_ALIVE, _AVG_GENERATION_GAP, glocale.lang)
+
+
+def _get_person_key(person):
+    """
+    Return the data of a person used to compute their lifespan.
+    """
+    return (
+        person.get_birth_ref() and person.get_birth_ref().serialize(),
+        person.get_death_ref() and person.get_death_ref().serialize(),
+        [ref.serialize() for ref in person.get_event_ref_list()],
+        person.get_family_handle_list(),
+        person.get_parent_family_handle_list(),
+    )
+
+
+def _is_stored_person(basedb, person):
+    """
+    Return True if the person is in the database as it is, and not for
+    example changed in an editor or by a proxy.
+    """
+    if person is None or not basedb.has_person_handle(person.handle):
+        return False
+    stored_person = basedb.get_person_from_handle(person.handle)
+    return _get_person_key(stored_person) == _get_person_key(person)
+
+
+def _compute_lifespan(db, person):
+    """
+    Compute the lifespan of a person, and return it in storable form with
+    the handles of the people, families and events it depends on.
+    """
+    recording_db = _RecordingDb(db)
+    birth, death, explain, other = ProbablyAlive(recording_db).probably_alive_range(
+        person
+    )
+    recording_db.handles.add(person.handle)
+    data = (
+        birth.serialize() if birth is not None else None,
+        death.serialize() if death is not None else None,
+        explain,
+        other.handle if other is not None else None,
+    )
+    return data, list(recording_db.handles)
+
+
+def _get_lifespan(basedb, person):
+    """
+    Return the estimated birth and death dates of a person as
+    :func:`probably_alive_range` does, from the lifespans stored in the
+    database, computing and storing it if needed.
+    """
+    settings = _get_lifespan_settings()
+    data = basedb.get_lifespan(person.handle, settings)
+    if data is None:
+        data, dependencies = _compute_lifespan(basedb, person)
+        basedb.set_lifespans(settings, [(person.handle, data, dependencies)])
+    birth, death, explain, other_handle = data
+    return (
+        Date().unserialize(birth) if birth is not None else None,
+        Date().unserialize(death) if death is not None else None,
+        explain,
+        basedb.get_person_from_handle(other_handle) if other_handle else None,
+    )
+
+
+def _compute_lifespans(db, handles):
+    """
+    Compute the lifespans of the people that are not stored yet.
+    """
+    settings = _get_lifespan_settings()
+    lifespans = []
+    for handle in handles:
+        if db.get_lifespan(handle, settings) is None:
+            person = db.get_person_from_handle(handle)
+            try:
+                data, dependencies = _compute_lifespan(db, person)
+            except DatabaseError:
+                # loop in the family tree, reported when the person is used
+                continue
+            lifespans.append((handle, data, dependencies))
+    return lifespans
+
+
+def update_lifespans(db):
+    """
+    Compute and store the estimated lifespans of all people of the database
+    that are not stored yet, in worker processes if the database supports
+    it.  Later calls to :func:`probably_alive` then read them from the
+    database, until the people, families or events they depend on change.
+    """
+    basedb = _get_base_db(db)
+    settings = _get_lifespan_settings()
+    count = basedb.get_lifespan_count(settings)
+    if count is None or count >= basedb.get_number_of_people():
+        return
+    lifespans = []
+    for chunk in basedb.map_over_people(_compute_lifespans):
+        lifespans.extend(chunk)
+    basedb.set_lifespans(settings, lifespans)
 
 
 def update_constants():
@@ -59,9 +59,22 @@ class LRU:
 
     def __getitem__(self, obj):
         """
-        Return item associated with Obj
+        Return item associated with Obj, which becomes the most recently
+        used
         """
-        return self.data[obj].value[1]
+        nobj = self.data[obj]
+        if nobj is not self.last:
+            # unlink the node, and append it at the end
+            if nobj.prev:
+                nobj.prev.next = nobj.next
+            else:
+                self.first = nobj.next
+            nobj.next.prev = nobj.prev
+            nobj.prev = self.last
+            nobj.next = None
+            self.last.next = nobj
+            self.last = nobj
+        return nobj.value[1]
 
     def __setitem__(self, obj, val):
         """
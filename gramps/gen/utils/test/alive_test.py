@@ -0,0 +1,132 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Stored lifespan tests on the example database.
+"""
+
+# -------------------------------------------------------------------------
+#
+# Standard python modules
+#
+# -------------------------------------------------------------------------
+import os
+import unittest
+from unittest.mock import patch
+
+# -------------------------------------------------------------------------
+#
+# Gramps modules
+#
+# -------------------------------------------------------------------------
+from ...const import DATA_DIR
+from ...db import DbTxn
+from ...db.utils import import_as_dict
+from ...user import User
+from .. import alive
+from ..alive import probably_alive, probably_alive_range, update_lifespans
+
+TEST_DIR = os.path.abspath(os.path.join(DATA_DIR, "tests"))
+EXAMPLE = os.path.join(TEST_DIR, "example.gramps")
+
+
+class LifespanTest(unittest.TestCase):
+    """
+    Compare the stored lifespans with the ones computed each time.
+    """
+
+    def setUp(self):
+        self.db = import_as_dict(EXAMPLE, User())
+        update_lifespans(self.db)
+
+    def get_range(self, person, stored=True):
+        """
+        Return the lifespan of a person in comparable form.
+        """
+        if stored:
+            value = probably_alive_range(person, self.db)
+        else:
+            # any explicit setting bypasses the stored lifespans
+            value = probably_alive_range(
+                person, self.db, max_sib_age_diff=alive._MAX_SIB_AGE_DIFF
+            )
+        birth, death, explain, other = value
+        return (
+            birth.serialize() if birth is not None else None,
+            death.serialize() if death is not None else None,
+            explain,
+            other.handle if other is not None else None,
+        )
+
+    def assert_stored_ranges(self):
+        """
+        Check that the stored lifespans of all people match the computed ones.
+        """
+        for person in self.db.iter_people():
+            self.assertEqual(
+                self.get_range(person), self.get_range(person, False), person.gramps_id
+            )
+
+    def shift_birth(self, person, years):
+        """
+        Move the birth date of a person by the given number of years.
+        """
+        event = self.db.get_event_from_handle(person.get_birth_ref().ref)
+        event.set_date_object(event.get_date_object().copy_offset_ymd(years))
+        with DbTxn("Edit birth", self.db) as trans:
+            self.db.commit_event(event, trans)
+
+    def test_stored(self):
+        with patch.object(alive, "_compute_lifespan", side_effect=AssertionError):
+            self.assert_stored_ranges()
+            for person in self.db.iter_people():
+                self.assertEqual(
+                    probably_alive(person, self.db),
+                    probably_alive(
+                        person,
+                        self.db,
+                        max_age_prob_alive=alive._MAX_AGE_PROB_ALIVE,
+                    ),
+                    person.gramps_id,
+                )
+
+    def test_edit_spouse(self):
+        person = self.db.get_person_from_gramps_id("I0667")
+        spouse = self.db.get_person_from_gramps_id("I0666")
+        before = self.get_range(person)
+        self.assertEqual(before[3], spouse.handle)
+        self.shift_birth(spouse, -60)
+        after = self.get_range(person)
+        self.assertNotEqual(after, before)
+        self.assertEqual(after, self.get_range(person, False))
+        self.assert_stored_ranges()
+
+    def test_edit_child(self):
+        person = self.db.get_person_from_gramps_id("I1442")
+        child = self.db.get_person_from_gramps_id("I1441")
+        before = self.get_range(person)
+        self.assertEqual(before[3], child.handle)
+        self.shift_birth(child, -60)
+        after = self.get_range(person)
+        self.assertNotEqual(after, before)
+        self.assertEqual(after, self.get_range(person, False))
+        self.assert_stored_ranges()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for lru.py """
+
+import unittest
+
+from ..lru import LRU
+
+
+class LRUTest(unittest.TestCase):
+    """
+    Test the order in which the entries are evicted.
+    """
+
+    def setUp(self):
+        self.lru = LRU(3)
+        for key in "abc":
+            self.lru[key] = key.upper()
+
+    def test_evict_oldest(self):
+        self.lru["d"] = "D"
+        self.assertNotIn("a", self.lru)
+        self.assertEqual([key for key in "bcd" if key in self.lru], ["b", "c", "d"])
+
+    def test_read_survives(self):
+        # reading an entry makes it the most recently used
+        self.assertEqual(self.lru["a"], "A")
+        self.lru["d"] = "D"
+        self.assertIn("a", self.lru)
+        self.assertNotIn("b", self.lru)
+        self.assertEqual(self.lru["c"], "C")
+        self.lru["e"] = "E"
+        self.assertNotIn("a", self.lru)
+        self.assertEqual(
+            [self.lru[key] for key in "cde" if key in self.lru], ["C", "D", "E"]
+        )
+
+    def test_read_last_and_delete(self):
+        self.assertEqual(self.lru["c"], "C")
+        self.assertEqual(self.lru["b"], "B")
+        del self.lru["a"]
+        self.assertEqual(self.lru.first.value, ("c", "C"))
+        self.assertEqual(self.lru.last.value, ("b", "B"))
+        self.assertIsNone(self.lru.first.prev)
+        self.assertIsNone(self.lru.last.next)
+
+
+if __name__ == "__main__":
+    unittest.main()
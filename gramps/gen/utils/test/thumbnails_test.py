@@ -0,0 +1,295 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Thumbnail index and thumbnail service tests.
+"""
+
+# -------------------------------------------------------------------------
+#
+# Standard python modules
+#
+# -------------------------------------------------------------------------
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+# -------------------------------------------------------------------------
+#
+# Gramps modules
+#
+# -------------------------------------------------------------------------
+from ...const import SIZE_LARGE, SIZE_NORMAL
+from .. import thumbnails
+from ..thumbnails import ThumbnailIndex, ThumbnailService, get_thumbnail_path
+
+
+# -------------------------------------------------------------------------
+#
+# ThumbnailIndexTest class
+#
+# -------------------------------------------------------------------------
+class ThumbnailIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, "thumb", "index.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_keys(self):
+        keys = {
+            ThumbnailIndex.get_key("a.jpg"),
+            ThumbnailIndex.get_key("a.jpg", size=SIZE_LARGE),
+            ThumbnailIndex.get_key("a.jpg", (0, 0, 50, 50)),
+            ThumbnailIndex.get_key("b.jpg"),
+        }
+        self.assertEqual(len(keys), 4)
+
+    def test_lookup(self):
+        index = ThumbnailIndex(self.filename)
+        key = ThumbnailIndex.get_key("a.jpg", (0, 0, 50, 50), SIZE_NORMAL)
+        self.assertIsNone(index.lookup(key, 10.5))
+        index.add(key, 10.5, "/thumb/a.png")
+        self.assertEqual(index.lookup(key, 10.5), "/thumb/a.png")
+        # the source file was modified
+        self.assertIsNone(index.lookup(key, 11.5))
+        self.assertTrue(index.discard(key))
+        self.assertFalse(index.discard(key))
+        self.assertIsNone(index.lookup(key, 10.5))
+
+    def make_thumbnail(self, name):
+        """
+        Create a dummy thumbnail file, and return its path.
+        """
+        filename = os.path.join(self.tmpdir.name, name)
+        with open(filename, "w") as thumb:
+            thumb.write("thumbnail")
+        return filename
+
+    def test_save(self):
+        index = ThumbnailIndex(self.filename)
+        key = ThumbnailIndex.get_key("a.jpg")
+        thumb = self.make_thumbnail("a.png")
+        index.add(key, 1700000000.123456, thumb)
+        index.save()
+        index = ThumbnailIndex(self.filename)
+        self.assertEqual(index.lookup(key, 1700000000.123456), thumb)
+
+    def test_prune(self):
+        index = ThumbnailIndex(self.filename)
+        keys = [ThumbnailIndex.get_key(name) for name in ("a.jpg", "b.jpg")]
+        thumbs = [self.make_thumbnail(name) for name in ("a.png", "b.png")]
+        for key, thumb in zip(keys, thumbs):
+            index.add(key, 1.0, thumb)
+        index.save()
+        os.remove(thumbs[0])
+        # the entry of the removed thumbnail is dropped when the index loads
+        index = ThumbnailIndex(self.filename)
+        self.assertIsNone(index.lookup(keys[0], 1.0))
+        self.assertEqual(index.lookup(keys[1], 1.0), thumbs[1])
+        index.save()
+        with open(self.filename, encoding="utf-8") as index_file:
+            self.assertEqual(list(json.load(index_file)["entries"]), [keys[1]])
+
+    def test_bad_file(self):
+        os.makedirs(os.path.dirname(self.filename))
+        with open(self.filename, "w", encoding="utf-8") as index_file:
+            index_file.write("{not json")
+        index = ThumbnailIndex(self.filename)
+        self.assertIsNone(index.lookup(ThumbnailIndex.get_key("a.jpg"), 1.0))
+
+
+# -------------------------------------------------------------------------
+#
+# ThumbnailTestCase class
+#
+# -------------------------------------------------------------------------
+class ThumbnailTestCase(unittest.TestCase):
+    """
+    Create thumbnails in a temporary directory, with a thumbnailer that
+    writes a dummy file.
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.thumb_dir = os.path.join(self.tmpdir.name, "normal")
+        self.src_file = os.path.join(self.tmpdir.name, "a.jpg")
+        with open(self.src_file, "w") as src:
+            src.write("image")
+        self.created = []
+        self.index = ThumbnailIndex(os.path.join(self.tmpdir.name, "index.json"))
+        for name, value in (
+            ("THUMB_NORMAL", self.thumb_dir),
+            ("THUMBNAIL_INDEX", self.index),
+            ("run_thumbnailer", self.run_thumbnailer),
+        ):
+            patcher = patch.object(thumbnails, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_thumbnailer(self, mime_type, src_file, dest_file, size, rectangle=None):
+        self.created.append(dest_file)
+        os.makedirs(os.path.dirname(dest_file), exist_ok=True)
+        with open(dest_file, "w") as dest:
+            dest.write("thumbnail")
+        return True
+
+
+# -------------------------------------------------------------------------
+#
+# ThumbnailPathTest class
+#
+# -------------------------------------------------------------------------
+class ThumbnailPathTest(ThumbnailTestCase):
+    """
+    Test get_thumbnail_path.
+    """
+
+    def test_create(self):
+        filename = get_thumbnail_path(self.src_file, "image/jpeg")
+        self.assertTrue(filename.startswith(self.thumb_dir))
+        self.assertTrue(os.path.isfile(filename))
+        self.assertEqual(self.created, [filename])
+        key = ThumbnailIndex.get_key(self.src_file)
+        mtime = os.stat(self.src_file).st_mtime
+        self.assertEqual(self.index.lookup(key, mtime), filename)
+
+    def test_index_hit(self):
+        filename = get_thumbnail_path(self.src_file, "image/jpeg")
+        self.assertEqual(get_thumbnail_path(self.src_file, "image/jpeg"), filename)
+        self.assertEqual(len(self.created), 1)
+
+    def test_removed_thumbnail(self):
+        filename = get_thumbnail_path(self.src_file, "image/jpeg")
+        os.remove(filename)
+        self.assertEqual(get_thumbnail_path(self.src_file, "image/jpeg"), filename)
+        self.assertTrue(os.path.isfile(filename))
+        self.assertEqual(len(self.created), 2)
+
+    def test_modified_source(self):
+        filename = get_thumbnail_path(self.src_file, "image/jpeg")
+        mtime = os.stat(filename).st_mtime
+        os.utime(self.src_file, (mtime + 10, mtime + 10))
+        self.assertEqual(get_thumbnail_path(self.src_file, "image/jpeg"), filename)
+        self.assertEqual(len(self.created), 2)
+
+    def test_rectangle(self):
+        whole = get_thumbnail_path(self.src_file, "image/jpeg")
+        region = get_thumbnail_path(self.src_file, "image/jpeg", (0, 0, 50, 50))
+        self.assertNotEqual(whole, region)
+        self.assertEqual(len(self.created), 2)
+
+    def test_missing_source(self):
+        missing = os.path.join(self.tmpdir.name, "missing.jpg")
+        filename = get_thumbnail_path(missing, "image/jpeg")
+        self.assertEqual(os.path.basename(filename), "image-missing.png")
+        self.assertEqual(self.created, [])
+
+    def test_failed_thumbnailer(self):
+        with patch.object(thumbnails, "run_thumbnailer", return_value=False):
+            filename = get_thumbnail_path(self.src_file, "image/jpeg")
+        self.assertEqual(os.path.basename(filename), "document.png")
+        key = ThumbnailIndex.get_key(self.src_file)
+        self.assertIsNone(self.index.lookup(key, os.stat(self.src_file).st_mtime))
+
+
+# -------------------------------------------------------------------------
+#
+# ThumbnailServiceTest class
+#
+# -------------------------------------------------------------------------
+class ThumbnailServiceTest(ThumbnailTestCase):
+    """
+    Test the creation of thumbnails in the worker threads.
+    """
+
+    def setUp(self):
+        ThumbnailTestCase.setUp(self)
+        self.release = threading.Event()
+        self.service = ThumbnailService(2)
+        self.addCleanup(self.shutdown)
+        patcher = patch.object(thumbnails, "get_thumbnailers", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_thumbnailer(self, mime_type, src_file, dest_file, size, rectangle=None):
+        self.release.wait(10)
+        return ThumbnailTestCase.run_thumbnailer(
+            self, mime_type, src_file, dest_file, size, rectangle
+        )
+
+    def shutdown(self):
+        """
+        Wait for the worker threads, and their done callbacks, to finish.
+        """
+        self.release.set()
+        self.service.close()
+
+    def test_request(self):
+        self.release.set()
+        future = self.service.request(self.src_file, "image/jpeg")
+        filename = future.result(10)
+        self.assertTrue(os.path.isfile(filename))
+        self.assertEqual(self.created, [filename])
+
+    def test_pending_request(self):
+        first = self.service.request(self.src_file, "image/jpeg")
+        second = self.service.request(self.src_file, "image/jpeg")
+        other = self.service.request(self.src_file, "image/jpeg", size=SIZE_LARGE)
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.release.set()
+        self.assertEqual(first.result(10), second.result(10))
+        other.result(10)
+        self.assertEqual(len(self.created), 2)
+        # a new request once the first one is done
+        third = self.service.request(self.src_file, "image/jpeg")
+        self.assertIsNot(first, third)
+        self.assertEqual(third.result(10), first.result())
+        self.assertEqual(len(self.created), 2)
+
+    def test_save_index(self):
+        self.release.set()
+        self.service.request(self.src_file, "image/jpeg").result(10)
+        # the index is saved by the done callback of the last thumbnail
+        self.shutdown()
+        index = ThumbnailIndex(self.index.filename)
+        key = ThumbnailIndex.get_key(self.src_file)
+        mtime = os.stat(self.src_file).st_mtime
+        self.assertEqual(index.lookup(key, mtime), self.created[0])
+
+    def test_close(self):
+        future = self.service.request(self.src_file, "image/jpeg")
+        self.release.set()
+        self.service.close()
+        self.assertTrue(future.done())
+        self.assertFalse(
+            any(thread.name.startswith("thumbnail") for thread in threading.enumerate())
+        )
+        # the worker threads are started again by the next request
+        filename = self.service.request(self.src_file, "image/jpeg").result(10)
+        self.assertEqual(filename, future.result())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,8 +28,13 @@ Handles generation and access to thumbnails used in Gramps.
 # Standard python modules
 #
 # -------------------------------------------------------------------------
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
 import logging
+import stat
+import threading
 from hashlib import md5
 
 # -------------------------------------------------------------------------
@@ -52,9 +57,11 @@ except:
 # gramps modules
 #
 # -------------------------------------------------------------------------
+from gramps.gen.config import config
 from gramps.gen.const import (
     ICON,
     IMAGE_DIR,
+    THUMB_DIR,
     THUMB_LARGE,
     THUMB_NORMAL,
     SIZE_NORMAL,
@@ -62,6 +69,7 @@ from gramps.gen.const import (
 )
 from gramps.gen.plug import BasePluginManager, START
 from gramps.gen.mime import get_type
+from gramps.gen.utils.file import media_path_full
 
 # -------------------------------------------------------------------------
 #
@@ -72,6 +80,9 @@ LOG = logging.getLogger(".thumbnail")
 
 THUMBNAILERS = []
 
+THUMB_INDEX = os.path.join(THUMB_DIR, "index.json")
+THUMB_INDEX_VERSION = 1
+
 
 def get_thumbnailers():
     if len(THUMBNAILERS):
@@ -123,6 +134,145 @@ def __build_thumb_path(path, rectangle=None, size=SIZE_NORMAL):
     return os.path.join(base_dir, md5_hash.hexdigest() + ".png")
 
 
+# -------------------------------------------------------------------------
+#
+# ThumbnailIndex
+#
+# -------------------------------------------------------------------------
+class ThumbnailIndex:
+    """
+    A persistent index of the thumbnails created, from the path, the
+    subsection rectangle and the size of a thumbnail to the modification time
+    of the source file when the thumbnail was created, and the path of the
+    thumbnail.
+
+    A thumbnail in the index is current while the source file keeps the
+    same modification time and the thumbnail file exists, so that its path
+    need not be hashed again.
+    """
+
+    def __init__(self, filename):
+        """
+        :param filename: the file the index is saved to
+        :type filename: unicode
+        """
+        self.filename = filename
+        self.__entries = None
+        self.__changed = False
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def get_key(path, rectangle=None, size=SIZE_NORMAL):
+        """
+        Return the key of a thumbnail in the index.
+        """
+        return "%s|%s|%s" % (size, rectangle, path)
+
+    def __load(self):
+        """
+        Read the index the first time it is used, without the thumbnails
+        whose files were removed since. Called with the lock held.
+        """
+        if self.__entries is not None:
+            return
+        self.__entries = {}
+        try:
+            with open(self.filename, encoding="utf-8") as index_file:
+                data = json.load(index_file)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == THUMB_INDEX_VERSION:
+            entries = data["entries"]
+            self.__entries = {
+                key: entry for key, entry in entries.items() if os.path.isfile(entry[1])
+            }
+            self.__changed = len(self.__entries) != len(entries)
+
+    def lookup(self, key, mtime):
+        """
+        Return the path of the thumbnail, or None if it is not in the index
+        or if the source file was modified since it was created.
+
+        :param key: the key of the thumbnail, from get_key()
+        :type key: unicode
+        :param mtime: the modification time of the source file
+        :type mtime: float
+        """
+        with self.__lock:
+            self.__load()
+            entry = self.__entries.get(key)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+        return None
+
+    def add(self, key, mtime, filename):
+        """
+        Add a thumbnail to the index.
+
+        :param key: the key of the thumbnail, from get_key()
+        :type key: unicode
+        :param mtime: the modification time of the source file
+        :type mtime: float
+        :param filename: the path of the thumbnail
+        :type filename: unicode
+        """
+        with self.__lock:
+            self.__load()
+            if self.__entries.get(key) != [mtime, filename]:
+                self.__entries[key] = [mtime, filename]
+                self.__changed = True
+
+    def discard(self, key):
+        """
+        Remove a thumbnail from the index, for example when its file cannot
+        be read. Return True if it was in the index.
+        """
+        with self.__lock:
+            self.__load()
+            if self.__entries.pop(key, None) is None:
+                return False
+            self.__changed = True
+            return True
+
+    def save(self):
+        """
+        Write the index, if it changed.
+        """
+        with self.__lock:
+            if not self.__changed:
+                return
+            data = json.dumps(
+                {"version": THUMB_INDEX_VERSION, "entries": self.__entries},
+                separators=(",", ":"),
+            )
+            self.__changed = False
+        tmp_filename = self.filename + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            with open(tmp_filename, "w", encoding="utf-8") as index_file:
+                index_file.write(data)
+            os.replace(tmp_filename, self.filename)
+        except OSError as err:
+            LOG.warning("Cannot save the thumbnail index %s: %s", self.filename, err)
+
+
+THUMBNAIL_INDEX = ThumbnailIndex(THUMB_INDEX)
+atexit.register(THUMBNAIL_INDEX.save)
+
+# A thumbnail can be requested by the GUI while a worker thread creates it.
+# They are created one at a time for each thumbnail path.
+_CREATE_LOCKS = {}
+_CREATE_LOCKS_LOCK = threading.Lock()
+
+
+def _get_create_lock(filename):
+    """
+    Return the lock held while creating the thumbnail file.
+    """
+    with _CREATE_LOCKS_LOCK:
+        return _CREATE_LOCKS.setdefault(filename, threading.Lock())
+
+
 # -------------------------------------------------------------------------
 #
 # __create_thumbnail_image
@@ -224,15 +374,41 @@ def get_thumbnail_image(src_file, mtype=None, rectangle=None, size=SIZE_NORMAL):
     :returns: thumbnail representing the source file
     :rtype: GdkPixbuf.Pixbuf
     """
-    try:
-        filename = get_thumbnail_path(src_file, mtype, rectangle, size)
-        return GdkPixbuf.Pixbuf.new_from_file(filename)
-    except (GLib.GError, OSError):
-        if mtype:
-            return find_mime_type_pixbuf(mtype)
-        else:
-            default = os.path.join(IMAGE_DIR, "document.png")
-            return GdkPixbuf.Pixbuf.new_from_file(default)
+    key = ThumbnailIndex.get_key(src_file, rectangle, size)
+    while True:
+        try:
+            filename = get_thumbnail_path(src_file, mtype, rectangle, size)
+            return GdkPixbuf.Pixbuf.new_from_file(filename)
+        except (GLib.GError, OSError):
+            # The thumbnail file may have been removed since it was indexed
+            if not THUMBNAIL_INDEX.discard(key):
+                return get_default_image(mtype)
+
+
+def get_default_image(mtype=None):
+    """
+    Return the image (in GTK Pixbuf format) shown in place of a thumbnail:
+    the associated icon for the mime type, or a generic document icon.
+
+    :param mime_type: mime type of the source file
+    :type mime_type: unicode
+    :rtype: GdkPixbuf.Pixbuf
+    """
+    if mtype:
+        return find_mime_type_pixbuf(mtype)
+    else:
+        default = os.path.join(IMAGE_DIR, "document.png")
+        return GdkPixbuf.Pixbuf.new_from_file(default)
+
+
+def get_thumbnail_image_async(
+    src_file, callback, mtype=None, rectangle=None, size=SIZE_NORMAL
+):
+    """
+    Return the thumbnail image associated with the source file without
+    waiting for it to be created, see :meth:`ThumbnailService.get_image`.
+    """
+    return get_thumbnail_service().get_image(src_file, callback, mtype, rectangle, size)
 
 
 # -------------------------------------------------------------------------
@@ -255,13 +431,252 @@ def get_thumbnail_path(src_file, mtype=None, rectangle=None, size=SIZE_NORMAL):
     :returns: thumbnail representing the source file
     :rtype: GdkPixbuf.Pixbuf
     """
-    filename = __build_thumb_path(src_file, rectangle, size)
-    if not os.path.isfile(src_file):
+    try:
+        src_stat = os.stat(src_file)
+    except OSError:
+        src_stat = None
+    if src_stat is None or not stat.S_ISREG(src_stat.st_mode):
         return os.path.join(IMAGE_DIR, "image-missing.png")
-    else:
+
+    # Look for a current thumbnail in the index first, which saves hashing
+    # the path and comparing the modification times.
+    key = ThumbnailIndex.get_key(src_file, rectangle, size)
+    filename = THUMBNAIL_INDEX.lookup(key, src_stat.st_mtime)
+    if filename is not None:
+        if os.path.isfile(filename):
+            return filename
+        # The thumbnail file was removed since it was indexed
+        THUMBNAIL_INDEX.discard(key)
+
+    filename = __build_thumb_path(src_file, rectangle, size)
+    with _get_create_lock(filename):
         if (not os.path.isfile(filename)) or (
-            os.path.getmtime(src_file) > os.path.getmtime(filename)
+            src_stat.st_mtime > os.path.getmtime(filename)
         ):
             if not __create_thumbnail_image(src_file, mtype, rectangle, size):
                 return os.path.join(IMAGE_DIR, "document.png")
-        return os.path.abspath(filename)
+    filename = os.path.abspath(filename)
+    THUMBNAIL_INDEX.add(key, src_stat.st_mtime, filename)
+    return filename
+
+
+# -------------------------------------------------------------------------
+#
+# ThumbnailService
+#
+# -------------------------------------------------------------------------
+class ThumbnailService:
+    """
+    Creates thumbnails in a pool of worker threads, so that the GUI need
+    not wait for them.
+
+    The thumbnails of all the media objects of a database, and of the
+    regions of their media references, can be created in the background
+    when it is loaded. Thumbnails requested by the GUI are created before
+    the remaining ones.
+    """
+
+    # The number of background thumbnails queued for each worker.
+    QUEUED_PER_WORKER = 2
+
+    def __init__(self, workers=0):
+        """
+        :param workers: the number of worker threads, with 0 meaning the
+          number of CPUs
+        :type workers: int
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.__executor = None
+        self.__pending = {}
+        self.__lock = threading.Lock()
+        self.__jobs = None
+        self.__timeout_id = None
+
+    def __get_executor(self):
+        """
+        Return the pool of worker threads, started when first used.
+        """
+        if self.__executor is None:
+            # Load the thumbnailer plugins in the main thread.
+            get_thumbnailers()
+            self.__executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="thumbnail"
+            )
+        return self.__executor
+
+    def close(self):
+        """
+        Wait for the thumbnails requested to be created, and stop the worker
+        threads. They are started again by the next request.
+        """
+        with self.__lock:
+            executor = self.__executor
+            self.__executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def request(self, src_file, mtype=None, rectangle=None, size=SIZE_NORMAL):
+        """
+        Create the thumbnail in a worker thread, if it is not current.
+        Return a :class:`concurrent.futures.Future` of the result of
+        :func:`get_thumbnail_path`.
+
+        :param src_file: Source media file
+        :type src_file: unicode
+        :param mime_type: mime type of the source file
+        :type mime_type: unicode
+        :param rectangle: subsection rectangle
+        :type rectangle: tuple
+        """
+        key = ThumbnailIndex.get_key(src_file, rectangle, size)
+        with self.__lock:
+            future = self.__pending.get(key)
+            if future is not None:
+                return future
+            future = self.__get_executor().submit(
+                get_thumbnail_path, src_file, mtype, rectangle, size
+            )
+            self.__pending[key] = future
+        future.add_done_callback(lambda dummy: self.__done(key))
+        return future
+
+    def __done(self, key):
+        """
+        Called in a worker thread when a thumbnail is done.
+        """
+        with self.__lock:
+            del self.__pending[key]
+            idle = not self.__pending and self.__jobs is None
+        if idle:
+            THUMBNAIL_INDEX.save()
+
+    def get_image(
+        self, src_file, callback, mtype=None, rectangle=None, size=SIZE_NORMAL
+    ):
+        """
+        Return the thumbnail image (in GTK Pixbuf format) associated with
+        the source file if it is current. Otherwise, return the image of
+        :func:`get_default_image` and create the thumbnail in a worker
+        thread. When it is done, callback is called from the GTK main loop
+        with the thumbnail image.
+
+        :param src_file: Source media file
+        :type src_file: unicode
+        :param callback: function called with the thumbnail image
+        :type callback: function
+        :param mime_type: mime type of the source file
+        :type mime_type: unicode
+        :param rectangle: subsection rectangle
+        :type rectangle: tuple
+        :rtype: GdkPixbuf.Pixbuf
+        """
+        key = ThumbnailIndex.get_key(src_file, rectangle, size)
+        try:
+            filename = THUMBNAIL_INDEX.lookup(key, os.stat(src_file).st_mtime)
+        except OSError:
+            # The missing image is returned at once.
+            return get_thumbnail_image(src_file, mtype, rectangle, size)
+        if filename is not None:
+            try:
+                return GdkPixbuf.Pixbuf.new_from_file(filename)
+            except GLib.GError:
+                THUMBNAIL_INDEX.discard(key)
+
+        def show_image():
+            callback(get_thumbnail_image(src_file, mtype, rectangle, size))
+            return False
+
+        self.request(src_file, mtype, rectangle, size).add_done_callback(
+            lambda dummy: GLib.idle_add(show_image)
+        )
+        return get_default_image(mtype)
+
+    def queue_database(self, db, sizes=(SIZE_NORMAL,)):
+        """
+        Create in the background the thumbnails of all the media objects of
+        the database, and of the regions of their media references.  The
+        thumbnails of a database queued before are no longer created.
+
+        :param db: the database, or None to only stop the thumbnails of
+          the database queued before
+        :param sizes: the sizes of the thumbnails
+        :type sizes: tuple
+        """
+        if self.__timeout_id is not None:
+            GLib.source_remove(self.__timeout_id)
+            self.__timeout_id = None
+        with self.__lock:
+            self.__jobs = None
+            if db is not None and db.is_open():
+                self.__jobs = self.__iter_jobs(db, sizes)
+        if self.__jobs is not None:
+            self.__timeout_id = GLib.timeout_add(
+                50, self.__queue_jobs, priority=GLib.PRIORITY_LOW
+            )
+
+    def __queue_jobs(self):
+        """
+        Queue the next background thumbnails, while few are waiting for a
+        worker. Called from the GTK main loop.
+        """
+        try:
+            while len(self.__pending) < self.workers * self.QUEUED_PER_WORKER:
+                self.request(*next(self.__jobs))
+        except StopIteration:
+            pass
+        except Exception as err:
+            # The database may have been closed.
+            LOG.warning("Stopped creating thumbnails: %s", err)
+        else:
+            return True
+        with self.__lock:
+            self.__jobs = None
+            idle = not self.__pending
+        self.__timeout_id = None
+        if idle:
+            THUMBNAIL_INDEX.save()
+        return False
+
+    @staticmethod
+    def __iter_jobs(db, sizes):
+        """
+        Generate the arguments of the thumbnails of the media objects of
+        the database, then of the regions of the media references.
+        """
+        for media in db.iter_media():
+            path = media_path_full(db, media.get_path())
+            for size in sizes:
+                yield path, media.get_mime_type(), None, size
+        for iter_objects in (
+            db.iter_people,
+            db.iter_families,
+            db.iter_events,
+            db.iter_places,
+            db.iter_sources,
+            db.iter_citations,
+        ):
+            for obj in iter_objects():
+                for media_ref in obj.get_media_list():
+                    rectangle = media_ref.get_rectangle()
+                    if rectangle is None:
+                        continue
+                    media = db.get_media_from_handle(media_ref.ref)
+                    if media is None:
+                        continue
+                    path = media_path_full(db, media.get_path())
+                    for size in sizes:
+                        yield path, media.get_mime_type(), rectangle, size
+
+
+_SERVICE = None
+
+
+def get_thumbnail_service():
+    """
+    Return the thumbnail service, with the number of worker threads of the
+    "behavior.thumbnail-workers" option.
+    """
+    global _SERVICE
+    if _SERVICE is None:
+        _SERVICE = ThumbnailService(config.get("behavior.thumbnail-workers"))
+    return _SERVICE
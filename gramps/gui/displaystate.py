@@ -66,6 +66,7 @@ from .managedwindow import GrampsWindowManager
 from gramps.gen.relationship import get_relationship_calculator
 from .glade import Glade
 from gramps.gen.utils.db import navigation_label
+from gramps.gen.utils.thumbnails import get_thumbnail_service
 from gramps.gen.errors import HandleError
 from .widgets.progressdialog import ProgressMonitor, GtkProgressDialog
 from .dialog import ErrorDialog, WarningDialog
@@ -609,6 +610,9 @@ class DisplayState(Callback):
     def db_changed(self, db):
         db.connect("long-op-start", self.progress_monitor.add_op)
         self.clear_history()
+        # create the missing thumbnails in the background
+        if config.get("behavior.generate-thumbnails"):
+            get_thumbnail_service().queue_database(db)
 
     def set_relationship_class(self):
         """method that rebinds the relationship to the current rel calc
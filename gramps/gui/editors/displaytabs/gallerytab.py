@@ -24,6 +24,7 @@
 # Python classes
 #
 # -------------------------------------------------------------------------
+from functools import partial
 import os
 import pickle
 from urllib.parse import urlparse
@@ -57,7 +58,7 @@ from gramps.gen.utils.file import (
     relative_path,
     create_checksum,
 )
-from gramps.gen.utils.thumbnails import get_thumbnail_image
+from gramps.gen.utils.thumbnails import get_thumbnail_image_async
 from gramps.gen.errors import WindowActiveError
 from gramps.gen.mime import get_type, is_valid_type
 from ...ddtargets import DdTargets
@@ -276,18 +277,32 @@ class GalleryTab(ButtonTab, DbGUIElement):
                     parent=self.uistate.window,
                 )
             else:
-                pixbuf = get_thumbnail_image(
+                node = self.iconmodel.append(row=[None, obj.get_description(), ref])
+                row_ref = Gtk.TreeRowReference.new(
+                    self.iconmodel, self.iconmodel.get_path(node)
+                )
+                pixbuf = get_thumbnail_image_async(
                     media_path_full(self.dbstate.db, obj.get_path()),
+                    partial(self.__thumbnail_done, self.iconmodel, row_ref),
                     obj.get_mime_type(),
                     ref.get_rectangle(),
                 )
-                self.iconmodel.append(row=[pixbuf, obj.get_description(), ref])
+                self.iconmodel.set_value(node, 0, pixbuf)
         self._connect_icon_model()
         self._set_label()
         self._selection_changed()
         if self.update:
             self.update()
 
+    @staticmethod
+    def __thumbnail_done(iconmodel, row_ref, pixbuf):
+        """
+        Show the thumbnail created after the gallery was built, if its row
+        is still there.
+        """
+        if row_ref.valid():
+            iconmodel[row_ref.get_path()][0] = pixbuf
+
     def get_selected(self):
         node = self.iconlist.get_selected_items()
         if len(node) > 0:
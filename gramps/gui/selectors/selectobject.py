@@ -28,6 +28,7 @@
 #
 # -------------------------------------------------------------------------
 import gc
+from functools import partial
 
 # -------------------------------------------------------------------------
 #
@@ -46,7 +47,7 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.sgettext
 from gramps.gen.const import THUMBSCALE
 from gramps.gen.utils.file import media_path_full
-from gramps.gen.utils.thumbnails import get_thumbnail_image
+from gramps.gen.utils.thumbnails import get_thumbnail_image_async
 from ..views.treemodels import MediaModel
 from .baseselector import BaseSelector
 from gramps.gen.const import URL_MANUAL_SECT1
@@ -92,6 +93,7 @@ class SelectObject(BaseSelector):
         vbox.pack_start(self.preview, False, True, 0)
         vbox.reorder_child(self.preview, 1)
         self.preview.show()
+        self.preview_handle = None
         self.selection.connect("changed", self._row_change)
 
     def _row_change(self, obj):
@@ -100,10 +102,23 @@ class SelectObject(BaseSelector):
             return
         handle = id_list[0]
         obj = self.get_from_handle_func()(handle)
-        pix = get_thumbnail_image(media_path_full(self.db, obj.get_path()))
+        self.preview_handle = handle
+        pix = get_thumbnail_image_async(
+            media_path_full(self.db, obj.get_path()),
+            partial(self._thumbnail_done, handle),
+            obj.get_mime_type(),
+        )
         self.preview.set_from_pixbuf(pix)
         gc.collect()
 
+    def _thumbnail_done(self, handle, pix):
+        """
+        Display the thumbnail created in the background, unless another
+        row was selected since.
+        """
+        if handle == self.preview_handle:
+            self.preview.set_from_pixbuf(pix)
+
     def get_config_name(self):
         return __name__
 
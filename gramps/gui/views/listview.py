@@ -364,6 +364,7 @@ class ListView(NavigationView):
             self.build_columns(preserve_col)
             self.list.restore_column_size()
             cput2 = perf_counter()
+            self.model.filter_callback = self.__filter_done
             self.list.set_model(self.model)
             cput3 = perf_counter()
             self.__display_column_sort()
@@ -396,6 +397,15 @@ class ListView(NavigationView):
         else:
             self.dirty = True
 
+    def __filter_done(self):
+        """
+        Called when the model has added all the rows matching the filter.
+        """
+        if self.active:
+            self.uistate.show_filter_results(
+                self.dbstate, self.model.displayed(), self.model.total()
+            )
+
     def search_build_tree(self):
         self.build_tree()
 
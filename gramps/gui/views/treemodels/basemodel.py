@@ -20,6 +20,20 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 #
 
+# -------------------------------------------------------------------------
+#
+# Python modules
+#
+# -------------------------------------------------------------------------
+from time import perf_counter
+
+# -------------------------------------------------------------------------
+#
+# GNOME/GTK modules
+#
+# -------------------------------------------------------------------------
+from gi.repository import GLib
+
 # -------------------------------------------------------------------------
 #
 # Gramps modules
@@ -28,6 +42,9 @@
 from gramps.gen.utils.lru import LRU
 from gramps.gen.config import config
 
+# Time in seconds a filter may run before control returns to the main loop
+FILTER_CHUNK_TIME = 0.05
+
 
 class BaseModel:
     # LRU cache size
@@ -36,14 +53,99 @@ class BaseModel:
     def __init__(self):
         self.lru_data = LRU(BaseModel._CACHE_SIZE)
         self.lru_path = LRU(BaseModel._CACHE_SIZE)
+        # Running filter, see start_filter
+        self._filter_iter = None
+        self._filter_add = None
+        self._filter_source = None
+        # Called when a running filter has added all its matches
+        self.filter_callback = None
 
     def destroy(self):
         """
         Destroy the items in memory.
         """
+        self.cancel_filter()
+        self.filter_callback = None
         self.lru_data = None
         self.lru_path = None
 
+    def start_filter(self, matches, add_func):
+        """
+        Add the matches of a filter to the model in idle time.
+
+        The first matches are added immediately, the remaining ones in chunks
+        while Gtk is idle, so the view can show the first results while the
+        filter runs.
+
+        :param matches: generator of matches, see GenericFilter.iter_apply
+        :param add_func: function called with each match to add it
+        """
+        self.cancel_filter()
+        self._filter_iter = matches
+        self._filter_add = add_func
+        if self._filter_chunk():
+            self._filter_source = GLib.idle_add(self._filter_chunk)
+
+    def _filter_chunk(self, limit=FILTER_CHUNK_TIME):
+        """
+        Add the next matches of the running filter to the model, for at most
+        limit seconds, or all of them if limit is None.
+        Return True while matches remain, as used by GLib.idle_add.
+        """
+        stop = perf_counter() + (limit or 0)
+        done = True
+        try:
+            for match in self._filter_iter:
+                self._filter_add(match)
+                if limit is not None and perf_counter() > stop:
+                    done = False
+                    break
+        finally:
+            if done:
+                self._filter_iter = None
+                self._filter_add = None
+                self._filter_source = None
+        if done and self.filter_callback:
+            self.filter_callback()
+        return not done
+
+    def complete_filter(self):
+        """
+        Add all remaining matches of the running filter to the model.
+        Called before the model is changed for other reasons.
+        """
+        if self._filter_iter is not None:
+            if self._filter_source is not None:
+                GLib.source_remove(self._filter_source)
+                self._filter_source = None
+            self._filter_chunk(None)
+
+    def cancel_filter(self):
+        """
+        Stop the running filter, keeping the matches already added.
+        """
+        if self._filter_source is not None:
+            GLib.source_remove(self._filter_source)
+            self._filter_source = None
+        if self._filter_iter is not None:
+            self._filter_iter.close()
+            self._filter_iter = None
+            self._filter_add = None
+
+    def is_filtering(self):
+        """
+        Return True while a filter is adding matches to the model.
+        """
+        return self._filter_iter is not None
+
+    def prefetch(self, handles):
+        """
+        Load the data needed to display the rows with the given handles,
+        which are about to be shown.  Models whose columns read other
+        objects can override this to read them in batches.
+        """
+        pass
+
     def clear_cache(self, handle=None):
         """
         Clear the LRU cache. Always clear lru_path, because paths may have
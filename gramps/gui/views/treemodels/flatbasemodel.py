@@ -84,6 +84,10 @@ from gramps.gen.proxy.cache import CacheProxyDb
 
 UEMPTY = ""
 
+# Number of rows before and after a displayed row whose data is prefetched
+# when the row is not in the prefetched range, see FlatBaseModel.do_get_value
+PREFETCH_ROWS = 100
+
 
 class FlatNodeMap:
     """
@@ -399,6 +403,26 @@ class FlatNodeMap:
             self.__corr = (len(self._index2hndl) - 1, -1)
         return Gtk.TreePath((self.real_path(insert_pos),))
 
+    def append(self, srtkey_hndl):
+        """
+        Append a node. Given is a tuple (sortkey, handle) that sorts after all
+        rows present, as happens when the rows of a filter are added in order.
+        Returns the path of the appended row
+
+        :param srtkey_hndl: the (sortkey, handle) tuple that must be appended
+        :type srtkey_hndl: sortkey key already transformed by self.sort_func, object handle
+
+        :Returns: path of the row appended in the treeview
+        :Returns type: Gtk.TreePath
+        """
+        index = len(self._index2hndl)
+        self._index2hndl.append(srtkey_hndl)
+        self._hndl2index[srtkey_hndl[1]] = index
+        # update self.__corr so it remains correct
+        if self._reverse:
+            self.__corr = (index, -1)
+        return Gtk.TreePath((self.real_path(index),))
+
     def delete(self, handle):
         """
         Delete the row with the given (handle).
@@ -484,8 +508,11 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         # get the function that maps data to sort_keys
         self.sort_func = lambda x: glocale.sort_key(self.smap[col](x))
         self.sort_col = scol
+        self.sort_model_col = col
         self.skip = skip
         self._in_build = False
+        # range of the node map indexes whose rows have been prefetched
+        self._prefetch_range = range(0)
 
         self.node_map = FlatNodeMap()
         self.set_search(search)
@@ -567,12 +594,28 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         """
         return None
 
+    def stored_sort_key(self, col):
+        """
+        Return a (class_name, sort_name, func) tuple if the sort value of
+        the model column only depends on the raw data of the object, so
+        that the database can store the sort keys.  func must return the
+        same value as the sort function of the column, without using the
+        model cache.  Return None otherwise.
+        """
+        return None
+
     def sort_keys(self):
         """
         Return the (sort_key, handle) list of all data that can maximally
         be shown.
         This list is sorted ascending, via localized string sort.
         """
+        stored = self.stored_sort_key(self.sort_model_col)
+        if stored is not None:
+            class_name, sort_name, func = stored
+            return self.db.get_sort_keys(
+                class_name, sort_name, lambda data: glocale.sort_key(func(data))
+            )
         # use cursor as a context manager
         with self.gen_cursor() as cursor:
             # loop over database and store the sort field, and the handle
@@ -584,6 +627,7 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         """function called when view must be build, given a search text
         in the top search bar
         """
+        self.cancel_filter()
         self.clear_cache()
         self._in_build = True
         if (self.db is not None) and self.db.is_open():
@@ -616,7 +660,11 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
     def _rebuild_filter(self, ignore=None):
         """function called when view must be build, given filter options
         in the filter sidebar
+
+        The rows matching the filter are added while Gtk is idle, see
+        start_filter.
         """
+        self.cancel_filter()
         self.clear_cache()
         self._in_build = True
         if (self.db is not None) and self.db.is_open():
@@ -626,10 +674,13 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
                 allkeys = self.sort_keys()
             if self.search:
                 ident = False
+                dlist = []
                 if ignore is None:
-                    dlist = self.search.apply(cdb, allkeys, tupleind=1, user=self.user)
+                    matches = self.search.iter_apply(
+                        cdb, allkeys, tupleind=1, user=self.user
+                    )
                 else:
-                    dlist = self.search.apply(
+                    matches = self.search.iter_apply(
                         cdb, [k for k in allkeys if k[1] != ignore], tupleind=1
                     )
             elif ignore is None:
@@ -641,16 +692,28 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
             self.node_map.set_path_map(
                 dlist, allkeys, identical=ident, reverse=self._reverse
             )
+            if self.search:
+                self.start_filter(matches, self._add_filter_row)
         else:
             self.node_map.clear_map()
         self._in_build = False
 
+    def _add_filter_row(self, srtkey_hndl):
+        """
+        Add a row matching the filter. Rows are added in sort order.
+        """
+        path = self.node_map.append(srtkey_hndl)
+        if not self._in_build:
+            node = self.do_get_iter(path)[1]
+            self.row_inserted(path, node)
+
     def add_row_by_handle(self, handle):
         """
         Add a row. This is called after object with handle is created.
         Row is only added if search/filter data is such that it must be shown
         """
         assert isinstance(handle, str)
+        self.complete_filter()
         if self.node_map.get_path_from_handle(handle) is not None:
             return  # row is already displayed
         data = self.map(handle)
@@ -669,6 +732,7 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         """
         Delete a row, called after the object with handle is deleted
         """
+        self.complete_filter()
         delete_path = self.node_map.delete(handle)
         # delete_path is an integer from 0 to n-1
         if delete_path is not None:
@@ -679,6 +743,7 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         """
         Update a row, called after the object with handle is changed
         """
+        self.complete_filter()
         if self.node_map.get_path_from_handle(handle) is None:
             return  # row is not currently displayed
         self.clear_cache(handle)
@@ -801,12 +866,33 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
             ##        when using user_data for that!
             ##upstream bug: https://bugzilla.gnome.org/show_bug.cgi?id=698366
             index = 0
+        if index not in self._prefetch_range:
+            self._prefetch_rows(index)
         handle = self.node_map._index2hndl[index][1]
         val = self._get_value(handle, col)
         # print 'val is', val, type(val)
 
         return val
 
+    def _prefetch_rows(self, index):
+        """
+        Prefetch the data of the rows around the given node map index, so
+        that scrolling does not read the rows one by one.
+        """
+        index2hndl = self.node_map._index2hndl
+        self._prefetch_range = range(
+            max(0, index - PREFETCH_ROWS), min(len(index2hndl), index + PREFETCH_ROWS)
+        )
+        self.prefetch([index2hndl[i][1] for i in self._prefetch_range])
+
+    def clear_cache(self, handle=None):
+        """
+        Clear the LRU cache, and the prefetched range, as the rows may have
+        moved.
+        """
+        BaseModel.clear_cache(self, handle)
+        self._prefetch_range = range(0)
+
     def do_iter_previous(self, iter):
         # print 'do_iter_previous'
         raise NotImplementedError
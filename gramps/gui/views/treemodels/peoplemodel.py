@@ -31,6 +31,7 @@ TreeModel for the Gramps Person tree.
 #
 # -------------------------------------------------------------------------
 from html import escape
+from zlib import crc32
 
 # -------------------------------------------------------------------------
 #
@@ -73,6 +74,7 @@ from .flatbasemodel import FlatBaseModel
 from .treebasemodel import TreeBaseModel
 from .basemodel import BaseModel
 from gramps.gen.config import config
+from gramps.gen.errors import HandleError
 
 # -------------------------------------------------------------------------
 #
@@ -96,6 +98,18 @@ invalid_date_format = config.get("preferences.invalid-date-format")
 no_surname = config.get("preferences.no-surname-text")
 
 
+def _raw_sorted_name(data):
+    return name_displayer.raw_sorted_name(data[COLUMN_NAME])
+
+
+def _raw_gramps_id(data):
+    return data[COLUMN_ID]
+
+
+def _raw_change(data):
+    return "%012x" % data[COLUMN_CHANGE]
+
+
 # -------------------------------------------------------------------------
 #
 # PeopleBaseModel
@@ -115,7 +129,7 @@ class PeopleBaseModel(BaseModel):
         BaseModel.__init__(self)
         self.db = db
         self.gen_cursor = db.get_person_cursor
-        self.map = db.get_raw_person_data
+        self.map = self.get_person_data
 
         self.fmap = [
             self.column_name,
@@ -175,6 +189,86 @@ class PeopleBaseModel(BaseModel):
         """Return the number of columns in the model"""
         return len(self.fmap) + 1
 
+    def stored_sort_key(self, col):
+        """
+        Return the stored sort key of the name, ID and last changed columns.
+        The name of the name key includes a checksum of the name formats.
+        """
+        if col == 0:
+            formats = (
+                name_displayer.get_default_format(),
+                name_displayer.get_name_format(also_default=True, only_active=False),
+                name_displayer.get_pat_as_surn(),
+            )
+            return (
+                "Person",
+                "name-%08x" % crc32(repr(formats).encode("utf-8")),
+                _raw_sorted_name,
+            )
+        if col == 1:
+            return ("Person", "gramps_id", _raw_gramps_id)
+        if col == 14:
+            return ("Person", "change", _raw_change)
+        return None
+
+    def get_person_data(self, handle):
+        """
+        Return the raw data of the person, from the cache if it was
+        prefetched.
+        """
+        cached, data = self.get_cached_value(handle, "DATA")
+        if not cached:
+            data = self.db.get_raw_person_data(handle)
+        return data
+
+    def prefetch(self, handles):
+        """
+        Read the people and the events, places, families, spouses and notes
+        shown in their columns in a few batched reads.  The raw data of the
+        people is kept in the cache, the other objects in the database cache.
+        """
+        handles = [
+            handle for handle in handles if not self.get_cached_value(handle, "DATA")[0]
+        ]
+        if not handles:
+            return
+        event_handles = set()
+        family_handles = set()
+        note_handles = set()
+        for handle, data in self.db.get_raw_data_from_handles(
+            "Person", handles
+        ).items():
+            self.set_cached_value(handle, "DATA", data)
+            for event_ref in data[COLUMN_EVENT]:
+                event_handles.add(EventRef().unserialize(event_ref).ref)
+            family_handles.update(data[COLUMN_FAMILY])
+            family_handles.update(data[COLUMN_PARENT])
+            note_handles.update(data[COLUMN_NOTES])
+
+        self.db.prefetch_handles("Event", event_handles)
+        self.db.prefetch_handles("Family", family_handles)
+        self.db.prefetch_handles("Note", note_handles)
+        place_handles = set()
+        for event_handle in event_handles:
+            try:
+                event = self.db.get_event_from_handle(event_handle)
+            except HandleError:
+                continue
+            if event and event.get_place_handle():
+                place_handles.add(event.get_place_handle())
+        self.db.prefetch_handles("Place", place_handles)
+        spouse_handles = set()
+        for family_handle in family_handles:
+            try:
+                family = self.db.get_family_from_handle(family_handle)
+            except HandleError:
+                continue
+            if family:
+                spouse_handles.add(family.get_father_handle())
+                spouse_handles.add(family.get_mother_handle())
+        spouse_handles.discard(None)
+        self.db.prefetch_handles("Person", spouse_handles)
+
     def sort_name(self, data):
         handle = data[0]
         cached, name = self.get_cached_value(handle, "SORT_NAME")
@@ -431,9 +525,7 @@ class PeopleBaseModel(BaseModel):
     def _get_parents_data(self, data):
         parents = 0
         if data[COLUMN_PARENT]:
-            person = self.db.get_person_from_gramps_id(data[COLUMN_ID])
-            family_list = person.get_parent_family_handle_list()
-            for fam_hdle in family_list:
+            for fam_hdle in data[COLUMN_PARENT]:
                 family = self.db.get_family_from_handle(fam_hdle)
                 if family.get_father_handle():
                     parents += 1
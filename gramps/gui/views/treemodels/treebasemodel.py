@@ -33,6 +33,7 @@ This module provides the model that is used for all hierarchical treeviews.
 #
 # -------------------------------------------------------------------------
 from time import perf_counter
+from functools import partial
 import logging
 
 _LOG = logging.getLogger(".gui.treebasemodel")
@@ -513,6 +514,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         data_filter and data_filter2 will have been set from set_search
         """
         cput = perf_counter()
+        self.cancel_filter()
         self.clear_cache()
         self._in_build = True
 
@@ -608,8 +610,27 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
     def __rebuild_filter(self, dfilter, skip, items, gen_cursor, data_map, add_func):
         """
         Rebuild the data map for a single Gramps object type, where a filter
-        is applied.
+        is applied. The rows matching the filter are added while Gtk is idle,
+        see start_filter.
         """
+        self.__total += items
+        assert not skip
+        if dfilter:
+            cdb = CacheProxyDb(self.db)
+            # Collect the handles in tree order first, so that no cursor
+            # stays open between idle calls.
+            with dfilter.get_tree_cursor(cdb) as cursor:
+                handles = [handle for handle, data in cursor]
+            matches = dfilter.iter_apply(
+                cdb,
+                handles,
+                user=User(parent=self.uistate.window, uistate=self.uistate),
+            )
+            self.start_filter(
+                matches, partial(self.__add_filter_row, data_map, add_func)
+            )
+            return
+
         pmon = progressdlg.ProgressMonitor(
             progressdlg.StatusProgress,
             (self.uistate,),
@@ -618,29 +639,25 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         )
         status_ppl = progressdlg.LongOpStatus(total_steps=items, interval=items // 20)
         pmon.add_op(status_ppl)
-
-        self.__total += items
-        assert not skip
-        if dfilter:
-            cdb = CacheProxyDb(self.db)
-            for handle in dfilter.apply(
-                cdb,
-                tree=True,
-                user=User(parent=self.uistate.window, uistate=self.uistate),
-            ):
+        with gen_cursor() as cursor:
+            for handle, data in cursor:
                 status_ppl.heartbeat()
-                data = data_map(handle)
                 add_func(handle, data)
                 self.__displayed += 1
-        else:
-            with gen_cursor() as cursor:
-                for handle, data in cursor:
-                    status_ppl.heartbeat()
-                    add_func(handle, data)
-                    self.__displayed += 1
-
         status_ppl.end()
 
+    def __add_filter_row(self, data_map, add_func, handle):
+        """
+        Add the row of an object matching the filter.
+        """
+        add_func(handle, data_map(handle))
+        if self._in_build:
+            self.__displayed += 1
+        else:
+            # add_node counted the row as displayed, but also as new to the
+            # total, which already includes it.
+            self.__total -= 1
+
     def add_node(
         self, parent, child, sortkey, handle, add_parent=True, secondary=False
     ):
@@ -783,6 +800,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         Add a row to the model.
         """
         assert isinstance(handle, str)
+        self.complete_filter()
         self.clear_path_cache()
         if self._get_node(handle) is not None:
             return  # row already exists
@@ -810,6 +828,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         Delete a row from the model.
         """
         assert isinstance(handle, str)
+        self.complete_filter()
         cput = perf_counter()
         self.clear_cache(handle)
         node = self._get_node(handle)
@@ -853,6 +872,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         place.
         """
         assert isinstance(handle, str)
+        self.complete_filter()
         self.clear_cache(handle)
         if self._get_node(handle) is None:
             return  # row not currently displayed
@@ -17,6 +17,13 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 #
 
+# -------------------------------------------------------------------------
+#
+# Standard python modules
+#
+# -------------------------------------------------------------------------
+from functools import partial
+
 # -------------------------------------------------------------------------
 #
 # GTK/Gnome modules
@@ -30,7 +37,11 @@ from gi.repository import Gtk
 # Gramps modules
 #
 # -------------------------------------------------------------------------
-from gramps.gen.utils.thumbnails import get_thumbnail_image, SIZE_NORMAL, SIZE_LARGE
+from gramps.gen.utils.thumbnails import (
+    get_thumbnail_image_async,
+    SIZE_NORMAL,
+    SIZE_LARGE,
+)
 from ..utils import is_right_click, open_file_with_default_application
 from ..widgets.menuitem import add_menuitem
 from gramps.gen.const import GRAMPS_LOCALE as glocale
@@ -51,6 +62,7 @@ class Photo(Gtk.EventBox):
     def __init__(self, use_small_size=False):
         Gtk.EventBox.__init__(self)
         self.full_path = None
+        self.image = None
         self.uistate = None
         self.handle = None
         self.photo = Gtk.Image()
@@ -70,13 +82,28 @@ class Photo(Gtk.EventBox):
         Set the image to be displayed.
         """
         self.full_path = full_path
+        self.image = (full_path, rectangle)
         if full_path:
-            pixbuf = get_thumbnail_image(full_path, mime_type, rectangle, self.__size)
+            pixbuf = get_thumbnail_image_async(
+                full_path,
+                partial(self.__thumbnail_done, self.image),
+                mime_type,
+                rectangle,
+                self.__size,
+            )
             self.photo.set_from_pixbuf(pixbuf)
             self.photo.show()
         else:
             self.photo.hide()
 
+    def __thumbnail_done(self, image, pixbuf):
+        """
+        Display the thumbnail created after set_image(), unless another
+        image was set since.
+        """
+        if self.image == image:
+            self.photo.set_from_pixbuf(pixbuf)
+
     def handle_button_press(self, widget, event):
         """
         Display the image with the default external viewer.
@@ -110,6 +137,7 @@ class Photo(Gtk.EventBox):
         Set the image to be displayed from a pixbuf.
         """
         self.full_path = full_path
+        self.image = None
         if full_path:
             self.photo.set_from_pixbuf(pixbuf)
             self.photo.show()
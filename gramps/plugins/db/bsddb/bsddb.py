@@ -215,7 +215,11 @@ class DbBsddb(SQLite):
                         # These are list, but need to be set
                         data = set(data)
 
-                self.dbapi.execute(sql, [key.decode("utf-8"), pickle.dumps(data)])
+                if new_t == "metadata":
+                    blob = pickle.dumps(data)
+                else:
+                    blob = self.blob_codec.encode(data)
+                self.dbapi.execute(sql, [key.decode("utf-8"), blob])
 
             # get schema version from file if not in metadata
             if new_t == "metadata" and schema_vers is None:
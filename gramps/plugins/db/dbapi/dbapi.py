@@ -35,10 +35,12 @@ import logging
 #
 # ------------------------------------------------------------------------
 from gramps.gen.db.dbconst import (
+    ARRAYSIZE,
     DBLOGNAME,
     DBBACKEND,
     KEY_TO_NAME_MAP,
     KEY_TO_CLASS_MAP,
+    CLASS_TO_KEY_MAP,
     TXNADD,
     TXNUPD,
     TXNDEL,
@@ -55,6 +57,13 @@ from gramps.gen.db.dbconst import (
     REFERENCE_KEY,
 )
 from gramps.gen.db.generic import DbGeneric
+from gramps.gen.db.kinship import (
+    PERSON_PARENT_FAMILY_LIST,
+    FAMILY_FATHER_HANDLE,
+    FAMILY_MOTHER_HANDLE,
+    FAMILY_CHILD_REF_LIST,
+    CHILD_REF_HANDLE,
+)
 from gramps.gen.updatecallback import UpdateCallback
 from gramps.gen.lib import (
     Tag,
@@ -74,12 +83,41 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 LOG = logging.getLogger(".dbapi")
 _LOG = logging.getLogger(DBLOGNAME)
 
+# Number of objects whose references are buffered in a batch transaction
+# before they are written to the reference table.
+BACKLINK_BUFFER_SIZE = 10000
+
+# Number of objects committed in a transaction whose writes are buffered
+# before they are written to the object tables.
+OBJECT_BUFFER_SIZE = 1000
+
+# Maximum number of parameters bound to a single "IN (...)" query.
+MAX_SQL_PARAMETERS = 500
+
+# Number of lifespans buffered outside of a transaction before they are
+# written to the lifespan table.
+LIFESPAN_BUFFER_SIZE = 1000
+
+# Number of generations after which the ancestry of a person is cut, in
+# case of loops in the family tree.
+MAX_ANCESTRY_GENERATIONS = 1000
+
 
 class DBAPI(DbGeneric):
     """
     Database backends class for DB-API 2.0 databases
     """
 
+    def __init__(self, directory=None):
+        self._pending_backlinks = {}
+        self._pending_objects = {}
+        self._sort_funcs = {}
+        self._sort_key_names = None
+        self._ancestry = None
+        self._lifespan_settings = None
+        self._pending_lifespans = {}
+        super().__init__(directory)
+
     def _initialize(self, directory, username, password):
         raise NotImplementedError
 
@@ -196,6 +234,7 @@ class DBAPI(DbGeneric):
             "value BLOB"
             ")"
         )
+        self._create_sort_key_table()
         self.dbapi.execute(
             "CREATE TABLE gender_stats "
             "("
@@ -238,6 +277,15 @@ class DBAPI(DbGeneric):
         self.dbapi.commit()
 
     def _close(self):
+        self._sort_funcs = {}
+        self._sort_key_names = None
+        self._ancestry = None
+        if self._pending_lifespans and not self.readonly:
+            self._txn_begin()
+            self._flush_lifespans()
+            self._txn_commit()
+        self._lifespan_settings = None
+        self._pending_lifespans = {}
         self.dbapi.close()
 
     def _txn_begin(self):
@@ -306,6 +354,8 @@ class DBAPI(DbGeneric):
         )
 
         action = {TXNADD: "-add", TXNUPD: "-update", TXNDEL: "-delete", None: "-delete"}
+        self._flush_objects()
+        self._flush_backlinks()
         self.dbapi.commit()
         if not txn.batch:
             # Now, emit signals:
@@ -314,14 +364,13 @@ class DBAPI(DbGeneric):
                 for obj_type in range(11):
                     if obj_type != REFERENCE_KEY and (obj_type, trans_type) in txn:
                         if trans_type == TXNDEL:
-                            handles = [
-                                handle for (handle, data) in txn[(obj_type, trans_type)]
-                            ]
+                            handles = list(txn[(obj_type, trans_type)])
                         else:
+                            deleted = set(txn[(obj_type, TXNDEL)])
                             handles = [
                                 handle
-                                for (handle, data) in txn[(obj_type, trans_type)]
-                                if (handle, None) not in txn[(obj_type, TXNDEL)]
+                                for handle in txn[(obj_type, trans_type)]
+                                if handle not in deleted
                             ]
                         if handles:
                             signal = KEY_TO_NAME_MAP[obj_type] + action[trans_type]
@@ -337,7 +386,10 @@ class DBAPI(DbGeneric):
         """
         Executed after a batch operation abort.
         """
+        self._pending_backlinks = {}
+        self._pending_objects = {}
         self.dbapi.rollback()
+        self.clear_cache()
         self.transaction = None
         txn.clear()
         txn.first = None
@@ -369,6 +421,14 @@ class DBAPI(DbGeneric):
         value: item, will be serialized here
         """
         self._txn_begin()
+        self._store_metadata(key, value)
+        self._txn_commit()
+
+    def _store_metadata(self, key, value):
+        """
+        Store an item in the metadata table, within the current backend
+        transaction.
+        """
         self.dbapi.execute("SELECT 1 FROM metadata WHERE setting = ?", [key])
         row = self.dbapi.fetchone()
         if row:
@@ -381,7 +441,6 @@ class DBAPI(DbGeneric):
                 "INSERT INTO metadata (setting, value) VALUES (?, ?)",
                 [key, pickle.dumps(value)],
             )
-        self._txn_commit()
 
     def get_name_group_keys(self):
         """
@@ -415,15 +474,14 @@ class DBAPI(DbGeneric):
         :type locale: A GrampsLocale object.
         """
         if sort_handles:
-            self.dbapi.execute(
+            sql = (
                 "SELECT handle FROM person "
                 "ORDER BY surname "
                 'COLLATE "%s"' % self._collation(locale)
             )
         else:
-            self.dbapi.execute("SELECT handle FROM person")
-        rows = self.dbapi.fetchall()
-        return [row[0] for row in rows]
+            sql = "SELECT handle FROM person"
+        return [row[0] for row in self._iter_query(sql)]
 
     def get_family_handles(self, sort_handles=False, locale=glocale):
         """
@@ -453,20 +511,17 @@ class DBAPI(DbGeneric):
                 + "END) "
                 + 'COLLATE "%s"' % self._collation(locale)
             )
-            self.dbapi.execute(sql)
         else:
-            self.dbapi.execute("SELECT handle FROM family")
-        rows = self.dbapi.fetchall()
-        return [row[0] for row in rows]
+            sql = "SELECT handle FROM family"
+        return [row[0] for row in self._iter_query(sql)]
 
     def get_event_handles(self):
         """
         Return a list of database handles, one handle for each Event in the
         database.
         """
-        self.dbapi.execute("SELECT handle FROM event")
-        rows = self.dbapi.fetchall()
-        return [row[0] for row in rows]
+        sql = "SELECT handle FROM event"
+        return [row[0] for row in self._iter_query(sql)]
 
     def get_citation_handles(self, sort_handles=False, locale=glocale):
         """
@@ -479,15 +534,14 @@ class DBAPI(DbGeneric):
         :type locale: A GrampsLocale object.
         """
         if sort_handles:
-            self.dbapi.execute(
+            sql = (
                 "SELECT handle FROM citation "
                 "ORDER BY page "
                 'COLLATE "%s"' % self._collation(locale)
             )
         else:
-            self.dbapi.execute("SELECT handle FROM citation")
-        rows = self.dbapi.fetchall()
-        return [row[0] for row in rows]
+            sql = "SELECT handle FROM citation"
+        return [row[0] for row in self._iter_query(sql)]
 
     def get_source_handles(self, sort_handles=False, locale=glocale):
         """
@@ -500,15 +554,14 @@ class DBAPI(DbGeneric):
         :type locale: A GrampsLocale object.
         """
         if sort_handles:
-            self.dbapi.execute(
+            sql = (
                 "SELECT handle FROM source "
                 "ORDER BY title "
                 'COLLATE "%s"' % self._collation(locale)
             )
         else:
-            self.dbapi.execute("SELECT handle from source")
-        rows = self.dbapi.fetchall()
-        return [row[0] for row in rows]
+            sql = "SELECT handle from source"
+        return [row[0] for row in self._iter_query(sql)]
 
     def get_place_handles(self, sort_handles=False, locale=glocale):
         """
@@ -521,24 +574,22 @@ class DBAPI(DbGeneric):
         :type locale: A GrampsLocale object.
         """
         if sort_handles:
-            self.dbapi.execute(
+            sql = (
                 "SELECT handle FROM place "
                 "ORDER BY title "
                 'COLLATE "%s"' % self._collation(locale)
             )
         else:
-            self.dbapi.execute("SELECT handle FROM place")
-        rows = self.dbapi.fetchall()
-        return [row[0] for row in rows]
+            sql = "SELECT handle FROM place"
+        return [row[0] for row in self._iter_query(sql)]
 
     def get_repository_handles(self):
         """
         Return a list of database handles, one handle for each Repository in
         the database.
         """
-        self.dbapi.execute("SELECT handle FROM repository")
-        rows = self.dbapi.fetchall()
-        return [row[0] for row in rows]
+        sql = "SELECT handle FROM repository"
+        return [row[0] for row in self._iter_query(sql)]
 
     def get_media_handles(self, sort_handles=False, locale=glocale):
         """
@@ -551,24 +602,22 @@ class DBAPI(DbGeneric):
         :type locale: A GrampsLocale object.
         """
         if sort_handles:
-            self.dbapi.execute(
+            sql = (
                 "SELECT handle FROM media "
                 "ORDER BY desc "
                 'COLLATE "%s"' % self._collation(locale)
             )
         else:
-            self.dbapi.execute("SELECT handle FROM media")
-        rows = self.dbapi.fetchall()
-        return [row[0] for row in rows]
+            sql = "SELECT handle FROM media"
+        return [row[0] for row in self._iter_query(sql)]
 
     def get_note_handles(self):
         """
         Return a list of database handles, one handle for each Note in the
         database.
         """
-        self.dbapi.execute("SELECT handle FROM note")
-        rows = self.dbapi.fetchall()
-        return [row[0] for row in rows]
+        sql = "SELECT handle FROM note"
+        return [row[0] for row in self._iter_query(sql)]
 
     def get_tag_handles(self, sort_handles=False, locale=glocale):
         """
@@ -581,15 +630,14 @@ class DBAPI(DbGeneric):
         :type locale: A GrampsLocale object.
         """
         if sort_handles:
-            self.dbapi.execute(
+            sql = (
                 "SELECT handle FROM tag "
                 "ORDER BY name "
                 'COLLATE "%s"' % self._collation(locale)
             )
         else:
-            self.dbapi.execute("SELECT handle FROM tag")
-        rows = self.dbapi.fetchall()
-        return [row[0] for row in rows]
+            sql = "SELECT handle FROM tag"
+        return [row[0] for row in self._iter_query(sql)]
 
     def get_tag_from_name(self, name):
         """
@@ -597,15 +645,17 @@ class DBAPI(DbGeneric):
 
         If no such Tag exists, None is returned.
         """
+        self._flush_objects()
         self.dbapi.execute("SELECT blob_data FROM tag WHERE name = ?", [name])
         row = self.dbapi.fetchone()
         if row:
-            return Tag.create(pickle.loads(row[0]))
+            return Tag.create(self.blob_codec.decode(row[0]))
         return None
 
     def _get_number_of(self, obj_key):
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT count(1) FROM %s" % table
+        self._flush_objects()
         self.dbapi.execute(sql)
         row = self.dbapi.fetchone()
         return row[0]
@@ -646,26 +696,22 @@ class DBAPI(DbGeneric):
         Commit the specified object to the database, storing the changes as
         part of the transaction.
         """
-        old_data = None
         obj.change = int(change_time or time.time())
-        table = KEY_TO_NAME_MAP[obj_key]
-
-        if self._has_handle(obj_key, obj.handle):
-            old_data = self._get_raw_data(obj_key, obj.handle)
-            # update the object:
-            sql = "UPDATE %s SET blob_data = ? WHERE handle = ?" % table
-            self.dbapi.execute(sql, [pickle.dumps(obj.serialize()), obj.handle])
-        else:
-            # Insert the object:
-            sql = ("INSERT INTO %s (handle, blob_data) VALUES (?, ?)") % table
-            self.dbapi.execute(sql, [obj.handle, pickle.dumps(obj.serialize())])
-        self._update_secondary_values(obj)
+        self._invalidate_cache(obj_key, obj.handle)
+
+        old_data = self._get_raw_data(obj_key, obj.handle)
+        data = obj.serialize()
+        self._write_object(obj_key, obj, data)
+        self._update_sort_keys(obj_key, obj.handle, data)
+        self._update_kinship_graph(obj_key, obj.handle, data)
+        self._update_ancestry(obj_key, obj.handle, old_data, data)
+        self._update_lifespans(obj_key, obj.handle)
         self._update_backlinks(obj, trans)
         if not trans.batch:
             if old_data:
-                trans.add(obj_key, TXNUPD, obj.handle, old_data, obj.serialize())
+                trans.add(obj_key, TXNUPD, obj.handle, old_data, data)
             else:
-                trans.add(obj_key, TXNADD, obj.handle, None, obj.serialize())
+                trans.add(obj_key, TXNADD, obj.handle, None, data)
 
         return old_data
 
@@ -676,15 +722,22 @@ class DBAPI(DbGeneric):
         """
         table = KEY_TO_NAME_MAP[obj_key]
         handle = data[0]
+        self._flush_objects()
+        self._invalidate_cache(obj_key, handle)
+        old_data = self._get_ancestry_old_data(obj_key, handle)
 
         if self._has_handle(obj_key, handle):
             # update the object:
             sql = "UPDATE %s SET blob_data = ? WHERE handle = ?" % table
-            self.dbapi.execute(sql, [pickle.dumps(data), handle])
+            self.dbapi.execute(sql, [self.blob_codec.encode(data), handle])
         else:
             # Insert the object:
             sql = ("INSERT INTO %s (handle, blob_data) VALUES (?, ?)") % table
-            self.dbapi.execute(sql, [handle, pickle.dumps(data)])
+            self.dbapi.execute(sql, [handle, self.blob_codec.encode(data)])
+        self._update_sort_keys(obj_key, handle, data)
+        self._update_kinship_graph(obj_key, handle, data)
+        self._update_ancestry(obj_key, handle, old_data, data)
+        self._update_lifespans(obj_key, handle)
 
         return
 
@@ -740,35 +793,55 @@ class DBAPI(DbGeneric):
                 )
                 transaction.add(REFERENCE_KEY, TXNDEL, key, old_data, None)
         else:  # batch mode
-            current_references = set(obj.get_referenced_handles_recursively())
-
-            # Delete the existing references
-            self.dbapi.execute(
-                "DELETE FROM reference WHERE obj_handle = ?", [obj.handle]
+            # Defer the writes so that they can be flushed in bulk.  A later
+            # commit of the same object replaces its pending references.
+            self._pending_backlinks[obj.handle] = (
+                obj.__class__.__name__,
+                set(obj.get_referenced_handles_recursively()),
             )
+            if len(self._pending_backlinks) >= BACKLINK_BUFFER_SIZE:
+                self._flush_backlinks()
 
-            # Now, add the current ones
-            for ref_class_name, ref_handle in current_references:
-                sql = (
-                    "INSERT INTO reference "
-                    + "(obj_handle, obj_class, ref_handle, ref_class)"
-                    + "VALUES(?, ?, ?, ?)"
-                )
-                self.dbapi.execute(
-                    sql,
-                    [obj.handle, obj.__class__.__name__, ref_handle, ref_class_name],
-                )
+    def _flush_backlinks(self):
+        """
+        Write the references buffered during a batch transaction to the
+        reference table.
+        """
+        if not self._pending_backlinks:
+            return
+        self.dbapi.executemany(
+            "DELETE FROM reference WHERE obj_handle = ?",
+            [(handle,) for handle in self._pending_backlinks],
+        )
+        self.dbapi.executemany(
+            "INSERT INTO reference "
+            "(obj_handle, obj_class, ref_handle, ref_class) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (handle, obj_class, ref_handle, ref_class_name)
+                for handle, (obj_class, references) in self._pending_backlinks.items()
+                for ref_class_name, ref_handle in references
+            ],
+        )
+        self._pending_backlinks = {}
 
     def _do_remove(self, handle, transaction, obj_key):
         if self.readonly or not handle:
             return
-        if self._has_handle(obj_key, handle):
-            data = self._get_raw_data(obj_key, handle)
+        data = self._get_raw_data(obj_key, handle)
+        if data is not None:
+            if obj_key in self._pending_objects:
+                self._pending_objects[obj_key][1].pop(handle, None)
             obj_class = KEY_TO_CLASS_MAP[obj_key]
             self._remove_backlinks(obj_class, handle, transaction)
             table = KEY_TO_NAME_MAP[obj_key]
             sql = "DELETE FROM %s WHERE handle = ?" % table
             self.dbapi.execute(sql, [handle])
+            self._invalidate_cache(obj_key, handle)
+            self._update_sort_keys(obj_key, handle, None)
+            self._update_kinship_graph(obj_key, handle, None)
+            self._update_ancestry(obj_key, handle, data, None)
+            self._update_lifespans(obj_key, handle)
             if not transaction.batch:
                 transaction.add(obj_key, TXNDEL, handle, data, None)
 
@@ -776,6 +849,7 @@ class DBAPI(DbGeneric):
         """
         Removes all references from this object (backlinks).
         """
+        self._flush_backlinks()
         # collect backlinks from this object for undo
         self.dbapi.execute(
             "SELECT ref_class, ref_handle " + "FROM reference WHERE obj_handle = ?",
@@ -808,15 +882,161 @@ class DBAPI(DbGeneric):
 
             result_list = list(find_backlink_handles(handle))
         """
-        self.dbapi.execute(
-            "SELECT obj_class, obj_handle " "FROM reference " "WHERE ref_handle = ?",
-            [handle],
-        )
-        rows = self.dbapi.fetchall()
-        for row in rows:
+        self._flush_backlinks()
+        sql = "SELECT obj_class, obj_handle FROM reference WHERE ref_handle = ?"
+        for row in self._iter_query(sql, [handle]):
             if (include_classes is None) or (row[0] in include_classes):
                 yield (row[0], row[1])
 
+    def select_handles(self, class_name, predicates):
+        """
+        Return the handles of the objects that satisfy all the predicates.
+
+        :param class_name: name of the object class, for example "Person".
+        :type class_name: str
+        :param predicates: list of (sql, args) tuples, where sql is a
+            boolean expression over the columns of the object's table.
+        :type predicates: list
+        """
+        # Predicates may refer to the reference table.
+        self._flush_objects()
+        self._flush_backlinks()
+        table = KEY_TO_NAME_MAP[CLASS_TO_KEY_MAP[class_name]]
+        sql = "SELECT handle FROM %s" % table
+        values = []
+        if predicates:
+            sql += " WHERE " + " AND ".join("(%s)" % pred for pred, args in predicates)
+            values = [value for pred, args in predicates for value in args]
+        self.dbapi.execute(sql, values)
+        return [row[0] for row in self.dbapi.fetchall()]
+
+    def _create_sort_key_table(self):
+        """
+        Create the table holding the stored sort keys.
+        """
+        self.dbapi.execute(
+            "CREATE TABLE sort_key "
+            "("
+            "sort_name VARCHAR(100), "
+            "handle VARCHAR(50), "
+            "sort_key BLOB, "
+            "PRIMARY KEY (sort_name, handle)"
+            ")"
+        )
+        self.dbapi.execute(
+            "CREATE INDEX sort_key_sort_name " "ON sort_key(sort_name, sort_key)"
+        )
+
+    def _get_sort_key_names(self):
+        """
+        Return a dictionary mapping the names of the stored sort keys to
+        their class name.
+        """
+        if self._sort_key_names is None:
+            self._sort_key_names = self._get_metadata("sort-keys", {})
+        return self._sort_key_names
+
+    def get_sort_keys(self, class_name, sort_name, sort_func):
+        """
+        Return a list of (sort_key, handle) tuples for all objects of the
+        class, sorted ascending.
+
+        The keys are stored in the sort_key table, under a name including
+        the collation of the current locale.  They are computed the first
+        time they are requested and updated when objects are committed.
+        Objects committed while the sort function is not known in the
+        session, for example by an import from the command line, keep a
+        NULL key, which is computed when the keys are next requested.
+
+        :param class_name: name of the object class, for example "Person".
+        :type class_name: str
+        :param sort_name: name identifying the sort function.
+        :type sort_name: str
+        :param sort_func: function mapping the raw data to the sort key.
+        :type sort_func: function
+        """
+        if self.readonly:
+            return super().get_sort_keys(class_name, sort_name, sort_func)
+        name = "%s:%s:%s" % (class_name, sort_name, self._collation(glocale))
+        self._sort_funcs[name] = sort_func
+        names = self._get_sort_key_names()
+        if name in names:
+            self._update_null_sort_keys(class_name, name, sort_func)
+            self.dbapi.execute(
+                "SELECT sort_key, handle FROM sort_key "
+                "WHERE sort_name = ? ORDER BY sort_key, handle",
+                [name],
+            )
+            return [tuple(row) for row in self.dbapi.fetchall()]
+
+        srt_keys = super().get_sort_keys(class_name, sort_name, sort_func)
+        self._txn_begin()
+        if not self.dbapi.table_exists("sort_key"):
+            self._create_sort_key_table()
+        self.dbapi.execute("DELETE FROM sort_key WHERE sort_name = ?", [name])
+        self.dbapi.executemany(
+            "INSERT INTO sort_key (sort_name, handle, sort_key) VALUES (?, ?, ?)",
+            [(name, handle, key) for key, handle in srt_keys],
+        )
+        names[name] = class_name
+        self._store_metadata("sort-keys", names)
+        self._txn_commit()
+        return srt_keys
+
+    def _update_null_sort_keys(self, class_name, name, sort_func):
+        """
+        Compute the stored sort keys left NULL by commits made while the
+        sort function was not known.
+        """
+        self.dbapi.execute(
+            "SELECT handle FROM sort_key WHERE sort_name = ? AND sort_key IS NULL",
+            [name],
+        )
+        handles = [row[0] for row in self.dbapi.fetchall()]
+        if not handles:
+            return
+        get_raw = self.method("get_raw_%s_data", class_name)
+        self._txn_begin()
+        for handle in handles:
+            data = get_raw(handle)
+            if data is None:
+                self.dbapi.execute(
+                    "DELETE FROM sort_key WHERE sort_name = ? AND handle = ?",
+                    [name, handle],
+                )
+            else:
+                self.dbapi.execute(
+                    "UPDATE sort_key SET sort_key = ? "
+                    "WHERE sort_name = ? AND handle = ?",
+                    [sort_func(data), name, handle],
+                )
+        self._txn_commit()
+
+    def _update_sort_keys(self, obj_key, handle, data):
+        """
+        Update the stored sort keys of an object.  If the sort function of
+        a stored key is not known in this session, the key of the object is
+        set to NULL, to be computed when the keys are next requested.
+
+        :param data: the raw data of the object, or None if it was removed.
+        """
+        names = self._get_sort_key_names()
+        class_name = KEY_TO_CLASS_MAP[obj_key]
+        for name, name_class in names.items():
+            if name_class != class_name:
+                continue
+            self.dbapi.execute(
+                "DELETE FROM sort_key WHERE sort_name = ? AND handle = ?",
+                [name, handle],
+            )
+            if data is not None:
+                sort_func = self._sort_funcs.get(name)
+                self.dbapi.execute(
+                    "INSERT INTO sort_key (sort_name, handle, sort_key) "
+                    "VALUES (?, ?, ?)",
+                    [name, handle, None if sort_func is None else sort_func(data)],
+                )
+
     def find_initial_person(self):
         """
         Returns first person in the database
@@ -827,35 +1047,92 @@ class DBAPI(DbGeneric):
             person = self.get_person_from_handle(handle)
             if person:
                 return person
+        self._flush_objects()
         self.dbapi.execute("SELECT handle FROM person")
         row = self.dbapi.fetchone()
         if row:
             return self.get_person_from_handle(row[0])
 
+    def _iter_query(self, sql, args=None):
+        """
+        Execute a query on a dedicated cursor and return an iterator over
+        the rows of the result.
+
+        The rows are read when the query is executed, so the iteration is
+        not affected by other queries, or by changes to the tables, made
+        before it is finished.  Use :meth:`_iter_table` to iterate over a
+        whole table.
+        """
+        self._flush_objects()
+        with self.dbapi.cursor() as cursor:
+            if args is None:
+                cursor.execute(sql)
+            else:
+                cursor.execute(sql, args)
+            rows = cursor.fetchall()
+        yield from rows
+
+    def _iter_table(self, table, columns):
+        """
+        Return an iterator over the rows of a table, in ascending handle
+        order, read in batches that start after the last handle read.
+
+        Only the rows with a handle up to the largest handle present when
+        the iteration starts are returned, so that the objects added while
+        iterating, which get larger handles, are not visited.
+
+        :param table: name of the table.
+        :type table: str
+        :param columns: the columns to return, starting with the handle.
+        :type columns: str
+        """
+        last = list(self._iter_query("SELECT MAX(handle) FROM %s" % table))[0][0]
+        if last is None:
+            return
+        sql = (
+            "SELECT %s FROM %s WHERE handle > ? AND handle <= ? "
+            "ORDER BY handle LIMIT %d"
+        ) % (columns, table, ARRAYSIZE)
+        handle = ""
+        while True:
+            rows = list(self._iter_query(sql, [handle, last]))
+            yield from rows
+            if len(rows) < ARRAYSIZE:
+                return
+            handle = rows[-1][0]
+
     def _iter_handles(self, obj_key):
         """
         Return an iterator over handles in the database
         """
-        table = KEY_TO_NAME_MAP[obj_key]
-        sql = "SELECT handle FROM %s" % table
-        self.dbapi.execute(sql)
-        rows = self.dbapi.fetchall()
-        for row in rows:
+        for row in self._iter_table(KEY_TO_NAME_MAP[obj_key], "handle"):
             yield row[0]
 
+    def _iter_sorted_handle_chunks(self, class_name, chunk_size):
+        """
+        Return an iterator over the handles of the objects of the class,
+        in ascending order, split in lists of at most chunk_size handles.
+
+        The handles are read from the primary key index as the iteration
+        goes.
+        """
+        table = KEY_TO_NAME_MAP[CLASS_TO_KEY_MAP[class_name]]
+        chunk = []
+        for row in self._iter_table(table, "handle"):
+            chunk.append(row[0])
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
     def _iter_raw_data(self, obj_key):
         """
         Return an iterator over raw data in the database.
         """
         table = KEY_TO_NAME_MAP[obj_key]
-        sql = "SELECT handle, blob_data FROM %s" % table
-        with self.dbapi.cursor() as cursor:
-            cursor.execute(sql)
-            rows = cursor.fetchmany()
-            while rows:
-                for row in rows:
-                    yield (row[0], pickle.loads(row[1]))
-                rows = cursor.fetchmany()
+        for row in self._iter_table(table, "handle, blob_data"):
+            yield (row[0], self.blob_codec.decode(row[1]))
 
     def _iter_raw_place_tree_data(self):
         """
@@ -865,16 +1142,15 @@ class DBAPI(DbGeneric):
         sql = "SELECT handle, blob_data FROM place WHERE enclosed_by = ?"
         while to_do:
             handle = to_do.pop()
-            self.dbapi.execute(sql, [handle])
-            rows = self.dbapi.fetchall()
-            for row in rows:
+            for row in self._iter_query(sql, [handle]):
                 to_do.append(row[0])
-                yield (row[0], pickle.loads(row[1]))
+                yield (row[0], self.blob_codec.decode(row[1]))
 
     def reindex_reference_map(self, callback):
         """
         Reindex all primary records in the database.
         """
+        self._pending_backlinks = {}
         self._txn_begin()
         self.dbapi.execute("DELETE FROM reference")
         total = 0
@@ -929,6 +1205,446 @@ class DBAPI(DbGeneric):
                     self.update()
         self._txn_commit()
 
+    # ------------------------------------------------------------------
+    #
+    # Ancestry closure table
+    #
+    # ------------------------------------------------------------------
+    def _create_ancestry_table(self):
+        """
+        Create the table holding the ancestors of each person.
+        """
+        self.dbapi.execute(
+            "CREATE TABLE ancestry "
+            "("
+            "ancestor VARCHAR(50), "
+            "descendant VARCHAR(50), "
+            "generations INTEGER, "
+            "PRIMARY KEY (descendant, ancestor, generations)"
+            ")"
+        )
+        self.dbapi.execute(
+            "CREATE INDEX ancestry_ancestor " "ON ancestry(ancestor, generations)"
+        )
+
+    def _has_ancestry(self):
+        """
+        Return True if the ancestry table is kept for this database.
+        """
+        if self._ancestry is None:
+            self._ancestry = self._get_metadata("ancestry", False)
+        return self._ancestry
+
+    def reindex_ancestry(self, callback=None):
+        """
+        Build the ancestry table, holding an (ancestor, descendant,
+        generations) row for each ancestor of each person, through all their
+        parent families, and for each number of generations between them.
+        The table is then kept up to date when people and families are
+        committed, until :meth:`drop_ancestry` is called.
+        """
+        if self.readonly:
+            return
+        self._txn_begin()
+        if self.dbapi.table_exists("ancestry"):
+            self.dbapi.execute("DELETE FROM ancestry")
+        else:
+            self._create_ancestry_table()
+        family_parents = {}
+        with self.get_family_cursor() as cursor:
+            for handle, data in cursor:
+                family_parents[handle] = {
+                    parent_handle
+                    for parent_handle in (
+                        data[FAMILY_FATHER_HANDLE],
+                        data[FAMILY_MOTHER_HANDLE],
+                    )
+                    if parent_handle
+                }
+        parents = {}
+        with self.get_person_cursor() as cursor:
+            for handle, data in cursor:
+                parents[handle] = set()
+                for family_handle in data[PERSON_PARENT_FAMILY_LIST]:
+                    parents[handle] |= family_parents.get(family_handle, set())
+        UpdateCallback.__init__(self, callback)
+        self.set_total(len(parents))
+        for handle in list(parents):
+            self.dbapi.executemany(
+                "INSERT INTO ancestry (ancestor, descendant, generations) "
+                "VALUES (?, ?, ?)",
+                [
+                    (ancestor, handle, generations)
+                    for ancestor, generations in self._get_ancestry_rows(
+                        handle, parents
+                    )
+                ],
+            )
+            self.update()
+        self._store_metadata("ancestry", True)
+        self._ancestry = True
+        self._txn_commit()
+
+    def drop_ancestry(self):
+        """
+        Drop the ancestry table, which is then no longer kept.
+        """
+        if self.readonly:
+            return
+        self._txn_begin()
+        if self.dbapi.table_exists("ancestry"):
+            self.dbapi.execute("DROP TABLE ancestry")
+        self._store_metadata("ancestry", False)
+        self._ancestry = False
+        self._txn_commit()
+
+    def _get_parent_handles(self, handle, parents):
+        """
+        Return the set of handles of the fathers and mothers of the parent
+        families of a person, caching it in the parents dictionary.  The
+        parents need not be in the database.
+        """
+        if handle not in parents:
+            parent_handles = set()
+            data = self._get_raw_data(PERSON_KEY, handle)
+            if data:
+                for family_handle in data[PERSON_PARENT_FAMILY_LIST]:
+                    family = self._get_raw_data(FAMILY_KEY, family_handle)
+                    if family:
+                        for parent_handle in (
+                            family[FAMILY_FATHER_HANDLE],
+                            family[FAMILY_MOTHER_HANDLE],
+                        ):
+                            if parent_handle:
+                                parent_handles.add(parent_handle)
+            parents[handle] = parent_handles
+        return parents[handle]
+
+    def _get_stored_ancestry(self, handle):
+        """
+        Return the (ancestor, generations) rows of a person in the ancestry
+        table.
+        """
+        self.dbapi.execute(
+            "SELECT ancestor, generations FROM ancestry WHERE descendant = ?",
+            [handle],
+        )
+        return self.dbapi.fetchall()
+
+    def _get_ancestry_rows(self, handle, parents, changed=None):
+        """
+        Return the set of (ancestor, generations) rows of a person.
+
+        :param parents: dictionary caching the parents of each person.
+        :param changed: if given, the people whose ancestry changed; the
+            ancestry of the other people is read from the ancestry table.
+        """
+        rows = set()
+        level = {handle}
+        seen = set()
+        generations = 0
+        while level and generations < MAX_ANCESTRY_GENERATIONS:
+            generations += 1
+            next_level = set()
+            for current in level:
+                next_level |= self._get_parent_handles(current, parents)
+            level = set()
+            for ancestor in next_level:
+                rows.add((ancestor, generations))
+                if changed is None or ancestor in changed:
+                    level.add(ancestor)
+                else:
+                    for row in self._get_stored_ancestry(ancestor):
+                        rows.add((row[0], row[1] + generations))
+            # in a loop, the same people come back
+            key = frozenset(level)
+            if key in seen:
+                break
+            seen.add(key)
+        return rows
+
+    def _get_ancestry_old_data(self, obj_key, handle):
+        """
+        Return the raw data of a family about to be changed, which the
+        ancestry table update needs.
+        """
+        if obj_key == FAMILY_KEY and self._has_ancestry():
+            return self._get_raw_data(obj_key, handle)
+        return None
+
+    def _update_ancestry(self, obj_key, handle, old_data, data):
+        """
+        Update the ancestry table, if it is kept, after a person or a
+        family was committed or removed.
+
+        The people whose parents may have changed are checked against
+        their stored parents, and if they differ the ancestry of the person
+        and of all their descendants is computed again.
+
+        :param old_data: the previous raw data of a family, or None.
+        :param data: the raw data of the object, or None if it was removed.
+        """
+        if obj_key == PERSON_KEY:
+            candidates = {handle}
+        elif obj_key == FAMILY_KEY:
+            candidates = set()
+            for family_data in (old_data, data):
+                if family_data:
+                    candidates.update(
+                        child_ref[CHILD_REF_HANDLE]
+                        for child_ref in family_data[FAMILY_CHILD_REF_LIST]
+                    )
+        else:
+            return
+        if not self._has_ancestry():
+            return
+        parents = {}
+        for child_handle in candidates:
+            self.dbapi.execute(
+                "SELECT ancestor FROM ancestry "
+                "WHERE descendant = ? AND generations = 1",
+                [child_handle],
+            )
+            stored = {row[0] for row in self.dbapi.fetchall()}
+            if stored != self._get_parent_handles(child_handle, parents):
+                self._reindex_ancestry_of(child_handle, parents)
+
+    def _reindex_ancestry_of(self, handle, parents):
+        """
+        Compute again the ancestry of a person and of their descendants.
+        """
+        self.dbapi.execute(
+            "SELECT DISTINCT descendant FROM ancestry WHERE ancestor = ?", [handle]
+        )
+        changed = {row[0] for row in self.dbapi.fetchall()}
+        changed.add(handle)
+        rows = [
+            (ancestor, descendant, generations)
+            for descendant in changed
+            for ancestor, generations in self._get_ancestry_rows(
+                descendant, parents, changed
+            )
+        ]
+        self.dbapi.executemany(
+            "DELETE FROM ancestry WHERE descendant = ?",
+            [(descendant,) for descendant in changed],
+        )
+        self.dbapi.executemany(
+            "INSERT INTO ancestry (ancestor, descendant, generations) "
+            "VALUES (?, ?, ?)",
+            rows,
+        )
+
+    def _select_ancestry(
+        self, column, key_column, handle, min_generations, max_generations
+    ):
+        """
+        Return the set of handles of a column of the ancestry table, for the
+        rows of a person in the other column, leaving out the people not in
+        the database.
+        """
+        sql = (
+            "SELECT DISTINCT ancestry.%s FROM ancestry "
+            "JOIN person ON person.handle = ancestry.%s "
+            "WHERE ancestry.%s = ? AND ancestry.generations >= ?"
+        ) % (column, column, key_column)
+        self._flush_objects()
+        args = [handle, min_generations]
+        if max_generations is not None:
+            sql += " AND ancestry.generations <= ?"
+            args.append(max_generations)
+        handles = {row[0] for row in self._iter_query(sql, args)}
+        if (
+            min_generations <= 0
+            and (max_generations is None or max_generations >= 0)
+            and self._has_handle(PERSON_KEY, handle)
+        ):
+            handles.add(handle)
+        return handles
+
+    def get_ancestor_handles(self, handle, min_generations=1, max_generations=None):
+        """
+        Return the set of handles of the ancestors of a person, through all
+        their parent families, at least min_generations and at most
+        max_generations generations away.  The parents are one generation
+        away, and the person is included if min_generations is 0.
+
+        The ancestry table is used if it is kept.
+        """
+        if not self._has_ancestry():
+            return super().get_ancestor_handles(
+                handle, min_generations, max_generations
+            )
+        return self._select_ancestry(
+            "ancestor", "descendant", handle, min_generations, max_generations
+        )
+
+    def get_descendant_handles(self, handle, min_generations=1, max_generations=None):
+        """
+        Return the set of handles of the descendants of a person, at least
+        min_generations and at most max_generations generations away.  The
+        children are one generation away, and the person is included if
+        min_generations is 0.
+
+        The ancestry table is used if it is kept.
+        """
+        if not self._has_ancestry():
+            return super().get_descendant_handles(
+                handle, min_generations, max_generations
+            )
+        return self._select_ancestry(
+            "descendant", "ancestor", handle, min_generations, max_generations
+        )
+
+    # ------------------------------------------------------------------
+    #
+    # Lifespans
+    #
+    # ------------------------------------------------------------------
+    def _create_lifespan_tables(self):
+        """
+        Create the tables holding the estimated lifespans of people, and the
+        objects each one depends on.
+        """
+        self.dbapi.execute(
+            "CREATE TABLE lifespan "
+            "("
+            "handle VARCHAR(50) PRIMARY KEY NOT NULL, "
+            "data BLOB"
+            ")"
+        )
+        self.dbapi.execute(
+            "CREATE TABLE lifespan_dependency "
+            "("
+            "dependency VARCHAR(50), "
+            "handle VARCHAR(50)"
+            ")"
+        )
+        self.dbapi.execute(
+            "CREATE INDEX lifespan_dependency_dependency "
+            "ON lifespan_dependency(dependency)"
+        )
+        self.dbapi.execute(
+            "CREATE INDEX lifespan_dependency_handle " "ON lifespan_dependency(handle)"
+        )
+
+    def _get_lifespan_settings(self):
+        """
+        Return the settings of the stored lifespans, or None if there are
+        none.
+        """
+        if self._lifespan_settings is None:
+            self._lifespan_settings = self._get_metadata("lifespan-settings", None)
+        return self._lifespan_settings
+
+    def get_lifespan(self, handle, settings):
+        """
+        Return the estimated lifespan data of a person stored by
+        :meth:`set_lifespans` with the same settings, or None if there is
+        none.
+        """
+        if self._get_lifespan_settings() != settings:
+            return None
+        if handle in self._pending_lifespans:
+            return self._pending_lifespans[handle][0]
+        self.dbapi.execute("SELECT data FROM lifespan WHERE handle = ?", [handle])
+        row = self.dbapi.fetchone()
+        if row:
+            return pickle.loads(row[0])
+        return None
+
+    def get_lifespan_count(self, settings):
+        """
+        Return the number of people with a lifespan stored with the given
+        settings, or None if the database does not store lifespans.
+        """
+        if self.readonly:
+            return None
+        if self._get_lifespan_settings() != settings:
+            return 0
+        self.dbapi.execute("SELECT COUNT(*) FROM lifespan")
+        return self.dbapi.fetchone()[0] + len(self._pending_lifespans)
+
+    def set_lifespans(self, settings, lifespans):
+        """
+        Store the estimated lifespans of people.
+
+        Outside of a transaction, they are buffered and written in batches.
+
+        :param settings: picklable value the lifespans were computed with.
+        :param lifespans: list of (handle, data, dependencies) tuples, where
+            data is a picklable value and dependencies a list of handles.
+        :type lifespans: list
+        """
+        if self.readonly:
+            return
+        if self._get_lifespan_settings() != settings:
+            self._txn_begin()
+            if self.dbapi.table_exists("lifespan"):
+                self.dbapi.execute("DELETE FROM lifespan")
+                self.dbapi.execute("DELETE FROM lifespan_dependency")
+            else:
+                self._create_lifespan_tables()
+            self._store_metadata("lifespan-settings", settings)
+            self._txn_commit()
+            self._lifespan_settings = settings
+            self._pending_lifespans = {}
+        for handle, data, dependencies in lifespans:
+            self._pending_lifespans[handle] = (data, dependencies)
+        if self.transaction is not None:
+            self._flush_lifespans()
+        elif len(self._pending_lifespans) >= LIFESPAN_BUFFER_SIZE:
+            self._txn_begin()
+            self._flush_lifespans()
+            self._txn_commit()
+
+    def _flush_lifespans(self):
+        """
+        Write the buffered lifespans to the lifespan table, within the
+        current backend transaction.
+        """
+        if not self._pending_lifespans:
+            return
+        pending = self._pending_lifespans
+        self._pending_lifespans = {}
+        handles = [(handle,) for handle in pending]
+        self.dbapi.executemany("DELETE FROM lifespan WHERE handle = ?", handles)
+        self.dbapi.executemany(
+            "DELETE FROM lifespan_dependency WHERE handle = ?", handles
+        )
+        self.dbapi.executemany(
+            "INSERT INTO lifespan (handle, data) VALUES (?, ?)",
+            [(handle, pickle.dumps(data)) for handle, (data, deps) in pending.items()],
+        )
+        self.dbapi.executemany(
+            "INSERT INTO lifespan_dependency (dependency, handle) VALUES (?, ?)",
+            [
+                (dependency, handle)
+                for handle, (data, dependencies) in pending.items()
+                for dependency in dependencies
+            ],
+        )
+
+    def _update_lifespans(self, obj_key, handle):
+        """
+        Drop the stored lifespans depending on a person, family or event
+        that was committed or removed.
+        """
+        if obj_key not in (PERSON_KEY, FAMILY_KEY, EVENT_KEY):
+            return
+        if self._get_lifespan_settings() is None:
+            return
+        self._flush_lifespans()
+        self.dbapi.execute(
+            "SELECT handle FROM lifespan_dependency WHERE dependency = ?", [handle]
+        )
+        handles = [(row[0],) for row in self.dbapi.fetchall()]
+        if handles:
+            self.dbapi.executemany("DELETE FROM lifespan WHERE handle = ?", handles)
+            self.dbapi.executemany(
+                "DELETE FROM lifespan_dependency WHERE handle = ?", handles
+            )
+
     def rebuild_secondary(self, callback=None):
         """
         Rebuild secondary indices
@@ -978,6 +1694,8 @@ class DBAPI(DbGeneric):
         self.genderStats = GenderStats(gstats)
 
     def _has_handle(self, obj_key, handle):
+        if self._get_pending_row(obj_key, handle) is not None:
+            return True
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT 1 FROM %s WHERE handle = ?" % table
         self.dbapi.execute(sql, [handle])
@@ -986,31 +1704,58 @@ class DBAPI(DbGeneric):
     def _has_gramps_id(self, obj_key, gramps_id):
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT 1 FROM %s WHERE gramps_id = ?" % table
+        self._flush_objects()
         self.dbapi.execute(sql, [gramps_id])
         return self.dbapi.fetchone() != None
 
     def _get_gramps_ids(self, obj_key):
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT gramps_id FROM %s" % table
+        self._flush_objects()
         self.dbapi.execute(sql)
         rows = self.dbapi.fetchall()
         return [row[0] for row in rows]
 
     def _get_raw_data(self, obj_key, handle):
+        row = self._get_pending_row(obj_key, handle)
+        if row is not None:
+            return self.blob_codec.decode(row[1])
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT blob_data FROM %s WHERE handle = ?" % table
         self.dbapi.execute(sql, [handle])
         row = self.dbapi.fetchone()
         if row:
-            return pickle.loads(row[0])
+            return self.blob_codec.decode(row[0])
+
+    def _get_raw_data_many(self, obj_key, handles):
+        table = KEY_TO_NAME_MAP[obj_key]
+        handles = list(handles)
+        result = {}
+        if obj_key in self._pending_objects:
+            rows = self._pending_objects[obj_key][1]
+            for handle in handles:
+                if handle in rows:
+                    result[handle] = self.blob_codec.decode(rows[handle][1])
+        handles = [handle for handle in handles if handle not in result]
+        for start in range(0, len(handles), MAX_SQL_PARAMETERS):
+            chunk = handles[start : start + MAX_SQL_PARAMETERS]
+            sql = "SELECT handle, blob_data FROM %s WHERE handle IN (%s)" % (
+                table,
+                ", ".join(["?"] * len(chunk)),
+            )
+            self.dbapi.execute(sql, chunk)
+            for row in self.dbapi.fetchall():
+                result[row[0]] = self.blob_codec.decode(row[1])
+        return result
 
     def _get_raw_from_id_data(self, obj_key, gramps_id):
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT blob_data FROM %s WHERE gramps_id = ?" % table
+        self._flush_objects()
         self.dbapi.execute(sql, [gramps_id])
         row = self.dbapi.fetchone()
         if row:
-            return pickle.loads(row[0])
+            return self.blob_codec.decode(row[0])
 
     def get_gender_stats(self):
         """
@@ -1059,23 +1804,24 @@ class DBAPI(DbGeneric):
         """
         cls = KEY_TO_CLASS_MAP[obj_key]
         table = cls.lower()
+        self._invalidate_cache(obj_key, handle)
+        self._update_sort_keys(obj_key, handle, data)
+        self._update_kinship_graph(obj_key, handle, data)
+        old_data = self._get_ancestry_old_data(obj_key, handle)
         if data is None:
             sql = "DELETE FROM %s WHERE handle = ?" % table
             self.dbapi.execute(sql, [handle])
         else:
-            if self._has_handle(obj_key, handle):
-                sql = "UPDATE %s SET blob_data = ? WHERE handle = ?" % table
-                self.dbapi.execute(sql, [pickle.dumps(data), handle])
-            else:
-                sql = "INSERT INTO %s (handle, blob_data) VALUES (?, ?)" % table
-                self.dbapi.execute(sql, [handle, pickle.dumps(data)])
             obj = self._get_table_func(cls)["class_func"].create(data)
-            self._update_secondary_values(obj)
+            self._write_object(obj_key, obj, data)
+        self._update_ancestry(obj_key, handle, old_data, data)
+        self._update_lifespans(obj_key, handle)
 
     def get_surname_list(self):
         """
         Return the list of locale-sorted surnames contained in the database.
         """
+        self._flush_objects()
         self.dbapi.execute("SELECT DISTINCT surname " "FROM person " "ORDER BY surname")
         surname_list = []
         for row in self.dbapi.fetchall():
@@ -1125,39 +1871,102 @@ class DBAPI(DbGeneric):
                         % (table_name, field, sql_type)
                     )
 
-    def _update_secondary_values(self, obj):
+    def _get_secondary_values(self, obj):
         """
-        Given a primary object update its secondary field values
-        in the database.
-        Does not commit.
+        Given a primary object return the names and values of its secondary
+        columns, the handle left out.
         """
         table = obj.__class__.__name__
-        fields = [field[0] for field in obj.get_secondary_fields()]
-        sets = []
-        values = []
-        for field in fields:
-            sets.append("%s = ?" % field)
-            values.append(getattr(obj, field))
+        columns = [
+            field[0] for field in obj.get_secondary_fields() if field[0] != "handle"
+        ]
+        values = [getattr(obj, column) for column in columns]
 
         # Derived fields
         if table == "Person":
             given_name, surname = self._get_person_data(obj)
-            sets.append("given_name = ?")
-            values.append(given_name)
-            sets.append("surname = ?")
-            values.append(surname)
+            columns += ["given_name", "surname"]
+            values += [given_name, surname]
         if table == "Place":
-            handle = self._get_place_data(obj)
-            sets.append("enclosed_by = ?")
-            values.append(handle)
+            columns.append("enclosed_by")
+            values.append(self._get_place_data(obj))
+        return tuple(columns), self._sql_cast_list(values)
 
-        if len(values) > 0:
-            table_name = table.lower()
+    def _update_secondary_values(self, obj):
+        """
+        Given a primary object update its secondary field values
+        in the database.
+        Does not commit.
+        """
+        columns, values = self._get_secondary_values(obj)
+        if columns:
+            table_name = obj.__class__.__name__.lower()
             self.dbapi.execute(
-                "UPDATE %s SET %s where handle = ?" % (table_name, ", ".join(sets)),
-                self._sql_cast_list(values) + [obj.handle],
+                "UPDATE %s SET %s where handle = ?"
+                % (table_name, ", ".join("%s = ?" % column for column in columns)),
+                values + [obj.handle],
             )
 
+    def _get_upsert_sql(self, obj_key, columns):
+        """
+        Return the statement inserting or updating an object with its
+        blob and secondary columns.
+        """
+        columns = ("handle", "blob_data") + columns
+        return (
+            "INSERT INTO %s (%s) VALUES (%s) "
+            "ON CONFLICT (handle) DO UPDATE SET %s"
+            % (
+                KEY_TO_NAME_MAP[obj_key],
+                ", ".join(columns),
+                ", ".join(["?"] * len(columns)),
+                ", ".join("%s = excluded.%s" % (col, col) for col in columns[1:]),
+            )
+        )
+
+    def _write_object(self, obj_key, obj, data):
+        """
+        Write an object with its secondary columns in a single statement.
+
+        Within a transaction the write is buffered, a later commit of the
+        same object replacing it, and the buffer is flushed in bulk.
+        """
+        columns, values = self._get_secondary_values(obj)
+        row = [obj.handle, self.blob_codec.encode(data)] + values
+        if self.transaction is None:
+            self.dbapi.execute(self._get_upsert_sql(obj_key, columns), row)
+            return
+        if obj_key not in self._pending_objects:
+            self._pending_objects[obj_key] = (columns, {})
+        self._pending_objects[obj_key][1][obj.handle] = row
+        count = sum(len(rows) for columns, rows in self._pending_objects.values())
+        if count >= OBJECT_BUFFER_SIZE:
+            self._flush_objects()
+
+    def _get_pending_row(self, obj_key, handle):
+        """
+        Return the buffered row of an object, or None.
+        """
+        if obj_key in self._pending_objects:
+            return self._pending_objects[obj_key][1].get(handle)
+        return None
+
+    def _flush_objects(self):
+        """
+        Write the objects buffered during a transaction to the object
+        tables.  This must be called before any query on the object tables
+        which is not by handle.
+        """
+        if not self._pending_objects:
+            return
+        pending = self._pending_objects
+        self._pending_objects = {}
+        for obj_key, (columns, rows) in pending.items():
+            if rows:
+                self.dbapi.executemany(
+                    self._get_upsert_sql(obj_key, columns), list(rows.values())
+                )
+
     def _sql_cast_list(self, values):
         """
         Given a list of field names and values, return the values
@@ -31,7 +31,12 @@ Backend for SQLite database.
 import sqlite3
 import os
 import re
+import sys
 import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.request import pathname2url
 
 # -------------------------------------------------------------------------
 #
@@ -39,7 +44,7 @@ import logging
 #
 # -------------------------------------------------------------------------
 from gramps.plugins.db.dbapi.dbapi import DBAPI
-from gramps.gen.db.dbconst import ARRAYSIZE
+from gramps.gen.config import config
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 
 _ = glocale.translation.gettext
@@ -72,7 +77,145 @@ class SQLite(DBAPI):
             path_to_db = ":memory:"
         else:
             path_to_db = os.path.join(directory, "sqlite.db")
+        self._path_to_db = path_to_db
         self.dbapi = Connection(path_to_db)
+        if (
+            path_to_db != ":memory:"
+            and not self.readonly
+            and config.get("database.sqlite-wal")
+        ):
+            # readers, including worker processes, do not block the writer
+            self.dbapi.execute("PRAGMA journal_mode=WAL")
+
+    def map_over_objects(self, class_name, func, chunk_size=1000):
+        """
+        Call func(db, handles) for each chunk of the handles of the objects
+        of the class, and return the list of the results in chunk order.
+
+        The chunks are processed by a pool of worker processes, each with
+        its own read-only connection to the database file, unless the
+        database is in memory, a transaction is in progress, processes
+        cannot be forked or this is the process of the GUI.  The number of
+        workers is set by the
+        "database.workers" option, with 0 meaning the number of CPUs.
+        """
+        chunks = self._get_handle_chunks(class_name, chunk_size)
+        workers = min(self._get_worker_count(), len(chunks))
+        if workers < 2:
+            return [func(self, chunk) for chunk in chunks]
+        with self._get_executor(workers) as executor:
+            return list(executor.map(_run_worker, [func] * len(chunks), chunks))
+
+    def imap_over_objects(self, class_name, func, chunk_size=1000):
+        """
+        Call func(db, handles) for each chunk of the handles of the objects
+        of the class, taken in ascending order, and return an iterator over
+        the results in chunk order.
+
+        The chunks are processed by worker processes as in
+        :meth:`map_over_objects`, with at most two chunks per worker
+        submitted ahead of the iteration, so that the memory used does not
+        grow with the number of objects.
+        """
+        chunks = self._iter_sorted_handle_chunks(class_name, chunk_size)
+        workers = self._get_worker_count()
+        if workers < 2:
+            for chunk in chunks:
+                yield func(self, chunk)
+            return
+        with self._get_executor(workers) as executor:
+            futures = deque()
+            for chunk in chunks:
+                futures.append(executor.submit(_run_worker, func, chunk))
+                if len(futures) >= 2 * workers:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+
+    def _get_worker_count(self):
+        """
+        Return the number of worker processes to use, or 1 if the work
+        must be done in this process: when the database is in memory, a
+        transaction is in progress, processes cannot be forked or this is
+        the process of the GUI.
+        """
+        if (
+            self._path_to_db == ":memory:"
+            or self.transaction is not None
+            or "fork" not in multiprocessing.get_all_start_methods()
+            or _in_gui_process()
+        ):
+            return 1
+        return config.get("database.workers") or os.cpu_count() or 1
+
+    def _get_executor(self, workers):
+        """
+        Return a pool of forked worker processes.
+        """
+        # forked workers inherit this database object, see _init_worker
+        context = multiprocessing.get_context("fork")
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self,),
+        )
+
+    def _open_worker_connection(self):
+        """
+        Replace the connection by a read-only one, in a worker process.
+        """
+        # Keep the connection inherited from the parent process open, as
+        # closing it in this process could release the parent's locks.
+        self._parent_dbapi = self.dbapi
+        self.dbapi = Connection(_readonly_uri(self._path_to_db), uri=True)
+        self.readonly = True
+        self.clear_cache()
+
+
+# -------------------------------------------------------------------------
+#
+# Worker process functions
+#
+# -------------------------------------------------------------------------
+_WORKER_DB = None
+
+
+def _init_worker(db):
+    """
+    Initialize a worker process of SQLite.map_over_objects.
+    """
+    global _WORKER_DB
+    db._open_worker_connection()
+    _WORKER_DB = db
+
+
+def _run_worker(func, handles):
+    """
+    Call the mapped function in a worker process.
+    """
+    return func(_WORKER_DB, handles)
+
+
+def _in_gui_process():
+    """
+    Return True if this is the process of the GUI.
+
+    The threads started by GTK may hold locks while the process is forked,
+    which would deadlock the workers, and the workers could not use the
+    inherited connection to the display anyway.  The report and export
+    functions mapped over the objects need the state of this process, so
+    the workers cannot be spawned instead.
+    """
+    gio = sys.modules.get("gi.repository.Gio")
+    return gio is not None and gio.Application.get_default() is not None
+
+
+def _readonly_uri(path):
+    """
+    Return the URI opening the database file read-only.
+    """
+    return "file:%s?mode=ro" % pathname2url(os.path.abspath(path))
 
 
 # -------------------------------------------------------------------------
@@ -135,6 +278,20 @@ class Connection:
         self.log.debug(args)
         self.__cursor.execute(*args, **kwargs)
 
+    def executemany(self, *args, **kwargs):
+        """
+        Executes an SQL statement against all parameter sequences.
+
+        :param args: arguments to be passed to the sqlite3 executemany
+                     statement
+        :type args: list
+        :param kwargs: arguments to be passed to the sqlite3 executemany
+                       statement
+        :type kwargs: list
+        """
+        self.log.debug(args[:1])
+        self.__cursor.executemany(*args, **kwargs)
+
     def fetchone(self):
         """
         Fetches the next row of a query result set, returning a single sequence,
@@ -212,7 +369,6 @@ class Cursor:
 
     def __enter__(self):
         self.__cursor = self.__connection.cursor()
-        self.__cursor.arraysize = ARRAYSIZE
         return self
 
     def __exit__(self, *args, **kwargs):
@@ -229,12 +385,12 @@ class Cursor:
         """
         self.__cursor.execute(*args, **kwargs)
 
-    def fetchmany(self):
+    def fetchall(self):
         """
-        Fetches the next set of rows of a query result, returning a list. An
+        Fetches all remaining rows of a query result, returning a list. An
         empty list is returned when no more rows are available.
         """
-        return self.__cursor.fetchmany()
+        return self.__cursor.fetchall()
 
 
 def regexp(expr, value):
@@ -250,4 +406,4 @@ def regexp(expr, value):
     :returns: True if the expr exists within the value, false otherwise.
     :rtype: bool
     """
-    return re.search(expr, value, re.MULTILINE) is not None
+    return re.search(expr, value) is not None
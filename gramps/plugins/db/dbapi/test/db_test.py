@@ -23,19 +23,28 @@
 # Standard python modules
 #
 # -------------------------------------------------------------------------
+import multiprocessing
+import os
+import shutil
+import tempfile
 import unittest
+from unittest.mock import patch
 
 # -------------------------------------------------------------------------
 #
 # Gramps modules
 #
 # -------------------------------------------------------------------------
-from gramps.gen.db import DbTxn
+from gramps.gen.config import config
+from gramps.gen.db import DbTxn, PERSON_KEY
+from gramps.gen.errors import HandleError
 from gramps.gen.db.utils import make_database
+from gramps.gen.db.codec import get_available_codecs
 from gramps.gen.lib import (
     Person,
     Family,
     Event,
+    EventRef,
     Place,
     Repository,
     Source,
@@ -296,6 +305,16 @@ class DbRandomTest(unittest.TestCase):
             sort_handles=True,
         )
 
+    def test_nested_iter_handles(self):
+        count = 0
+        for handle in self.db.iter_person_handles():
+            self.assertIn(handle, self.handles["Person"])
+            self.assertEqual(
+                len(self.db.get_family_handles()), len(self.handles["Family"])
+            )
+            count += 1
+        self.assertEqual(count, len(self.handles["Person"]))
+
     ################################################################
     #
     # Test get_*_gramps_ids methods
@@ -418,6 +437,76 @@ class DbRandomTest(unittest.TestCase):
             Tag, self.db.get_tag_handles, self.db.get_tag_from_handle
         )
 
+    ################################################################
+    #
+    # Test get_*_from_handles methods
+    #
+    ################################################################
+
+    def __get_from_handles_test(self, obj_class, handles_func, get_func):
+        handles = list(reversed(handles_func()))
+        objects = get_func(handles)
+        self.assertEqual(len(objects), len(handles))
+        for handle, obj in zip(handles, objects):
+            self.assertIsInstance(obj, obj_class)
+            self.assertEqual(obj.handle, handle)
+
+    def test_get_people_from_handles(self):
+        self.__get_from_handles_test(
+            Person, self.db.get_person_handles, self.db.get_people_from_handles
+        )
+
+    def test_get_families_from_handles(self):
+        self.__get_from_handles_test(
+            Family, self.db.get_family_handles, self.db.get_families_from_handles
+        )
+
+    def test_get_events_from_handles(self):
+        self.__get_from_handles_test(
+            Event, self.db.get_event_handles, self.db.get_events_from_handles
+        )
+
+    def test_get_places_from_handles(self):
+        self.__get_from_handles_test(
+            Place, self.db.get_place_handles, self.db.get_places_from_handles
+        )
+
+    def test_get_repositories_from_handles(self):
+        self.__get_from_handles_test(
+            Repository,
+            self.db.get_repository_handles,
+            self.db.get_repositories_from_handles,
+        )
+
+    def test_get_sources_from_handles(self):
+        self.__get_from_handles_test(
+            Source, self.db.get_source_handles, self.db.get_sources_from_handles
+        )
+
+    def test_get_citations_from_handles(self):
+        self.__get_from_handles_test(
+            Citation, self.db.get_citation_handles, self.db.get_citations_from_handles
+        )
+
+    def test_get_media_from_handles(self):
+        self.__get_from_handles_test(
+            Media, self.db.get_media_handles, self.db.get_media_from_handles
+        )
+
+    def test_get_notes_from_handles(self):
+        self.__get_from_handles_test(
+            Note, self.db.get_note_handles, self.db.get_notes_from_handles
+        )
+
+    def test_get_tags_from_handles(self):
+        self.__get_from_handles_test(
+            Tag, self.db.get_tag_handles, self.db.get_tags_from_handles
+        )
+
+    def test_get_from_handles_missing(self):
+        handles = self.handles["Person"][:1] + ["missing-handle"]
+        self.assertRaises(HandleError, self.db.get_people_from_handles, handles)
+
     ################################################################
     #
     # Test get_*_from_gramps_id methods
@@ -899,5 +988,639 @@ class DbPersonTest(unittest.TestCase):
         self.assertEqual(saved["Mary"], (1, 3, 1))
 
 
+# -------------------------------------------------------------------------
+#
+# DbBatchTest class
+#
+# -------------------------------------------------------------------------
+class DbBatchTest(unittest.TestCase):
+    """
+    Tests of the reference map maintained during batch transactions.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = make_database("sqlite")
+        cls.db.load(":memory:")
+
+    def test_batch_backlinks(self):
+        with DbTxn("Add test objects", self.db, batch=True) as trans:
+            note_handle = self.db.add_note(Note(), trans)
+            event = Event()
+            event.add_note(note_handle)
+            self.db.add_event(event, trans)
+            # A second commit replaces the buffered references
+            event.set_note_list([])
+            self.db.commit_event(event, trans)
+            person = Person()
+            person.add_note(note_handle)
+            person_handle = self.db.add_person(person, trans)
+        backlinks = list(self.db.find_backlink_handles(note_handle))
+        self.assertEqual(backlinks, [("Person", person_handle)])
+
+    def test_batch_backlinks_in_transaction(self):
+        with DbTxn("Add test objects", self.db, batch=True) as trans:
+            note_handle = self.db.add_note(Note(), trans)
+            person = Person()
+            person.add_note(note_handle)
+            person_handle = self.db.add_person(person, trans)
+            backlinks = list(self.db.find_backlink_handles(note_handle))
+            self.assertEqual(backlinks, [("Person", person_handle)])
+
+
+# -------------------------------------------------------------------------
+#
+# DbCacheTest class
+#
+# -------------------------------------------------------------------------
+class DbCacheTest(unittest.TestCase):
+    """
+    Tests of the object cache.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = make_database("sqlite")
+        cls.db.load(":memory:")
+
+    def setUp(self):
+        with DbTxn("Add test objects", self.db) as trans:
+            self.handle = self.db.add_person(Person(), trans)
+
+    def test_cache_hit(self):
+        stats1 = self.db.get_cache_stats()
+        self.db.get_person_from_handle(self.handle)
+        self.db.get_person_from_handle(self.handle)
+        stats2 = self.db.get_cache_stats()
+        self.assertEqual(stats2["misses"], stats1["misses"] + 1)
+        self.assertEqual(stats2["hits"], stats1["hits"] + 1)
+
+    def test_cache_copy(self):
+        person = self.db.get_person_from_handle(self.handle)
+        person.add_family_handle("F0001")
+        person = self.db.get_person_from_handle(self.handle)
+        self.assertEqual(person.get_family_handle_list(), [])
+
+    def test_cache_commit(self):
+        person = self.db.get_person_from_handle(self.handle)
+        person.set_gender(Person.FEMALE)
+        with DbTxn("Edit person", self.db) as trans:
+            self.db.commit_person(person, trans)
+        person = self.db.get_person_from_handle(self.handle)
+        self.assertEqual(person.get_gender(), Person.FEMALE)
+        self.db.undo()
+        person = self.db.get_person_from_handle(self.handle)
+        self.assertEqual(person.get_gender(), Person.UNKNOWN)
+
+    def test_raw_data_from_handles(self):
+        data = self.db.get_raw_data_from_handles("Person", [self.handle, "missing"])
+        self.assertEqual(list(data), [self.handle])
+        self.assertEqual(data[self.handle], self.db.get_raw_person_data(self.handle))
+
+    def test_cache_remove(self):
+        self.db.get_person_from_handle(self.handle)
+        with DbTxn("Remove person", self.db) as trans:
+            self.db.remove_person(self.handle, trans)
+        self.assertRaises(HandleError, self.db.get_person_from_handle, self.handle)
+
+
+# -------------------------------------------------------------------------
+#
+# DbCodecTest class
+#
+# -------------------------------------------------------------------------
+@unittest.skipUnless("msgpack" in get_available_codecs(), "msgpack not installed")
+class DbCodecTest(unittest.TestCase):
+    """
+    Tests of the blob codec conversion.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # new databases use the codec of the preferences
+        cls.addClassCleanup(
+            config.set, "database.blob-codec", config.get("database.blob-codec")
+        )
+        config.set("database.blob-codec", "pickle")
+        cls.db = make_database("sqlite")
+        cls.db.load(":memory:")
+
+    def test_convert_codec(self):
+        person = Person()
+        surname = Surname()
+        surname.set_surname("Smith")
+        person.primary_name.add_surname(surname)
+        person.primary_name.set_first_name("John")
+        event = Event()
+        event.set_description("Birth")
+        event.get_date_object().set_yr_mon_day(1900, 1, 2)
+        with DbTxn("Add test objects", self.db) as trans:
+            self.db.add_event(event, trans)
+            event_ref = EventRef()
+            event_ref.set_reference_handle(event.handle)
+            person.add_event_ref(event_ref)
+            self.db.add_person(person, trans)
+        self.assertEqual(self.db.get_blob_codec(), "pickle")
+
+        self.db.set_blob_codec("msgpack")
+        self.assertEqual(self.db.get_blob_codec(), "msgpack")
+        new_person = self.db.get_person_from_handle(person.handle)
+        self.assertEqual(new_person.serialize(), person.serialize())
+        new_event = self.db.get_event_from_handle(event.handle)
+        self.assertEqual(new_event.serialize(), event.serialize())
+
+        self.db.set_blob_codec("pickle")
+        self.assertEqual(self.db.get_blob_codec(), "pickle")
+        new_person = self.db.get_person_from_handle(person.handle)
+        self.assertEqual(new_person.serialize(), person.serialize())
+
+    def test_convert_in_batches(self):
+        with DbTxn("Add test objects", self.db) as trans:
+            handles = [self.db.add_person(Person(), trans) for dummy in range(5)]
+        sort_func = lambda data: data[1]
+        expected = self.db.get_sort_keys("Person", "gramps_id", sort_func)
+        # the data is rewritten in place, without updating the sort keys or
+        # the lifespans
+        with patch("gramps.gen.db.upgrade.CONVERT_CHUNK_SIZE", 2), patch.object(
+            self.db, "_update_sort_keys", side_effect=AssertionError
+        ), patch.object(self.db, "_update_lifespans", side_effect=AssertionError):
+            self.db.set_blob_codec("msgpack")
+        self.addCleanup(self.db.set_blob_codec, "pickle")
+        self.assertEqual(self.db.get_blob_codec(), "msgpack")
+        for handle in handles:
+            self.assertEqual(self.db.get_person_from_handle(handle).handle, handle)
+        self.db._sort_funcs.clear()
+        self.assertEqual(
+            self.db.get_sort_keys("Person", "gramps_id", sort_func), expected
+        )
+
+
+# -------------------------------------------------------------------------
+#
+# DbSortKeyTest class
+#
+# -------------------------------------------------------------------------
+class DbSortKeyTest(unittest.TestCase):
+    """
+    Tests of the stored sort keys.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = make_database("sqlite")
+        cls.db.load(":memory:")
+
+    def test_sort_keys(self):
+        sort_func = lambda data: data[1]
+        with DbTxn("Add test objects", self.db) as trans:
+            handle1 = self.db.add_person(Person(), trans)
+            handle2 = self.db.add_person(Person(), trans)
+        person1 = self.db.get_person_from_handle(handle1)
+        person2 = self.db.get_person_from_handle(handle2)
+        expected = sorted([(person1.gramps_id, handle1), (person2.gramps_id, handle2)])
+        self.assertEqual(self.db.get_sort_keys("Person", "id", sort_func), expected)
+        # stored keys are returned the second time
+        self.assertEqual(self.db.get_sort_keys("Person", "id", sort_func), expected)
+
+        person1.set_gramps_id("Z0001")
+        with DbTxn("Edit person", self.db) as trans:
+            self.db.commit_person(person1, trans)
+        expected = [(person2.gramps_id, handle2), ("Z0001", handle1)]
+        self.assertEqual(self.db.get_sort_keys("Person", "id", sort_func), expected)
+
+        with DbTxn("Remove person", self.db) as trans:
+            self.db.remove_person(handle2, trans)
+        expected = [("Z0001", handle1)]
+        self.assertEqual(self.db.get_sort_keys("Person", "id", sort_func), expected)
+
+        self.db.undo()
+        expected = [(person2.gramps_id, handle2), ("Z0001", handle1)]
+        self.assertEqual(self.db.get_sort_keys("Person", "id", sort_func), expected)
+
+    def test_unknown_sort_func(self):
+        sort_func = lambda data: data[1]
+        with DbTxn("Add test objects", self.db) as trans:
+            handle1 = self.db.add_person(Person(), trans)
+        self.db.get_sort_keys("Person", "gramps_id", sort_func)
+        # a session which did not register the sort function, like an
+        # import from the command line
+        self.db._sort_funcs.clear()
+        person1 = self.db.get_person_from_handle(handle1)
+        person1.set_gramps_id("Y0001")
+        with DbTxn("Edit and add people", self.db) as trans:
+            self.db.commit_person(person1, trans)
+            handle2 = self.db.add_person(Person(), trans)
+        person2 = self.db.get_person_from_handle(handle2)
+        # only the keys of the committed people are computed again
+        with patch(
+            "gramps.gen.db.base.DbReadBase.get_sort_keys",
+            side_effect=AssertionError,
+        ):
+            keys = self.db.get_sort_keys("Person", "gramps_id", sort_func)
+        self.assertIn(("Y0001", handle1), keys)
+        self.assertIn((person2.gramps_id, handle2), keys)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(keys), self.db.get_number_of_people())
+
+
+# -------------------------------------------------------------------------
+#
+# DbSelectTest class
+#
+# -------------------------------------------------------------------------
+class DbSelectTest(unittest.TestCase):
+    """
+    Tests of the handles selected with SQL predicates.
+    """
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        with DbTxn("Add test objects", self.db) as trans:
+            for gramps_id in ("I1", "A\nB"):
+                person = Person()
+                person.set_gramps_id(gramps_id)
+                self.db.add_person(person, trans)
+
+    def tearDown(self):
+        self.db.close(update=False)
+
+    def select_ids(self, pattern):
+        handles = self.db.select_handles("Person", [("gramps_id REGEXP ?", [pattern])])
+        return sorted(self.db.get_person_from_handle(h).gramps_id for h in handles)
+
+    def test_regexp(self):
+        self.assertEqual(self.select_ids("1"), ["I1"])
+        self.assertEqual(self.select_ids("(?i)^i"), ["I1"])
+        # the pattern matches like re.search, not line by line
+        self.assertEqual(self.select_ids("^B"), [])
+        self.assertEqual(self.select_ids("A$"), [])
+        self.assertEqual(self.select_ids("^A\nB$"), ["A\nB"])
+
+
+# -------------------------------------------------------------------------
+#
+# DbKinshipTest class
+#
+# -------------------------------------------------------------------------
+class DbKinshipTest(unittest.TestCase):
+    """
+    Tests of the kinship graph.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = make_database("sqlite")
+        cls.db.load(":memory:")
+
+    def add_family(self, father, children, trans):
+        family = Family()
+        family.set_father_handle(father.handle)
+        self.db.add_family(family, trans)
+        father.add_family_handle(family.handle)
+        self.db.commit_person(father, trans)
+        for child in children:
+            self.db.add_child_to_family(family, child, trans=trans)
+        return family
+
+    def test_kinship_graph(self):
+        people = [Person() for dummy in range(4)]
+        with DbTxn("Add test objects", self.db) as trans:
+            for person in people:
+                self.db.add_person(person, trans)
+        # read the graph before the families are added
+        graph = self.db.get_kinship_graph()
+        self.assertEqual(graph.get_descendants(people[0].handle), {people[0].handle})
+
+        grandfather, father, child, other = [person.handle for person in people]
+        with DbTxn("Add families", self.db) as trans:
+            family = self.add_family(people[0], [people[1]], trans)
+            self.add_family(people[1], [people[2]], trans)
+        graph = self.db.get_kinship_graph()
+        self.assertEqual(
+            graph.get_ancestors(child, inclusive=False), {father, grandfather}
+        )
+        self.assertEqual(graph.get_ancestors(child, generations=2), {child, father})
+        self.assertEqual(
+            graph.get_descendants(grandfather), {grandfather, father, child}
+        )
+        self.assertEqual(graph.get_relatives(child), {grandfather, father, child})
+        self.assertEqual(
+            graph.get_common_ancestor_people([child]), {grandfather, father, child}
+        )
+
+        with DbTxn("Remove family", self.db) as trans:
+            self.db.remove_family_relationships(family.handle, trans)
+        graph = self.db.get_kinship_graph()
+        self.assertEqual(graph.get_ancestors(child, inclusive=False), {father})
+        self.assertEqual(graph.get_relatives(other), {other})
+
+
+# -------------------------------------------------------------------------
+#
+# DbAncestryTest class
+#
+# -------------------------------------------------------------------------
+class DbAncestryTest(unittest.TestCase):
+    """
+    Tests of the ancestry table.
+    """
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        self.people = [Person() for dummy in range(5)]
+        with DbTxn("Add test objects", self.db) as trans:
+            for person in self.people:
+                self.db.add_person(person, trans)
+            # 0 -> 1 -> 2, and 3 -> 2
+            self.add_family(self.people[0], self.people[0], [self.people[1]], trans)
+            self.add_family(self.people[1], self.people[3], [self.people[2]], trans)
+
+    def tearDown(self):
+        self.db.close(update=False)
+
+    def add_family(self, father, mother, children, trans):
+        family = Family()
+        family.set_father_handle(father.handle)
+        if mother is not father:
+            family.set_mother_handle(mother.handle)
+        self.db.add_family(family, trans)
+        for child in children:
+            self.db.add_child_to_family(family, child, trans=trans)
+        return family
+
+    def handles(self, *indexes):
+        return {self.people[index].handle for index in indexes}
+
+    def test_ancestry(self):
+        handle = self.people[2].handle
+        self.assertEqual(self.db.get_ancestor_handles(handle), self.handles(0, 1, 3))
+        self.db.reindex_ancestry()
+        self.assertEqual(self.db.get_ancestor_handles(handle), self.handles(0, 1, 3))
+        self.assertEqual(
+            self.db.get_ancestor_handles(handle, max_generations=1),
+            self.handles(1, 3),
+        )
+        self.assertEqual(
+            self.db.get_ancestor_handles(handle, min_generations=2),
+            self.handles(0),
+        )
+        self.assertEqual(
+            self.db.get_descendant_handles(self.people[0].handle, 0),
+            self.handles(0, 1, 2),
+        )
+
+        # new parents of the root are ancestors of all descendants
+        with DbTxn("Add family", self.db) as trans:
+            self.add_family(self.people[4], self.people[4], [self.people[0]], trans)
+        self.assertEqual(self.db.get_ancestor_handles(handle), self.handles(0, 1, 3, 4))
+        self.assertEqual(
+            self.db.get_descendant_handles(self.people[4].handle, 3),
+            self.handles(2),
+        )
+
+        with DbTxn("Remove person", self.db) as trans:
+            self.db.remove_person(self.people[0].handle, trans)
+        self.assertEqual(self.db.get_ancestor_handles(handle), self.handles(1, 3))
+
+        self.db.undo()
+        self.assertEqual(self.db.get_ancestor_handles(handle), self.handles(0, 1, 3, 4))
+
+        self.db.drop_ancestry()
+        self.assertEqual(self.db.get_ancestor_handles(handle), self.handles(0, 1, 3, 4))
+
+
+# -------------------------------------------------------------------------
+#
+# DbLifespanTest class
+#
+# -------------------------------------------------------------------------
+class DbLifespanTest(unittest.TestCase):
+    """
+    Tests of the stored lifespans.
+    """
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+
+    def tearDown(self):
+        self.db.close(update=False)
+
+    def test_lifespans(self):
+        person = Person()
+        event = Event()
+        with DbTxn("Add test objects", self.db) as trans:
+            self.db.add_person(person, trans)
+            self.db.add_event(event, trans)
+        handle = person.handle
+        self.assertIsNone(self.db.get_lifespan(handle, "settings"))
+        self.assertEqual(self.db.get_lifespan_count("settings"), 0)
+
+        self.db.set_lifespans("settings", [(handle, "data", [handle, event.handle])])
+        self.assertEqual(self.db.get_lifespan(handle, "settings"), "data")
+        self.assertEqual(self.db.get_lifespan_count("settings"), 1)
+        self.assertIsNone(self.db.get_lifespan(handle, "other settings"))
+
+        # a change of a dependency drops the lifespan
+        with DbTxn("Edit event", self.db) as trans:
+            self.db.commit_event(event, trans)
+        self.assertIsNone(self.db.get_lifespan(handle, "settings"))
+
+        self.db.set_lifespans("settings", [(handle, "data", [handle])])
+        self.db.set_lifespans("other settings", [])
+        self.assertIsNone(self.db.get_lifespan(handle, "settings"))
+        self.assertEqual(self.db.get_lifespan_count("other settings"), 0)
+
+
+# -------------------------------------------------------------------------
+#
+# DbMapTest class
+#
+# -------------------------------------------------------------------------
+def _count_people(db, handles):
+    return len(db.get_people_from_handles(handles))
+
+
+def _get_handles(db, handles):
+    return [person.handle for person in db.get_people_from_handles(handles)]
+
+
+def _get_pid(db, handles):
+    return os.getpid()
+
+
+class DbMapTest(unittest.TestCase):
+    """
+    Tests of the mapping of functions over the objects of a database file.
+    """
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.db = make_database("sqlite")
+        self.db.load(self.dirname)
+
+    def tearDown(self):
+        self.db.close(update=False)
+        shutil.rmtree(self.dirname)
+
+    def test_map_over_people(self):
+        with DbTxn("Add test objects", self.db) as trans:
+            for dummy in range(25):
+                self.db.add_person(Person(), trans)
+        results = self.db.map_over_people(_count_people, chunk_size=10)
+        self.assertEqual(results, [10, 10, 5])
+
+    def test_imap_over_objects(self):
+        with DbTxn("Add test objects", self.db) as trans:
+            for dummy in range(25):
+                self.db.add_person(Person(), trans)
+        results = list(self.db.imap_over_objects("Person", _get_handles, chunk_size=10))
+        self.assertEqual([len(chunk) for chunk in results], [10, 10, 5])
+        handles = [handle for chunk in results for handle in chunk]
+        self.assertEqual(handles, sorted(self.db.get_person_handles()))
+
+    @unittest.skipUnless(
+        "fork" in multiprocessing.get_all_start_methods(), "needs forked workers"
+    )
+    def test_workers(self):
+        with DbTxn("Add test objects", self.db) as trans:
+            for dummy in range(25):
+                self.db.add_person(Person(), trans)
+        workers = config.get("database.workers")
+        config.set("database.workers", 2)
+        try:
+            pids = self.db.map_over_people(_get_pid, chunk_size=5)
+            self.assertNotIn(os.getpid(), pids)
+            # no forked workers in the process of the GUI
+            # the plugin manager may load the backend under another name
+            module = type(self.db).__module__
+            with patch(module + "._in_gui_process", return_value=True):
+                pids = self.db.map_over_people(_get_pid, chunk_size=5)
+            self.assertEqual(pids, [os.getpid()] * 5)
+        finally:
+            config.set("database.workers", workers)
+
+
+# -------------------------------------------------------------------------
+#
+# DbWriteBufferTest class
+#
+# -------------------------------------------------------------------------
+class DbWriteBufferTest(unittest.TestCase):
+    """
+    Tests of the objects buffered within a transaction.
+    """
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+
+    def tearDown(self):
+        self.db.close(update=False)
+
+    def test_buffered_objects(self):
+        with DbTxn("Add test objects", self.db) as trans:
+            person = Person()
+            person.set_gramps_id("I1")
+            self.db.add_person(person, trans)
+            self.assertIsNotNone(self.db._get_pending_row(PERSON_KEY, person.handle))
+            self.assertTrue(self.db.has_person_handle(person.handle))
+            person.set_gramps_id("I2")
+            self.db.commit_person(person, trans)
+            self.assertEqual(
+                self.db.get_person_from_handle(person.handle).gramps_id, "I2"
+            )
+            # queries on the table see the buffered objects
+            self.assertEqual(self.db.get_number_of_people(), 1)
+            self.assertEqual(
+                self.db.get_person_from_gramps_id("I2").handle, person.handle
+            )
+
+            removed = Person()
+            self.db.add_person(removed, trans)
+            self.db.remove_person(removed.handle, trans)
+        self.assertEqual(self.db.get_person_handles(), [person.handle])
+        self.assertTrue(self.db.has_person_gramps_id("I2"))
+        self.assertFalse(self.db.has_person_gramps_id("I1"))
+
+        self.db.undo()
+        self.assertEqual(self.db.get_number_of_people(), 0)
+
+    def test_add_while_iterating(self):
+        # more people than are read in one batch
+        with DbTxn("Add test objects", self.db) as trans:
+            for dummy in range(2500):
+                self.db.add_person(Person(), trans)
+        handles = self.db.get_person_handles()
+        visited = []
+        with DbTxn("Add test objects", self.db) as trans:
+            for handle in self.db.iter_person_handles():
+                visited.append(handle)
+                if len(visited) > len(handles):
+                    break
+                self.db.add_person(Person(), trans)
+        self.assertEqual(sorted(visited), sorted(handles))
+
+        handles = self.db.get_person_handles()
+        visited = []
+        with DbTxn("Add test objects", self.db) as trans:
+            for person in self.db.iter_people():
+                visited.append(person.handle)
+                if len(visited) > len(handles):
+                    break
+                self.db.add_person(Person(), trans)
+        self.assertEqual(sorted(visited), sorted(handles))
+
+
+# -------------------------------------------------------------------------
+#
+# DbUndoTest class
+#
+# -------------------------------------------------------------------------
+class DbUndoTest(unittest.TestCase):
+    """
+    Tests of the undo log.
+    """
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        self.db.undodb.memory_size = 2
+        self.db.undodb.max_size = 4
+
+    def tearDown(self):
+        self.db.close(update=False)
+
+    def add_people(self, count):
+        handles = []
+        for dummy in range(count):
+            person = Person()
+            with DbTxn("Add person", self.db) as trans:
+                self.db.add_person(person, trans)
+            handles.append(person.handle)
+        return handles
+
+    def test_undo_from_log(self):
+        handles = self.add_people(3)
+        self.assertEqual(len(self.db.undodb.undodb), 0)
+        for handle in reversed(handles):
+            self.assertTrue(self.db.undo())
+            self.assertFalse(self.db.has_person_handle(handle))
+        self.assertTrue(self.db.redo())
+        self.assertTrue(self.db.has_person_handle(handles[0]))
+
+    def test_undo_limit(self):
+        handles = self.add_people(6)
+        self.assertEqual(self.db.undodb.undo_count, 4)
+        self.assertEqual(len(self.db.undodb), 6)
+        self.assertRaises(IndexError, self.db.undodb.__getitem__, 0)
+        while self.db.undo():
+            pass
+        self.assertTrue(self.db.has_person_handle(handles[1]))
+        self.assertFalse(self.db.has_person_handle(handles[2]))
+
+
 if __name__ == "__main__":
     unittest.main()
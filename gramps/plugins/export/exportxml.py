@@ -39,6 +39,8 @@ import time
 import shutil
 import os
 import codecs
+from functools import partial
+from io import StringIO
 from xml.sax.saxutils import escape
 
 # ------------------------------------------------------------------------
@@ -80,6 +82,23 @@ try:
 except:
     _gzip_ok = 0
 
+# Number of objects written to a string by each call of _write_objects
+CHUNK_SIZE = 1000
+
+# Methods of GrampsXmlWriter writing the objects of each class
+WRITE_METHODS = {
+    "Tag": "write_tag",
+    "Event": "write_event",
+    "Person": "write_person",
+    "Family": "write_family",
+    "Citation": "write_citation",
+    "Source": "write_source",
+    "Place": "write_place_obj",
+    "Media": "write_object",
+    "Repository": "write_repository",
+    "Note": "write_note",
+}
+
 # table for skipping control chars from XML except 09, 0A, 0D
 strip_dict = dict.fromkeys(list(range(9)) + list(range(11, 13)) + list(range(14, 32)))
 
@@ -292,21 +311,13 @@ class GrampsXmlWriter(UpdateCallback):
         # Write table objects
         if tag_len > 0:
             self.g.write("  <tags>\n")
-            for key in sorted(self.db.get_tag_handles()):
-                tag = self.db.get_tag_from_handle(key)
-                if tag:
-                    self.write_tag(tag, 2)
-                self.update()
+            self.write_objects("Tag")
             self.g.write("  </tags>\n")
 
         # Write primary objects
         if event_len > 0:
             self.g.write("  <events>\n")
-            for handle in sorted(self.db.get_event_handles()):
-                event = self.db.get_event_from_handle(handle)
-                if event:
-                    self.write_event(event, 2)
-                self.update()
+            self.write_objects("Event")
             self.g.write("  </events>\n")
 
         if person_len > 0:
@@ -316,75 +327,42 @@ class GrampsXmlWriter(UpdateCallback):
                 self.g.write(' home="_%s"' % person.handle)
             self.g.write(">\n")
 
-            for handle in sorted(self.db.get_person_handles()):
-                person = self.db.get_person_from_handle(handle)
-                if person:
-                    self.write_person(person, 2)
-                self.update()
+            self.write_objects("Person")
             self.g.write("  </people>\n")
 
         if family_len > 0:
             self.g.write("  <families>\n")
-            for handle in sorted(self.db.iter_family_handles()):
-                family = self.db.get_family_from_handle(handle)
-                if family:
-                    self.write_family(family, 2)
-                self.update()
+            self.write_objects("Family")
             self.g.write("  </families>\n")
 
         if citation_len > 0:
             self.g.write("  <citations>\n")
-            for handle in sorted(self.db.get_citation_handles()):
-                citation = self.db.get_citation_from_handle(handle)
-                if citation:
-                    self.write_citation(citation, 2)
-                self.update()
+            self.write_objects("Citation")
             self.g.write("  </citations>\n")
 
         if source_len > 0:
             self.g.write("  <sources>\n")
-            for handle in sorted(self.db.get_source_handles()):
-                source = self.db.get_source_from_handle(handle)
-                if source:
-                    self.write_source(source, 2)
-                self.update()
+            self.write_objects("Source")
             self.g.write("  </sources>\n")
 
         if place_len > 0:
             self.g.write("  <places>\n")
-            for key in sorted(self.db.get_place_handles()):
-                # try:
-                place = self.db.get_place_from_handle(key)
-                if place:
-                    self.write_place_obj(place, 2)
-                self.update()
+            self.write_objects("Place")
             self.g.write("  </places>\n")
 
         if obj_len > 0:
             self.g.write("  <objects>\n")
-            for handle in sorted(self.db.get_media_handles()):
-                obj = self.db.get_media_from_handle(handle)
-                if obj:
-                    self.write_object(obj, 2)
-                self.update()
+            self.write_objects("Media")
             self.g.write("  </objects>\n")
 
         if repo_len > 0:
             self.g.write("  <repositories>\n")
-            for key in sorted(self.db.get_repository_handles()):
-                repo = self.db.get_repository_from_handle(key)
-                if repo:
-                    self.write_repository(repo, 2)
-                self.update()
+            self.write_objects("Repository")
             self.g.write("  </repositories>\n")
 
         if note_len > 0:
             self.g.write("  <notes>\n")
-            for key in sorted(self.db.get_note_handles()):
-                note = self.db.get_note_from_handle(key)
-                if note:
-                    self.write_note(note, 2)
-                self.update()
+            self.write_objects("Note")
             self.g.write("  </notes>\n")
 
         # Data is written, now write bookmarks.
@@ -396,6 +374,20 @@ class GrampsXmlWriter(UpdateCallback):
     #        self.status.end()
     #        self.status = None
 
+    def write_objects(self, class_name):
+        """
+        Write the objects of a class, in the order of their handles.
+
+        The objects are written to strings by chunks, possibly in worker
+        processes, see :meth:`imap_over_objects`, and the strings are
+        written to the file as they come in.
+        """
+        func = partial(_write_objects, class_name, self.strip_photos)
+        for count, text in self.db.imap_over_objects(class_name, func, CHUNK_SIZE):
+            self.g.write(text)
+            for dummy in range(count):
+                self.update()
+
     def write_metadata(self):
         """Method to write out metadata of the database"""
         mediapath = self.db.get_mediapath()
@@ -1414,6 +1406,40 @@ class GrampsXmlWriter(UpdateCallback):
         self.g.write("%s</object>\n" % ("  " * index))
 
 
+# -------------------------------------------------------------------------
+#
+# Writing of objects to strings
+#
+# -------------------------------------------------------------------------
+class _FragmentWriter(GrampsXmlWriter):
+    """
+    Writes objects to a string, with the methods of GrampsXmlWriter.
+    """
+
+    def __init__(self, strip_photos):
+        self.strip_photos = strip_photos
+        self.g = StringIO()
+
+
+def _write_objects(class_name, strip_photos, db, handles):
+    """
+    Return the number of handles and the XML of the objects of the class
+    with the handles.
+
+    This is called by :meth:`imap_over_objects`, possibly in a worker
+    process.
+    """
+    writer = _FragmentWriter(strip_photos)
+    write_func = getattr(writer, WRITE_METHODS[class_name])
+    get_func = db.method("get_%s_from_handle", class_name)
+    db.prefetch_handles(class_name, handles)
+    for handle in handles:
+        obj = get_func(handle)
+        if obj:
+            write_func(obj, 2)
+    return len(handles), writer.g.getvalue()
+
+
 # -------------------------------------------------------------------------
 #
 #
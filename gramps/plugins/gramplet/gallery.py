@@ -32,7 +32,6 @@ from gi.repository import Gtk
 # ------------------------------------------------------------------------
 from gramps.gen.plug import Gramplet
 from gramps.gui.widgets import Photo
-from gramps.gen.utils.thumbnails import get_thumbnail_image
 from gramps.gen.utils.file import media_path_full
 
 
@@ -79,18 +78,10 @@ class Gallery(Gramplet):
             media = self.dbstate.db.get_media_from_handle(media_handle)
             full_path = media_path_full(self.dbstate.db, media.get_path())
             mime_type = media.get_mime_type()
+            photo = Photo(self.uistate.screen_height() < 1000)
+            photo.set_image(full_path, mime_type, media_ref.get_rectangle())
             if mime_type and mime_type.startswith("image"):
-                photo = Photo(self.uistate.screen_height() < 1000)
-                photo.set_image(full_path, mime_type, media_ref.get_rectangle())
                 photo.set_uistate(self.uistate, media_handle)
-            else:
-                photo = Photo(self.uistate.screen_height() < 1000)
-                photo.set_pixbuf(
-                    full_path,
-                    get_thumbnail_image(
-                        full_path, mime_type, media_ref.get_rectangle()
-                    ),
-                )
             self.image_list.append(photo)
             self.top.pack_start(photo, False, False, 0)
             count += 1
@@ -921,135 +921,147 @@ class GedcomDateParser(DateParser):
         self.dhformat = "%m/%d/%y"
 
 
+# -------------------------------------------------------------------------
+#
+# Tokenizer - splits the input into compact GEDCOM records
+#
+# -------------------------------------------------------------------------
+CONTINUATION_TOKENS = {
+    tag: token for tag, token in TOKENS.items() if token in (TOKEN_CONT, TOKEN_CONC)
+}
+
+
+def _split_line(line):
+    """
+    Split a line with a pointer, or with extra spaces, into its level, xref,
+    tag and value.
+    """
+    # According to the GEDCOM 5.5 standard,
+    # Chapter 1 subsection Grammar "leading whitespace preceeding
+    # a GEDCOM line should be ignored"
+    level, sep, rest = line.lstrip(" ").partition(" ")
+    level = int(level)
+    # there should only be one space after the level,
+    # but we can ignore more,
+    rest = rest.lstrip(" ")
+    # the xref_id can have spaces in it
+    if rest.startswith("@"):
+        empty, xref, rest = rest.split("@", 2)
+        rest = rest.lstrip()
+    else:
+        xref = None
+    tag, sep, value = rest.partition(" ")
+    return (level, xref, tag, value)
+
+
+def tokenize(lines, add_msg):
+    """
+    Split GEDCOM lines into (level, xref, tag, value, line number) records.
+
+    This is a single streaming pass over the input. CONT and CONC lines are
+    folded into the value of the record they continue, so a record is
+    yielded as soon as the next line that is not a continuation is read.
+    The xref is the pointer of the line without its '@' delimiters, or None.
+
+    :param lines: iterable of the text lines of the file
+    :type lines: iterable
+    :param add_msg: called with a message for every line that is ignored
+    :type add_msg: callable
+    """
+    head = None
+    parts = []
+    index = 0
+    for line in lines:
+        index += 1
+        # We strip the terminator which is any combination of
+        # carriage_return and line_feed
+        line = line.rstrip("\n\r")
+        fields = line.split(" ", 2)
+        try:
+            if len(fields) > 1 and fields[0] and fields[1][:1] not in ("@", ""):
+                # the usual <LEVEL> <TAG> <VALUE> line
+                level = int(fields[0])
+                xref = None
+                tag = fields[1]
+                value = fields[2] if len(fields) > 2 else ""
+            else:
+                (level, xref, tag, value) = _split_line(line)
+        except ValueError:
+            problem = _("Line ignored ")
+            text = line
+            prob_width = 66
+            problem = problem.ljust(prob_width)[0 : (prob_width - 1)]
+            text = text.replace("\n", "\n".ljust(prob_width + 22))
+            message = "%s              %s" % (problem, text)
+            add_msg(message)
+            continue
+
+        # Need to un-double '@' See Gedcom 5.5 spec 'any_char'
+        if "@@" in value:
+            value = value.replace("@@", "@")
+        token = CONTINUATION_TOKENS.get(tag)
+        if token is not None and head is not None:
+            # Ignore meaningless @IDENT@ on CONT or CONC line
+            # as noted at http://www.tamurajones.net/IdentCONT.xhtml
+            if token == TOKEN_CONT:
+                parts.append("\n")
+            parts.append(value)
+            continue
+        if head is not None:
+            yield head + ("".join(parts) if len(parts) > 1 else parts[0], start)
+        # There will normally only be one space between tag and value, but
+        # in case there is more then one, remove extra spaces. Also, Gedcom
+        # spec says there should be no spaces at end of line, however some
+        # programs put them there (FTM), so let's leave them in place.
+        head = (level, xref, tag)
+        parts = [value.lstrip()]
+        start = index
+    if head is not None:
+        yield head + ("".join(parts) if len(parts) > 1 else parts[0], start)
+
+
 # -------------------------------------------------------------------------
 #
 # Lexer - serves as the lexical analysis engine
 #
 # -------------------------------------------------------------------------
 class Lexer:
-    """low level line reading and early parsing"""
+    """Turns the records of the tokenizer into GedLine objects"""
 
     def __init__(self, ifile, __add_msg):
         self.ifile = ifile
-        self.current_list = []
-        self.eof = False
-        self.cnv = None
-        self.cnt = 0
-        self.index = 0
-        self.func_map = {
-            TOKEN_CONT: self.__fix_token_cont,
-            TOKEN_CONC: self.__fix_token_conc,
-        }
-        self.__add_msg = __add_msg
+        self.records = tokenize(ifile, __add_msg)
 
     def readline(self):
-        """read a line from file with possibility of putting it back"""
-        if len(self.current_list) <= 1 and not self.eof:
-            self.__readahead()
+        """read the next line from the file"""
+        record = next(self.records, None)
+        if record is None:
+            return None
+        (level, xref, tag, value, index) = record
+        if xref is not None:
+            # GedLine expects the pointer as the tag, and the rest of the
+            # line as the data. A value that starts with a CONT line is
+            # kept on its own line, as in
+            # 0 @<XREF:NOTE>@ NOTE
+            #   1 CONT <SUBMITTER TEXT>
+            if value.startswith("\n"):
+                value = tag + value
+            elif value:
+                value = tag + " " + value
+            else:
+                value = tag
+            tag = "@" + xref + "@"
         try:
-            return GedLine(self.current_list.pop())
+            return GedLine((level, TOKENS.get(tag, TOKEN_UNKNOWN), value, tag, index))
         except:
             LOG.debug("Error in reading Gedcom line", exc_info=True)
             return None
 
-    def __fix_token_cont(self, data):
-        line = self.current_list[0]
-        new_value = line[2] + "\n" + data[2]
-        self.current_list[0] = (line[0], line[1], new_value, line[3], line[4])
-
-    def __fix_token_conc(self, data):
-        line = self.current_list[0]
-        if len(line[2]) == 4:
-            # This deals with lines of the form
-            # 0 @<XREF:NOTE>@ NOTE
-            #   1 CONC <SUBMITTER TEXT>
-            # The previous line contains only a tag and no data so concat a
-            # space to separate the new line from the tag. This prevents the
-            # first letter of the new line being lost later
-            # in _GedcomParse.__parse_record
-            new_value = line[2] + " " + data[2]
-        else:
-            new_value = line[2] + data[2]
-        self.current_list[0] = (line[0], line[1], new_value, line[3], line[4])
-
-    def __readahead(self):
-        while len(self.current_list) < 5:
-            line = self.ifile.readline()
-            self.index += 1
-            if not line:
-                self.eof = True
-                return
-
-            original_line = line
-            try:
-                # According to the GEDCOM 5.5 standard,
-                # Chapter 1 subsection Grammar "leading whitespace preceeding
-                # a GEDCOM line should be ignored"
-                # We will also strip the terminator which is any combination
-                # of carriage_return and line_feed
-                line = line.lstrip(" ").rstrip("\n\r")
-                # split into level+delim+rest
-                line = line.partition(" ")
-                level = int(line[0])
-                # there should only be one space after the level,
-                # but we can ignore more,
-                line = line[2].lstrip(" ")
-                # then split into tag+delim+line_value
-                # or xfef_id+delim+rest
-                # the xref_id can have spaces in it
-                if line.startswith("@"):
-                    line = line.split("@", 2)
-                    # line is now [None, alphanum+pointer_string, rest]
-                    tag = "@" + line[1] + "@"
-                    line_value = line[2].lstrip()
-                    # Ignore meaningless @IDENT@ on CONT or CONC line
-                    # as noted at http://www.tamurajones.net/IdentCONT.xhtml
-                    if line_value.lstrip().startswith(
-                        "CONT "
-                    ) or line_value.lstrip().startswith("CONC "):
-                        line = line_value.lstrip().partition(" ")
-                        tag = line[0]
-                        line_value = line[2]
-                else:
-                    line = line.partition(" ")
-                    tag = line[0]
-                    line_value = line[2]
-            except:
-                problem = _("Line ignored ")
-                text = original_line.rstrip("\n\r")
-                prob_width = 66
-                problem = problem.ljust(prob_width)[0 : (prob_width - 1)]
-                text = text.replace("\n", "\n".ljust(prob_width + 22))
-                message = "%s              %s" % (problem, text)
-                self.__add_msg(message)
-                continue
-
-            # Need to un-double '@' See Gedcom 5.5 spec 'any_char'
-            line_value = line_value.replace("@@", "@")
-            token = TOKENS.get(tag, TOKEN_UNKNOWN)
-            data = (level, token, line_value, tag, self.index)
-
-            func = self.func_map.get(data[1])
-            if func:
-                func(data)
-            else:
-                # There will normally only be one space between tag and
-                # line_value, but in case there is more then one, remove extra
-                # spaces after CONC/CONT processing
-                # Also, Gedcom spec says there should be no spaces at end of
-                # line, however some programs put them there (FTM), so let's
-                # leave them in place.
-                data = data[:2] + (data[2].lstrip(),) + data[3:]
-                self.current_list.insert(0, data)
-
     def clean_up(self):
         """
-        Break circular references to parsing methods stored in dictionaries
-        to aid garbage collection
+        Stop the tokenizer so that the file can be released
         """
-        for key in list(self.func_map.keys()):
-            del self.func_map[key]
-        del self.func_map
+        self.records.close()
 
 
 # -----------------------------------------------------------------------
@@ -1335,6 +1347,10 @@ class BaseReader:
         """Read a single line"""
         raise NotImplementedError()
 
+    def __iter__(self):
+        """Iterate over the lines of the file"""
+        return iter(self.readline, "")
+
     def report_error(self, problem, line):
         """Create an error message"""
         line = line.rstrip("\n\r")
@@ -2163,7 +2179,6 @@ class GedcomParser(UpdateCallback):
     __TRUNC_MSG = _(
         "Your GEDCOM file is corrupted. " "It appears to have been truncated."
     )
-    _EMPTY_LOC = Location().serialize()
 
     SyntaxError = "Syntax Error"
     BadFile = "Not a GEDCOM file"
@@ -2226,20 +2241,17 @@ class GedcomParser(UpdateCallback):
     ):
         UpdateCallback.__init__(self, user.callback)
         self.user = user
-        self.set_total(stage_one.get_line_count())
+        self.set_total(stage_one.get_file_size())
         self.repo2id = {}
         self.trans = None
         self.errors = []
         self.number_of_errors = 0
-        self.maxpeople = stage_one.get_person_count()
         self.dbase = dbase
         self.import_researcher = self.dbase.get_total() == 0
         event_ids = []
         for event in dbase.iter_events():
             event_ids.append(event.gramps_id)
         self.emapper = IdFinder(event_ids, dbase.event_prefix)
-        self.famc_map = stage_one.get_famc_map()
-        self.fams_map = stage_one.get_fams_map()
 
         self.place_parser = PlaceParser()
         self.inline_srcs = OrderedDict()
@@ -3056,15 +3068,9 @@ class GedcomParser(UpdateCallback):
         }
         self.func_list.append(self.note_parse_tbl)
 
-        # look for existing place titles, build a map
-        self.place_names = defaultdict(list)
-        cursor = dbase.get_place_cursor()
-        data = next(cursor)
-        while data:
-            (handle, val) = data
-            self.place_names[val[2]].append(handle)
-            data = next(cursor)
-        cursor.close()
+        # index the existing places on title, location and enclosing places
+        for place in dbase.iter_places():
+            self.place_import.store_place(place)
 
         enc = stage_one.get_encoding()
 
@@ -3079,6 +3085,7 @@ class GedcomParser(UpdateCallback):
         else:
             rdr = AnsiReader(ifile, self.__add_msg)
 
+        self.ifile = ifile
         self.lexer = Lexer(rdr, self.__add_msg)
         self.filename = filename
         self.backoff = False
@@ -3292,22 +3299,6 @@ class GedcomParser(UpdateCallback):
             self.dbase.add_note(note, self.trans)
         return note
 
-    def __loc_is_empty(self, location):
-        """
-        Determines whether a location is empty.
-
-        @param location: The current location
-        @type location: gen.lib.Location
-        @return True of False
-        """
-        if location is None:
-            return True
-        elif location.serialize() == self._EMPTY_LOC:
-            return True
-        elif location.is_empty():
-            return True
-        return False
-
     def __find_place(self, title, location, placeref_list):
         """
         Finds an existing place based on the title and primary location.
@@ -3318,22 +3309,10 @@ class GedcomParser(UpdateCallback):
         @type location: gen.lib.Location
         @return gen.lib.Place
         """
-        for place_handle in self.place_names[title]:
-            place = self.dbase.get_place_from_handle(place_handle)
-            if place.get_title() == title:
-                if (
-                    self.__loc_is_empty(location)
-                    and self.__loc_is_empty(self.__get_first_loc(place))
-                    and place.get_placeref_list() == placeref_list
-                ):
-                    return place
-                elif (
-                    not self.__loc_is_empty(location)
-                    and not self.__loc_is_empty(self.__get_first_loc(place))
-                    and self.__get_first_loc(place).is_equivalent(location) == IDENTICAL
-                ) and place.get_placeref_list() == placeref_list:
-                    return place
-        return None
+        place_handle = self.place_import.find_place(title, location, placeref_list)
+        if place_handle is None:
+            return None
+        return self.dbase.get_place_from_handle(place_handle)
 
     def __add_place(self, event, sub_state):
         """
@@ -3364,7 +3343,7 @@ class GedcomParser(UpdateCallback):
                 # handle.
                 if location:
                     self.place_import.store_location(location, place.handle)
-                self.place_names[place.get_title()].append(place.get_handle())
+                self.place_import.store_place(place)
                 event.set_place_handle(place.get_handle())
             else:
                 place.merge(sub_state.place)
@@ -3373,6 +3352,7 @@ class GedcomParser(UpdateCallback):
                     self.place_import, place, place_title
                 )
                 self.dbase.commit_place(place, self.trans)
+                self.place_import.store_place(place)
                 if location:
                     self.place_import.store_location(location, place.handle)
                 event.set_place_handle(place.get_handle())
@@ -3416,7 +3396,7 @@ class GedcomParser(UpdateCallback):
         """
         if not self.backoff:
             self.groups = self.lexer.readline()
-            self.update()
+            self.update(self.ifile.tell())
 
             # EOF ?
             if not self.groups:
@@ -5125,7 +5105,7 @@ class GedcomParser(UpdateCallback):
                 place.set_title(title)
                 place.name.set_value(title)
                 self.dbase.add_place(place, self.trans)
-                self.place_names[place.get_title()].append(place.get_handle())
+                self.place_import.store_place(place)
             else:
                 pass
             state.lds_ord.set_place_handle(place.handle)
@@ -6234,10 +6214,11 @@ class GedcomParser(UpdateCallback):
             if place is None:
                 place = state.place
                 self.dbase.add_place(place, self.trans)
-                self.place_names[place.get_title()].append(place.get_handle())
+                self.place_import.store_place(place)
             else:
                 place.merge(state.place)
                 self.dbase.commit_place(place, self.trans)
+                self.place_import.store_place(place)
             place_title = _pd.display(self.dbase, place)
             state.pf.load_place(self.place_import, place, place_title)
 
@@ -8559,13 +8540,15 @@ class GedcomParser(UpdateCallback):
 # -------------------------------------------------------------------------
 class GedcomStageOne:
     """
-    The GedcomStageOne parser scans the file quickly, looking for a few things.
-     This includes:
+    The GedcomStageOne parser looks at the start of the file, to find:
 
     1. Character set encoding
-    2. Number of people and families in the list
-    3. Child to family references, since Ancestry.com creates GEDCOM files
-       without the FAMC references.
+    2. The size of the file, used to report the progress of the import
+
+    Everything else is left to the single pass of the GedcomParser, so the
+    file is not read twice.  The person count, line count and FAMC/FAMS maps
+    are still available for other callers, but they are only gathered by a
+    full scan of the file the first time one of them is asked for.
     """
 
     __BAD_UTF16 = _(
@@ -8585,9 +8568,11 @@ class GedcomStageOne:
 
     def __init__(self, ifile):
         self.ifile = ifile
-        self.famc = defaultdict(list)
-        self.fams = defaultdict(list)
+        self.raw_file = ifile
+        self.famc = None
+        self.fams = None
         self.enc = ""
+        self.size = 0
         self.pcnt = 0
         self.lcnt = 0
 
@@ -8627,56 +8612,93 @@ class GedcomStageOne:
 
     def parse(self):
         """
-        Parse the input file.
+        Parse the header of the input file.
         """
-        current_family_id = ""
+        self.ifile.seek(0, os.SEEK_END)
+        self.size = self.ifile.tell()
+        self.ifile.seek(0)
 
         reader = self.__detect_file_decoder(self.ifile)
 
-        for line in reader:
-            # Scan for a few items, keep counts.  Also look for actual CHAR
-            # Keyword to figure out actual encodeing for non-unicode file types
-            line = line.strip()
-            if not line:
-                continue
-            self.lcnt += 1
+        if not self.enc:
+            # Look for the CHAR keyword in the header to figure out actual
+            # encoding for non-unicode file types
+            for line in reader:
+                data = line.split(None, 2)
+                if data[:1] == ["0"] and data[1:2] != ["HEAD"]:
+                    break
+                if len(data) > 2 and data[1] == "CHAR":
+                    self.enc = data[2].strip()
+                    break
+        self.ifile = reader  # need this to keep python from autoclosing file
 
-            try:
-                data = line.split(None, 3) + [""]
-                (level, key, value) = data[:3]
-                level = int(level)
-                key = key.strip()
-                value = value.strip()
-            except:
-                continue
+    def __scan(self):
+        """
+        Scan the whole file once, counting the lines and INDI records and
+        collecting the Child and Spouse family references.  The position of
+        the input file is restored afterwards, so this may be called while
+        the GedcomParser is reading it.
+        """
+        if self.famc is not None:
+            return
+        self.famc = defaultdict(list)
+        self.fams = defaultdict(list)
+        current_family_id = ""
 
-            if level == 0 and key[0] == "@":
-                if value in ("FAM", "FAMILY"):
-                    current_family_id = key.strip()[1:-1]
-                elif value in ("INDI", "INDIVIDUAL"):
-                    self.pcnt += 1
-            elif key in ("HUSB", "HUSBAND", "WIFE") and self.__is_xref_value(value):
-                self.fams[value[1:-1]].append(current_family_id)
-            elif key in ("CHIL", "CHILD") and self.__is_xref_value(value):
-                self.famc[value[1:-1]].append(current_family_id)
-            elif key == "CHAR" and not self.enc:
-                assert isinstance(value, str)
-                self.enc = value
-        LOG.debug("parse pcnt %d", self.pcnt)
-        LOG.debug("parse famc %s", dict(self.famc))
-        LOG.debug("parse fams %s", dict(self.fams))
-        self.ifile = reader  # need this to keep python from autoclosing file
+        position = self.raw_file.tell()
+        self.raw_file.seek(0)
+        # GEDCOM keywords are 7-bit ASCII, so only UTF-16 needs a decoder
+        encoding = "utf_16" if self.enc == "UTF16" else "latin1"
+        reader = TextIOWrapper(
+            self.raw_file, encoding=encoding, errors="replace", newline=None
+        )
+        try:
+            for line in reader:
+                line = line.strip()
+                if not line:
+                    continue
+                self.lcnt += 1
+
+                try:
+                    data = line.split(None, 3) + [""]
+                    (level, key, value) = data[:3]
+                    level = int(level)
+                    key = key.strip()
+                    value = value.strip()
+                except:
+                    continue
+
+                if level == 0 and key[0] == "@":
+                    if value in ("FAM", "FAMILY"):
+                        current_family_id = key.strip()[1:-1]
+                    elif value in ("INDI", "INDIVIDUAL"):
+                        self.pcnt += 1
+                elif key in ("HUSB", "HUSBAND", "WIFE") and self.__is_xref_value(value):
+                    self.fams[value[1:-1]].append(current_family_id)
+                elif key in ("CHIL", "CHILD") and self.__is_xref_value(value):
+                    self.famc[value[1:-1]].append(current_family_id)
+        finally:
+            # detach, or closing the wrapper would close the input file
+            reader.detach()
+            self.raw_file.seek(position)
+        LOG.debug("scan pcnt %d", self.pcnt)
 
     def get_famc_map(self):
         """
         Return the Person to Child Family map
+
+        The file is scanned on the first call.
         """
+        self.__scan()
         return self.famc
 
     def get_fams_map(self):
         """
         Return the Person to Family map (where the person is a spouse)
+
+        The file is scanned on the first call.
         """
+        self.__scan()
         return self.fams
 
     def get_encoding(self):
@@ -8695,15 +8717,27 @@ class GedcomStageOne:
     def get_person_count(self):
         """
         Return the number of INDI records found
+
+        The file is scanned on the first call.
         """
+        self.__scan()
         return self.pcnt
 
     def get_line_count(self):
         """
         Return the number of lines in the file
+
+        The file is scanned on the first call.
         """
+        self.__scan()
         return self.lcnt
 
+    def get_file_size(self):
+        """
+        Return the size of the file in bytes
+        """
+        return self.size
+
 
 # -------------------------------------------------------------------------
 #
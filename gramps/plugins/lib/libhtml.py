@@ -444,6 +444,52 @@ class Html(list):
     #
     iterkeys = itervalues = iteritems = __iter__
 
+    #
+    def serialize(self, indent="\t", tabs=""):
+        """
+        Generator: performs an insertion-order tree traversal and yields
+                   each output line, as write() does.
+
+        The tree is walked with an explicit stack instead of recursion.
+        Deferred items are produced as they are reached, so that the lines
+        can be written as soon as they are built.
+
+        :type  indent:   string
+        :param indent:   string to use for indentation. Default = '\t' (tab)
+        :type  tabs:     string
+        :param tabs:     starting indentation
+        """
+        stack = []
+        items = iter((self,))
+        while True:
+            for item in items:
+                if isinstance(item, Html):
+                    if item.indent is None:
+                        sub_tabs = ""
+                    elif item.indent:
+                        sub_tabs = tabs + indent
+                    else:
+                        sub_tabs = tabs
+                    if item.inline:  # if inline, write all list and
+                        yield sub_tabs + str(item)  # nested list elements
+                    else:  # else write one at a time
+                        stack.append((items, tabs))
+                        items, tabs = list.__iter__(item), sub_tabs
+                        break
+                elif isinstance(item, _Deferred):
+                    stack.append((items, tabs))
+                    items = item.release()
+                    break
+                elif isinstance(item, _Fragment):
+                    for line in item.lines:
+                        yield tabs + line[1:] if line[:1] == "\0" else line
+                else:
+                    yield tabs + str(item)
+            else:
+                if not stack:
+                    return
+                items, tabs = stack.pop()
+
     #
     def write(self, method=print, indent="\t", tabs=""):
         """
@@ -457,19 +503,71 @@ class Html(list):
         :type  tabs:     string
         :param tabs:     starting indentation
         """
-        if self.indent is None:
-            tabs = ""
-        elif self.indent:
-            tabs += indent
-        if self.inline:  # if inline, write all list and
-            method(str("%s%s" % (tabs, self)))  # nested list elements
-        #
-        else:
-            for item in self[:]:  # else write one at a time
-                if isinstance(item, Html):  # recurse if nested Html class
-                    item.write(method=method, indent=indent, tabs=tabs)
-                else:
-                    method(str("%s%s" % (tabs, item)))  # else write the line
+        for line in self.serialize(indent, tabs):
+            method(line)
+
+    #
+    def write_to(self, output, indent="\t", buffer_lines=1000):
+        """
+        Output function: writes the lines of the tree to a file, each
+                         followed by a newline, as write(print) would.
+
+        The lines are joined and written in batches, instead of one call
+        per line.
+
+        :type  output:       file object
+        :param output:       the text file to write to
+        :type  indent:       string
+        :param indent:       string to use for indentation. Default = '\t'
+        :type  buffer_lines: integer
+        :param buffer_lines: number of lines written at a time
+        """
+        lines = []
+        for line in self.serialize(indent):
+            lines.append(line)
+            if len(lines) >= buffer_lines:
+                lines.append("")
+                output.write("\n".join(lines))
+                lines = []
+        if lines:
+            lines.append("")
+            output.write("\n".join(lines))
+
+    #
+    @staticmethod
+    def defer(iterable):
+        """
+        Return an object standing for the items of iterable, which can be
+        added to an Html object like any other item.  The items are only
+        produced when the tree is written, and are not kept, so a large
+        table body can be built from a generator without holding all of
+        its rows in memory.  The tree can only be written once.
+
+        :type  iterable: iterable
+        :param iterable: the Html objects and strings to write
+        :rtype:          object reference
+        :returns:        the deferred items
+        """
+        return _Deferred(iterable)
+
+    #
+    @staticmethod
+    def fragment(html, indent="\t"):
+        """
+        Return a precompiled copy of an Html object, which can be added to
+        other Html objects like any other item.  Its lines are built once,
+        and are only indented when it is written, so that the same
+        fragment can be added to many pages at any depth.
+
+        :type  html:   Html object
+        :param html:   the tree to precompile
+        :type  indent: string
+        :param indent: string to use for indentation. It must be the one
+                       used to write the pages. Default = '\t' (tab)
+        :rtype:        object reference
+        :returns:      the precompiled fragment
+        """
+        return _Fragment(html, indent)
 
     #
     def addXML(self, version=1.0, encoding="UTF-8", standalone="no"):
@@ -639,6 +737,53 @@ class Html(list):
         return exc_type is None
 
 
+# ------------------------------------------------------------------------
+#
+# Deferred and precompiled items.
+#
+# ------------------------------------------------------------------------
+
+
+class _Deferred:
+    """
+    Items of an Html tree produced when the tree is written.
+    See Html.defer().
+    """
+
+    __slots__ = ["iterable"]
+
+    def __init__(self, iterable):
+        self.iterable = iterable
+
+    def release(self):
+        """
+        Return an iterator over the items. It can only be used once.
+        """
+        iterable, self.iterable = self.iterable, ()
+        return iter(iterable)
+
+    def __str__(self):
+        return "".join(str(item) for item in self.release())
+
+
+class _Fragment:
+    """
+    A precompiled Html tree. See Html.fragment().
+
+    The lines are kept with a leading NUL character in place of the
+    indentation of the parent, which is only known when it is written.
+    """
+
+    __slots__ = ["text", "lines"]
+
+    def __init__(self, html, indent="\t"):
+        self.text = str(html)
+        self.lines = list(Html.serialize(html, indent, "\0"))
+
+    def __str__(self):
+        return self.text
+
+
 # ------------------------------------------------------------------------
 #
 # Functions
@@ -21,7 +21,7 @@
 """
 Helper class for importing places.
 """
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 
 # -------------------------------------------------------------------------
 #
@@ -31,6 +31,33 @@ from collections import OrderedDict
 from gramps.gen.lib import Place, PlaceName, PlaceType, PlaceRef
 
 
+def _freeze(data):
+    """
+    Return a hashable copy of serialized data.
+    """
+    if isinstance(data, (list, tuple)):
+        return tuple(_freeze(item) for item in data)
+    return data
+
+
+def place_key(title, location, placeref_list):
+    """
+    Return the key of a place in the place index, or None if the place can
+    not be matched.
+
+    Empty locations are normalized to None, so that they all match.  Only
+    places without enclosing places can be matched, as the importers have
+    always compared the place reference lists by identity.
+    """
+    if placeref_list is None or placeref_list:
+        return None
+    if location is None or location.is_empty():
+        location = None
+    else:
+        location = _freeze(location.serialize())
+    return (title, location)
+
+
 # -------------------------------------------------------------------------
 #
 # PlaceImport class
@@ -45,6 +72,49 @@ class PlaceImport:
         self.db = db
         self.loc2handle = {}
         self.handle2loc = OrderedDict()
+        self.key2handles = defaultdict(list)
+        self.handle2key = {}
+        self.handle2order = {}
+
+    def store_place(self, place):
+        """
+        Store a place in the place index, or update its key after a change.
+
+        The place is indexed on its title, its first alternate location and
+        its enclosing places, so that find_place does not need to read any
+        places from the database.
+        """
+        alt_locs = place.get_alternate_locations()
+        key = place_key(
+            place.get_title(),
+            alt_locs[0] if alt_locs else None,
+            place.get_placeref_list(),
+        )
+        self.handle2order.setdefault(place.handle, len(self.handle2order))
+        old_key = self.handle2key.get(place.handle)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self.key2handles[old_key].remove(place.handle)
+        if key is None:
+            del self.handle2key[place.handle]
+            return
+        self.key2handles[key].append(place.handle)
+        self.handle2key[place.handle] = key
+
+    def find_place(self, title, location, placeref_list):
+        """
+        Return the handle of the first stored place with the given title,
+        location and enclosing places, or None.
+        """
+        key = place_key(title, location, placeref_list)
+        if key is None:
+            return None
+        handles = self.key2handles.get(key)
+        if not handles:
+            return None
+        # the place that was stored first, whatever the order of the changes
+        return min(handles, key=self.handle2order.get)
 
     def store_location(self, location, handle):
         """
@@ -98,10 +168,21 @@ class PlaceImport:
             # link to existing place
             if parent:
                 place = self.db.get_place_from_handle(handle)
-                placeref = PlaceRef()
-                placeref.ref = parent
-                place.set_placeref_list([placeref])
+                place.set_placeref_list(self.__make_placeref_list(parent))
                 self.db.commit_place(place, trans, place.get_change_time())
+                if handle in self.handle2key:
+                    self.store_place(place)
+
+    @staticmethod
+    def __make_placeref_list(parent):
+        """
+        Return the placeref list of a place enclosed by parent.
+        """
+        if parent is None:
+            return []
+        placeref = PlaceRef()
+        placeref.ref = parent
+        return [placeref]
 
     def __add_place(self, name, type_num, parent, title, trans):
         """
@@ -113,10 +194,7 @@ class PlaceImport:
         place.name = place_name
         place.title = title
         place.place_type = PlaceType(7 - type_num)
-        if parent is not None:
-            placeref = PlaceRef()
-            placeref.ref = parent
-            place.set_placeref_list([placeref])
+        place.set_placeref_list(self.__make_placeref_list(parent))
         handle = self.db.add_place(place, trans)
         self.db.commit_place(place, trans)
         return handle
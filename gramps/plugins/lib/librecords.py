@@ -46,7 +46,7 @@ from gramps.gen.lib import (
     StyledTextTagType,
 )
 from gramps.gen.display.name import displayer as name_displayer
-from gramps.gen.utils.alive import probably_alive
+from gramps.gen.utils.alive import probably_alive, update_lifespans
 from gramps.gen.proxy import LivingProxyDb
 
 # ------------------------------------------------------------------------
@@ -171,6 +171,7 @@ def find_records(
     if filter:
         person_handle_list = filter.apply(db, person_handle_list, user=user)
 
+    update_lifespans(db)
     for person_handle in person_handle_list:
         person = db.get_person_from_handle(person_handle)
         unfil_person = get_unfiltered_person_from_handle(person_handle)
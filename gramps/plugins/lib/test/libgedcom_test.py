@@ -0,0 +1,149 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unittest of the GEDCOM tokenizer and of the GedcomStageOne scanner
+"""
+
+import io
+import unittest
+
+from gramps.plugins.lib.libgedcom import GedcomStageOne, tokenize
+
+GEDCOM = """0 HEAD
+1 CHAR ASCII
+0 @I1@ INDI
+1 NAME John /Smith/
+1 FAMS @F1@
+0 @I2@ INDI
+1 FAMC @F1@
+0 @F1@ FAM
+1 HUSB @I1@
+1 CHIL @I2@
+
+0 TRLR
+"""
+
+
+class TokenizeTest(unittest.TestCase):
+    """
+    Test the records yielded by tokenize()
+    """
+
+    def tokens(self, text):
+        """
+        Tokenize the text, returning the records and the ignored lines.
+        """
+        messages = []
+        records = list(tokenize(io.StringIO(text), messages.append))
+        return records, messages
+
+    def test_simple_lines(self):
+        records, messages = self.tokens("0 HEAD\n1 CHAR UTF-8\n0 TRLR\n")
+        self.assertEqual(
+            records,
+            [
+                (0, None, "HEAD", "", 1),
+                (1, None, "CHAR", "UTF-8", 2),
+                (0, None, "TRLR", "", 3),
+            ],
+        )
+        self.assertEqual(messages, [])
+
+    def test_xref(self):
+        records, messages = self.tokens("0 @I1@ INDI\n1 FAMS @F1@\n")
+        self.assertEqual(
+            records, [(0, "I1", "INDI", "", 1), (1, None, "FAMS", "@F1@", 2)]
+        )
+
+    def test_line_terminators(self):
+        records, messages = self.tokens("0 HEAD\r\n1 NOTE text\r\n")
+        self.assertEqual(
+            records, [(0, None, "HEAD", "", 1), (1, None, "NOTE", "text", 2)]
+        )
+
+    def test_continuation(self):
+        records, messages = self.tokens(
+            "1 NOTE first\n2 CONT second\n2 CONC  half\n2 @N1@ CONT third\n"
+            "1 NOTE next\n"
+        )
+        self.assertEqual(
+            records,
+            [
+                (1, None, "NOTE", "first\nsecond half\nthird", 1),
+                (1, None, "NOTE", "next", 5),
+            ],
+        )
+
+    def test_double_at(self):
+        records, messages = self.tokens("1 EMAIL me@@example.com\n")
+        self.assertEqual(records, [(1, None, "EMAIL", "me@example.com", 1)])
+
+    def test_extra_spaces(self):
+        records, messages = self.tokens("  1   NAME John\n1 NOTE   text  \n")
+        self.assertEqual(
+            records,
+            [(1, None, "NAME", "John", 1), (1, None, "NOTE", "text  ", 2)],
+        )
+
+    def test_bad_lines(self):
+        records, messages = self.tokens("0 HEAD\nnot a line\n\n0 TRLR\n")
+        self.assertEqual(records, [(0, None, "HEAD", "", 1), (0, None, "TRLR", "", 4)])
+        self.assertEqual(len(messages), 2)
+        self.assertIn("not a line", messages[0])
+
+    def test_empty(self):
+        self.assertEqual(self.tokens(""), ([], []))
+
+
+class GedcomStageOneTest(unittest.TestCase):
+    """
+    Test the counts and maps of GedcomStageOne
+    """
+
+    def test_parse(self):
+        ifile = io.BytesIO(GEDCOM.encode("ascii"))
+        stage_one = GedcomStageOne(ifile)
+        stage_one.parse()
+        self.assertEqual(stage_one.get_encoding(), "ASCII")
+        self.assertEqual(stage_one.get_file_size(), len(GEDCOM))
+
+    def test_scan(self):
+        ifile = io.BytesIO(GEDCOM.encode("ascii"))
+        stage_one = GedcomStageOne(ifile)
+        stage_one.parse()
+        ifile.seek(7)
+        self.assertEqual(stage_one.get_person_count(), 2)
+        self.assertEqual(stage_one.get_line_count(), 11)
+        self.assertEqual(stage_one.get_fams_map(), {"I1": ["F1"]})
+        self.assertEqual(stage_one.get_famc_map(), {"I2": ["F1"]})
+        # the scan leaves the file where the parser is reading it
+        self.assertEqual(ifile.tell(), 7)
+        self.assertFalse(ifile.closed)
+
+    def test_scan_utf16(self):
+        ifile = io.BytesIO(GEDCOM.encode("utf_16"))
+        stage_one = GedcomStageOne(ifile)
+        stage_one.parse()
+        self.assertEqual(stage_one.get_encoding(), "UTF16")
+        self.assertEqual(stage_one.get_person_count(), 2)
+        self.assertEqual(stage_one.get_famc_map(), {"I2": ["F1"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
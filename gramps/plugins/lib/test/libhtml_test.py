@@ -0,0 +1,89 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unittest of the output of libhtml
+"""
+
+import io
+import unittest
+
+from gramps.plugins.lib.libhtml import Html
+
+
+def build_page(rows, nav):
+    """
+    Build a small page, adding the rows to a table body and the navigation
+    menu to the body with the given functions.
+    """
+    page, head, body = Html.page("Title", "utf-8", "en")
+    head += Html("meta", attr='name="author" content="A"')
+    body += Html("pre", "line 1\nline 2", indent=None)
+    with Html("table") as table:
+        body += table
+        tbody = Html("tbody")
+        table += tbody
+        tbody += rows(
+            Html("tr") + (Html("td", str(index), inline=True), Html("td", "text"))
+            for index in range(5)
+        )
+    body += nav(
+        Html("ul", indent=False)
+        + (
+            Html("li", Html("a", "Home", href="index.html"), inline=True),
+            Html("li", Html("p", "preformatted", indent=None)),
+        )
+    )
+    return page
+
+
+class LibHtmlTest(unittest.TestCase):
+    def setUp(self):
+        self.expected = []
+        build_page(list, lambda html: html).write(self.expected.append)
+
+    def test_write_to(self):
+        output = io.StringIO()
+        build_page(list, lambda html: html).write_to(output, buffer_lines=4)
+        self.assertEqual(output.getvalue(), "\n".join(self.expected) + "\n")
+
+    def test_defer(self):
+        lines = []
+        build_page(Html.defer, lambda html: html).write(lines.append)
+        self.assertEqual(lines, self.expected)
+
+    def test_fragment(self):
+        fragment = Html.fragment(
+            Html("ul", indent=False)
+            + (
+                Html("li", Html("a", "Home", href="index.html"), inline=True),
+                Html("li", Html("p", "preformatted", indent=None)),
+            )
+        )
+        for dummy in range(2):
+            lines = []
+            build_page(list, lambda html: fragment).write(lines.append)
+            self.assertEqual(lines, self.expected)
+        self.assertEqual(
+            str(Html("div", fragment, inline=True)),
+            "<div>%s</div>" % fragment,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
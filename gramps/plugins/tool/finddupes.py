@@ -27,6 +27,8 @@
 # GNOME libraries
 #
 # -------------------------------------------------------------------------
+from bisect import bisect_right
+
 from gi.repository import Gtk
 
 # -------------------------------------------------------------------------
@@ -35,14 +37,14 @@ from gi.repository import Gtk
 #
 # -------------------------------------------------------------------------
 from gramps.gen.const import URL_MANUAL_PAGE
-from gramps.gen.lib import Event, Person
+from gramps.gen.lib import Date, Event, Person
 from gramps.gui.utils import ProgressMeter
 from gramps.gui.plug import tool
 from gramps.gen.soundex import soundex, compare
 from gramps.gen.display.name import displayer as name_displayer
 from gramps.gui.dialog import OkDialog
 from gramps.gui.listmodel import ListModel
-from gramps.gen.errors import WindowActiveError
+from gramps.gen.errors import HandleError, WindowActiveError
 from gramps.gui.merge import MergePerson
 from gramps.gui.display import display_help
 from gramps.gui.managedwindow import ManagedWindow
@@ -151,23 +153,13 @@ class DuplicatePeopleTool(tool.Tool, ManagedWindow):
 
         display_help(WIKI_HELP_PAGE, WIKI_HELP_SEC)
 
-    def ancestors_of(self, p1_id, id_list):
-        if (not p1_id) or (p1_id in id_list):
-            return
-        id_list.append(p1_id)
-        p1 = self.db.get_person_from_handle(p1_id)
-        f1_id = p1.get_main_parents_family_handle()
-        if f1_id:
-            f1 = self.db.get_family_from_handle(f1_id)
-            self.ancestors_of(f1.get_father_handle(), id_list)
-            self.ancestors_of(f1.get_mother_handle(), id_list)
-
     def on_merge_ok_clicked(self, obj):
         threshold = self.menu.get_model()[self.menu.get_active()][1]
         self.use_soundex = int(self.soundex_obj.get_active())
         try:
             self.find_potentials(threshold)
-        except AttributeError as msg:
+        except (AttributeError, HandleError) as msg:
+            self.progress.close()
             RunDatabaseRepair(str(msg), parent=self.window)
             return
 
@@ -196,224 +188,215 @@ class DuplicatePeopleTool(tool.Tool, ManagedWindow):
                 pass
 
     def find_potentials(self, thresh):
+        """
+        Fill self.map with the best match of each person, and self.list
+        with the handles of the matched people.
+
+        The features of the people are loaded once, possibly by worker
+        processes, and the people are put in blocks so that only the pairs
+        that can score above -1 are compared, see :meth:`build_blocks`.
+        """
         self.progress = ProgressMeter(
             _("Find Duplicates"), _("Looking for duplicate people"), parent=self.window
         )
-
-        index = 0
-        males = {}
-        females = {}
+        self.progress.set_pass(
+            _("Pass 1: Building preliminary lists"), 1, ProgressMeter.MODE_ACTIVITY
+        )
+        self.progress.step()
+
+        self.keys = {}
+        self.people = []
+        for chunk in self.db.map_over_people(_get_features):
+            self.people.extend(chunk)
+        blocks = self.build_blocks()
+        self.graph = self.db.get_kinship_graph()
         self.map = {}
 
-        length = self.db.get_number_of_people()
-
-        self.progress.set_pass(_("Pass 1: Building preliminary lists"), length)
+        header = _("Pass 2: Calculating potential matches")
+        self.progress.set_pass(header, len(self.people))
 
-        for p1_id in self.db.iter_person_handles():
+        # scores of the pairs above the threshold, by the later person
+        found = {}
+        for index, person1 in enumerate(self.people):
             self.progress.step()
-            p1 = self.db.get_person_from_handle(p1_id)
-            key = self.gen_key(get_surnames(p1.get_primary_name()))
-            if p1.get_gender() == Person.MALE:
-                if key in males:
-                    males[key].append(p1_id)
-                else:
-                    males[key] = [p1_id]
-            else:
-                if key in females:
-                    females[key].append(p1_id)
+            matches = found.pop(index, [])
+            for other in self.get_candidates(index, blocks):
+                person2 = self.people[other]
+                chance = self.compare_people(person1, person2)
+                # the spouses compared depend on the gender of the first
+                # person, so females and unknowns are scored both ways
+                if person1[1] == person2[1]:
+                    back = chance
                 else:
-                    females[key] = [p1_id]
-
-        self.progress.set_pass(_("Pass 2: Calculating potential matches"), length)
-
-        for p1key in self.db.iter_person_handles():
-            self.progress.step()
-            p1 = self.db.get_person_from_handle(p1key)
-
-            key = self.gen_key(get_surnames(p1.get_primary_name()))
-            if p1.get_gender() == Person.MALE:
-                remaining = males[key]
-            else:
-                remaining = females[key]
-
-            # index = 0
-            for p2key in remaining:
-                # index += 1
-                if p1key == p2key:
+                    back = self.compare_people(person2, person1)
+                if max(chance, back) < thresh or self.is_direct_line(person1, person2):
                     continue
-                p2 = self.db.get_person_from_handle(p2key)
-                if p2key in self.map:
-                    (v, c) = self.map[p2key]
-                    if v == p1key:
-                        continue
-
-                chance = self.compare_people(p1, p2)
                 if chance >= thresh:
-                    if p1key in self.map:
-                        val = self.map[p1key]
-                        if val[1] > chance:
-                            self.map[p1key] = (p2key, chance)
-                    else:
-                        self.map[p1key] = (p2key, chance)
-
+                    matches.append((other, chance))
+                if back >= thresh:
+                    found.setdefault(other, []).append((index, back))
+
+            # keep the matches in the order of the people, so that the
+            # same match is kept whatever the blocks
+            p1key = person1[0]
+            for other, chance in matches:
+                p2key = self.people[other][0]
+                if p2key in self.map and self.map[p2key][0] == p1key:
+                    continue
+                if p1key not in self.map:
+                    self.progress.set_header(
+                        "%s (%s)" % (header, _("%d found") % (len(self.map) + 1))
+                    )
+                    self.map[p1key] = (p2key, chance)
+                elif self.map[p1key][1] > chance:
+                    self.map[p1key] = (p2key, chance)
+
+        self.people = []
+        self.block_keys = []
+        self.keys = {}
+        self.graph = None
         self.list = sorted(self.map)
         self.length = len(self.list)
         self.progress.close()
 
+    def build_blocks(self):
+        """
+        Put the people in blocks, and return the blocks.
+
+        Two people can only match if they have the same gender and surname
+        key, share an initial of their given names and, when both have a
+        plain birth date, are born the same year.  So each person is put
+        in a block for each of their initials, keyed by the decade of their
+        birth, or by None if the birth date does not give a year.  The
+        blocks are lists of numbers of people, in increasing order.
+        """
+        self.block_keys = []
+        blocks = {}
+        for index, person in enumerate(self.people):
+            handle, gender, name, birth, death, parents, spouses = person
+            surnames, suffix, first_name = name
+            bucket = (gender == Person.MALE, self.gen_key(surnames))
+            initials = {token[0] for token in first_name.split()} or {first_name}
+            date = birth[0]
+            if (
+                date.is_empty()
+                or date.is_compound()
+                or date.get_modifier() == Date.MOD_TEXTONLY
+            ):
+                decade = None
+            else:
+                decade = date.get_year() // 10
+            self.block_keys.append((bucket, initials, decade))
+            for initial in initials:
+                block = blocks.setdefault((bucket, initial), {})
+                block.setdefault(decade, []).append(index)
+        return blocks
+
+    def get_candidates(self, index, blocks):
+        """
+        Return the numbers of the people after the person in the blocks of
+        the person, in increasing order.
+        """
+        bucket, initials, decade = self.block_keys[index]
+        candidates = set()
+        for initial in initials:
+            block = blocks[(bucket, initial)]
+            if decade is None:
+                lists = block.values()
+            else:
+                lists = (block.get(decade, []), block.get(None, []))
+            for numbers in lists:
+                candidates.update(numbers[bisect_right(numbers, index) :])
+        return sorted(candidates)
+
+    def is_direct_line(self, person1, person2):
+        """
+        Return True if one person is an ancestor of the other, through the
+        main families.
+        """
+        return person2[0] in self.graph.get_ancestors(person1[0], False) or person1[
+            0
+        ] in self.graph.get_ancestors(person2[0], False)
+
     def gen_key(self, val):
+        if val in self.keys:
+            return self.keys[val]
+        key = val
         if self.use_soundex:
             try:
-                return soundex(val)
+                key = soundex(val)
             except UnicodeEncodeError:
-                return val
-        else:
-            return val
+                pass
+        self.keys[val] = key
+        return key
 
-    def compare_people(self, p1, p2):
-        name1 = p1.get_primary_name()
-        name2 = p2.get_primary_name()
+    def compare_people(self, person1, person2):
+        """
+        Return the score of a pair of people, from their features, without
+        checking whether one is an ancestor of the other.  See
+        :func:`_get_features`.
+        """
+        handle1, gender1, name1, birth1, death1, parents1, spouses1 = person1
+        handle2, gender2, name2, birth2, death2, parents2, spouses2 = person2
 
         chance = self.name_match(name1, name2)
         if chance == -1:
             return -1
 
-        birth1_ref = p1.get_birth_ref()
-        if birth1_ref:
-            birth1 = self.db.get_event_from_handle(birth1_ref.ref)
-        else:
-            birth1 = Event()
-
-        death1_ref = p1.get_death_ref()
-        if death1_ref:
-            death1 = self.db.get_event_from_handle(death1_ref.ref)
-        else:
-            death1 = Event()
-
-        birth2_ref = p2.get_birth_ref()
-        if birth2_ref:
-            birth2 = self.db.get_event_from_handle(birth2_ref.ref)
-        else:
-            birth2 = Event()
-
-        death2_ref = p2.get_death_ref()
-        if death2_ref:
-            death2 = self.db.get_event_from_handle(death2_ref.ref)
-        else:
-            death2 = Event()
-
-        value = self.date_match(birth1.get_date_object(), birth2.get_date_object())
+        value = self.date_match(birth1[0], birth2[0])
         if value == -1:
             return -1
         chance += value
 
-        value = self.date_match(death1.get_date_object(), death2.get_date_object())
+        value = self.date_match(death1[0], death2[0])
         if value == -1:
             return -1
         chance += value
 
-        value = self.place_match(birth1.get_place_handle(), birth2.get_place_handle())
+        value = self.place_match(birth1[1:], birth2[1:])
         if value == -1:
             return -1
         chance += value
 
-        value = self.place_match(death1.get_place_handle(), death2.get_place_handle())
+        value = self.place_match(death1[1:], death2[1:])
         if value == -1:
             return -1
         chance += value
 
-        ancestors = []
-        self.ancestors_of(p1.get_handle(), ancestors)
-        if p2.get_handle() in ancestors:
-            return -1
-
-        ancestors = []
-        self.ancestors_of(p2.get_handle(), ancestors)
-        if p1.get_handle() in ancestors:
-            return -1
-
-        f1_id = p1.get_main_parents_family_handle()
-        f2_id = p2.get_main_parents_family_handle()
-
-        if f1_id and f2_id:
-            f1 = self.db.get_family_from_handle(f1_id)
-            f2 = self.db.get_family_from_handle(f2_id)
-            dad1_id = f1.get_father_handle()
-            if dad1_id:
-                dad1 = get_name_obj(self.db.get_person_from_handle(dad1_id))
-            else:
-                dad1 = None
-            dad2_id = f2.get_father_handle()
-            if dad2_id:
-                dad2 = get_name_obj(self.db.get_person_from_handle(dad2_id))
-            else:
-                dad2 = None
-
-            value = self.name_match(dad1, dad2)
-
+        if parents1 and parents2:
+            value = self.name_match(parents1[0], parents2[0])
             if value == -1:
                 return -1
-
             chance += value
 
-            mom1_id = f1.get_mother_handle()
-            if mom1_id:
-                mom1 = get_name_obj(self.db.get_person_from_handle(mom1_id))
-            else:
-                mom1 = None
-            mom2_id = f2.get_mother_handle()
-            if mom2_id:
-                mom2 = get_name_obj(self.db.get_person_from_handle(mom2_id))
-            else:
-                mom2 = None
-
-            value = self.name_match(mom1, mom2)
+            value = self.name_match(parents1[1], parents2[1])
             if value == -1:
                 return -1
-
             chance += value
 
-        for f1_id in p1.get_family_handle_list():
-            f1 = self.db.get_family_from_handle(f1_id)
-            for f2_id in p2.get_family_handle_list():
-                f2 = self.db.get_family_from_handle(f2_id)
-                if p1.get_gender() == Person.FEMALE:
-                    father1_id = f1.get_father_handle()
-                    father2_id = f2.get_father_handle()
-                    if father1_id and father2_id:
-                        if father1_id == father2_id:
-                            chance += 1
-                        else:
-                            father1 = self.db.get_person_from_handle(father1_id)
-                            father2 = self.db.get_person_from_handle(father2_id)
-                            fname1 = get_name_obj(father1)
-                            fname2 = get_name_obj(father2)
-                            value = self.name_match(fname1, fname2)
-                            if value != -1:
-                                chance += value
+        # compare the other parents of the families of the people
+        if gender1 == Person.FEMALE:
+            spouse = slice(0, 2)
+        else:
+            spouse = slice(2, 4)
+        for family1 in spouses1:
+            spouse1_id, spouse1 = family1[spouse]
+            if not spouse1_id:
+                continue
+            for family2 in spouses2:
+                spouse2_id, spouse2 = family2[spouse]
+                if not spouse2_id:
+                    continue
+                if spouse1_id == spouse2_id:
+                    chance += 1
                 else:
-                    mother1_id = f1.get_mother_handle()
-                    mother2_id = f2.get_mother_handle()
-                    if mother1_id and mother2_id:
-                        if mother1_id == mother2_id:
-                            chance += 1
-                        else:
-                            mother1 = self.db.get_person_from_handle(mother1_id)
-                            mother2 = self.db.get_person_from_handle(mother2_id)
-                            mname1 = get_name_obj(mother1)
-                            mname2 = get_name_obj(mother2)
-                            value = self.name_match(mname1, mname2)
-                            if value != -1:
-                                chance += value
+                    value = self.name_match(spouse1, spouse2)
+                    if value != -1:
+                        chance += value
         return chance
 
     def name_compare(self, s1, s2):
-        if self.use_soundex:
-            try:
-                return compare(s1, s2)
-            except UnicodeEncodeError:
-                return s1 == s2
-        else:
-            return s1 == s2
+        return self.gen_key(s1) == self.gen_key(s2)
 
     def date_match(self, date1, date2):
         if date1.is_empty() or date2.is_empty():
@@ -464,10 +447,8 @@ class DuplicatePeopleTool(tool.Tool, ManagedWindow):
         if not name1 or not name:
             return 0
 
-        srn1 = get_surnames(name)
-        sfx1 = name.get_suffix()
-        srn2 = get_surnames(name1)
-        sfx2 = name1.get_suffix()
+        srn1, sfx1, first1 = name
+        srn2, sfx2, first2 = name1
 
         if not self.name_compare(srn1, srn2):
             return -1
@@ -475,33 +456,23 @@ class DuplicatePeopleTool(tool.Tool, ManagedWindow):
             if sfx1 != "" and sfx2 != "":
                 return -1
 
-        if name.get_first_name() == name1.get_first_name():
+        if first1 == first2:
             return 1
         else:
-            list1 = name.get_first_name().split()
-            list2 = name1.get_first_name().split()
+            list1 = first1.split()
+            list2 = first2.split()
 
             if len(list1) < len(list2):
                 return self.list_reduce(list1, list2)
             else:
                 return self.list_reduce(list2, list1)
 
-    def place_match(self, p1_id, p2_id):
+    def place_match(self, place1, place2):
+        (p1_id, name1) = place1
+        (p2_id, name2) = place2
         if p1_id == p2_id:
             return 1
 
-        if not p1_id:
-            name1 = ""
-        else:
-            p1 = self.db.get_place_from_handle(p1_id)
-            name1 = p1.get_title()
-
-        if not p2_id:
-            name2 = ""
-        else:
-            p2 = self.db.get_place_from_handle(p2_id)
-            name2 = p2.get_title()
-
         if not (name1 and name2):
             return 0
         if name1 == name2:
@@ -680,6 +651,98 @@ def get_surnames(name):
     return " ".join([surn.get_surname() for surn in name.get_surname_list()])
 
 
+def get_name_features(name):
+    """Return the surnames, suffix and given names of a name"""
+    return (get_surnames(name), name.get_suffix(), name.get_first_name())
+
+
+def _get_objects(get_func, handles):
+    handles = list(handles)
+    return dict(zip(handles, get_func(handles)))
+
+
+def _get_features(db, handles):
+    """
+    Return the features of the people with the handles, as compared by
+    :meth:`DuplicatePeopleTool.compare_people`.
+
+    The features of a person are a tuple of the handle, the gender, the
+    name features, the birth and death as (date, place handle, place title),
+    None or the name features of the father and mother of the main family,
+    and a list of (father handle, father name features, mother handle,
+    mother name features) for the families of the person.
+
+    This is called by :meth:`map_over_people`, possibly in a worker process.
+    """
+    people = db.get_people_from_handles(handles)
+    event_handles = set()
+    family_handles = set()
+    for person in people:
+        for ref in (person.get_birth_ref(), person.get_death_ref()):
+            if ref:
+                event_handles.add(ref.ref)
+        family_handles.update(person.get_family_handle_list())
+        family_handle = person.get_main_parents_family_handle()
+        if family_handle:
+            family_handles.add(family_handle)
+
+    events = _get_objects(db.get_events_from_handles, event_handles)
+    place_handles = {event.get_place_handle() for event in events.values()}
+    place_handles.discard("")
+    places = _get_objects(db.get_places_from_handles, place_handles)
+    families = _get_objects(db.get_families_from_handles, family_handles)
+    parent_handles = set()
+    for family in families.values():
+        parent_handles.add(family.get_father_handle())
+        parent_handles.add(family.get_mother_handle())
+    parent_handles.discard(None)
+    parent_handles.discard("")
+    names = {
+        parent.get_handle(): get_name_features(parent.get_primary_name())
+        for parent in db.get_people_from_handles(parent_handles)
+    }
+    names[None] = names[""] = None
+
+    def get_event(ref):
+        event = events[ref.ref] if ref else Event()
+        place_handle = event.get_place_handle()
+        title = places[place_handle].get_title() if place_handle else ""
+        return (event.get_date_object(), place_handle, title)
+
+    def get_parents(family):
+        father_handle = family.get_father_handle()
+        mother_handle = family.get_mother_handle()
+        return (
+            father_handle,
+            names[father_handle],
+            mother_handle,
+            names[mother_handle],
+        )
+
+    features = []
+    for person in people:
+        family_handle = person.get_main_parents_family_handle()
+        if family_handle:
+            parents = get_parents(families[family_handle])[1::2]
+        else:
+            parents = None
+        features.append(
+            (
+                person.get_handle(),
+                person.get_gender(),
+                get_name_features(person.get_primary_name()),
+                get_event(person.get_birth_ref()),
+                get_event(person.get_death_ref()),
+                parents,
+                [
+                    get_parents(families[handle])
+                    for handle in person.get_family_handle_list()
+                ],
+            )
+        )
+    return features
+
+
 # ------------------------------------------------------------------------
 #
 #
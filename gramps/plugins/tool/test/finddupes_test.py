@@ -0,0 +1,308 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the blocks and scores of finddupes.py """
+
+import unittest
+from unittest.mock import patch
+
+from gramps.gen.db import DbTxn
+from gramps.gen.db.utils import make_database
+from gramps.gen.lib import (
+    ChildRef,
+    Date,
+    Event,
+    EventRef,
+    EventType,
+    Family,
+    Name,
+    Person,
+    Surname,
+)
+from gramps.plugins.tool.finddupes import DuplicatePeopleTool, _get_features
+
+
+class MockDuplicatePeopleTool(DuplicatePeopleTool):
+    """
+    The tool without its window.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.window = None
+        self.map = {}
+        self.keys = {}
+        self.use_soundex = 1
+
+
+class FindDuplicatesTest(unittest.TestCase):
+    """
+    Base class, with a database in memory to add people to.
+    """
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        self.addCleanup(self.db.close)
+        self.tool = MockDuplicatePeopleTool(self.db)
+
+    def add_person(self, trans, gender, first_name, surname, year=None):
+        """
+        Add a person, born in the year if given, and return the handle.
+        """
+        person = Person()
+        person.set_gender(gender)
+        name = Name()
+        name.set_first_name(first_name)
+        name_surname = Surname()
+        name_surname.set_surname(surname)
+        name.add_surname(name_surname)
+        person.set_primary_name(name)
+        if year is not None:
+            event = Event()
+            event.set_type(EventType.BIRTH)
+            event.set_date_object(Date(year))
+            self.db.add_event(event, trans)
+            ref = EventRef()
+            ref.set_reference_handle(event.handle)
+            person.add_event_ref(ref)
+            person.set_birth_ref(ref)
+        return self.db.add_person(person, trans)
+
+    def add_family(self, trans, father, mother, children=()):
+        """
+        Add a family of the people with the handles.
+        """
+        family = Family()
+        family.set_father_handle(father)
+        family.set_mother_handle(mother)
+        for child in children:
+            child_ref = ChildRef()
+            child_ref.set_reference_handle(child)
+            family.add_child_ref(child_ref)
+        self.db.add_family(family, trans)
+        for handle in (father, mother):
+            if handle:
+                person = self.db.get_person_from_handle(handle)
+                person.add_family_handle(family.handle)
+                self.db.commit_person(person, trans)
+        for handle in children:
+            person = self.db.get_person_from_handle(handle)
+            person.add_parent_family_handle(family.handle)
+            self.db.commit_person(person, trans)
+
+    def get_people(self):
+        """
+        Return the features of the people, in the order of the tool.
+        """
+        return _get_features(self.db, self.db.get_person_handles())
+
+    def find_potentials(self, thresh):
+        """
+        Run the tool, and return the best match of each person.
+        """
+        with patch("gramps.plugins.tool.finddupes.ProgressMeter"):
+            self.tool.find_potentials(thresh)
+        return self.tool.map
+
+    def find_all(self, thresh):
+        """
+        Return the best match of each person, comparing all the pairs of
+        people of the same gender, as the tool did before using blocks.
+        """
+        people = self.get_people()
+        self.tool.graph = self.db.get_kinship_graph()
+        result = {}
+        for person1 in people:
+            for person2 in people:
+                p1key, p2key = person1[0], person2[0]
+                if p1key == p2key:
+                    continue
+                if (person1[1] == Person.MALE) != (person2[1] == Person.MALE):
+                    continue
+                if p2key in result and result[p2key][0] == p1key:
+                    continue
+                chance = self.tool.compare_people(person1, person2)
+                if chance < thresh or self.tool.is_direct_line(person1, person2):
+                    continue
+                if p1key not in result or result[p1key][1] > chance:
+                    result[p1key] = (p2key, chance)
+        return result
+
+
+class BlocksTest(FindDuplicatesTest):
+    """
+    Test the blocks of people and the candidates taken from them.
+    """
+
+    def setUp(self):
+        super().setUp()
+        with DbTxn("Add people", self.db) as trans:
+            self.handles = [
+                self.add_person(trans, Person.MALE, "John", "Smith", 1850),
+                self.add_person(trans, Person.MALE, "John Paul", "Smyth", 1855),
+                self.add_person(trans, Person.MALE, "J.", "Smith"),
+                self.add_person(trans, Person.MALE, "John", "Smith", 1900),
+                self.add_person(trans, Person.MALE, "William", "Smith", 1850),
+                self.add_person(trans, Person.FEMALE, "Jane", "Smith", 1850),
+                self.add_person(trans, Person.UNKNOWN, "Jane", "Smith", 1850),
+                self.add_person(trans, Person.MALE, "John", "Jones", 1850),
+                self.add_person(trans, Person.MALE, "", "Smith", 1850),
+            ]
+        self.tool.people = self.get_people()
+        self.blocks = self.tool.build_blocks()
+        self.index = {person[0]: index for index, person in enumerate(self.tool.people)}
+
+    def get_pairs(self):
+        """
+        Return the pairs of numbers, in the list of handles, of each person
+        and their candidates.
+        """
+        pairs = set()
+        for index in range(len(self.tool.people)):
+            number = self.handles.index(self.tool.people[index][0])
+            for other in self.tool.get_candidates(index, self.blocks):
+                other = self.handles.index(self.tool.people[other][0])
+                pairs.add((min(number, other), max(number, other)))
+        return pairs
+
+    def test_block_keys(self):
+        keys = {
+            person[0]: key
+            for person, key in zip(self.tool.people, self.tool.block_keys)
+        }
+        self.assertEqual(keys[self.handles[0]], ((True, "S530"), {"J"}, 185))
+        self.assertEqual(keys[self.handles[1]], ((True, "S530"), {"J", "P"}, 185))
+        self.assertEqual(keys[self.handles[2]], ((True, "S530"), {"J"}, None))
+        self.assertEqual(keys[self.handles[5]], ((False, "S530"), {"J"}, 185))
+        self.assertEqual(keys[self.handles[6]], ((False, "S530"), {"J"}, 185))
+        self.assertEqual(keys[self.handles[8]], ((True, "S530"), {""}, 185))
+
+    def test_blocks_sorted(self):
+        for block in self.blocks.values():
+            for numbers in block.values():
+                self.assertEqual(numbers, sorted(set(numbers)))
+
+    def test_candidates(self):
+        self.assertEqual(
+            self.get_pairs(),
+            {
+                # the same surname key and initial, and the same decade
+                (0, 1),
+                # no birth date matches all the decades
+                (0, 2),
+                (1, 2),
+                (2, 3),
+                # females and unknowns share the blocks
+                (5, 6),
+            },
+        )
+
+    def test_candidates_after(self):
+        for index in range(len(self.tool.people)):
+            candidates = self.tool.get_candidates(index, self.blocks)
+            self.assertEqual(candidates, sorted(set(candidates)))
+            self.assertTrue(all(other > index for other in candidates))
+
+    def test_no_pair_lost(self):
+        # every pair left out of the blocks scores -1
+        pairs = set()
+        for index in range(len(self.tool.people)):
+            for other in self.tool.get_candidates(index, self.blocks):
+                pairs.add((index, other))
+        for index, person1 in enumerate(self.tool.people):
+            for other, person2 in enumerate(self.tool.people):
+                if index < other and (index, other) not in pairs:
+                    if (person1[1] == Person.MALE) == (person2[1] == Person.MALE):
+                        self.assertEqual(self.tool.compare_people(person1, person2), -1)
+
+
+class ScoresTest(FindDuplicatesTest):
+    """
+    Test the scores of pairs of people, and the matches found from them.
+    """
+
+    def test_scores(self):
+        with DbTxn("Add people", self.db) as trans:
+            self.add_person(trans, Person.MALE, "John", "Smith", 1850)
+            self.add_person(trans, Person.MALE, "John", "Smyth", 1850)
+            self.add_person(trans, Person.MALE, "John Paul", "Smith", 1850)
+            self.add_person(trans, Person.MALE, "John", "Smith", 1851)
+            self.add_person(trans, Person.MALE, "John", "Jones", 1850)
+        people = {
+            (person[2][0], person[2][2], person[3][0].get_year()): person
+            for person in self.get_people()
+        }
+        person = people[("Smith", "John", 1850)]
+        # name, birth date, and the same empty places
+        self.assertEqual(
+            self.tool.compare_people(person, people[("Smyth", "John", 1850)]), 4
+        )
+        self.assertEqual(
+            self.tool.compare_people(person, people[("Smith", "John Paul", 1850)]), 3.5
+        )
+        self.assertEqual(
+            self.tool.compare_people(person, people[("Smith", "John", 1851)]), -1
+        )
+        self.assertEqual(
+            self.tool.compare_people(person, people[("Jones", "John", 1850)]), -1
+        )
+
+    def test_same_matches(self):
+        with DbTxn("Add people", self.db) as trans:
+            father = self.add_person(trans, Person.MALE, "John", "Smith")
+            son = self.add_person(trans, Person.MALE, "John", "Smith")
+            mother = self.add_person(trans, Person.FEMALE, "Mary", "Brown", 1820)
+            self.add_family(trans, father, mother, [son])
+            self.add_person(trans, Person.MALE, "John", "Smyth", 1850)
+            self.add_person(trans, Person.MALE, "J.", "Smith", 1850)
+            self.add_person(trans, Person.MALE, "John", "Smith", 1900)
+            self.add_person(trans, Person.FEMALE, "Mary", "Brown")
+            self.add_person(trans, Person.UNKNOWN, "Mary", "Browne", 1820)
+            self.add_person(trans, Person.FEMALE, "Mary Ann", "Brown", 1820)
+        for thresh in (0.25, 1.0, 2.0, 4.0):
+            with self.subTest(thresh=thresh):
+                expected = self.find_all(thresh)
+                self.assertEqual(self.find_potentials(thresh), expected)
+        self.assertTrue(expected)
+        # a father and his son are not duplicates
+        matches = self.find_potentials(0.25)
+        self.assertNotEqual(matches[father][0], son)
+        self.assertNotEqual(matches[son][0], father)
+
+    def test_order_of_genders(self):
+        with DbTxn("Add people", self.db) as trans:
+            female = self.add_person(trans, Person.FEMALE, "Mary", "Jones", 1850)
+            unknown = self.add_person(trans, Person.UNKNOWN, "Mary", "Jones", 1850)
+            husband1 = self.add_person(trans, Person.MALE, "John", "Smith")
+            husband2 = self.add_person(trans, Person.MALE, "Peter", "Brown")
+            self.add_family(trans, husband1, female)
+            self.add_family(trans, husband2, unknown)
+        people = {person[0]: person for person in self.get_people()}
+        # a female is compared by the fathers of her families, anyone else
+        # by the mothers
+        chance = self.tool.compare_people(people[female], people[unknown])
+        back = self.tool.compare_people(people[unknown], people[female])
+        self.assertEqual(back, chance + 1)
+        # the match of the unknown uses its own score
+        self.assertEqual(self.find_potentials(back), {unknown: (female, back)})
+        self.assertEqual(self.find_all(back), {unknown: (female, back)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Narrative Web Page generator.
+
+Classe:
+    WebArchive - The archive file the website is written to
+
+Function:
+    set_archive_extension - Set the extension of an archive file name
+"""
+# ------------------------------------------------
+# python modules
+# ------------------------------------------------
+from io import BytesIO
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+
+# ------------------------------------------------
+# Gramps module
+# ------------------------------------------------
+from gramps.gen.const import GRAMPS_LOCALE as glocale
+from gramps.gen.constfunc import win
+
+_ = glocale.translation.sgettext
+
+# The archive formats, by file extension
+ARCHIVE_FORMATS = [
+    (".tar.gz", _("Compressed tar archive (.tar.gz)")),
+    (".tar", _("Uncompressed tar archive (.tar)")),
+    (".zip", _("Zip archive (.zip)")),
+]
+
+_TAR_MODES = {".tar.gz": "w:gz", ".tar": "w"}
+
+
+def set_archive_extension(filename, archive_format):
+    """
+    Return the filename with the extension of the archive format, replacing
+    the extension of any other archive format.
+
+    @param: filename       -- The path of the archive file
+    @param: archive_format -- The extension of one of ARCHIVE_FORMATS
+    """
+    # ".tar.gz" is checked before ".tar"
+    for ext, dummy_descr in ARCHIVE_FORMATS:
+        if filename.endswith(ext):
+            filename = filename[: -len(ext)]
+            break
+    return filename + archive_format
+
+
+#################################################
+#
+#    Writes the website to an archive file
+#
+#################################################
+class WebArchive:
+    """
+    An archive file the files of the website are written to.
+
+    Each file is written to the archive file as it is added, and the names
+    of the files added are kept in a set, so that a file added twice is
+    only written once.
+    """
+
+    def __init__(self, filename, archive_format=".tar.gz"):
+        """
+        @param: filename       -- The path of the archive file
+        @param: archive_format -- The extension of one of ARCHIVE_FORMATS
+        """
+        self.archive_format = archive_format
+        self.members = set()
+        if archive_format == ".zip":
+            self.tar = None
+            self.zip = zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED)
+        else:
+            self.tar = tarfile.open(filename, _TAR_MODES[archive_format])
+            self.zip = None
+
+    def __contains__(self, name):
+        """
+        Return True if the file is already archived.
+        """
+        return name in self.members
+
+    def add_data(self, name, data, mtime):
+        """
+        Add a file with the given content, unless it is already archived.
+
+        @param: name  -- The name of the file in the archive
+        @param: data  -- The content of the file, as bytes
+        @param: mtime -- The last modification time of the file
+        """
+        if name in self.members:
+            return
+        self.members.add(name)
+        if self.zip:
+            zipinfo = zipfile.ZipInfo(name, _zip_date_time(mtime))
+            zipinfo.compress_type = zipfile.ZIP_DEFLATED
+            self.zip.writestr(zipinfo, data)
+        else:
+            tarinfo = tarfile.TarInfo(name)
+            tarinfo.size = len(data)
+            tarinfo.mtime = mtime
+            if not win():
+                tarinfo.uid = os.getuid()
+                tarinfo.gid = os.getgid()
+            self.tar.addfile(tarinfo, BytesIO(data))
+
+    def add_file(self, name, from_fname, mtime):
+        """
+        Copy a file, unless it is already archived.
+
+        @param: name       -- The name of the file in the archive
+        @param: from_fname -- The path of the file to copy
+        @param: mtime      -- The last modification time of the file
+        """
+        if name in self.members:
+            return
+        self.members.add(name)
+        if self.zip:
+            zipinfo = zipfile.ZipInfo.from_file(from_fname, name)
+            zipinfo.date_time = _zip_date_time(mtime)
+            # The copied files are mostly images, which are already
+            # compressed.
+            zipinfo.compress_type = zipfile.ZIP_STORED
+            with open(from_fname, "rb") as src, self.zip.open(zipinfo, "w") as dest:
+                shutil.copyfileobj(src, dest)
+        else:
+
+            def set_mtime(tarinfo):
+                """
+                For each file, we set the last modification time.
+
+                We could also set uid, gid, uname, gname and mode
+                #tarinfo.uid = os.getuid()
+                #tarinfo.mode = 0660
+                #tarinfo.uname = tarinfo.gname = "www-data"
+                """
+                tarinfo.mtime = mtime
+                return tarinfo
+
+            self.tar.add(from_fname, name, filter=set_mtime)
+
+    def close(self):
+        """
+        Finish writing the archive file.
+        """
+        if self.zip:
+            self.zip.close()
+        else:
+            self.tar.close()
+
+
+def _zip_date_time(mtime):
+    """
+    Return the zip date and time of a modification time. Zip files cannot
+    store times before 1980.
+    """
+    return max(time.localtime(mtime)[:6], (1980, 1, 1, 0, 0, 0))
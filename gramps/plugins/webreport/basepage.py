@@ -159,6 +159,24 @@ function GoToTop() {
 </script>
 """
 
+# The parts of the output file names used by the navigation menu to find the
+# current section.
+_NAV_SECTIONS = (
+    "index",
+    "srn",
+    "ppl",
+    "fam",
+    "src",
+    "repo",
+    "plc",
+    "evt",
+    "img",
+    "addr",
+    "updates",
+    "statistics",
+    "cal/",
+)
+
 
 class BasePage:
     """
@@ -190,6 +208,7 @@ class BasePage:
         self.not_holiday = True
 
         self.page_title = ""
+        self.last_change = 0  # Set by the deferred rows of index pages.
 
         self.author = get_researcher().get_name()
         if self.author:
@@ -1013,7 +1032,7 @@ class BasePage:
         else:
             gid_html = ""
 
-        result = self.report.obj_dict.get(Family).get(family_handle)
+        result = self.report.get_obj_entry(Family, family_handle)
         if result is None:
             # the family is not included in the webreport
             return name + str(gid_html)
@@ -1519,14 +1538,10 @@ class BasePage:
         with Html("div", id="footer") as footer:
             footer_note = self.report.options["footernote"]
             if footer_note:
-                note = self.get_note_format(
-                    self.r_db.get_note_from_gramps_id(footer_note), False
+                footer += self.get_fragment(
+                    ("user_footer", self.the_lang, footer_note),
+                    partial(self.build_user_note, "user_footer", footer_note),
                 )
-                user_footer = Html("div", id="user_footer")
-                footer += user_footer
-
-                # attach note
-                user_footer += note
 
             msg = self._(
                 "Generated by %(gramps_home_html_start)s"
@@ -1612,6 +1627,14 @@ class BasePage:
         # return footer to its callers
         return footer
 
+    def write_deferred_footer(self):
+        """
+        Will create the footer section of a page with deferred rows, when
+        the page is written.  It must follow the rows, which set the last
+        change time in self.last_change.
+        """
+        yield self.write_footer(self.last_change)
+
     def write_header(self, the_title, cal=0):
         """
         Note. 'title' is used as currentsection in the navigation links and
@@ -1671,8 +1694,90 @@ class BasePage:
             Html("meta", attr=_meta6, indent=False),
         )
 
-        # Link to _NARRATIVESCREEN  stylesheet
+        # create stylesheet and favicon links
+        links = self.get_fragment(
+            ("links", self.the_lang, cal, self.uplink),
+            partial(self.build_head_links, cal),
+        )
+
+        # add additional meta and link tags
+        head += meta
+        head += links
+
+        # Add the script to control the menu
+        menuscript = Html(
+            "<script>function navFunction() { "
+            'var x = document.getElementById("dropmenu"); '
+            'if (x.className === "nav") { x.className += "'
+            ' responsive"; } else { x.className = "nav"; }'
+            " }</script>"
+        )
+        head += menuscript
+
+        # add outerwrapper to set the overall page width
+        outerwrapperdiv = Html("div", id="outerwrapper")
+        body += outerwrapperdiv
+
+        # begin header section
+        headerdiv = Html("div", id="header", class_=self.dir) + (
+            Html(
+                '<button href="javascript:void(0);" class="navIcon"'
+                ' onclick="navFunction()">&#8801;</button>'
+            )
+        )
+        headerdiv += Html(
+            "h1", html_escape(self.title_str), class_="nav", id="SiteTitle", inline=True
+        )
+        outerwrapperdiv += headerdiv
+
+        header_note = self.report.options["headernote"]
+        if header_note:
+            headerdiv += self.get_fragment(
+                ("user_header", self.the_lang, header_note),
+                partial(self.build_user_note, "user_header", header_note),
+            )
+
+        # Begin Navigation Menu--
+        # is the style sheet either Basic-Blue or Visually Impaired,
+        # and menu layout is Drop Down?
+        if (
+            self.report.css == _("Basic-Blue")
+            or self.report.css == _("Visually Impaired")
+        ) and self.report.navigation == "dropdown":
+            outerwrapperdiv += self.display_drop_menu()
+        else:
+            outerwrapperdiv += self.display_nav_links(the_title, cal=cal)
+
+        if self.report.options["toggle"]:
+            head += TOGGLE
+
+        # Create a button to go to the top of the page
+        viewbox = "0 0 100 100"
+        points = "0,100 100,100, 50,10"
+        svg = Html("svg", viewBox=viewbox, class_="triangle", inline=False)
+        svg += Html("polygon", points=points)
+        outerwrapperdiv += Html(
+            "button", svg, id="gototop", title=_("Go to top"), onclick="GoToTop()"
+        )
+        outerwrapperdiv += GOTOTOP  # This must be positioned
+        # after the button for it to work
+
+        # message for Codacy :
+        # body is used in some modules to add functions like onload(),
+        # initialize(), ...
+        # some modules doesn't need that, so body is an unused variable
+        # in these modules.
+        # return page, head, and body to its classes...
+        return page, head, body, outerwrapperdiv
+
+    def build_head_links(self, cal):
+        """
+        Creates the stylesheet and favicon links of the head section
+
+        @param: cal -- The number of directories to use
+        """
         sub_cal = cal + 1 if cal > 0 else 1
+        # Link to _NARRATIVESCREEN  stylesheet
         if self.usecms:
             fname = "/".join(["css", _NARRATIVESCREEN])
         elif self.the_lang:
@@ -1705,7 +1810,6 @@ class BasePage:
             fname = "/".join(["images", "favicon2.ico"])
         url4 = self.report.build_url_fname(fname, None, self.uplink, image=True)
 
-        # create stylesheet and favicon links
         links = Html("link", type="image/x-icon", href=url4, rel="shortcut icon")
         # attach the ancestortree style sheet if ancestor
         # graph is being created?
@@ -1786,82 +1890,45 @@ class BasePage:
                 indent=False,
             )
 
-        # add additional meta and link tags
-        head += meta
-        head += links
-
-        # Add the script to control the menu
-        menuscript = Html(
-            "<script>function navFunction() { "
-            'var x = document.getElementById("dropmenu"); '
-            'if (x.className === "nav") { x.className += "'
-            ' responsive"; } else { x.className = "nav"; }'
-            " }</script>"
-        )
-        head += menuscript
-
-        # add outerwrapper to set the overall page width
-        outerwrapperdiv = Html("div", id="outerwrapper")
-        body += outerwrapperdiv
-
-        # begin header section
-        headerdiv = Html("div", id="header", class_=self.dir) + (
-            Html(
-                '<button href="javascript:void(0);" class="navIcon"'
-                ' onclick="navFunction()">&#8801;</button>'
-            )
-        )
-        headerdiv += Html(
-            "h1", html_escape(self.title_str), class_="nav", id="SiteTitle", inline=True
-        )
-        outerwrapperdiv += headerdiv
+        return links
 
-        header_note = self.report.options["headernote"]
-        if header_note:
-            note = self.get_note_format(
-                self.r_db.get_note_from_gramps_id(header_note), False
-            )
+    def build_user_note(self, div_id, note_id):
+        """
+        Creates the division of the header or footer note
 
-            user_header = Html("div", id="user_header")
-            headerdiv += user_header
+        @param: div_id  -- The id of the division
+        @param: note_id -- The gramps ID of the note
+        """
+        note = self.get_note_format(self.r_db.get_note_from_gramps_id(note_id), False)
+        user_note = Html("div", id=div_id)
 
-            # attach note
-            user_header += note
+        # attach note
+        user_note += note
+        return user_note
 
-        # Begin Navigation Menu--
-        # is the style sheet either Basic-Blue or Visually Impaired,
-        # and menu layout is Drop Down?
-        if (
-            self.report.css == _("Basic-Blue")
-            or self.report.css == _("Visually Impaired")
-        ) and self.report.navigation == "dropdown":
-            outerwrapperdiv += self.display_drop_menu()
-        else:
-            outerwrapperdiv += self.display_nav_links(the_title, cal=cal)
-
-        if self.report.options["toggle"]:
-            head += TOGGLE
+    def display_nav_links(self, currentsection, cal=0):
+        """
+        Creates the navigation menu, or reuses the one of a previous page
 
-        # Create a button to go to the top of the page
-        viewbox = "0 0 100 100"
-        points = "0,100 100,100, 50,10"
-        svg = Html("svg", viewBox=viewbox, class_="triangle", inline=False)
-        svg += Html("polygon", points=points)
-        outerwrapperdiv += Html(
-            "button", svg, id="gototop", title=_("Go to top"), onclick="GoToTop()"
+        @param: currentsection = which menu item are you on
+        """
+        if self.report.options["multitrans"] and self.not_holiday:
+            # the language links depend on the page
+            return self.build_nav_links(currentsection, cal)
+        cur_fname = self.report.cur_fname
+        key = (
+            "nav",
+            self.the_lang,
+            currentsection,
+            cal,
+            self.uplink,
+            tuple(section in cur_fname for section in _NAV_SECTIONS),
+        )
+        return self.get_fragment(
+            key, partial(self.build_nav_links, currentsection, cal)
         )
-        outerwrapperdiv += GOTOTOP  # This must be positioned
-        # after the button for it to work
-
-        # message for Codacy :
-        # body is used in some modules to add functions like onload(),
-        # initialize(), ...
-        # some modules doesn't need that, so body is an unused variable
-        # in these modules.
-        # return page, head, and body to its classes...
-        return page, head, body, outerwrapperdiv
 
-    def display_nav_links(self, currentsection, cal=0):
+    def build_nav_links(self, currentsection, cal=0):
         """
         Creates the navigation menu
 
@@ -2042,6 +2109,15 @@ class BasePage:
         return navigation
 
     def display_drop_menu(self):
+        """
+        Creates the Drop Down Navigation Menu, or reuses the one of a
+        previous page
+        """
+        return self.get_fragment(
+            ("dropmenu", self.the_lang, self.uplink), self.build_drop_menu
+        )
+
+    def build_drop_menu(self):
         """
         Creates the Drop Down Navigation Menu
         """
@@ -2948,7 +3024,7 @@ class BasePage:
         @param: handle -- The family handle
         @param: url    -- url to be linked
         """
-        self.report.fam_link[handle] = url
+        self.report.set_fam_link(handle, url)
         return Html(
             "a",
             self._("Family Map"),
@@ -3035,7 +3111,7 @@ class BasePage:
                                  object has already been retrieved, as it
                                  will be used to improve performance
         """
-        result = self.report.obj_dict.get(Person).get(person_handle)
+        result = self.report.get_obj_entry(Person, person_handle)
 
         # construct link, name and gid
         if result is None:
@@ -3344,7 +3420,7 @@ class BasePage:
             parent_place = self.r_db.get_place_from_handle(placeref.ref)
             if parent_place:
                 place_name = parent_place.get_name().get_value()
-                if parent_place.handle in self.report.obj_dict[Place]:
+                if self.report.get_obj_entry(Place, parent_place.handle):
                     place_hyper = self.place_link(
                         parent_place.handle, place_name, uplink=self.uplink
                     )
@@ -3362,21 +3438,18 @@ class BasePage:
         )
         tbody += trow
         encloses = []
-        for link in self.r_db.find_backlink_handles(
-            place.handle, include_classes=["Place"]
-        ):
-            child_place = self.r_db.get_place_from_handle(link[1])
+        for child_handle in self.report.get_enclosed_places(place.handle):
+            child_place = self.r_db.get_place_from_handle(child_handle)
             placeref = None
             for placeref in child_place.get_placeref_list():
                 if placeref.ref == place.handle:
                     place_name = child_place.get_name().get_value()
-                    if link[1] in self.report.obj_dict[Place]:
-                        encloses.append((place_name, link[1]))
+                    if self.report.get_obj_entry(Place, child_handle):
+                        encloses.append((place_name, child_handle))
                     else:
                         encloses.append((place_name, ""))
         for name, handle in sorted(encloses, key=sort_by_encl):
-            place_name = child_place.get_name().get_value()
-            if handle and handle in self.report.obj_dict[Place]:
+            if handle:
                 place_hyper = self.place_link(handle, name, uplink=self.uplink)
             else:
                 place_hyper = name
@@ -3547,9 +3620,7 @@ class BasePage:
             bkref_list, key=lambda x: sort_by_role(x)
         ):
             list_html = Html("li")
-            path = self.report.obj_dict[bkref_class][bkref_handle][0]
-            name = self.report.obj_dict[bkref_class][bkref_handle][1]
-            gid = self.report.obj_dict[bkref_class][bkref_handle][2]
+            path, name, gid = self.report.get_obj_entry(bkref_class, bkref_handle)[:3]
             if role != "":
                 if self.reference_sort:
                     role = self.birth_death_dates(gid)
@@ -3603,7 +3674,7 @@ class BasePage:
             if path == "":
                 list_html += name
                 list_html += self.display_bkref(
-                    self.report.bkref_dict[bkref_class][bkref_handle], depth + 1
+                    self.report.get_bkrefs(bkref_class, bkref_handle), depth + 1
                 )
             else:
                 url = self.report.build_url_fname(path, uplink=self.uplink)
@@ -3681,6 +3752,32 @@ class BasePage:
     # -----------------------------------------------------------------------
     #              # Web Page Fortmatter and writer
     # -----------------------------------------------------------------------
+    def get_fragment(self, key, build):
+        """
+        Returns the precompiled fragment of a part shared by many pages,
+        building it the first time it is used.
+
+        The handles of the objects read to build the part are kept, and are
+        recorded again each time it is used, so that the pages of the
+        incremental mode still depend on them.
+
+        @param: key   -- The key of the part, from everything it depends on
+        @param: build -- A function returning the part, as an Html object
+        """
+        fragments = self.report.fragments
+        key = (self.report.the_lang, key)
+        if key not in fragments:
+            recorded = self.r_db.recorded
+            self.r_db.recorded = set()
+            try:
+                fragments[key] = (Html.fragment(build()), self.r_db.recorded)
+            finally:
+                self.r_db.recorded = recorded
+        fragment, handles = fragments[key]
+        if self.r_db.recorded is not None:
+            self.r_db.recorded.update(handles)
+        return fragment
+
     def xhtml_writer(self, htmlinstance, output_file, sio, date):
         """
         Will format, write, and close the file
@@ -3688,10 +3785,15 @@ class BasePage:
         @param: output_file  -- Open file that is being written to
         @param: htmlinstance -- Web page created with libhtml
                                 gramps/plugins/lib/libhtml.py
+        @param: date         -- The last modification date of the page, or
+                                a function returning it once the page is
+                                written, for pages with deferred rows
         """
-        htmlinstance.write(partial(print, file=output_file))
+        htmlinstance.write_to(output_file)
 
         # closes the file
+        if callable(date):
+            date = date()
         self.report.close_file(output_file, sio, date)
 
     def create_toggle(self, element):
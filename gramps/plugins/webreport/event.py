@@ -42,6 +42,7 @@ Classe:
 # python modules
 # ------------------------------------------------
 from collections import defaultdict
+from functools import partial
 from operator import itemgetter
 from decimal import getcontext
 import logging
@@ -123,11 +124,9 @@ class EventPages(BasePage):
         with self.r_user.progress(
             progress_title, message, len(event_handle_list) + 1
         ) as step:
-            index = 1
-            for event_handle in event_handle_list:
-                step()
-                index += 1
-                self.eventpage(self.report, the_lang, the_title, event_handle)
+            pages = dict.fromkeys(event_handle_list, ())
+            write_page = partial(self.eventpage, self.report, the_lang, the_title)
+            self.report.write_pages(Event, pages, write_page, step)
             step()
         self.eventlistpage(
             self.report, the_lang, the_title, event_types, event_handle_list
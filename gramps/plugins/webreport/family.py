@@ -42,6 +42,7 @@ Classe:
 # python modules
 # ------------------------------------------------
 from collections import defaultdict, OrderedDict
+from functools import partial
 from decimal import getcontext
 import logging
 
@@ -113,15 +114,13 @@ class FamilyPages(BasePage):
             LOG.debug("    %s", str(item))
 
         message = _("Creating family pages...")
-        index = 1
         progress_title = self.report.pgrs_title(the_lang)
         with self.r_user.progress(
             progress_title, message, len(self.report.obj_dict[Family]) + 1
         ) as step:
-            for family_handle in self.report.obj_dict[Family]:
-                step()
-                index += 1
-                self.familypage(self.report, the_lang, the_title, family_handle)
+            pages = dict.fromkeys(self.report.obj_dict[Family], ())
+            write_page = partial(self.familypage, self.report, the_lang, the_title)
+            self.report.write_pages(Family, pages, write_page, step)
             step()
             self.familylistpage(
                 self.report, the_lang, the_title, self.report.obj_dict[Family].keys()
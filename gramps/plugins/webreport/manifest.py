@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Narrative Web Page generator.
+
+Classes:
+    PageManifest     - The pages written by the last run of the report, used
+                       to only regenerate the pages of changed objects
+    RecordingProxyDb - A cache proxy recording the objects read for a page
+"""
+# ------------------------------------------------
+# python modules
+# ------------------------------------------------
+from functools import partial
+import gzip
+import json
+import logging
+import os
+
+# ------------------------------------------------
+# Gramps module
+# ------------------------------------------------
+from gramps.gen.proxy import CacheProxyDb
+
+LOG = logging.getLogger(".NarrativeWeb")
+
+MANIFEST = "narrativeweb-manifest.json.gz"
+MANIFEST_VERSION = 2
+CHUNK_SIZE = 1000
+
+# The classes of the objects a page can depend on.
+_CLASSES = (
+    "Person",
+    "Family",
+    "Event",
+    "Place",
+    "Source",
+    "Citation",
+    "Media",
+    "Repository",
+    "Note",
+    "Tag",
+)
+
+
+def _get_changed_handles(class_name, since, db, handles):
+    """
+    Return the handles of the objects of the class changed at or after the
+    given time.
+
+    This is called by :meth:`imap_over_objects`, possibly in a worker
+    process.
+    """
+    get_func = db.method("get_%s_from_handle", class_name)
+    db.prefetch_handles(class_name, handles)
+    changed = []
+    for handle in handles:
+        obj = get_func(handle)
+        if obj is not None and obj.change >= since:
+            changed.append(handle)
+    return changed
+
+
+#################################################
+#
+#    Keeps the list of pages of the previous run
+#
+#################################################
+class PageManifest:
+    """
+    The manifest of the object pages written by the report.
+
+    For each page it keeps a signature of the page, the handles of the
+    objects read to write it, the files written, the family map links set
+    while writing it and the entries of the object and back reference
+    dictionaries of the report, and the lists of enclosed places, it read.
+    The signature covers the content of those entries and lists, as the
+    names in them depend on other objects, and the places a place encloses
+    are only stored with the enclosed places.  It is saved in the
+    destination directory, with the time the report was started and the
+    handles of the objects in the report.
+
+    On the next run, a page is current when its signature is the same and
+    none of the objects it depends on was changed since the time of the
+    previous run, or entered or left the report.  Deleting an object
+    changes the objects referring to it, so that case is covered by the
+    change times.
+    """
+
+    def __init__(self, dirname, options_key, start_time):
+        """
+        @param: dirname     -- The destination directory of the report
+        @param: options_key -- A string identifying the report options.
+                               Pages are only kept if it did not change.
+        @param: start_time  -- The time the report started to read the
+                               database
+        """
+        self.filename = os.path.join(dirname, MANIFEST)
+        self.options_key = options_key
+        self.start_time = int(start_time)
+        self.members = set()
+        self.old_pages = {}
+        self.old_handles = []
+        self.current = set()
+        self.pages = {}
+
+    def load(self, db, members):
+        """
+        Read the manifest of the previous run, and find the pages that are
+        still current.
+
+        @param: db      -- The database, which must not be a proxy, as the
+                           change times are read by worker processes.
+        @param: members -- The set of the handles of the objects in the
+                           report.
+        """
+        self.members = members
+        try:
+            with gzip.open(self.filename, "rt", encoding="utf-8") as mfile:
+                manifest = json.load(mfile)
+        except (OSError, ValueError) as msg:
+            if os.path.exists(self.filename):
+                LOG.warning("Ignoring the manifest %s: %s", self.filename, msg)
+            return
+        if manifest.get("version") != MANIFEST_VERSION:
+            return
+        self.old_pages = manifest["pages"]
+        if manifest["options"] != self.options_key:
+            return
+
+        old_handles = self.old_handles = manifest["handles"]
+        changed = set()
+        for class_name in _CLASSES:
+            func = partial(_get_changed_handles, class_name, manifest["time"])
+            for chunk in db.imap_over_objects(class_name, func, CHUNK_SIZE):
+                changed.update(chunk)
+        old_members = {old_handles[index] for index in manifest["members"]}
+        changed.update(old_members.symmetric_difference(members))
+
+        stale = {index for index, handle in enumerate(old_handles) if handle in changed}
+        for key, (dummy_sig, deps, files, *dummy_rest) in self.old_pages.items():
+            if stale.isdisjoint(deps) and all(
+                os.path.exists(os.path.join(os.path.dirname(self.filename), fname))
+                for fname in files
+            ):
+                self.current.add(key)
+        LOG.debug(
+            "%d of %d pages are current, %d objects changed",
+            len(self.current),
+            len(self.old_pages),
+            len(changed),
+        )
+
+    def is_current(self, key, signature):
+        """
+        Return True if the page written by the previous run can be kept.
+
+        @param: key       -- The key of the page
+        @param: signature -- The signature of the page in this run
+        """
+        return key in self.current and self.old_pages[key][0] == signature
+
+    def get_reads(self, key):
+        """
+        Return the set of the (kind, class name, handle) of the dictionary
+        entries read by the page in the previous run, or None if the page
+        is not current.
+
+        @param: key -- The key of the page
+        """
+        if key not in self.current:
+            return None
+        return {
+            (kind, class_name, self.old_handles[index])
+            for kind, class_name, index in self.old_pages[key][4]
+        }
+
+    def get_links(self, key):
+        """
+        Return the family map links set by the page in the previous run.
+
+        @param: key -- The key of the page
+        """
+        return self.old_pages[key][3]
+
+    def keep(self, key):
+        """
+        Keep the page written by the previous run in the manifest.
+
+        @param: key -- The key of the page
+        """
+        signature, deps, files, links, dummy_reads = self.old_pages[key]
+        deps = [self.old_handles[index] for index in deps]
+        self.add(key, signature, deps, files, links, self.get_reads(key))
+
+    def add(self, key, signature, deps, files, links, reads):
+        """
+        Add a page to the manifest.
+
+        @param: key       -- The key of the page
+        @param: signature -- The signature of the page
+        @param: deps      -- The handles of the objects the page depends on
+        @param: files     -- The files written, relative to the destination
+        @param: links     -- A list of (handle, url) family map links
+        @param: reads     -- The (kind, class name, handle) of the entries
+                             of the dictionaries of the report, and of
+                             the lists of enclosed places, read
+        """
+        self.pages[key] = (
+            signature,
+            list(deps),
+            list(files),
+            list(links),
+            list(reads),
+        )
+
+    def update(self, pages):
+        """
+        Add the pages added to another copy of the manifest, for example in
+        a worker process.
+
+        @param: pages -- The dictionary of the pages added
+        """
+        self.pages.update(pages)
+
+    def remove_stale(self, dirname):
+        """
+        Remove the files of the pages of the previous run that were not
+        written again or kept by this run, such as the pages of removed
+        objects.
+
+        @param: dirname -- The destination directory of the report
+        """
+        written = set()
+        for dummy_sig, dummy_deps, files, *dummy_rest in self.pages.values():
+            written.update(files)
+        for key, (dummy_sig, dummy_deps, files, *dummy_rest) in self.old_pages.items():
+            if key in self.pages:
+                continue
+            for fname in files:
+                if fname in written:
+                    continue
+                try:
+                    os.remove(os.path.join(dirname, fname))
+                except OSError:
+                    pass
+
+    def save(self):
+        """
+        Write the manifest of this run.
+        """
+        handles = []
+        handle_index = {}
+
+        def get_index(handle):
+            """
+            Return the index of the handle in the list of handles.
+            """
+            index = handle_index.get(handle)
+            if index is None:
+                index = handle_index[handle] = len(handles)
+                handles.append(handle)
+            return index
+
+        def get_indexes(handle_list):
+            """
+            Return the indexes of the handles in the list of handles.
+            """
+            return [get_index(handle) for handle in handle_list]
+
+        pages = {
+            key: (
+                signature,
+                get_indexes(deps),
+                files,
+                links,
+                [
+                    (kind, class_name, get_index(handle))
+                    for kind, class_name, handle in reads
+                ],
+            )
+            for key, (signature, deps, files, links, reads) in self.pages.items()
+        }
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "options": self.options_key,
+            "time": self.start_time,
+            "handles": handles,
+            "members": get_indexes(self.members),
+            "pages": pages,
+        }
+        with gzip.open(self.filename, "wt", encoding="utf-8") as mfile:
+            json.dump(manifest, mfile, separators=(",", ":"))
+
+
+def _record_handle(method):
+    """
+    Return a version of the CacheProxyDb method that records the handle.
+    """
+
+    def get_from_handle(self, handle):
+        if self.recorded is not None:
+            self.recorded.add(handle)
+        return method(self, handle)
+
+    get_from_handle.__doc__ = method.__doc__
+    return get_from_handle
+
+
+def _record_gramps_id(name):
+    """
+    Return a method calling the method of the proxied database with the
+    name, which records the handle of the object found.
+    """
+
+    def get_from_gramps_id(self, gramps_id):
+        obj = getattr(self.db, name)(gramps_id)
+        if obj is not None and self.recorded is not None:
+            self.recorded.add(obj.handle)
+        return obj
+
+    return get_from_gramps_id
+
+
+#################################################
+#
+#    Records the objects read for a page
+#
+#################################################
+class RecordingProxyDb(CacheProxyDb):
+    """
+    A cache proxy that records the handles of the objects read, by handle
+    or by Gramps ID, when recorded is a set.
+    """
+
+    def __init__(self, database):
+        """
+        @param: database -- The database to proxy
+        """
+        CacheProxyDb.__init__(self, database)
+        self.recorded = None
+
+    get_person_from_handle = _record_handle(CacheProxyDb.get_person_from_handle)
+    get_family_from_handle = _record_handle(CacheProxyDb.get_family_from_handle)
+    get_event_from_handle = _record_handle(CacheProxyDb.get_event_from_handle)
+    get_place_from_handle = _record_handle(CacheProxyDb.get_place_from_handle)
+    get_source_from_handle = _record_handle(CacheProxyDb.get_source_from_handle)
+    get_citation_from_handle = _record_handle(CacheProxyDb.get_citation_from_handle)
+    get_media_from_handle = _record_handle(CacheProxyDb.get_media_from_handle)
+    get_repository_from_handle = _record_handle(CacheProxyDb.get_repository_from_handle)
+    get_note_from_handle = _record_handle(CacheProxyDb.get_note_from_handle)
+    get_tag_from_handle = _record_handle(CacheProxyDb.get_tag_from_handle)
+
+    get_person_from_gramps_id = _record_gramps_id("get_person_from_gramps_id")
+    get_family_from_gramps_id = _record_gramps_id("get_family_from_gramps_id")
+    get_event_from_gramps_id = _record_gramps_id("get_event_from_gramps_id")
+    get_place_from_gramps_id = _record_gramps_id("get_place_from_gramps_id")
+    get_source_from_gramps_id = _record_gramps_id("get_source_from_gramps_id")
+    get_citation_from_gramps_id = _record_gramps_id("get_citation_from_gramps_id")
+    get_media_from_gramps_id = _record_gramps_id("get_media_from_gramps_id")
+    get_repository_from_gramps_id = _record_gramps_id("get_repository_from_gramps_id")
+    get_note_from_gramps_id = _record_gramps_id("get_note_from_gramps_id")
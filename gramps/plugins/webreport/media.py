@@ -146,11 +146,11 @@ class MediaPages(BasePage):
                 self.report.obj_dict[Media].keys(),
                 key=lambda x: sort_by_desc_and_gid(self.r_db.get_media_from_handle(x)),
             )
+            pages = {}
             prev = None
             total = len(sorted_media_handles)
             index = 1
             for handle in sorted_media_handles:
-                gc.collect()  # Reduce memory usage when there are many images.
                 if index == media_count:
                     next_ = None
                 elif index < total:
@@ -159,15 +159,8 @@ class MediaPages(BasePage):
                     next_ = self.unused_media_handles[0]
                 else:
                     next_ = None
-                self.mediapage(
-                    self.report,
-                    the_lang,
-                    the_title,
-                    handle,
-                    (prev, next_, index, media_count),
-                )
+                pages[handle] = ((prev, next_, index, media_count),)
                 prev = handle
-                step()
                 index += 1
 
             total = len(self.unused_media_handles)
@@ -176,23 +169,24 @@ class MediaPages(BasePage):
             prev = sorted_media_handles[total_m - 1] if total_m > 0 else 0
             if total > 0:
                 for media_handle in self.unused_media_handles:
-                    gc.collect()  # Reduce memory usage when many images.
                     if index == media_count:
                         next_ = None
                     else:
                         next_ = self.unused_media_handles[idx]
-                    self.mediapage(
-                        self.report,
-                        the_lang,
-                        the_title,
-                        media_handle,
-                        (prev, next_, index, media_count),
-                    )
+                    pages[media_handle] = ((prev, next_, index, media_count),)
                     prev = media_handle
-                    step()
                     index += 1
                     idx += 1
 
+            def write_page(media_handle, info):
+                """
+                Write the page of a media.
+                """
+                gc.collect()  # Reduce memory usage when there are many images.
+                self.mediapage(self.report, the_lang, the_title, media_handle, info)
+
+            self.report.write_pages(Media, pages, write_page, step)
+
         self.medialistpage(self.report, the_lang, the_title, sorted_media_handles)
 
     def medialistpage(self, report, the_lang, the_title, sorted_media_handles):
@@ -753,13 +747,11 @@ class MediaPages(BasePage):
         try:
             mtime = os.stat(fullpath).st_mtime
             if self.report.archive:
-                if str(newpath) not in self.report.archive.getnames():
-                    # The current file not already archived.
-                    self.report.archive.add(fullpath, str(newpath))
+                self.report.add_to_archive(str(newpath), None, fullpath, mtime)
             else:
                 to_dir = os.path.join(self.html_dir, to_dir)
                 if not os.path.isdir(to_dir):
-                    os.makedirs(to_dir)
+                    os.makedirs(to_dir, exist_ok=True)
                 new_file = os.path.join(self.html_dir, newpath)
                 if not os.path.exists(newpath):
                     shutil.copyfile(fullpath, new_file)
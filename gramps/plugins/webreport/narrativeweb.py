@@ -48,11 +48,11 @@ Classes:
 # ------------------------------------------------
 import logging
 from functools import partial
+from hashlib import md5
 import os
 import sys
 import time
 import shutil
-import tarfile
 from io import BytesIO, TextIOWrapper
 from collections import defaultdict
 from decimal import getcontext
@@ -61,7 +61,7 @@ from decimal import getcontext
 # Gramps module
 # ------------------------------------------------
 from gramps.gen.const import GRAMPS_LOCALE as glocale
-from gramps.gen.const import VERSION_DIR
+from gramps.gen.const import VERSION, VERSION_DIR
 from gramps.gen.lib import (
     EventType,
     Name,
@@ -98,9 +98,11 @@ from gramps.gen.config import config
 from gramps.gen.datehandler import displayer as _dd
 from gramps.gen.display.name import displayer as _nd
 from gramps.gen.display.place import displayer as _pd
-from gramps.gen.proxy import CacheProxyDb
 from gramps.plugins.lib.libhtmlconst import _CHARACTER_SETS, _CC, _COPY_OPTIONS
 from gramps.gen.relationship import get_relationship_calculator
+from gramps.gen.mime import is_image_type
+from gramps.gen.utils.file import media_path_full
+from gramps.gen.utils.thumbnails import ThumbnailService
 
 # ------------------------------------------------
 # specific narrative web import
@@ -127,6 +129,12 @@ from gramps.plugins.webreport.introduction import IntroductionPage
 from gramps.plugins.webreport.addressbook import AddressBookPage
 from gramps.plugins.webreport.addressbooklist import AddressBookListPage
 from gramps.plugins.webreport.calendar import CalendarPage
+from gramps.plugins.webreport.manifest import PageManifest, RecordingProxyDb
+from gramps.plugins.webreport.archive import (
+    ARCHIVE_FORMATS,
+    WebArchive,
+    set_archive_extension,
+)
 
 from gramps.plugins.webreport.common import (
     get_gendex_data,
@@ -152,6 +160,37 @@ _DEFAULT_MAX_IMG_HEIGHT = 600  # resize images that are taller than this
 
 
 # The two values above are settable in options.
+
+# The number of objects in each chunk of pages given to a worker process.
+_PAGE_CHUNK_SIZE = 200
+
+# The pages being written by NavWebReport.write_pages
+_PAGE_JOB = None
+
+
+def _get_bkref_key(bkrefs):
+    """
+    Return the back references of an object as a sorted list, for the
+    signature of a page.
+    """
+    return sorted(
+        (getattr(bkref_class, "__name__", ""), bkref_handle, str(role))
+        for bkref_class, bkref_handle, role in bkrefs
+    )
+
+
+def _write_pages(db, handles):
+    """
+    Write the pages of the objects with the handles, and return the result
+    of NavWebReport.write_page_chunk.
+
+    This is called by :meth:`imap_over_objects`, possibly in a worker
+    process forked after _PAGE_JOB was set.
+    """
+    report, obj_class, pages, write_page = _PAGE_JOB
+    return report.write_page_chunk(obj_class, pages, write_page, handles)
+
+
 class NavWebReport(Report):
     """
     Create WebReport object that produces the report.
@@ -165,6 +204,7 @@ class NavWebReport(Report):
         """
         Report.__init__(self, database, options, user)
         self.user = user
+        self.basedb = database
         menu = options.menu
         self.link_prefix_up = True
         self.options = {}
@@ -180,7 +220,7 @@ class NavWebReport(Report):
 
         stdoptions.run_private_data_option(self, menu)
         stdoptions.run_living_people_option(self, menu)
-        self.database = CacheProxyDb(self.database)
+        self.database = RecordingProxyDb(self.database)
         self._db = self.database
 
         filters_option = menu.get_option_by_name("filter")
@@ -241,6 +281,13 @@ class NavWebReport(Report):
         self.encoding = self.options["encoding"]
 
         self.use_archive = self.options["archive"]
+        # keep the unchanged pages of the last run?
+        self.incremental = self.options["incremental"] and not self.use_archive
+        self.manifest = None
+        self.page = None
+        self.page_files = None
+        self.page_links = None
+        self.page_reads = None
         self.use_intro = self.options["intronote"] or self.options["introimg"]
         self.use_home = self.options["homenote"] or self.options["homeimg"]
         self.use_contact = self.opts["contactnote"] or self.opts["contactimg"]
@@ -297,6 +344,10 @@ class NavWebReport(Report):
             self.intro_fname = None
 
         self.archive = None
+        self.archive_files = None  # Files to add to the archive, in a worker.
+        self.main_pid = os.getpid()
+        self.chunk_links = None
+        self.fragments = {}  # The page parts shared by many pages.
         self.cur_fname = None  # Internal use. The name of the output file,
         # to be used for the tar archive.
         self.string_io = None
@@ -332,6 +383,7 @@ class NavWebReport(Report):
         global _WRONGMEDIAPATH
 
         _WRONGMEDIAPATH = []
+        start_time = time.time()
         if not self.use_archive:
             dir_name = self.target_path
             if dir_name is None:
@@ -395,7 +447,9 @@ class NavWebReport(Report):
                 )
                 return
             try:
-                self.archive = tarfile.open(self.target_path, "w:gz")
+                self.archive = WebArchive(
+                    self.target_path, self.options["archive_format"]
+                )
             except (OSError, IOError) as value:
                 self.user.notify_error(
                     _("Could not create %s") % self.target_path, str(value)
@@ -517,6 +571,27 @@ class NavWebReport(Report):
                     cur_title = self.options[titl]
                     self.languages.append((cur_lang, cur_title))
 
+        if self.incremental:
+            self.manifest = PageManifest(
+                self.html_dir, self.get_options_key(), start_time
+            )
+            members = set()
+            for obj_class in (
+                Person,
+                Family,
+                Event,
+                Place,
+                Source,
+                Citation,
+                Media,
+                Repository,
+            ):
+                members.update(self.obj_dict[obj_class])
+            self.manifest.load(self.basedb, members)
+
+        if self.inc_gallery:
+            self.create_thumbnails()
+
         self.visited = []
         if len(self.languages) > 1:
             IndexPage(self, self.languages)
@@ -585,6 +660,10 @@ class NavWebReport(Report):
         # copy all of the necessary files
         self.copy_narrated_files()
 
+        if self.manifest is not None:
+            self.manifest.remove_stale(self.html_dir)
+            self.manifest.save()
+
         # if an archive is being used, close it?
         if self.archive:
             self.archive.close()
@@ -1414,6 +1493,58 @@ class NavWebReport(Report):
         ) as step:
             ThumbnailPreviewPage(self, self.the_lang, self.the_title, step)
 
+    def create_thumbnails(self):
+        """
+        Create the thumbnails of the media, and of the regions shown for the
+        first media reference of an object, in the worker threads of a
+        thumbnail service, so that the pages only have to copy them.
+
+        The worker threads are stopped before the pages are written, as
+        they can be written by forked processes.
+        """
+        if self.create_unused_media:
+            media_handles = self._db.get_media_handles()
+        else:
+            media_handles = self.obj_dict[Media]
+        jobs = []
+        for media_handle in media_handles:
+            media = self._db.get_media_from_handle(media_handle)
+            if media.get_mime_type():
+                jobs.append((media, None))
+        for obj_class in (Person, Family, Event, Place, Source, Citation):
+            get_obj = self._db.method("get_%s_from_handle", obj_class.__name__)
+            for handle in self.obj_dict[obj_class]:
+                media_list = get_obj(handle).get_media_list()
+                if not media_list:
+                    continue
+                media = self._db.get_media_from_handle(media_list[0].ref)
+                mime_type = media.get_mime_type() if media else None
+                if not (mime_type and is_image_type(mime_type)):
+                    continue
+                for media_ref in media_list:
+                    if media_ref.ref == media.handle and media_ref.rect is not None:
+                        jobs.append((media, media_ref.rect))
+                        break
+
+        service = ThumbnailService(config.get("behavior.thumbnail-workers"))
+        try:
+            futures = [
+                service.request(
+                    media_path_full(self._db, media.get_path()),
+                    media.get_mime_type(),
+                    region,
+                )
+                for media, region in jobs
+            ]
+            with self.user.progress(
+                self.pgrs_title(None), _("Creating thumbnails..."), len(futures)
+            ) as step:
+                for future in futures:
+                    future.result()
+                    step()
+        finally:
+            service.close()
+
     def statistics_preview_page(self):
         """
         creates the statistics preview page
@@ -1814,7 +1945,7 @@ class NavWebReport(Report):
                 fname = os.path.join(self.html_dir, self.cur_fname)
             dir_name = os.path.dirname(fname)
             if not os.path.isdir(dir_name):
-                os.makedirs(dir_name)
+                os.makedirs(dir_name, exist_ok=True)
             output_file = open(
                 fname, "w", encoding=self.encoding, errors="xmlcharrefreplace"
             )
@@ -1832,22 +1963,285 @@ class NavWebReport(Report):
                                when we use rsync.
         """
         if self.archive:
-            if self.cur_fname not in self.archive.getnames():
-                # The current file not already archived.
-                output_file.flush()
-                tarinfo = tarfile.TarInfo(self.cur_fname)
-                tarinfo.size = len(string_io.getvalue())
-                tarinfo.mtime = date if date != 0 else time.time()
-                if not win():
-                    tarinfo.uid = os.getuid()
-                    tarinfo.gid = os.getgid()
-                string_io.seek(0)
-                self.archive.addfile(tarinfo, string_io)
+            output_file.flush()
+            mtime = date if date != 0 else time.time()
+            self.add_to_archive(self.cur_fname, string_io.getvalue(), None, mtime)
             output_file.close()
         else:
             output_file.close()
             if date is not None and date > 0:
                 os.utime(output_file.name, (date, date))
+            if self.page_files is not None:
+                self.page_files.append(os.path.relpath(output_file.name, self.html_dir))
+
+    def get_options_key(self):
+        """
+        Return a key identifying the options and the languages of the report,
+        so that the pages of the last run are only kept if they did not
+        change.
+        """
+        options = sorted(
+            (name, repr(value))
+            for name, value in self.options.items()
+            if name != "incremental"
+        )
+        key = repr((VERSION, options, self.languages))
+        return md5(key.encode("utf-8")).hexdigest()
+
+    def get_obj_entry(self, obj_class, handle):
+        """
+        Return the entry of an object in the object dictionary, or None if
+        the object is not in the report.
+
+        In incremental mode, the entry is recorded as read by the page being
+        written: its name can depend on other objects, like the name of a
+        family on the parents.
+
+        @param: obj_class -- The class of the object
+        @param: handle    -- The handle of the object
+        """
+        if self.page_reads is not None:
+            self.page_reads.add(("obj", obj_class.__name__, handle))
+        return self.obj_dict[obj_class].get(handle)
+
+    def get_bkrefs(self, obj_class, handle):
+        """
+        Return the back references of an object, recorded as read by the
+        page being written in incremental mode.
+
+        @param: obj_class -- The class of the object
+        @param: handle    -- The handle of the object
+        """
+        if self.page_reads is not None:
+            self.page_reads.add(("bkref", obj_class.__name__, handle))
+        return self.bkref_dict[obj_class][handle]
+
+    def get_enclosed_places(self, handle):
+        """
+        Return the handles of the places directly enclosed by a place,
+        recorded as read by the page being written in incremental mode.
+
+        @param: handle -- The handle of the place
+        """
+        if self.page_reads is not None:
+            self.page_reads.add(("encl", "Place", handle))
+        return self._find_enclosed_places(handle)
+
+    def _find_enclosed_places(self, handle):
+        """
+        Return the sorted handles of the places directly enclosed by a place.
+
+        @param: handle -- The handle of the place
+        """
+        return sorted(
+            ref_handle
+            for dummy_class, ref_handle in self.database.find_backlink_handles(
+                handle, include_classes=["Place"]
+            )
+        )
+
+    def get_page_signature(self, obj_class, handle, extra, reads):
+        """
+        Return the signature of the page of an object, from its back
+        references, the extra information shown and the entries of the
+        object and back reference dictionaries read to write it.
+
+        @param: obj_class -- The class of the object
+        @param: handle    -- The handle of the object
+        @param: extra     -- See begin_page()
+        @param: reads     -- The (kind, class name, handle) of the entries
+                             read, see get_obj_entry(), get_bkrefs() and
+                             get_enclosed_places()
+        """
+        classes = {cls.__name__: cls for cls in self.obj_dict}
+        classes.update((cls.__name__, cls) for cls in self.bkref_dict)
+        reads = sorted(reads)
+        contents = []
+        for kind, class_name, ref_handle in reads:
+            ref_class = classes.get(class_name)
+            if kind == "obj":
+                entry = None
+                if ref_class is not None:
+                    entry = self.obj_dict[ref_class].get(ref_handle)
+                # the entries of places also hold an event
+                contents.append(entry[:3] if entry else None)
+            elif kind == "encl":
+                contents.append(self._find_enclosed_places(ref_handle))
+            else:
+                bkrefs = ()
+                if ref_class is not None:
+                    bkrefs = self.bkref_dict[ref_class].get(ref_handle, ())
+                contents.append(_get_bkref_key(bkrefs))
+        signature = repr(
+            (
+                _get_bkref_key(self.bkref_dict[obj_class][handle]),
+                extra,
+                reads,
+                contents,
+            )
+        )
+        return md5(signature.encode("utf-8")).hexdigest()
+
+    def begin_page(self, obj_class, handle, extra=None):
+        """
+        Start the page of an object.
+
+        In incremental mode, return False if the page written by the last
+        run is still current. The page is then kept, and the family map
+        links it set are set again. Otherwise, record the objects and the
+        dictionary entries read, the files written and the family map links
+        set until end_page().
+
+        @param: obj_class -- The class of the object
+        @param: handle    -- The handle of the object
+        @param: extra     -- Anything else shown on the page which is not
+                             given by the objects read, like the previous
+                             and next media
+        """
+        if self.manifest is None:
+            return True
+        key = "%s/%s/%s" % (self.the_lang or "", obj_class.__name__, handle)
+        reads = self.manifest.get_reads(key)
+        if reads is not None and self.manifest.is_current(
+            key, self.get_page_signature(obj_class, handle, extra, reads)
+        ):
+            self.manifest.keep(key)
+            for fam_handle, url in self.manifest.get_links(key):
+                self.set_fam_link(fam_handle, url)
+            return False
+        bkrefs = self.bkref_dict[obj_class][handle]
+        self.page = (key, obj_class, handle, extra)
+        self.page_files = []
+        self.page_links = []
+        self.page_reads = set()
+        self.database.recorded = {handle}
+        self.database.recorded.update(bkref[1] for bkref in bkrefs if bkref[1])
+        return True
+
+    def end_page(self):
+        """
+        End the page started by begin_page(), and add it to the manifest.
+        """
+        if self.manifest is None:
+            return
+        key, obj_class, handle, extra = self.page
+        signature = self.get_page_signature(obj_class, handle, extra, self.page_reads)
+        self.manifest.add(
+            key,
+            signature,
+            self.database.recorded,
+            self.page_files,
+            self.page_links,
+            self.page_reads,
+        )
+        self.database.recorded = None
+        self.page = self.page_files = self.page_links = self.page_reads = None
+
+    def set_fam_link(self, handle, url):
+        """
+        Set the url of the family map of a person.
+
+        @param: handle -- The person handle
+        @param: url    -- The url of the family map
+        """
+        self.fam_link[handle] = url
+        if self.page_links is not None:
+            self.page_links.append((handle, url))
+        if self.chunk_links is not None:
+            self.chunk_links[handle] = url
+
+    def write_pages(self, obj_class, pages, write_page, step):
+        """
+        Write the pages of the objects of a class.
+
+        The pages are written by chunks, in worker processes when the
+        database supports them, see :meth:`imap_over_objects`. The workers
+        are forked from this process, so they inherit the report with its
+        object and back reference dictionaries. They write the pages to the
+        destination directory, or return them to be added to the archive.
+
+        @param: obj_class  -- The class of the objects
+        @param: pages      -- A dictionary of the tuples of the arguments of
+                              write_page after the handle, keyed by the
+                              handles of the objects to write
+        @param: write_page -- The function writing the page of an object
+        @param: step       -- The function updating the progress
+        """
+        global _PAGE_JOB
+        _PAGE_JOB = (self, obj_class, pages, write_page)
+        try:
+            for count, entries, links, files in self.basedb.imap_over_objects(
+                obj_class.__name__, _write_pages, _PAGE_CHUNK_SIZE
+            ):
+                if self.manifest is not None:
+                    self.manifest.update(entries)
+                self.fam_link.update(links)
+                for name, data, from_fname, mtime in files:
+                    self.add_to_archive(name, data, from_fname, mtime)
+                for dummy_page in range(count):
+                    step()
+        finally:
+            _PAGE_JOB = None
+
+    def write_page_chunk(self, obj_class, pages, write_page, handles):
+        """
+        Write the pages of the objects with the handles which are in pages.
+
+        Return the number of pages, the pages added to the manifest, the
+        family map links set and, in a worker process writing an archive,
+        the files to add to it.
+
+        @param: obj_class  -- The class of the objects
+        @param: pages      -- See write_pages()
+        @param: write_page -- See write_pages()
+        @param: handles    -- The handles of a chunk of objects of the class
+        """
+        if self.manifest is not None:
+            manifest_pages = self.manifest.pages
+            self.manifest.pages = {}
+        if self.archive and os.getpid() != self.main_pid:
+            self.archive_files = []
+        self.chunk_links = {}
+        count = 0
+        try:
+            for handle in handles:
+                args = pages.get(handle)
+                if args is None:
+                    continue
+                count += 1
+                if self.begin_page(obj_class, handle, args):
+                    write_page(handle, *args)
+                    self.end_page()
+            entries = {}
+            if self.manifest is not None:
+                entries = self.manifest.pages
+            return count, entries, self.chunk_links, self.archive_files or []
+        finally:
+            if self.manifest is not None:
+                self.manifest.pages = manifest_pages
+            self.archive_files = None
+            self.chunk_links = None
+
+    def add_to_archive(self, name, data, from_fname, mtime):
+        """
+        Add a file to the archive, unless it is already archived.
+
+        In a worker process of write_pages(), the file is returned to the
+        main process, which adds it.
+
+        @param: name       -- The name of the file in the archive
+        @param: data       -- The content of the file, as bytes, or None to
+                              copy the file from_fname
+        @param: from_fname -- The path of the file to copy
+        @param: mtime      -- The last modification time of the file
+        """
+        if self.archive_files is not None:
+            self.archive_files.append((name, data, from_fname, mtime))
+            return
+        if data is None:
+            self.archive.add_file(name, from_fname, mtime)
+        else:
+            self.archive.add_data(name, data, mtime)
 
     def prepare_copy_media(self, photo):
         """
@@ -1882,29 +2276,16 @@ class NavWebReport(Report):
         LOG.debug("copying '%s' to '%s/%s'", from_fname, to_dir, to_fname)
         mtime = os.stat(from_fname).st_mtime
         if self.archive:
-
-            def set_mtime(tarinfo):
-                """
-                For each file, we set the last modification time.
-
-                We could also set uid, gid, uname, gname and mode
-                #tarinfo.uid = os.getuid()
-                #tarinfo.mode = 0660
-                #tarinfo.uname = tarinfo.gname = "www-data"
-                """
-                tarinfo.mtime = mtime
-                return tarinfo
-
-            dest = os.path.join(to_dir, to_fname)
-            if dest not in self.archive.getnames():
-                # The current file not already archived.
-                self.archive.add(from_fname, dest, filter=set_mtime)
+            self.add_to_archive(os.path.join(to_dir, to_fname), None, from_fname, mtime)
         else:
             dest = os.path.join(self.html_dir, to_dir, to_fname)
+            if self.page_files is not None:
+                # removed with the page, like the thumbnail of a media
+                self.page_files.append(os.path.relpath(dest, self.html_dir))
 
             destdir = os.path.dirname(dest)
             if not os.path.isdir(destdir):
-                os.makedirs(destdir)
+                os.makedirs(destdir, exist_ok=True)
 
             if from_fname != dest:
                 if not os.path.exists(dest):
@@ -1969,8 +2350,10 @@ class NavWebOptions(MenuReportOptions):
         """
         self.__db = dbase
         self.__archive = None
+        self.__archive_format = None
         self.__target = None
         self.__target_uri = None
+        self.__incremental = None
         self.__pid = None
         self.__filter = None
         self.__graph = None
@@ -2068,11 +2451,23 @@ class NavWebOptions(MenuReportOptions):
         category_name = _("Report Options")
         addopt = partial(menu.add_option, category_name)
 
-        self.__archive = BooleanOption(_("Store website in .tar.gz archive"), False)
+        self.__archive = BooleanOption(_("Store website in an archive"), False)
         self.__archive.set_help(_("Whether to store the website in an " "archive file"))
         addopt("archive", self.__archive)
         self.__archive.connect("value-changed", self.__archive_changed)
 
+        self.__archive_format = EnumeratedListOption(_("Archive format"), ".tar.gz")
+        for ext, descr in ARCHIVE_FORMATS:
+            self.__archive_format.add_item(ext, descr)
+        self.__archive_format.set_help(
+            _(
+                "The format of the archive file. An uncompressed archive "
+                "can be compressed later by a faster, parallel tool."
+            )
+        )
+        addopt("archive_format", self.__archive_format)
+        self.__archive_format.connect("value-changed", self.__archive_changed)
+
         dbname = self.__db.get_dbname()
         default_dir = dbname + "_" + "NAVWEB"
         self.__target = DestinationOption(
@@ -2082,6 +2477,17 @@ class NavWebOptions(MenuReportOptions):
         self.__target.set_help(_("The destination directory for the web " "files"))
         addopt("target", self.__target)
 
+        self.__incremental = BooleanOption(_("Only regenerate changed pages"), False)
+        self.__incremental.set_help(
+            _(
+                "Whether to keep the pages of the people, families, events, "
+                "places, sources, repositories and media written by the last "
+                "run in the destination directory when nothing they show "
+                "changed. Not available for an archive."
+            )
+        )
+        addopt("incremental", self.__incremental)
+
         self.__archive_changed()
 
         title = StringOption(_("Website title"), _("My Family Tree"))
@@ -2927,10 +3333,19 @@ class NavWebOptions(MenuReportOptions):
         Update the change of storage: archive or directory
         """
         if self.__archive.get_value() is True:
-            self.__target.set_extension(".tar.gz")
+            archive_format = self.__archive_format.get_value()
+            target = self.__target.get_value()
+            if not self.__target.get_directory_entry():
+                # The archive format changed: replace the previous extension
+                self.__target.set_value(set_archive_extension(target, archive_format))
+            self.__target.set_extension(archive_format)
             self.__target.set_directory_entry(False)
+            self.__archive_format.set_available(True)
+            self.__incremental.set_available(False)
         else:
             self.__target.set_directory_entry(True)
+            self.__archive_format.set_available(False)
+            self.__incremental.set_available(True)
             # We don't use an archive. If usecms is True, set it to False
             if self.__usecms:
                 self.__usecms.set_value(False)
@@ -170,12 +170,16 @@ class PersonPages(BasePage):
         with self.r_user.progress(
             progress_title, message, len(self.report.obj_dict[Person]) + 1
         ) as step:
-            index = 1
-            for person_handle in sorted(self.report.obj_dict[Person]):
-                step()
-                index += 1
+
+            def write_page(person_handle):
+                """
+                Write the page of a person.
+                """
                 person = self.r_db.get_person_from_handle(person_handle)
                 self.individualpage(self.report, the_lang, the_title, person)
+
+            pages = dict.fromkeys(self.report.obj_dict[Person], ())
+            self.report.write_pages(Person, pages, write_page, step)
             step()
             self.individuallistpage(
                 self.report, the_lang, the_title, self.report.obj_dict[Person].keys()
@@ -190,7 +194,6 @@ class PersonPages(BasePage):
     def __output_person(
         self,
         date,
-        tbody,
         bucket_letter,
         bucket_link,
         showbirth,
@@ -204,14 +207,13 @@ class PersonPages(BasePage):
         person_handle,
     ):
         """
-        Generate and output the data for a single person
+        Generate the table row of a single person
         """
         person = self.r_db.get_person_from_handle(person_handle)
         if person.get_change_time() > date:
             date = person.get_change_time()
         # surname column
         trow = Html("tr")
-        tbody += trow
         tcell = Html("td", class_="ColumnSurname", inline=True)
         trow += tcell
         if first_surname:
@@ -337,7 +339,79 @@ class PersonPages(BasePage):
                 tcell = "&nbsp;"
                 samerow = True
             trow += Html("td", class_="ColumnParents", inline=samerow) + tcell
-        return (date, first_surname, first_individual)
+        return (trow, date, first_surname, first_individual)
+
+    def __individual_rows(self, index, showbirth, showdeath, showpartner, showparents):
+        """
+        Generate the table rows of the individual list, bucket by bucket.
+        The rows are only built when the page is written, and the last
+        change time of the people is kept in self.last_change.
+
+        @param: index -- The AlphabeticIndex of the surnames
+        """
+        # for each bucket, output the surnames in that bucket
+        index.resetBucketIterator()
+        output = []
+        dup_index = 0
+        while index.nextBucket():
+            if index.bucketRecordCount != 0:
+                surname_handle_dict = defaultdict(list)
+                bucket_letter = index.bucketLabel
+                bucket_link = bucket_letter
+                if bucket_letter in output:
+                    bucket_link = "%s (%i)" % (bucket_letter, dup_index)
+                    dup_index += 1
+                output.append(bucket_letter)
+                while index.nextRecord():
+                    surname = index.recordName
+                    handle_list = index.recordData
+                    for handle in handle_list:
+                        surname_handle_dict[surname].append(handle)
+                surname_handle_list = list(surname_handle_dict.items())
+                # sort by surname
+                surname_handle_list.sort(key=lambda x: self.rlocale.sort_key(x[0]))
+
+                name_format = self.report.options["name_format"]
+                nme_format = _nd.name_formats[name_format][1]
+                for surname, handle_list in surname_handle_list:
+                    if not surname or surname.isspace():
+                        surname = self._("<absent>")
+
+                    # In case the user choose a format name like "*SURNAME*"
+                    # We must display this field in upper case. So we use
+                    # the english format of format_name to find if this is
+                    # the case. name_format =
+                    # self.report.options['name_format'] nme_format =
+                    # _nd.name_formats[name_format][1]
+                    if "SURNAME" in nme_format:
+                        surnamed = surname.upper()
+                    else:
+                        surnamed = surname
+                    first_surname = True
+                    first_individual = True
+                    for person_handle in sorted(
+                        handle_list, key=self.sort_on_name_and_grampsid
+                    ):
+                        (
+                            trow,
+                            self.last_change,
+                            first_surname,
+                            first_individual,
+                        ) = self.__output_person(
+                            self.last_change,
+                            bucket_letter,
+                            bucket_link,
+                            showbirth,
+                            showdeath,
+                            showpartner,
+                            showparents,
+                            surname,
+                            surnamed,
+                            first_surname,
+                            first_individual,
+                            person_handle,
+                        )
+                        yield trow
 
     def individuallistpage(self, report, the_lang, the_title, ppl_handle_list):
         """
@@ -361,7 +435,6 @@ class PersonPages(BasePage):
         output_file, sio = self.report.create_file("individuals")
         result = self.write_header(self._("Individuals"))
         indlistpage, dummy_head, dummy_body, outerwrapper = result
-        date = 0
 
         # begin Individuals division
         with Html("div", class_="content", id="Individuals") as individuallist:
@@ -440,80 +513,22 @@ class PersonPages(BasePage):
                         "th", self._("Parents"), class_="ColumnParents", inline=True
                     )
 
+            # the rows are built while the page is written
             tbody = Html("tbody")
             table += tbody
-
-            # for each bucket, output the surnames in that bucket
-            index.resetBucketIterator()
-            output = []
-            dup_index = 0
-            while index.nextBucket():
-                if index.bucketRecordCount != 0:
-                    surname_handle_dict = defaultdict(list)
-                    bucket_letter = index.bucketLabel
-                    bucket_link = bucket_letter
-                    if bucket_letter in output:
-                        bucket_link = "%s (%i)" % (bucket_letter, dup_index)
-                        dup_index += 1
-                    output.append(bucket_letter)
-                    while index.nextRecord():
-                        surname = index.recordName
-                        handle_list = index.recordData
-                        for handle in handle_list:
-                            surname_handle_dict[surname].append(handle)
-                    surname_handle_list = list(surname_handle_dict.items())
-                    # sort by surname
-                    surname_handle_list.sort(key=lambda x: self.rlocale.sort_key(x[0]))
-
-                    name_format = self.report.options["name_format"]
-                    nme_format = _nd.name_formats[name_format][1]
-                    for surname, handle_list in surname_handle_list:
-                        if not surname or surname.isspace():
-                            surname = self._("<absent>")
-
-                        # In case the user choose a format name like "*SURNAME*"
-                        # We must display this field in upper case. So we use
-                        # the english format of format_name to find if this is
-                        # the case. name_format =
-                        # self.report.options['name_format'] nme_format =
-                        # _nd.name_formats[name_format][1]
-                        if "SURNAME" in nme_format:
-                            surnamed = surname.upper()
-                        else:
-                            surnamed = surname
-                        first_surname = True
-                        first_individual = True
-                        for person_handle in sorted(
-                            handle_list, key=self.sort_on_name_and_grampsid
-                        ):
-                            (
-                                date,
-                                first_surname,
-                                first_individual,
-                            ) = self.__output_person(
-                                date,
-                                tbody,
-                                bucket_letter,
-                                bucket_link,
-                                showbirth,
-                                showdeath,
-                                showpartner,
-                                showparents,
-                                surname,
-                                surnamed,
-                                first_surname,
-                                first_individual,
-                                person_handle,
-                            )
+            tbody += Html.defer(
+                self.__individual_rows(
+                    index, showbirth, showdeath, showpartner, showparents
+                )
+            )
 
         # create clear line for proper styling
-        # create footer section
-        footer = self.write_footer(date)
-        outerwrapper += (FULLCLEAR, footer)
+        # create footer section, after the rows
+        outerwrapper += (FULLCLEAR, Html.defer(self.write_deferred_footer()))
 
         # send page out for processing
         # and close the file
-        self.xhtml_writer(indlistpage, output_file, sio, date)
+        self.xhtml_writer(indlistpage, output_file, sio, lambda: self.last_change)
 
     #################################################
     #
@@ -940,7 +955,7 @@ class PersonPages(BasePage):
                 (latitude, longitude, placetitle, handle, event) = place_lat_long[index]
                 # Do we have several events for this place?
                 evthdle = event.get_handle()
-                bkref_list = self.report.bkref_dict[Event][evthdle]
+                bkref_list = self.report.get_bkrefs(Event, evthdle)
                 if bkref_list:
                     if placetitle == old_place_title:
                         for ref in bkref_list:
@@ -1258,7 +1273,7 @@ class PersonPages(BasePage):
         person_name = self.get_name(person)
         # This does not use [new_]person_link because the requirements are
         # unique
-        result = self.report.obj_dict.get(Person).get(person.handle)
+        result = self.report.get_obj_entry(Person, person.handle)
         if result is None or result[0] == "":
             # The person is not included in the webreport or there is no link
             # to them
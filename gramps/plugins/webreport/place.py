@@ -42,6 +42,7 @@ Classe:
 # python modules
 # ------------------------------------------------
 from collections import defaultdict
+from functools import partial
 from decimal import getcontext
 import logging
 
@@ -168,22 +169,19 @@ class PlacePages(BasePage):
         with self.r_user.progress(
             progress_title, message, len(self.report.obj_dict[Place]) + 1
         ) as step:
-            index = 1
-            for place_name in self.report.obj_dict[PlaceName].keys():
-                step()
-                p_handle = self.report.obj_dict[PlaceName][place_name]
-                index += 1
+            # A place can have several names. Its page shows the last one.
+            pages = {}
+            for place_name, p_handle in self.report.obj_dict[PlaceName].items():
                 if isinstance(p_handle, tuple):
-                    self.placepage(
-                        self.report, the_lang, the_title, p_handle[0], place_name
-                    )
+                    pages[p_handle[0]] = (place_name,)
+            write_page = partial(self.placepage, self.report, the_lang, the_title)
+            self.report.write_pages(Place, pages, write_page, step)
             step()
         self.placelistpage(self.report, the_lang, the_title)
 
     def __output_place(
         self,
         ldatec,
-        tbody,
         first_place,
         pname,
         sname,
@@ -192,7 +190,10 @@ class PlacePages(BasePage):
         letter,
         bucket_link,
     ):
-        place = None
+        """
+        Generate the table row of a single place, or None
+        """
+        place = trow = None
         if place_handle:
             place = self.r_db.get_place_from_handle(place_handle)
         if place:
@@ -212,7 +213,6 @@ class PlacePages(BasePage):
             if not plc_title or plc_title == " ":
                 letter = "&nbsp;"
             trow = Html("tr")
-            tbody += trow
             tcell = Html("td", class_="ColumnLetter", inline=True)
             trow += tcell
             if first_place:
@@ -256,7 +256,70 @@ class PlacePages(BasePage):
                 else:
                     tcell1 += "&nbsp;"
                     tcell2 += "&nbsp;"
-        return (ldatec, first_place)
+        return (trow, ldatec, first_place)
+
+    def __place_rows(self, index):
+        """
+        Generate the table rows of the place index, bucket by bucket.
+        The rows are only built when the page is written, and the last
+        change time of the places is kept in self.last_change.
+
+        @param: index -- The AlphabeticIndex of the place names
+        """
+        # For each bucket, output the places in that bucket
+        index.resetBucketIterator()
+        output = []
+        dup_index = 0
+        while index.nextBucket():
+            if index.bucketRecordCount != 0:
+                bucket_letter = index.bucketLabel
+                bucket_link = bucket_letter
+                if bucket_letter in output:
+                    bucket_link = "%s (%i)" % (bucket_letter, dup_index)
+                    dup_index += 1
+                output.append(bucket_letter)
+                # Assemble all the places in this bucket into a dict for
+                # sorting
+                place_dict = dict()
+                while index.nextRecord():
+                    place_name = index.recordName
+                    value = index.recordData
+                    place_dict[place_name] = value
+
+                handle_list = sort_places(self.r_db, place_dict, self.rlocale)
+                first_place = True
+                for pname, place_handle in handle_list:
+                    if not pname:
+                        continue
+                    val = self.report.obj_dict[PlaceName][pname]
+                    nbelem = len(val)
+                    if val and nbelem > 3:
+                        if isinstance(place_handle, tuple):
+                            place = self.r_db.get_place_from_handle(place_handle[0])
+                        else:
+                            place = self.r_db.get_place_from_handle(place_handle)
+                        main_location = get_main_location(self.r_db, place)
+                        sname = main_location.get(PlaceType.STATE, "")
+                        cname = main_location.get(PlaceType.COUNTRY, "")
+                    elif nbelem == 3:
+                        cname = val[3]
+                        sname = val[2]
+                    else:
+                        val = [""]
+                        cname = ""
+                        sname = ""
+                    (trow, self.last_change, first_place) = self.__output_place(
+                        self.last_change,
+                        first_place,
+                        pname,
+                        sname,
+                        cname,
+                        val[0],
+                        bucket_letter,
+                        bucket_link,
+                    )
+                    if trow is not None:
+                        yield trow
 
     def placelistpage(self, report, the_lang, the_title):
         """
@@ -272,7 +335,6 @@ class PlacePages(BasePage):
         output_file, sio = self.report.create_file("places")
         result = self.write_header(self._("Places"))
         placelistpage, dummy_head, dummy_body, outerwrapper = result
-        ldatec = 0
 
         # begin places division
         with Html("div", class_="content", id="Places") as placelist:
@@ -346,72 +408,16 @@ class PlacePages(BasePage):
                 tbody = Html("tbody")
                 table += tbody
 
-                # For each bucket, output the places in that bucket
-                index.resetBucketIterator()
-                output = []
-                dup_index = 0
-                while index.nextBucket():
-                    if index.bucketRecordCount != 0:
-                        bucket_letter = index.bucketLabel
-                        bucket_link = bucket_letter
-                        if bucket_letter in output:
-                            bucket_link = "%s (%i)" % (bucket_letter, dup_index)
-                            dup_index += 1
-                        output.append(bucket_letter)
-                        # Assemble all the places in this bucket into a dict for
-                        # sorting
-                        place_dict = dict()
-                        while index.nextRecord():
-                            place_name = index.recordName
-                            value = index.recordData
-                            place_dict[place_name] = value
-
-                        handle_list = sort_places(self.r_db, place_dict, self.rlocale)
-                        first_place = True
-                        for pname, place_handle in handle_list:
-                            if not pname:
-                                continue
-                            val = self.report.obj_dict[PlaceName][pname]
-                            nbelem = len(val)
-                            if val and nbelem > 3:
-                                if isinstance(place_handle, tuple):
-                                    place = self.r_db.get_place_from_handle(
-                                        place_handle[0]
-                                    )
-                                else:
-                                    place = self.r_db.get_place_from_handle(
-                                        place_handle
-                                    )
-                                main_location = get_main_location(self.r_db, place)
-                                sname = main_location.get(PlaceType.STATE, "")
-                                cname = main_location.get(PlaceType.COUNTRY, "")
-                            elif nbelem == 3:
-                                cname = val[3]
-                                sname = val[2]
-                            else:
-                                val = [""]
-                                cname = ""
-                                sname = ""
-                            (ldatec, first_place) = self.__output_place(
-                                ldatec,
-                                trow,
-                                first_place,
-                                pname,
-                                sname,
-                                cname,
-                                val[0],
-                                bucket_letter,
-                                bucket_link,
-                            )
+                # the rows are built while the page is written
+                tbody += Html.defer(self.__place_rows(index))
 
         # add clearline for proper styling
-        # add footer section
-        footer = self.write_footer(ldatec)
-        outerwrapper += (FULLCLEAR, footer)
+        # add footer section, after the rows
+        outerwrapper += (FULLCLEAR, Html.defer(self.write_deferred_footer()))
 
         # send page out for processing
         # and close the file
-        self.xhtml_writer(placelistpage, output_file, sio, ldatec)
+        self.xhtml_writer(placelistpage, output_file, sio, lambda: self.last_change)
 
     def placepage(self, report, the_lang, the_title, place_handle, place_name):
         """
@@ -463,7 +469,7 @@ class PlacePages(BasePage):
                 head += Html("script", src=url, type="text/javascript", inline=True)
                 thumbnail = self.disp_first_img_as_thumbnail(media_list, place)
                 if thumbnail is not None:
-                    if media_list[0].ref in self.report.obj_dict[Media]:
+                    if self.report.get_obj_entry(Media, media_list[0].ref):
                         placedetail += thumbnail
 
             # add section title
@@ -632,7 +638,7 @@ class PlacePages(BasePage):
                                     uplink=uplnk,
                                     usedescr=False,
                                 )
-                                if photo_hdle in self.report.obj_dict[Media]:
+                                if self.report.get_obj_entry(Media, photo_hdle):
                                     tracelife += str(imglnk)
                                 break  # We show only the first image
                     with Html("script", type="text/javascript", indent=False) as jsc:
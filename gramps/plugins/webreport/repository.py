@@ -121,13 +121,16 @@ class RepositoryPages(BasePage):
             # RepositoryListPage Class
             self.repositorylistpage(self.report, the_lang, the_title, repos_dict, keys)
 
-            idx = 1
-            for dummy_index, key in enumerate(keys):
-                (repo, handle) = repos_dict[key]
-                step()
-                idx += 1
+            def write_page(handle):
+                """
+                Write the page of a repository.
+                """
+                repo = self.r_db.get_repository_from_handle(handle)
                 self.repositorypage(self.report, the_lang, the_title, repo, handle)
 
+            pages = {handle: () for dummy_repo, handle in repos_dict.values()}
+            self.report.write_pages(Repository, pages, write_page, step)
+
     def repositorylistpage(self, report, the_lang, the_title, repos_dict, keys):
         """
         Create Index for repositories
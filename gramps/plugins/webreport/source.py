@@ -42,6 +42,7 @@ Classe:
 # python modules
 # ------------------------------------------------
 from collections import defaultdict
+from functools import partial
 from decimal import getcontext
 import logging
 
@@ -113,11 +114,9 @@ class SourcePages(BasePage):
                 self.report, the_lang, the_title, self.report.obj_dict[Source].keys()
             )
 
-            index = 1
-            for source_handle in self.report.obj_dict[Source]:
-                step()
-                index += 1
-                self.sourcepage(self.report, the_lang, the_title, source_handle)
+            pages = dict.fromkeys(self.report.obj_dict[Source], ())
+            write_page = partial(self.sourcepage, self.report, the_lang, the_title)
+            self.report.write_pages(Source, pages, write_page, step)
 
     def sourcelistpage(self, report, the_lang, the_title, source_handles):
         """
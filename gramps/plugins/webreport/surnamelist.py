@@ -220,13 +220,19 @@ class SurnameListPage(BasePage):
                             index = AlphabeticIndex(self.rlocale)
                             for surname, handle_list in ppl_handles:
                                 index.addRecord(surname, handle_list)
-                            # Output the AlphabeticIndex for that count
-                            self.output_surname_records(index, tbody, name_format)
+                            # Output the AlphabeticIndex for that count,
+                            # while the page is written
+                            tbody += Html.defer(
+                                self.output_surname_records(index, name_format)
+                            )
 
                     else:  # order_by == self.ORDER_BY_NAME
                         # The AlphabeticIndex has already been constructed
-                        # Output the AlphabeticIndex
-                        self.output_surname_records(index, tbody, name_format)
+                        # Output the AlphabeticIndex, while the page is
+                        # written
+                        tbody += Html.defer(
+                            self.output_surname_records(index, name_format)
+                        )
 
         # create footer section
         # add clearline for proper styling
@@ -267,14 +273,13 @@ class SurnameListPage(BasePage):
         # return hyperlink to its caller
         return hyper
 
-    def output_surname_records(self, index, tbody, name_format):
+    def output_surname_records(self, index, name_format):
         """
-        Output all the surnames in the index.
+        Generate the table rows of all the surnames in the index.
 
         @param: index   -- An ICU AlphabeticIndex where the names are surnames
                            and the data is a list of people handles with that
                            surname
-        @param: tbody   -- The HTML body to which the lines are added
         @param: name_format -- The name format from the report options
         """
         index.resetBucketIterator()
@@ -283,7 +288,6 @@ class SurnameListPage(BasePage):
         while index.nextBucket():
             if index.bucketRecordCount != 0:
                 trow = Html("tr")
-                tbody += trow
 
                 tcell = Html("td", class_="ColumnLetter", inline=True)
                 trow += tcell
@@ -316,7 +320,6 @@ class SurnameListPage(BasePage):
                     surname = index.recordName
                     if not first:
                         trow = Html("tr")
-                        tbody += trow
 
                         tcell = Html("td", class_="ColumnLetter", inline=True)
                         trow += tcell
@@ -346,3 +349,4 @@ class SurnameListPage(BasePage):
                         class_="ColumnQuantity",
                         inline=True,
                     )
+                    yield trow
@@ -0,0 +1,130 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unittest of the archive file of the Narrated Web Site
+"""
+
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from gramps.plugins.webreport.archive import (
+    ARCHIVE_FORMATS,
+    WebArchive,
+    set_archive_extension,
+)
+
+MTIME = 1700000000
+
+
+class WebArchiveTest(unittest.TestCase):
+    """
+    Write the same files to an archive of each format.
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.image = os.path.join(self.tmpdir.name, "image.jpg")
+        with open(self.image, "wb") as image:
+            image.write(b"\xff\xd8 not really a jpeg")
+
+    def read_archive(self, filename, archive_format):
+        """
+        Return the list of the names, and a dict of the contents, of the
+        files in the archive.
+        """
+        if archive_format == ".zip":
+            with zipfile.ZipFile(filename) as archive:
+                names = archive.namelist()
+                return names, {name: archive.read(name) for name in names}
+        with tarfile.open(filename) as archive:
+            names = archive.getnames()
+            return names, {name: archive.extractfile(name).read() for name in names}
+
+    def write_archive(self, archive_format):
+        """
+        Write an archive of the format, adding each file twice.
+        """
+        filename = os.path.join(self.tmpdir.name, "site" + archive_format)
+        archive = WebArchive(filename, archive_format)
+        archive.add_data("index.html", b"<html>home</html>", MTIME)
+        self.assertIn("index.html", archive)
+        self.assertNotIn("images/image.jpg", archive)
+        archive.add_file("images/image.jpg", self.image, MTIME)
+        self.assertIn("images/image.jpg", archive)
+        # duplicates are ignored, the first file is kept
+        archive.add_data("index.html", b"<html>again</html>", MTIME)
+        archive.add_file("index.html", self.image, MTIME)
+        archive.add_file("images/image.jpg", self.image, MTIME)
+        archive.close()
+        return filename
+
+    def test_formats(self):
+        for archive_format, dummy_descr in ARCHIVE_FORMATS:
+            with self.subTest(archive_format=archive_format):
+                filename = self.write_archive(archive_format)
+                names, contents = self.read_archive(filename, archive_format)
+                self.assertEqual(names, ["index.html", "images/image.jpg"])
+                self.assertEqual(contents["index.html"], b"<html>home</html>")
+                with open(self.image, "rb") as image:
+                    self.assertEqual(contents["images/image.jpg"], image.read())
+
+    def test_compression(self):
+        filename = self.write_archive(".tar.gz")
+        with open(filename, "rb") as archive:
+            # the gzip magic number
+            self.assertEqual(archive.read(2), b"\x1f\x8b")
+        filename = self.write_archive(".tar")
+        self.assertTrue(tarfile.is_tarfile(filename))
+        self.assertFalse(zipfile.is_zipfile(filename))
+
+    def test_mtime(self):
+        filename = self.write_archive(".tar")
+        with tarfile.open(filename) as archive:
+            for member in archive.getmembers():
+                self.assertEqual(member.mtime, MTIME)
+        filename = self.write_archive(".zip")
+        with zipfile.ZipFile(filename) as archive:
+            for info in archive.infolist():
+                self.assertGreaterEqual(info.date_time, (2023, 11, 14))
+
+    def test_set_archive_extension(self):
+        self.assertEqual(
+            set_archive_extension("/tmp/X_NAVWEB.tar.gz", ".zip"), "/tmp/X_NAVWEB.zip"
+        )
+        self.assertEqual(
+            set_archive_extension("/tmp/X_NAVWEB.tar.gz", ".tar"), "/tmp/X_NAVWEB.tar"
+        )
+        self.assertEqual(
+            set_archive_extension("/tmp/X_NAVWEB.tar", ".tar.gz"),
+            "/tmp/X_NAVWEB.tar.gz",
+        )
+        self.assertEqual(
+            set_archive_extension("/tmp/X_NAVWEB.zip", ".zip"), "/tmp/X_NAVWEB.zip"
+        )
+        self.assertEqual(
+            set_archive_extension("/tmp/X_NAVWEB", ".tar.gz"), "/tmp/X_NAVWEB.tar.gz"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
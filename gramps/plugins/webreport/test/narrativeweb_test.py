@@ -0,0 +1,321 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unittest of the pages of the Narrated Web Site written by worker processes,
+and of the pages kept by the incremental mode
+"""
+
+import multiprocessing
+import os
+import tarfile
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from gramps.cli.plug import run_report
+from gramps.cli.user import User
+from gramps.gen.config import config
+from gramps.gen.const import DATA_DIR
+from gramps.gen.db import DbTxn
+from gramps.gen.db.utils import import_from_filename, make_database
+from gramps.gen.filters import reload_custom_filters
+from gramps.gen.plug import BasePluginManager
+from gramps.gen.utils import thumbnails
+from gramps.gen.utils.file import expand_path
+from gramps.plugins.webreport.manifest import MANIFEST
+
+TEST_DIR = os.path.abspath(os.path.join(DATA_DIR, "tests"))
+EXAMPLE = os.path.join(TEST_DIR, "data.gramps")
+
+
+def make_test_database(dirname):
+    """
+    Return a database file in the directory, with the example imported.
+    """
+    # worker processes need a database file, the report options a name
+    with open(os.path.join(dirname, "name.txt"), "w", encoding="utf8") as name_file:
+        name_file.write("navweb_test")
+    db = make_database("sqlite")
+    db.load(dirname)
+    import_from_filename(db, EXAMPLE, User())
+    # the report options list the custom filters
+    reload_custom_filters()
+    return db
+
+
+def read_site(target):
+    """
+    Return the contents of the files of the site, by their paths.
+    """
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(target):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            with open(path, "rb") as page:
+                files[os.path.relpath(path, target)] = page.read()
+    return files
+
+
+@unittest.skipUnless(
+    "fork" in multiprocessing.get_all_start_methods(), "needs forked workers"
+)
+class WorkersTest(unittest.TestCase):
+    """
+    Compare the site written by worker processes with the site written by
+    this process.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.db = make_test_database(cls.tmpdir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close(update=False)
+        cls.tmpdir.cleanup()
+
+    def setUp(self):
+        workers = config.get("database.workers")
+        self.addCleanup(config.set, "database.workers", workers)
+        # several chunks of each class of pages, in the module of the
+        # plugin, which make_database registered
+        pmgr = BasePluginManager.get_instance()
+        module = pmgr.load_plugin(pmgr.get_plugin("navwebpage"))
+        patcher = patch.object(module, "_PAGE_CHUNK_SIZE", 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_report(self, workers, name, **options):
+        """
+        Write the site with the number of worker processes, and return its
+        path.
+        """
+        config.set("database.workers", workers)
+        target = os.path.join(self.tmpdir.name, name)
+        clr = run_report(self.db, "navwebpage", target=target, **options)
+        self.assertIsNotNone(clr)
+        return target
+
+    def run_workers(self, name, **options):
+        """
+        Write the site with worker processes, and return its path.
+        """
+        with patch.object(
+            self.db, "_get_executor", wraps=self.db._get_executor
+        ) as executor:
+            target = self.run_report(4, name, **options)
+        self.assertTrue(executor.called)
+        return target
+
+    def read_archive(self, filename):
+        """
+        Return the names of the files in the archive, and their contents.
+        """
+        with tarfile.open(filename) as archive:
+            names = archive.getnames()
+            return names, {name: archive.extractfile(name).read() for name in names}
+
+    def test_pages(self):
+        expected = read_site(self.run_report(1, "site1"))
+        self.assertTrue(any(name.startswith("ppl") for name in expected))
+        files = read_site(self.run_workers("site4"))
+        self.assertEqual(sorted(files), sorted(expected))
+        for name, data in expected.items():
+            with self.subTest(name=name):
+                self.assertEqual(files[name], data)
+
+    def test_archive(self):
+        options = {"archive": "True", "archive_format": ".tar"}
+        names, expected = self.read_archive(self.run_report(1, "site1.tar", **options))
+        self.assertTrue(any(name.startswith("ppl") for name in names))
+        self.assertEqual(len(names), len(set(names)))
+        names4, files = self.read_archive(self.run_workers("site4.tar", **options))
+        self.assertEqual(names4, names)
+        for name, data in expected.items():
+            with self.subTest(name=name):
+                self.assertEqual(files[name], data)
+
+    def test_gui_process(self):
+        expected = read_site(self.run_report(1, "gui1"))
+        # the process of the GUI writes the pages itself
+        module = type(self.db).__module__
+        with patch(module + "._in_gui_process", return_value=True), patch.object(
+            self.db, "_get_executor", side_effect=AssertionError
+        ):
+            files = read_site(self.run_report(4, "gui4"))
+        self.assertEqual(files, expected)
+
+    def test_thumbnails(self):
+        created = []
+
+        def run_thumbnailer(mime_type, src_file, dest_file, size, rectangle=None):
+            created.append((threading.current_thread().name, rectangle))
+            os.makedirs(os.path.dirname(dest_file), exist_ok=True)
+            with open(dest_file, "w", encoding="utf8") as dest:
+                dest.write("thumbnail")
+            return True
+
+        thumb_dir = os.path.join(self.tmpdir.name, "thumbs")
+        index = thumbnails.ThumbnailIndex(os.path.join(thumb_dir, "index.json"))
+        # the media path may be relative to the current directory
+        mediapath = os.path.abspath(expand_path(self.db.get_mediapath()))
+        with patch.object(thumbnails, "THUMB_NORMAL", thumb_dir), patch.object(
+            thumbnails, "THUMBNAIL_INDEX", index
+        ), patch.object(thumbnails, "run_thumbnailer", run_thumbnailer), patch.object(
+            self.db, "get_mediapath", return_value=mediapath
+        ):
+            target = self.run_report(1, "thumbs")
+        # the thumbnails are created by the thumbnail service, whose
+        # threads are stopped before the pages are written
+        self.assertTrue(created)
+        for name, dummy in created:
+            self.assertTrue(name.startswith("thumbnail"), name)
+        self.assertFalse(
+            any(thread.name.startswith("thumbnail") for thread in threading.enumerate())
+        )
+        thumbs = [name for name in read_site(target) if name.startswith("thumb")]
+        self.assertEqual(len(thumbs), len(created))
+
+
+class IncrementalTest(unittest.TestCase):
+    """
+    Compare the site updated in incremental mode with the site written
+    again, after changing the database.
+    """
+
+    # the default paths of the downloads are the last directory used,
+    # which would change the options between the runs
+    OPTIONS = {"down_fname1": "", "down_fname2": "", "down_fname3": ""}
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+        self.db = make_test_database(self.tmpdir)
+        self.addCleanup(self.db.close, update=False)
+        self.site = self.run_report("site", incremental="True")
+        self.names = set(read_site(self.site))
+
+    def run_report(self, name, **options):
+        """
+        Write the site, and return its path.
+        """
+        target = os.path.join(self.tmpdir, name)
+        clr = run_report(
+            self.db, "navwebpage", target=target, **self.OPTIONS, **options
+        )
+        self.assertIsNotNone(clr)
+        return target
+
+    def update_site(self):
+        """
+        Update the site, check that it is the same as the site written again,
+        and return the paths of the files written by the update.
+        """
+        # the files written get the time of their object, or the current time
+        for name in self.names:
+            os.utime(os.path.join(self.site, name), (0, 0))
+        self.run_report("site", incremental="True")
+        files = read_site(self.site)
+        del files[MANIFEST]
+        expected = read_site(self.run_report("full"))
+        self.assertEqual(sorted(files), sorted(expected))
+        for name, data in expected.items():
+            with self.subTest(name=name):
+                self.assertEqual(files[name], data)
+        return {
+            name
+            for name in files
+            if os.stat(os.path.join(self.site, name)).st_mtime != 0
+        }
+
+    def rename_person(self, gramps_id, first_name):
+        """
+        Change the first name of the person with the Gramps ID.
+        """
+        with DbTxn("Rename person", self.db) as trans:
+            person = self.db.get_person_from_gramps_id(gramps_id)
+            person.get_primary_name().set_first_name(first_name)
+            self.db.commit_person(person, trans)
+
+    def get_place_page(self, gramps_id):
+        """
+        Return the path of the page of the place with the Gramps ID.
+        """
+        handle = self.db.get_place_from_gramps_id(gramps_id).handle
+        name = "plc/%s/%s/%s.html" % (handle[-1].lower(), handle[-2].lower(), handle)
+        self.assertIn(name, self.names)
+        return name
+
+    def test_kept(self):
+        written = self.update_site()
+        pages = [name for name in self.names if name.startswith(("ppl", "src"))]
+        self.assertTrue(pages)
+        self.assertTrue(written.isdisjoint(pages))
+
+    def test_regenerated(self):
+        self.rename_person("I0037", "Edward")
+        written = self.update_site()
+        # the page of the person, and the source of a citation of the name,
+        # which shows the name from the dictionary of the report
+        self.assertIn("ppl/x/w/PSNT6D0DDHJOBCFJWX.html", written)
+        self.assertIn("src/r/u/4TNT6DX8JM3BW08CUR.html", written)
+        self.assertNotIn("src/8/a/H9OT6DH812QJAQS5A8.html", written)
+        with open(
+            os.path.join(self.site, "src/r/u/4TNT6DX8JM3BW08CUR.html"),
+            encoding="utf-8",
+        ) as page:
+            self.assertIn("Smith, Edward", page.read())
+
+    def test_reparented_place(self):
+        # move Hoya from Sweden to Copenhagen, which does not change but
+        # lists the places it encloses
+        with DbTxn("Move place", self.db) as trans:
+            place = self.db.get_place_from_gramps_id("P0014")
+            copenhagen = self.db.get_place_from_gramps_id("P0013")
+            place.get_placeref_list()[0].ref = copenhagen.handle
+            self.db.commit_place(place, trans)
+        written = self.update_site()
+        self.assertIn(self.get_place_page("P0014"), written)
+        self.assertIn(self.get_place_page("P0011"), written)
+        self.assertIn(self.get_place_page("P0013"), written)
+
+    def test_deleted(self):
+        # the page of the person, the source only the person cites and the
+        # thumbnail of a media only the person refers to
+        removed = [
+            "ppl/x/w/PSNT6D0DDHJOBCFJWX.html",
+            "src/r/u/4TNT6DX8JM3BW08CUR.html",
+            "thumb/9/o/CVNT6DHG5ICZ1UGUO9.png",
+        ]
+        for name in removed:
+            self.assertIn(name, self.names)
+        with DbTxn("Delete person", self.db) as trans:
+            person = self.db.get_person_from_gramps_id("I0037")
+            self.db.delete_person_from_database(person, trans)
+        self.update_site()
+        files = read_site(self.site)
+        for name in removed:
+            self.assertNotIn(name, files)
+
+
+if __name__ == "__main__":
+    unittest.main()
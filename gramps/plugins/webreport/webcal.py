@@ -1707,9 +1707,7 @@ return false;
         """
 
         # writes the file out from the page variable; Html instance
-        # This didn't work for some reason, but it does in NarWeb:
-        # page.write(partial(print, file=of.write))
-        page.write(lambda line: open_file.write(line + "\n"))
+        page.write_to(open_file)
         # close the file now...
         self.close_file(open_file)
 
@@ -0,0 +1,152 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+# test/blob_codec_benchmark.py
+
+"""
+Compare the database blob codecs on the example tree.
+
+For each available codec this reports the time taken to encode and decode
+the serialized data of every object, the time taken to decode and create
+the objects, and the size of a SQLite database holding the data.  Run from
+the root github directory with:
+
+python3 test/blob_codec_benchmark.py [filename.gramps]
+"""
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+from gramps.gen.config import config
+from gramps.gen.db import KEY_TO_CLASS_MAP, KEY_TO_NAME_MAP
+from gramps.gen.db.codec import get_available_codecs, get_codec
+from gramps.gen.db.utils import import_as_dict, make_database
+from gramps.gen.user import User
+import gramps.gen.lib as RelLib
+
+EXAMPLE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "example",
+    "gramps",
+    "example.gramps",
+)
+REPEAT = 5
+
+
+def read_data(filename):
+    """
+    Import the file and return a list of (obj_key, data) pairs.
+    """
+    db = import_as_dict(filename, User())
+    data_list = []
+    for obj_key in KEY_TO_NAME_MAP:
+        for handle, data in db._iter_raw_data(obj_key):
+            data_list.append((obj_key, data))
+    db.close()
+    return data_list
+
+
+def timeit(func):
+    """
+    Return the best time of several runs of func.
+    """
+    best = None
+    for dummy in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def database_size(codec_name, data_list):
+    """
+    Return the size of a SQLite database file holding the data.
+    """
+    dirname = tempfile.mkdtemp()
+    old_codec = config.get("database.blob-codec")
+    config.set("database.blob-codec", codec_name)
+    try:
+        db = make_database("sqlite")
+        db.load(dirname)
+        db._txn_begin()
+        for obj_key, data in data_list:
+            db._commit_raw(data, obj_key)
+        db._txn_commit()
+        db.dbapi.execute("VACUUM")
+        db.close(update=False)
+        return os.path.getsize(os.path.join(dirname, "sqlite.db"))
+    finally:
+        config.set("database.blob-codec", old_codec)
+        shutil.rmtree(dirname)
+
+
+def benchmark(codec_name, data_list):
+    """
+    Return the benchmark results of a codec.
+    """
+    codec = get_codec(codec_name)
+    blobs = [(obj_key, codec.encode(data)) for obj_key, data in data_list]
+
+    def encode():
+        for obj_key, data in data_list:
+            codec.encode(data)
+
+    def decode():
+        for obj_key, blob in blobs:
+            codec.decode(blob)
+
+    def create():
+        for obj_key, blob in blobs:
+            cls = getattr(RelLib, KEY_TO_CLASS_MAP[obj_key])
+            cls.create(codec.decode(blob))
+
+    return (
+        timeit(encode),
+        timeit(decode),
+        timeit(create),
+        sum(len(blob) for obj_key, blob in blobs),
+        database_size(codec_name, data_list),
+    )
+
+
+def main():
+    if len(sys.argv) > 1:
+        filename = sys.argv[1]
+    else:
+        filename = EXAMPLE
+    data_list = read_data(filename)
+    print("%d objects in %s" % (len(data_list), filename))
+    print(
+        "%-10s %10s %10s %10s %12s %12s"
+        % ("codec", "dump (s)", "load (s)", "create (s)", "blobs (kB)", "file (kB)")
+    )
+    for codec_name in get_available_codecs():
+        dump, load, create, blob_size, file_size = benchmark(codec_name, data_list)
+        print(
+            "%-10s %10.3f %10.3f %10.3f %12d %12d"
+            % (codec_name, dump, load, create, blob_size // 1024, file_size // 1024)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+# test/gedcom_import_benchmark.py
+
+"""
+Measure the speed of the GEDCOM import on a synthetic file.
+
+A file is generated with the given number of families, each with two
+parents and three children, events, a source citation and a note spread
+over CONT and CONC lines.  The default of 40000 families gives a file of
+about three million lines.  This reports the lines per second of the
+tokenizer, and of the lexer, which also builds the GedLine objects.  With
+--import the file is also imported into an in-memory database.  Run from
+the root github directory with:
+
+python3 test/gedcom_import_benchmark.py [families] [--import]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from gramps.gen.db.utils import import_as_dict
+from gramps.gen.user import User
+from gramps.plugins.lib.libgedcom import Lexer, UTF8Reader, tokenize
+
+FAMILIES = 40000
+HEADER = """0 HEAD
+1 SOUR Gramps
+1 GEDC
+2 VERS 5.5.1
+2 FORM LINEAGE-LINKED
+1 CHAR UTF-8
+0 @S1@ SOUR
+1 TITL Synthetic records
+"""
+PERSON = """0 @I%(id)d@ INDI
+1 NAME %(given)s /Surname%(surname)d/
+2 GIVN %(given)s
+2 SURN Surname%(surname)d
+1 SEX %(sex)s
+1 BIRT
+2 DATE %(day)d JAN %(year)d
+2 PLAC Town%(town)d, County, Country
+2 SOUR @S1@
+3 PAGE Page %(id)d
+1 DEAT
+2 DATE ABT %(death)d
+1 %(link)s @F%(family)d@
+1 NOTE A note about person %(id)d that is long enough to be
+2 CONC  wrapped onto a second line,
+2 CONT and that continues on a third line.
+"""
+FAMILY = """0 @F%(id)d@ FAM
+1 HUSB @I%(husband)d@
+1 WIFE @I%(wife)d@
+1 CHIL @I%(child)d@
+1 CHIL @I%(child1)d@
+1 CHIL @I%(child2)d@
+1 MARR
+2 DATE %(year)d
+2 PLAC Town%(town)d, County, Country
+"""
+
+
+def write_gedcom(ofile, families):
+    """
+    Write a synthetic GEDCOM file, and return the number of lines.
+    """
+    lines = HEADER.count("\n")
+    ofile.write(HEADER)
+    for family in range(families):
+        first = family * 5
+        year = 1700 + family % 250
+        values = {
+            "family": family,
+            "surname": family % 1000,
+            "town": family % 5000,
+        }
+        for offset in range(5):
+            values.update(
+                {
+                    "id": first + offset,
+                    "given": "Given%d" % offset,
+                    "sex": "F" if offset == 1 else "M",
+                    "day": 1 + offset,
+                    "year": year + (25 if offset > 1 else 0),
+                    "death": year + 70,
+                    "link": "FAMC" if offset > 1 else "FAMS",
+                }
+            )
+            ofile.write(PERSON % values)
+            lines += PERSON.count("\n")
+        ofile.write(
+            FAMILY
+            % {
+                "id": family,
+                "husband": first,
+                "wife": first + 1,
+                "child": first + 2,
+                "child1": first + 3,
+                "child2": first + 4,
+                "year": year + 20,
+                "town": family % 5000,
+            }
+        )
+        lines += FAMILY.count("\n")
+    ofile.write("0 TRLR\n")
+    return lines + 1
+
+
+def run_tokenizer(filename, messages):
+    """
+    Read all of the records with the tokenizer.
+    """
+    with open(filename, "rb") as ifile:
+        reader = UTF8Reader(ifile, messages.append, "UTF-8")
+        for record in tokenize(reader, messages.append):
+            pass
+
+
+def run_lexer(filename, messages):
+    """
+    Read all of the lines with the lexer.
+    """
+    with open(filename, "rb") as ifile:
+        lexer = Lexer(UTF8Reader(ifile, messages.append, "UTF-8"), messages.append)
+        while lexer.readline():
+            pass
+        lexer.clean_up()
+
+
+def run_import(filename, messages):
+    """
+    Import the file into an in-memory database.
+    """
+    db = import_as_dict(filename, User())
+    db.close()
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    families = int(args[0]) if args else FAMILIES
+    runs = [("tokenizer", run_tokenizer), ("lexer", run_lexer)]
+    if "--import" in sys.argv:
+        runs.append(("import", run_import))
+
+    fd, filename = tempfile.mkstemp(suffix=".ged")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as ofile:
+            lines = write_gedcom(ofile, families)
+        print(
+            "%d lines, %d kB in %s"
+            % (lines, os.path.getsize(filename) // 1024, filename)
+        )
+        print("%-10s %10s %12s" % ("stage", "time (s)", "lines/sec"))
+        for name, func in runs:
+            messages = []
+            start = time.perf_counter()
+            func(filename, messages)
+            elapsed = time.perf_counter() - start
+            print("%-10s %10.3f %12d" % (name, elapsed, lines / elapsed))
+            for message in messages[:10]:
+                print(message)
+    finally:
+        os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()